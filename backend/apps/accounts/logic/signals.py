@@ -49,6 +49,35 @@ def update_user_full_name(sender, instance, **kwargs):
             pass  # Пользователь не найден, пропускаем
 
 
+@receiver(pre_save, sender=User)
+def invalidate_huntflow_accounts_cache(sender, instance, **kwargs):
+    """
+    Сброс кэша организаций Huntflow при смене активной системы или учетных данных
+    """
+    if not instance.pk:
+        return
+    
+    tracked_fields = (
+        'active_system',
+        'huntflow_access_token',
+        'huntflow_prod_url',
+        'huntflow_prod_api_key',
+        'huntflow_sandbox_url',
+        'huntflow_sandbox_api_key',
+    )
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not set(update_fields) & set(tracked_fields):
+        return
+    
+    old_values = User.objects.filter(pk=instance.pk).values(*tracked_fields).first()
+    if old_values is None:
+        return
+    
+    if any(old_values[field] != getattr(instance, field) for field in tracked_fields):
+        from apps.huntflow.accounts_cache import HuntflowAccountsCache
+        HuntflowAccountsCache.invalidate(instance.pk)
+
+
 @receiver(post_save, sender=User)
 def log_user_activity(sender, instance, created, **kwargs):
     """
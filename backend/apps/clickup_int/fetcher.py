@@ -0,0 +1,246 @@
+"""
+Параллельная постраничная загрузка ClickUp с учетом лимитов API
+
+ClickUp ограничивает число запросов на токен и возвращает остаток в заголовках
+X-RateLimit-Limit / X-RateLimit-Remaining / X-RateLimit-Reset (unix время сброса).
+ClickUpRateLimitState хранит эти значения на процесс для каждого токена:
+перед отправкой запрос ждет сброса окна, если остаток исчерпан, а после 429 -
+Retry-After или X-RateLimit-Reset.
+
+ClickUpPageFetcher держит в работе несколько страниц /list/{id}/task одновременно
+(до max_concurrency), пока не встретится последняя страница (last_page или пустая
+страница). Число страниц в работе растет на одну после каждого ответа без 429
+и уменьшается вдвое после 429; при малом остатке лимита запросы идут по одному.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_CLICKUP_FETCH_SETTINGS = {
+    'max_concurrency': 4,       # Максимум страниц в работе одновременно
+    'max_pages': 100,           # Ограничение числа страниц списка
+    'max_retries': 5,           # Повторы запроса после 429
+    'retry_after_default': 5,   # Пауза после 429 без заголовков (сек), растет экспоненциально
+    'max_backoff': 60,          # Максимальная пауза после 429 (сек)
+    'reserve_requests': 2,      # Остаток лимита, при котором ждем сброса окна
+}
+
+
+def get_clickup_fetch_settings() -> Dict[str, Any]:
+    config = dict(DEFAULT_CLICKUP_FETCH_SETTINGS)
+    config.update(getattr(settings, 'CLICKUP_FETCH_SETTINGS', {}) or {})
+    return config
+
+
+def _header_number(headers: Mapping[str, str], name: str) -> Optional[float]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_after_seconds(headers: Mapping[str, str], now: float) -> Optional[float]:
+    """Retry-After в секундах (число или HTTP дата)"""
+    value = headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - now, 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class ClickUpRateLimitState:
+    """Остаток лимита ClickUp API для одного токена (общий для потоков процесса)"""
+
+    _states: Dict[str, 'ClickUpRateLimitState'] = {}
+    _states_lock = threading.Lock()
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = config or get_clickup_fetch_settings()
+        self._lock = threading.Lock()
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None
+        self.blocked_until = 0.0
+        self.throttled = 0  # Сколько раз получен 429
+
+    @classmethod
+    def for_token(cls, api_token: str) -> 'ClickUpRateLimitState':
+        key = hashlib.sha256((api_token or '').encode('utf-8')).hexdigest()[:16]
+        state = cls._states.get(key)
+        if state is None:
+            with cls._states_lock:
+                state = cls._states.setdefault(key, cls())
+        return state
+
+    def acquire(self) -> float:
+        """
+        Резервирует запрос; возвращает, сколько секунд подождать перед ним
+
+        Пока окно не сброшено, остаток уменьшается локально, чтобы параллельные
+        запросы не израсходовали его сверх лимита.
+        """
+        with self._lock:
+            now = time.time()
+            if self.blocked_until > now:
+                return self.blocked_until - now
+            if self.reset_at is not None and self.reset_at <= now:
+                # Окно сброшено, остаток узнаем из следующего ответа
+                self.remaining = None
+                self.reset_at = None
+            if self.remaining is not None and self.remaining <= self.config['reserve_requests']:
+                return max((self.reset_at or now) - now, 0.0)
+            if self.remaining is not None:
+                self.remaining -= 1
+            return 0.0
+
+    def update(self, headers: Mapping[str, str]):
+        """Обновляет остаток по заголовкам X-RateLimit-* ответа"""
+        remaining = _header_number(headers, 'X-RateLimit-Remaining')
+        if remaining is None:
+            return
+        limit = _header_number(headers, 'X-RateLimit-Limit')
+        reset_at = _header_number(headers, 'X-RateLimit-Reset')
+        with self._lock:
+            if reset_at is not None and self.reset_at is not None and reset_at < self.reset_at:
+                return  # Ответ из предыдущего окна
+            if reset_at is not None and reset_at == self.reset_at and self.remaining is not None:
+                # Ответы одного окна приходят не по порядку - берем минимальный остаток
+                remaining = min(remaining, self.remaining)
+            self.remaining = int(remaining)
+            self.limit = int(limit) if limit is not None else self.limit
+            self.reset_at = reset_at if reset_at is not None else self.reset_at
+
+    def throttle(self, headers: Mapping[str, str], attempt: int) -> float:
+        """Учитывает 429 и возвращает паузу перед повтором"""
+        now = time.time()
+        delay = _retry_after_seconds(headers, now)
+        if delay is None:
+            reset_at = _header_number(headers, 'X-RateLimit-Reset')
+            if reset_at is not None and reset_at > now:
+                delay = reset_at - now
+        if delay is None:
+            delay = self.config['retry_after_default'] * (2 ** attempt)
+        delay = min(delay, self.config['max_backoff'])
+        with self._lock:
+            self.throttled += 1
+            # Паузу задает blocked_until, остаток обновит следующий ответ
+            self.remaining = None
+            self.blocked_until = max(self.blocked_until, now + delay)
+        return delay
+
+    def has_headroom(self, requests: int) -> bool:
+        """Хватит ли остатка окна на requests запросов (если остаток неизвестен - да)"""
+        with self._lock:
+            if self.remaining is None:
+                return True
+            return self.remaining - self.config['reserve_requests'] >= requests
+
+
+_fetch_executor = None
+_fetch_executor_lock = threading.Lock()
+
+
+def _get_fetch_executor() -> ThreadPoolExecutor:
+    """Общий ограниченный пул потоков для загрузки страниц ClickUp"""
+    global _fetch_executor
+    if _fetch_executor is None:
+        with _fetch_executor_lock:
+            if _fetch_executor is None:
+                _fetch_executor = ThreadPoolExecutor(
+                    max_workers=get_clickup_fetch_settings()['max_concurrency'] * 2,
+                    thread_name_prefix='clickup-fetch',
+                )
+    return _fetch_executor
+
+
+class ClickUpPageFetcher:
+    """
+    Загрузка страниц списка с несколькими запросами в работе одновременно
+
+    Пример:
+        pages = ClickUpPageFetcher(rate_state).fetch(lambda page: service.get_tasks_page(list_id, page))
+    """
+
+    def __init__(self, rate_state: ClickUpRateLimitState, config: Optional[Dict[str, Any]] = None):
+        self.rate_state = rate_state
+        self.config = config or get_clickup_fetch_settings()
+        self.requests_made = 0
+
+    def fetch(self, load_page: Callable[[int], Dict[str, Any]], max_pages: Optional[int] = None,
+              items_key: str = 'tasks') -> List[List[Dict[str, Any]]]:
+        """
+        Загружает страницы 0..последняя
+
+        Args:
+            load_page: page -> ответ API (словарь с items_key и, возможно, last_page)
+            max_pages: ограничение числа страниц (по умолчанию CLICKUP_FETCH_SETTINGS)
+            items_key: ключ списка элементов в ответе
+
+        Returns:
+            Элементы каждой страницы в порядке страниц. Ошибка любой страницы
+            (ClickUpAPIError) пробрасывается.
+        """
+        max_pages = max_pages or self.config['max_pages']
+        max_concurrency = max(1, self.config['max_concurrency'])
+        executor = _get_fetch_executor()
+
+        pages: Dict[int, List[Dict[str, Any]]] = {}
+        in_flight = {}
+        next_page = 0
+        last_page: Optional[int] = None
+        # Первая страница - одна: по ней узнаем остаток лимита и не один ли это лист
+        concurrency = 1
+        throttled = self.rate_state.throttled
+
+        try:
+            while True:
+                while (len(in_flight) < concurrency and next_page < max_pages
+                       and (last_page is None or next_page <= last_page)
+                       and (not in_flight or self.rate_state.has_headroom(len(in_flight) + 1))):
+                    in_flight[executor.submit(load_page, next_page)] = next_page
+                    next_page += 1
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page = in_flight.pop(future)
+                    response = future.result()
+                    self.requests_made += 1
+                    items = (response or {}).get(items_key) or []
+                    if not items or (response or {}).get('last_page'):
+                        last_page = page if last_page is None else min(last_page, page)
+                    pages[page] = items
+
+                if self.rate_state.throttled != throttled:
+                    throttled = self.rate_state.throttled
+                    concurrency = max(1, concurrency // 2)
+                else:
+                    concurrency = min(max_concurrency, concurrency + 1)
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+        end = last_page if last_page is not None else max_pages - 1
+        if last_page is None and next_page >= max_pages:
+            logger.warning(f"ClickUp: достигнут лимит страниц ({max_pages}), останавливаемся")
+        return [pages[page] for page in range(end + 1) if page in pages]
@@ -1,10 +1,13 @@
 import requests
 import json
+import time
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Tuple, Any
 from django.conf import settings
 from django.utils import timezone as django_timezone
 import logging
+from logic.base.http_pool import http_pool
+from .fetcher import ClickUpPageFetcher, ClickUpRateLimitState, get_clickup_fetch_settings
 
 logger = logging.getLogger(__name__)
 
@@ -25,24 +28,49 @@ class ClickUpService:
             'Authorization': api_token,
             'Content-Type': 'application/json'
         }
+        self.fetch_settings = get_clickup_fetch_settings()
+        self.rate_state = ClickUpRateLimitState.for_token(api_token)
     
     def _make_request(self, method: str, endpoint: str, params: Dict = None, data: Dict = None) -> Dict:
-        """Выполняет запрос к ClickUp API"""
+        """
+        Выполняет запрос к ClickUp API
+
+        Запросы идут через общий keep-alive пул (logic.base.http_pool). Остаток
+        лимита из X-RateLimit-* учитывается до отправки, после 429 запрос
+        повторяется после Retry-After / X-RateLimit-Reset (до max_retries раз).
+        """
         url = f"{self.BASE_URL}/{endpoint.lstrip('/')}"
+        max_retries = self.fetch_settings['max_retries']
         
         try:
-            logger.info(f"ClickUp API запрос: {method} {url}")
-            
-            response = requests.request(
-                method=method,
-                url=url,
-                headers=self.headers,
-                params=params,
-                json=data,
-                timeout=30
-            )
-            
-            logger.info(f"ClickUp API ответ: {response.status_code}")
+            for attempt in range(max_retries + 1):
+                delay = self.rate_state.acquire()
+                if delay > 0:
+                    logger.info(f"ClickUp API: ждем сброса лимита {delay:.1f} с")
+                    time.sleep(delay)
+                
+                logger.info(f"ClickUp API запрос: {method} {url}")
+                
+                response = http_pool.request(
+                    method,
+                    url,
+                    headers=self.headers,
+                    params=params,
+                    json=data,
+                    timeout=30
+                )
+                self.rate_state.update(response.headers)
+                
+                logger.info(f"ClickUp API ответ: {response.status_code}")
+                
+                if response.status_code != 429:
+                    break
+                if attempt >= max_retries:
+                    raise ClickUpAPIError("Превышен лимит запросов")
+                
+                delay = self.rate_state.throttle(response.headers, attempt)
+                logger.warning(f"ClickUp API: превышен лимит запросов, повтор через {delay:.1f} с")
+                time.sleep(delay)
             
             if response.status_code == 200:
                 return response.json()
@@ -52,8 +80,6 @@ class ClickUpService:
                 raise ClickUpAPIError("Недостаточно прав доступа")
             elif response.status_code == 404:
                 raise ClickUpAPIError("Ресурс не найден")
-            elif response.status_code == 429:
-                raise ClickUpAPIError("Превышен лимит запросов")
             else:
                 error_msg = f"Ошибка API: {response.status_code}"
                 try:
@@ -127,6 +153,18 @@ class ClickUpService:
         Returns:
             Список задач
         """
+        response = self.get_tasks_page(list_id, page, include_closed=include_closed)
+        return self.filter_huntflow_tagged(response.get('tasks', []), exclude_huntflow_tagged)
+    
+    def get_tasks_page(self, list_id: str, page: int, include_closed: bool = False) -> Dict:
+        """
+        Одна страница задач списка как есть (tasks и признак last_page)
+        
+        Args:
+            list_id: ID списка задач
+            page: Номер страницы
+            include_closed: Включать ли закрытые задачи
+        """
         params = {
             'include_closed': include_closed,
             'page': page,
@@ -135,9 +173,37 @@ class ClickUpService:
             'subtasks': True
         }
         
-        response = self._make_request('GET', f'/list/{list_id}/task', params=params)
-        tasks = response.get('tasks', [])
+        return self._make_request('GET', f'/list/{list_id}/task', params=params)
+    
+    def get_all_tasks(self, list_id: str, include_closed: bool = False, exclude_huntflow_tagged: bool = None,
+                      max_pages: int = None) -> List[Dict]:
+        """
+        Все задачи списка: несколько страниц загружаются параллельно (ClickUpPageFetcher)
         
+        Args:
+            list_id: ID списка задач
+            include_closed: Включать ли закрытые задачи
+            exclude_huntflow_tagged: None - все задачи, True - только без тега huntflow, False - только с тегом huntflow
+            max_pages: Ограничение числа страниц (по умолчанию CLICKUP_FETCH_SETTINGS['max_pages'])
+            
+        Returns:
+            Список задач в порядке страниц
+        """
+        started_at = time.monotonic()
+        fetcher = ClickUpPageFetcher(self.rate_state, self.fetch_settings)
+        pages = fetcher.fetch(
+            lambda page: self.get_tasks_page(list_id, page, include_closed=include_closed),
+            max_pages=max_pages
+        )
+        tasks = [task for page_tasks in pages for task in page_tasks]
+        logger.info(
+            f"ClickUp: список {list_id} - {len(tasks)} задач, {len(pages)} страниц, "
+            f"{fetcher.requests_made} запросов за {time.monotonic() - started_at:.2f} с"
+        )
+        return self.filter_huntflow_tagged(tasks, exclude_huntflow_tagged)
+    
+    def filter_huntflow_tagged(self, tasks: List[Dict], exclude_huntflow_tagged: bool = None) -> List[Dict]:
+        """Фильтр задач по тегу huntflow: None - все, True - без тега, False - только с тегом"""
         # Фильтруем задачи по тегу huntflow в зависимости от настроек
         if exclude_huntflow_tagged is True:
             # Только задачи БЕЗ тега huntflow
@@ -948,49 +1014,47 @@ class ClickUpService:
             exclude_huntflow_tagged = None   # Все задачи (передадим None в get_tasks)
         
         try:
-            # Получаем все задачи из списка (с пагинацией)
-            for page in range(max_pages):
-                tasks_data = self.get_tasks(list_id, include_closed=False, page=page, exclude_huntflow_tagged=exclude_huntflow_tagged)
-                
-                if not tasks_data:
-                    break
-                
-                for task_data in tasks_data:
-                    if not task_data:
-                        logger.warning("Получены пустые данные задачи, пропускаем")
-                        continue
-                        
-                    try:
-                        parsed_data = self.parse_task_data(task_data)
-                        
-                        # Проверяем обязательные поля
-                        if not parsed_data.get('task_id'):
-                            logger.warning(f"Задача без ID, пропускаем: {task_data}")
-                            continue
-                        
-                        # Проверяем, существует ли задача
-                        task, created = ClickUpTask.objects.get_or_create(
-                            task_id=parsed_data['task_id'],
-                            user=user,
-                            defaults=parsed_data
-                        )
-                        
-                        if created:
-                            tasks_created += 1
-                        else:
-                            # Обновляем существующую задачу
-                            for field, value in parsed_data.items():
-                                setattr(task, field, value)
-                            task.save()
-                            tasks_updated += 1
-                        
-                        tasks_processed += 1
-                        
-                    except Exception as e:
-                        task_id = task_data.get('id', 'unknown') if isinstance(task_data, dict) else 'unknown'
-                        logger.error(f"Ошибка обработки задачи {task_id}: {e}")
-                        continue
+            # Получаем все задачи из списка (страницы загружаются параллельно)
+            tasks_data = self.get_all_tasks(
+                list_id, include_closed=False, exclude_huntflow_tagged=exclude_huntflow_tagged, max_pages=max_pages
+            )
             
+            for task_data in tasks_data:
+                if not task_data:
+                    logger.warning("Получены пустые данные задачи, пропускаем")
+                    continue
+                    
+                try:
+                    parsed_data = self.parse_task_data(task_data)
+                    
+                    # Проверяем обязательные поля
+                    if not parsed_data.get('task_id'):
+                        logger.warning(f"Задача без ID, пропускаем: {task_data}")
+                        continue
+                    
+                    # Проверяем, существует ли задача
+                    task, created = ClickUpTask.objects.get_or_create(
+                        task_id=parsed_data['task_id'],
+                        user=user,
+                        defaults=parsed_data
+                    )
+                    
+                    if created:
+                        tasks_created += 1
+                    else:
+                        # Обновляем существующую задачу
+                        for field, value in parsed_data.items():
+                            setattr(task, field, value)
+                        task.save()
+                        tasks_updated += 1
+                    
+                    tasks_processed += 1
+                    
+                except Exception as e:
+                    task_id = task_data.get('id', 'unknown') if isinstance(task_data, dict) else 'unknown'
+                    logger.error(f"Ошибка обработки задачи {task_id}: {e}")
+                    continue
+        
             # Создаем лог синхронизации
             sync_duration = (django_timezone.now() - start_time).total_seconds()
             
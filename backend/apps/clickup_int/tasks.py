@@ -59,36 +59,14 @@ def bulk_import_clickup_tasks(self, user_id, bulk_import_id):
         print(f"🔍 [WORKER] Получаем список задач для пользователя {user.username}")
         logger.info(f"🔍 [WORKER] Получаем список задач для пользователя {user.username}")
         all_tasks = []
-        page = 0
         
         try:
-            print(f"🔍 [WORKER] Начинаем получение задач из ClickUp API...")
             print(f"🔍 [WORKER] Начинаем получение задач из ClickUp API...", flush=True)
             logger.info(f"🔍 [WORKER] Начинаем получение задач из ClickUp API...")
             
-            while True:
-                print(f"📄 [WORKER] Запрашиваем страницу {page}...")
-                print(f"📄 [WORKER] Запрашиваем страницу {page}...", flush=True)
-                logger.info(f"📄 [WORKER] Запрашиваем страницу {page}...")
-                
-                tasks = service.get_tasks(settings.list_id, include_closed=True, page=page, exclude_huntflow_tagged=True)
-                if not tasks:
-                    print(f"📄 Страница {page}: задач не найдено, завершаем")
-                    print(f"📄 Страница {page}: задач не найдено, завершаем", flush=True)
-                    logger.info(f"📄 Страница {page}: задач не найдено, завершаем")
-                    break
-                all_tasks.extend(tasks)
-                page += 1
-                logger.info(f"📄 Получена страница {page}, задач: {len(tasks)}")
-                print(f"📄 Получена страница {page}, задач: {len(tasks)}")
-                print(f"📄 Получена страница {page}, задач: {len(tasks)}", flush=True)
-                
-                # Ограничиваем количество страниц для безопасности
-                if page > 100:  # Максимум 100 страниц
-                    logger.warning(f"⚠️ Достигнут лимит страниц (100), останавливаемся")
-                    print(f"⚠️ Достигнут лимит страниц (100), останавливаемся")
-                    print(f"⚠️ Достигнут лимит страниц (100), останавливаемся", flush=True)
-                    break
+            # Несколько страниц загружаются параллельно с учетом лимитов ClickUp
+            # (ограничение - CLICKUP_FETCH_SETTINGS['max_pages'])
+            all_tasks = service.get_all_tasks(settings.list_id, include_closed=True, exclude_huntflow_tagged=True)
         except ClickUpAPIError as e:
             logger.error(f"❌ Ошибка получения задач из ClickUp: {e}")
             print(f"❌ Ошибка получения задач из ClickUp: {e}")
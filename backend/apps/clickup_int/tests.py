@@ -0,0 +1,180 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlsplit
+
+from django.test import SimpleTestCase, override_settings
+
+from .fetcher import ClickUpRateLimitState
+from .services import ClickUpAPIError, ClickUpService
+
+
+class FakeClickUpServer:
+    """
+    Локальный ClickUp API: /list/<id>/task отдает pages страниц задач
+
+    Каждый ответ задерживается на latency секунд; в throttle_pages - страницы,
+    на которые первый запрос получает 429 с Retry-After: 0.
+    """
+
+    def __init__(self, pages, page_size=3, latency=0.05, throttle_pages=(), remaining=100):
+        self.pages = pages
+        self.page_size = page_size
+        self.latency = latency
+        self.throttle_pages = set(throttle_pages)
+        self.remaining = remaining
+        self.requested_pages = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                page = int(parse_qs(urlsplit(self.path).query)['page'][0])
+                with fake._lock:
+                    fake.requested_pages.append(page)
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                    throttled = page in fake.throttle_pages
+                    fake.throttle_pages.discard(page)
+                    fake.remaining -= 1
+                    remaining = fake.remaining
+                time.sleep(fake.latency)
+                with fake._lock:
+                    fake.in_flight -= 1
+
+                if throttled:
+                    status, payload, extra = 429, {'err': 'Rate limit reached'}, {'Retry-After': '0'}
+                else:
+                    tasks = [
+                        {'id': f'{page}-{i}', 'name': f'Задача {page}-{i}', 'tags': []}
+                        for i in range(fake.page_size)
+                    ] if page < fake.pages else []
+                    status, payload, extra = 200, {'tasks': tasks, 'last_page': page == fake.pages - 1}, {}
+
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('X-RateLimit-Limit', '100')
+                self.send_header('X-RateLimit-Remaining', str(max(remaining, 0)))
+                self.send_header('X-RateLimit-Reset', str(int(time.time()) + 60))
+                for name, value in extra.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def __enter__(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.patcher = patch.object(ClickUpService, 'BASE_URL', f'http://127.0.0.1:{self.server.server_port}')
+        self.patcher.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.patcher.stop()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@override_settings(HTTP_POOL_SETTINGS={'hosts': {'127.0.0.1': {'respect_retry_after_header': False}}})
+class ClickUpPageFetcherTests(SimpleTestCase):
+    """Параллельная загрузка страниц списка с учетом лимитов ClickUp"""
+
+    def setUp(self):
+        ClickUpRateLimitState._states.clear()
+
+    def test_pages_are_fetched_concurrently_in_order(self):
+        with FakeClickUpServer(pages=10, latency=0.1) as server:
+            started_at = time.monotonic()
+            tasks = ClickUpService('token').get_all_tasks('list-1')
+            elapsed = time.monotonic() - started_at
+
+        self.assertEqual([task['id'] for task in tasks], [f'{page}-{i}' for page in range(10) for i in range(3)])
+        self.assertGreater(server.max_in_flight, 1)
+        # Последовательно - не меньше 10 * 0.1 с
+        self.assertLess(elapsed, 0.7)
+        # После last_page новые страницы не запрашиваются
+        self.assertLessEqual(max(server.requested_pages), 9 + 3)
+
+    def test_single_page_list_makes_one_request(self):
+        with FakeClickUpServer(pages=1) as server:
+            tasks = ClickUpService('token').get_all_tasks('list-1')
+        self.assertEqual(len(tasks), 3)
+        self.assertEqual(server.requested_pages, [0])
+
+    def test_rate_limited_page_is_retried(self):
+        with FakeClickUpServer(pages=6, throttle_pages=[2, 4]) as server:
+            service = ClickUpService('token')
+            tasks = service.get_all_tasks('list-1')
+
+        self.assertEqual(len(tasks), 18)
+        self.assertEqual(service.rate_state.throttled, 2)
+        self.assertEqual(server.requested_pages.count(2), 2)
+
+    def test_max_pages_limit(self):
+        with FakeClickUpServer(pages=10) as server:
+            tasks = ClickUpService('token').get_all_tasks('list-1', max_pages=4)
+        self.assertEqual(len(tasks), 12)
+        self.assertLess(max(server.requested_pages), 4)
+
+    def test_huntflow_filter_is_applied_after_fetch(self):
+        service = ClickUpService('token')
+        tasks = [{'id': '1', 'tags': [{'name': 'huntflow'}]}, {'id': '2', 'tags': []}]
+        self.assertEqual([t['id'] for t in service.filter_huntflow_tagged(tasks, True)], ['2'])
+        self.assertEqual([t['id'] for t in service.filter_huntflow_tagged(tasks, False)], ['1'])
+        self.assertEqual(len(service.filter_huntflow_tagged(tasks, None)), 2)
+
+    @patch('apps.clickup_int.services.time.sleep')
+    def test_gives_up_after_max_retries(self, sleep):
+        with FakeClickUpServer(pages=1, throttle_pages=[0]):
+            service = ClickUpService('token')
+            service.fetch_settings = dict(service.fetch_settings, max_retries=0)
+            with self.assertRaisesMessage(ClickUpAPIError, 'Превышен лимит запросов'):
+                service.get_tasks('list-1')
+
+
+class ClickUpRateLimitStateTests(SimpleTestCase):
+    """Остаток лимита по заголовкам X-RateLimit-*"""
+
+    @patch('apps.clickup_int.fetcher.time.time', return_value=1000.0)
+    def test_waits_for_reset_when_remaining_is_exhausted(self, _):
+        state = ClickUpRateLimitState({'reserve_requests': 2, 'retry_after_default': 5, 'max_backoff': 60})
+        state.update({'X-RateLimit-Remaining': '4', 'X-RateLimit-Reset': '1030'})
+        # Остаток уменьшается локально для параллельных запросов
+        self.assertEqual([state.acquire(), state.acquire()], [0.0, 0.0])
+        self.assertEqual(state.acquire(), 30.0)
+        self.assertFalse(state.has_headroom(1))
+
+    @patch('apps.clickup_int.fetcher.time.time', return_value=1000.0)
+    def test_stale_and_out_of_order_headers(self, _):
+        state = ClickUpRateLimitState({'reserve_requests': 0})
+        state.update({'X-RateLimit-Remaining': '10', 'X-RateLimit-Reset': '1060'})
+        state.update({'X-RateLimit-Remaining': '12', 'X-RateLimit-Reset': '1060'})
+        state.update({'X-RateLimit-Remaining': '90', 'X-RateLimit-Reset': '1000'})
+        self.assertEqual(state.remaining, 10)
+
+    @patch('apps.clickup_int.fetcher.time.time', return_value=1000.0)
+    def test_throttle_uses_retry_after_then_reset_then_backoff(self, _):
+        config = {'reserve_requests': 0, 'retry_after_default': 5, 'max_backoff': 60}
+        self.assertEqual(ClickUpRateLimitState(config).throttle({'Retry-After': '7'}, 0), 7.0)
+        self.assertEqual(ClickUpRateLimitState(config).throttle({'X-RateLimit-Reset': '1012'}, 0), 12.0)
+        self.assertEqual(ClickUpRateLimitState(config).throttle({}, 2), 20.0)
+        self.assertEqual(ClickUpRateLimitState(config).throttle({}, 10), 60.0)
+
+        state = ClickUpRateLimitState(config)
+        state.throttle({'Retry-After': '3'}, 0)
+        self.assertEqual(state.acquire(), 3.0)
@@ -1,5 +1,5 @@
 from django.conf import settings
-from apps.huntflow.services import HuntflowService
+from apps.huntflow.accounts_cache import HuntflowAccountsCache
 
 
 def sidebar_menu_context(request):
@@ -11,19 +11,18 @@ def sidebar_menu_context(request):
     - request.user: аутентифицированный пользователь
     
     ИСТОЧНИКИ ДАННЫХ:
-    - HuntflowService: сервис для работы с Huntflow API
-    - Huntflow API: получение списка аккаунтов
+    - HuntflowAccountsCache: кэш списка организаций (память процесса → Redis → Huntflow API)
     
     ОБРАБОТКА:
     - Проверка аутентификации пользователя
-    - Получение данных организаций через HuntflowService
+    - Получение данных организаций из кэша без запроса к API на каждую страницу
     - Обработка ошибок с fallback значениями
     
     ВЫХОДЯЩИЕ ДАННЫЕ:
     - context: словарь с данными для сайдбара
     
     СВЯЗИ:
-    - Использует: HuntflowService, Huntflow API
+    - Использует: HuntflowAccountsCache
     - Передает данные в: все шаблоны через context processor
     - Может вызываться из: Django template context
     """
@@ -32,8 +31,7 @@ def sidebar_menu_context(request):
     
     try:
         # Получаем данные организаций для сайдбара
-        huntflow_service = HuntflowService(request.user)
-        accounts = huntflow_service.get_accounts()
+        accounts = HuntflowAccountsCache.get_accounts(request.user)
         accounts_list = accounts.get('items', []) if accounts else []
         
         print(f"DEBUG context_processor: accounts_list = {accounts_list}")
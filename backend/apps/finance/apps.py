@@ -8,4 +8,4 @@ class FinanceConfig(AppConfig):
     
     def ready(self):
         # import apps.finance.logic.signals  # УДАЛЕНО - логика перенесена
-        pass
\ No newline at end of file
+        import apps.finance.signals
\ No newline at end of file
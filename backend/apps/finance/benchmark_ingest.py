@@ -0,0 +1,235 @@
+"""
+Пакетное сохранение бенчмарков из ответов AI анализа вакансий hh.ru
+
+Строки ответа проверяются и сопоставляются в памяти (MatcherIndex), затем весь
+пакет записывается одной транзакцией: bulk_create бенчмарков и один UPDATE
+обработанных записей HHVacancyTemp. На SQLite это убирает по транзакции на
+каждую строку и конкуренцию за блокировку при больших догрузках.
+
+Если параллельный процесс успел записать бенчмарк для той же вакансии hh.ru
+между проверкой и вставкой, пакет не теряется: строки вставляются по одной,
+а конфликтующие пропускаются как hh_vacancy_exists.
+"""
+
+import logging
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+
+from .benchmark_stats import mark_benchmark_stats_dirty
+from .matcher_index import get_matcher_index
+from .models import Benchmark, BenchmarkType, HHVacancyTemp
+
+logger = logging.getLogger('apps.finance')
+
+
+# Причины пропуска строк ответа AI
+SKIP_REASONS = {
+    'id_mismatch': 'vacancy_id не совпадает с вакансией',
+    'vacancy_skip': 'AI пропустил вакансию',
+    'vacancy_not_matched': 'не найдено соответствие вакансии',
+    'grade_skip': 'AI пропустил грейд',
+    'grade_not_matched': 'не найден грейд',
+    'no_salary': 'отсутствуют зарплаты',
+    'duplicate': 'дубликат (hh_vacancy_id, вакансия, грейд)',
+    'hh_vacancy_exists': 'для вакансии hh.ru уже есть бенчмарк',
+}
+
+
+class BenchmarkIngestBatch:
+    """
+    Пакет бенчмарков для одной транзакции
+
+    Пример:
+        batch = BenchmarkIngestBatch()
+        for ai_response, vacancy_data in results:
+            batch.add(ai_response, vacancy_data)
+        metrics = batch.commit()
+    """
+
+    def __init__(self, matcher_index=None):
+        self.matcher_index = matcher_index or get_matcher_index()
+        self._rows: List[Tuple[str, Benchmark]] = []
+        self._vacancy_ids: List[str] = []
+        self.skipped: Counter = Counter()
+        self.per_vacancy: Dict[str, Dict[str, int]] = {}
+
+    def _skip(self, hh_id: str, reason: str):
+        self.skipped[reason] += 1
+        self.per_vacancy[hh_id]['skipped'] += 1
+
+    def add(self, ai_response: dict, vacancy_data: dict):
+        """Проверяет и сопоставляет строки structured_benchmarks одной вакансии"""
+        from .tasks import _find_best_grade_match, _find_best_vacancy_match
+
+        hh_id = vacancy_data['hh_id']
+        if hh_id not in self.per_vacancy:
+            self.per_vacancy[hh_id] = {'saved': 0, 'skipped': 0}
+            self._vacancy_ids.append(hh_id)
+        company = (vacancy_data.get('raw_data') or {}).get('employer', {}).get('name', '')
+
+        for benchmark_data in ai_response.get('structured_benchmarks', []):
+            vacancy_id = benchmark_data.get('vacancy_id')
+            if vacancy_id != hh_id:
+                logger.error(f"ID mismatch: {vacancy_id} != {hh_id}")
+                self._skip(hh_id, 'id_mismatch')
+                continue
+
+            vacancy_name = benchmark_data.get('vacancy_name', '').strip()
+            if vacancy_name == 'skip':
+                skip_reason = benchmark_data.get('skip_reason', 'Не указана причина')
+                logger.info(f"⏭️ Пропускаем вакансию {vacancy_id}: {skip_reason}")
+                self._skip(hh_id, 'vacancy_skip')
+                continue
+
+            matched_vacancy = _find_best_vacancy_match(vacancy_name, self.matcher_index)
+            if not matched_vacancy:
+                logger.warning(f"❌ Не найдено соответствие для вакансии: '{vacancy_name}'")
+                self._skip(hh_id, 'vacancy_not_matched')
+                continue
+
+            grade_name = benchmark_data.get('grade', '').strip()
+            if grade_name == 'skip':
+                logger.info(f"⏭️ Пропускаем грейд для вакансии {vacancy_id}")
+                self._skip(hh_id, 'grade_skip')
+                continue
+
+            matched_grade = _find_best_grade_match(grade_name, self.matcher_index)
+            if not matched_grade:
+                logger.warning(f"❌ Не найден грейд: '{grade_name}'")
+                self._skip(hh_id, 'grade_not_matched')
+                continue
+
+            salary_from = benchmark_data.get('salary_from')
+            salary_to = benchmark_data.get('salary_to')
+            if not salary_from or not salary_to:
+                logger.warning(f"❌ Отсутствуют зарплаты для вакансии {vacancy_id}")
+                self._skip(hh_id, 'no_salary')
+                continue
+
+            self._rows.append((hh_id, Benchmark(
+                type=BenchmarkType.VACANCY,
+                hh_vacancy_id=hh_id,
+                vacancy=matched_vacancy,
+                grade=matched_grade,
+                salary_from=salary_from,
+                salary_to=salary_to,
+                location=benchmark_data.get('location', ''),
+                work_format=benchmark_data.get('work_format', ''),
+                compensation=benchmark_data.get('compensation', ''),
+                benefits=benchmark_data.get('benefits', ''),
+                development=benchmark_data.get('development', ''),
+                technologies=benchmark_data.get('technologies', ''),
+                domain=benchmark_data.get('domain'),
+                notes=f"Источник: hh.ru. Компания: {company}",
+                is_active=True
+            )))
+
+    def _deduplicate(self) -> List[Benchmark]:
+        """
+        Дедупликация по (hh_vacancy_id, вакансия, грейд)
+
+        hh_vacancy_id уникален в Benchmark, поэтому на вакансию hh.ru остается
+        первая подходящая строка, если бенчмарка для нее еще нет в БД.
+        """
+        existing = set(
+            Benchmark.objects.filter(
+                hh_vacancy_id__in={hh_id for hh_id, _ in self._rows}
+            ).order_by().values_list('hh_vacancy_id', flat=True)
+        )
+        seen_keys, taken_ids, unique_rows = set(), set(), []
+        for hh_id, benchmark in self._rows:
+            key = (hh_id, benchmark.vacancy_id, benchmark.grade_id)
+            if key in seen_keys:
+                self._skip(hh_id, 'duplicate')
+            elif hh_id in existing or hh_id in taken_ids:
+                self._skip(hh_id, 'hh_vacancy_exists')
+            else:
+                seen_keys.add(key)
+                taken_ids.add(hh_id)
+                unique_rows.append(benchmark)
+                self.per_vacancy[hh_id]['saved'] += 1
+        return unique_rows
+
+    def _insert(self, rows: List[Benchmark], batch_size: int) -> List[Benchmark]:
+        """bulk_create пакета; при конфликте уникальности - вставка по одной строке"""
+        try:
+            with transaction.atomic():
+                Benchmark.objects.bulk_create(rows, batch_size=batch_size)
+            return rows
+        except IntegrityError:
+            logger.warning("Конфликт при пакетной записи бенчмарков, записываем по одному")
+
+        written = []
+        for benchmark in rows:
+            # После отката пакета объекты могли получить pk первых INSERT
+            benchmark.pk = None
+            benchmark._state.adding = True
+            try:
+                with transaction.atomic():
+                    Benchmark.objects.bulk_create([benchmark])
+            except IntegrityError:
+                hh_id = benchmark.hh_vacancy_id
+                self.per_vacancy[hh_id]['saved'] -= 1
+                self._skip(hh_id, 'hh_vacancy_exists')
+                continue
+            written.append(benchmark)
+        return written
+
+    def commit(self, batch_size: int = 500) -> Dict:
+        """
+        Записывает пакет одной транзакцией и помечает вакансии очереди обработанными
+
+        Returns:
+            Метрики пакета: vacancies, written, skipped {причина: количество},
+            elapsed_ms, per_vacancy {hh_id: {'saved', 'skipped'}}
+        """
+        started = time.monotonic()
+        with transaction.atomic():
+            rows = self._insert(self._deduplicate(), batch_size)
+            HHVacancyTemp.objects.filter(hh_id__in=self._vacancy_ids).update(processed=True)
+            # bulk_create не отправляет сигналы: ячейки статистики пересчитываются после коммита
+            if rows:
+                mark_benchmark_stats_dirty({(benchmark.vacancy_id, benchmark.grade_id) for benchmark in rows})
+
+        metrics = {
+            'vacancies': len(self._vacancy_ids),
+            'written': len(rows),
+            'skipped': dict(self.skipped),
+            'elapsed_ms': round((time.monotonic() - started) * 1000, 1),
+            'per_vacancy': self.per_vacancy,
+        }
+        skipped_text = ', '.join(f"{SKIP_REASONS.get(reason, reason)}: {count}" for reason, count in self.skipped.items())
+        logger.info(
+            f"📦 Пакет бенчмарков: вакансий {metrics['vacancies']}, записано {metrics['written']}, "
+            f"пропущено {sum(self.skipped.values())}{f' ({skipped_text})' if skipped_text else ''}, "
+            f"{metrics['elapsed_ms']} мс"
+        )
+        return metrics
+
+
+def ingest_hh_analysis_results(results: Iterable[Tuple[dict, dict]], batch_size: int = 500) -> List[Dict]:
+    """
+    Догрузка большого количества ответов AI: по транзакции на batch_size вакансий
+
+    Args:
+        results: пары (ai_response, vacancy_data)
+
+    Returns:
+        Метрики каждого пакета (см. BenchmarkIngestBatch.commit)
+    """
+    matcher_index = get_matcher_index()
+    metrics = []
+    batch: Optional[BenchmarkIngestBatch] = None
+    for ai_response, vacancy_data in results:
+        if batch is None:
+            batch = BenchmarkIngestBatch(matcher_index)
+        batch.add(ai_response, vacancy_data)
+        if len(batch.per_vacancy) >= batch_size:
+            metrics.append(batch.commit())
+            batch = None
+    if batch is not None:
+        metrics.append(batch.commit())
+    return metrics
@@ -0,0 +1,319 @@
+"""
+Материализованная статистика бенчмарков для дашборда
+
+Дашборд раньше выполнял около 20 агрегирующих запросов к Benchmark на каждое
+открытие и заменял медиану средним. Теперь активные бенчмарки заранее сведены
+в BenchmarkStats (тип × вакансия × грейд × локация × месяц) с точными p25/p50/p75
+и отсортированными значениями зарплат, а дашборд читает их одним запросом и
+объединяет ячейки под выбранные фильтры в памяти.
+
+Обновление:
+- инкрементально: сохранение/удаление бенчмарка и пакетная догрузка
+  (BenchmarkIngestBatch) помечают пары вакансия × грейд, их ячейки
+  пересчитываются после коммита транзакции;
+- полностью: задача refresh_benchmark_stats по расписанию Celery Beat.
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Case, F, JSONField, Q, Value, When
+from django.utils import timezone
+
+from .models import Benchmark, BenchmarkStats, BenchmarkType
+from .quantiles import merge_sorted, percentile
+
+logger = logging.getLogger('apps.finance')
+
+
+CENTS = Decimal('0.01')
+
+# Период графиков по месяцам (как раньше: последние 12 месяцев)
+CHART_PERIOD_DAYS = 365
+
+
+def _month_of(moment) -> date:
+    return timezone.localtime(moment).date().replace(day=1)
+
+
+def _to_decimal(value: Optional[float]) -> Optional[Decimal]:
+    return Decimal(str(value)).quantize(CENTS) if value is not None else None
+
+
+# ==================== ПОСТРОЕНИЕ ЯЧЕЕК ====================
+
+def _build_cells(rows: Iterable[tuple]) -> List[BenchmarkStats]:
+    """
+    Ячейки статистики из строк (type, vacancy_id, grade_id, location, date_added, salary_from, salary_to)
+    """
+    grouped = defaultdict(lambda: ([], []))
+    for benchmark_type, vacancy_id, grade_id, location, date_added, salary_from, salary_to in rows:
+        from_values, top_values = grouped[(benchmark_type, vacancy_id, grade_id, location, _month_of(date_added))]
+        from_values.append(salary_from)
+        top_values.append(salary_to if salary_to is not None else salary_from)
+
+    cells = []
+    for (benchmark_type, vacancy_id, grade_id, location, month), (from_values, top_values) in grouped.items():
+        from_sorted = sorted(float(value) for value in from_values)
+        top_sorted = sorted(float(value) for value in top_values)
+        cells.append(BenchmarkStats(
+            type=benchmark_type,
+            vacancy_id=vacancy_id,
+            grade_id=grade_id,
+            location=location,
+            month=month,
+            count=len(from_values),
+            salary_from_sum=sum(from_values),
+            salary_from_min=min(from_values),
+            salary_from_p25=_to_decimal(percentile(from_sorted, 0.25)),
+            salary_from_p50=_to_decimal(percentile(from_sorted, 0.5)),
+            salary_from_p75=_to_decimal(percentile(from_sorted, 0.75)),
+            salary_top_sum=sum(top_values),
+            salary_top_max=max(top_values),
+            salary_top_p25=_to_decimal(percentile(top_sorted, 0.25)),
+            salary_top_p50=_to_decimal(percentile(top_sorted, 0.5)),
+            salary_top_p75=_to_decimal(percentile(top_sorted, 0.75)),
+            salary_from_values=from_sorted,
+            salary_top_values=top_sorted,
+        ))
+    return cells
+
+
+def refresh_benchmark_stats(pairs: Optional[Iterable[Tuple[int, int]]] = None) -> Dict:
+    """
+    Пересчитывает ячейки статистики
+
+    Args:
+        pairs: пары (vacancy_id, grade_id) для инкрементального обновления;
+            None - полная перестройка
+
+    Returns:
+        pairs, benchmarks, cells, elapsed_ms
+    """
+    started = time.monotonic()
+    benchmarks = Benchmark.objects.filter(is_active=True).order_by()
+    stats = BenchmarkStats.objects.order_by()
+    if pairs is not None:
+        pairs = set(pairs)
+        if not pairs:
+            return {'pairs': 0, 'benchmarks': 0, 'cells': 0, 'elapsed_ms': 0.0}
+        pair_filter = {
+            'vacancy_id__in': {vacancy_id for vacancy_id, _ in pairs},
+            'grade_id__in': {grade_id for _, grade_id in pairs},
+        }
+        benchmarks = benchmarks.filter(**pair_filter)
+        stats = stats.filter(**pair_filter)
+
+    rows = [
+        row for row in benchmarks.values_list(
+            'type', 'vacancy_id', 'grade_id', 'location', 'date_added', 'salary_from', 'salary_to'
+        )
+        if pairs is None or (row[1], row[2]) in pairs
+    ]
+    cells = _build_cells(rows)
+
+    with transaction.atomic():
+        if pairs is None:
+            stats.delete()
+        else:
+            stale_ids = [
+                stats_id for stats_id, vacancy_id, grade_id in stats.values_list('id', 'vacancy_id', 'grade_id')
+                if (vacancy_id, grade_id) in pairs
+            ]
+            BenchmarkStats.objects.filter(id__in=stale_ids).delete()
+        BenchmarkStats.objects.bulk_create(cells, batch_size=500)
+
+    result = {
+        'pairs': len(pairs) if pairs is not None else None,
+        'benchmarks': len(rows),
+        'cells': len(cells),
+        'elapsed_ms': round((time.monotonic() - started) * 1000, 1),
+    }
+    logger.info(
+        f"📊 Статистика бенчмарков обновлена: {'все пары' if pairs is None else f'пар {len(pairs)}'}, "
+        f"бенчмарков {result['benchmarks']}, ячеек {result['cells']}, {result['elapsed_ms']} мс"
+    )
+    return result
+
+
+# ==================== ИНКРЕМЕНТАЛЬНОЕ ОБНОВЛЕНИЕ ====================
+
+# Пары накапливаются в потоке (у каждого потока свое соединение и транзакция)
+_pending = threading.local()
+
+
+def mark_benchmark_stats_dirty(pairs: Iterable[Tuple[int, int]]):
+    """Пересчитать ячейки пар (vacancy_id, grade_id) после коммита текущей транзакции"""
+    if not hasattr(_pending, 'pairs'):
+        _pending.pairs = set()
+    _pending.pairs.update(pairs)
+    transaction.on_commit(flush_benchmark_stats)
+
+
+def flush_benchmark_stats():
+    """Пересчитывает накопленные пары; повторные вызовы после той же транзакции ничего не делают"""
+    pairs = getattr(_pending, 'pairs', None)
+    if not pairs:
+        return
+    _pending.pairs = set()
+    try:
+        refresh_benchmark_stats(pairs)
+    except Exception as e:
+        logger.error(f"Ошибка инкрементального обновления статистики бенчмарков: {e}")
+
+
+# ==================== ДАШБОРД ====================
+
+def _as_float(value) -> float:
+    return float(value) if value else 0
+
+
+def _ranked(groups: Dict, limit: Optional[int] = None) -> List[tuple]:
+    """Группы по убыванию количества (как order_by('-count') в прежних запросах)"""
+    ordered = sorted(groups.items(), key=lambda item: -item[1]['count'])
+    return ordered[:limit] if limit is not None else ordered
+
+
+def _avg(group: Dict) -> Decimal:
+    return group['salary_from_sum'] / group['count'] if group['count'] else Decimal('0')
+
+
+def dashboard_statistics(grade_ids: Iterable = (), vacancy_ids: Iterable = (), locations: Iterable = ()) -> Dict:
+    """
+    Статистика дашборда бенчмарков из BenchmarkStats одним запросом
+
+    Фильтры применяются к ячейкам в памяти, поэтому списки для фильтров
+    (available_*) получаются из того же запроса. Графики по месяцам берут
+    месяцы, начиная с месяца, в который попадает дата год назад.
+
+    Returns:
+        Значения контекста benchmarks_dashboard (кроме последних бенчмарков)
+    """
+    grade_ids = {int(grade_id) for grade_id in grade_ids}
+    vacancy_ids = {int(vacancy_id) for vacancy_id in vacancy_ids}
+    locations = set(locations)
+    chart_since = _month_of(timezone.now() - timedelta(days=CHART_PERIOD_DAYS))
+
+    def new_group():
+        return {'count': 0, 'salary_from_sum': Decimal('0')}
+
+    by_type, by_vacancy, by_grade, by_location, monthly = (defaultdict(new_group) for _ in range(5))
+    candlesticks = defaultdict(lambda: {'count': 0, 'min': None, 'max': None, 'from': [], 'top': []})
+    available_grades, available_vacancies, available_locations = set(), set(), set()
+    min_amount = max_amount = None
+
+    # Отсортированные значения нужны только свечам вакансий за период графиков:
+    # для остальных ячеек массивы не читаются из БД
+    in_candles = Q(type=BenchmarkType.VACANCY, month__gte=chart_since)
+    cells = BenchmarkStats.objects.order_by().annotate(
+        candle_from_values=Case(When(in_candles, then=F('salary_from_values')), default=Value(None), output_field=JSONField()),
+        candle_top_values=Case(When(in_candles, then=F('salary_top_values')), default=Value(None), output_field=JSONField()),
+    ).values_list(
+        'type', 'vacancy_id', 'vacancy__name', 'grade_id', 'grade__name', 'location', 'month', 'count',
+        'salary_from_sum', 'salary_from_min', 'salary_top_max', 'candle_from_values', 'candle_top_values',
+    )
+    for (benchmark_type, vacancy_id, vacancy_name, grade_id, grade_name, location, month, count,
+         salary_from_sum, salary_from_min, salary_top_max, from_values, top_values) in cells:
+        available_grades.add((grade_id, grade_name))
+        available_vacancies.add((vacancy_id, vacancy_name))
+        available_locations.add(location)
+        if ((grade_ids and grade_id not in grade_ids) or (vacancy_ids and vacancy_id not in vacancy_ids)
+                or (locations and location not in locations)):
+            continue
+
+        for groups, key in ((by_type, benchmark_type), (by_vacancy, (vacancy_name, vacancy_id)),
+                            (by_grade, (grade_name, grade_id)), (by_location, location)):
+            groups[key]['count'] += count
+            groups[key]['salary_from_sum'] += salary_from_sum
+        min_amount = salary_from_min if min_amount is None else min(min_amount, salary_from_min)
+        max_amount = salary_top_max if max_amount is None else max(max_amount, salary_top_max)
+
+        if month < chart_since:
+            continue
+        monthly[(benchmark_type, month)]['count'] += count
+        monthly[(benchmark_type, month)]['salary_from_sum'] += salary_from_sum
+        if benchmark_type == BenchmarkType.VACANCY:
+            candle = candlesticks[(month, vacancy_name, vacancy_id)]
+            candle['count'] += count
+            candle['min'] = salary_from_min if candle['min'] is None else min(candle['min'], salary_from_min)
+            candle['max'] = salary_top_max if candle['max'] is None else max(candle['max'], salary_top_max)
+            candle['from'].append(from_values)
+            candle['top'].append(top_values)
+
+    total = sum(group['count'] for group in by_type.values())
+
+    def month_series(benchmark_type):
+        return [
+            {'month': month.strftime('%Y-%m-%d'), 'avg_salary': _as_float(_avg(group))}
+            for (series_type, month), group in sorted(monthly.items(), key=lambda item: item[0][1])
+            if series_type == benchmark_type
+        ]
+
+    vacancy_candlestick_data = []
+    for (month, vacancy_name, vacancy_id), candle in sorted(candlesticks.items(), key=lambda item: item[0][:2]):
+        from_sorted = merge_sorted(candle['from'])
+        top_sorted = merge_sorted(candle['top'])
+        vacancy_candlestick_data.append({
+            'month': month.strftime('%Y-%m-%d'),
+            'vacancy__name': vacancy_name,
+            'vacancy__id': vacancy_id,
+            'min_salary': _as_float(candle['min']),
+            'p25_salary': percentile(from_sorted, 0.25),
+            'median_min_salary': percentile(from_sorted, 0.5),
+            'median_max_salary': percentile(top_sorted, 0.5),
+            'p75_salary': percentile(top_sorted, 0.75),
+            'max_salary': _as_float(candle['max']),
+            'count': candle['count'],
+        })
+
+    return {
+        'total_benchmarks': total,
+        'candidate_count': by_type[BenchmarkType.CANDIDATE]['count'],
+        'vacancy_count': by_type[BenchmarkType.VACANCY]['count'],
+        'avg_amount': sum(group['salary_from_sum'] for group in by_type.values()) / total if total else Decimal('0'),
+        'min_amount': min_amount or Decimal('0'),
+        'max_amount': max_amount or Decimal('0'),
+        'avg_candidate': _avg(by_type[BenchmarkType.CANDIDATE]),
+        'avg_vacancy': _avg(by_type[BenchmarkType.VACANCY]),
+        'vacancy_stats': [
+            {'vacancy__name': name, 'count': group['count'], 'avg_amount': _avg(group)}
+            for (name, _), group in _ranked(by_vacancy, 10)
+        ],
+        'grade_stats': [
+            {'grade__name': name, 'count': group['count'], 'avg_amount': _avg(group)}
+            for (name, _), group in _ranked(by_grade, 10)
+        ],
+        'location_stats': [
+            {'location': location, 'count': group['count'], 'avg_amount': _avg(group)}
+            for location, group in _ranked(by_location, 10)
+        ],
+        'top_vacancies': [
+            {'vacancy__name': name, 'vacancy__id': vacancy_id, 'count': group['count']}
+            for (name, vacancy_id), group in _ranked(by_vacancy, 5)
+        ],
+        'top_grades': [
+            {'grade__name': name, 'grade__id': grade_id, 'count': group['count']}
+            for (name, grade_id), group in _ranked(by_grade, 5)
+        ],
+        'grade_distribution': [
+            {'grade__name': name, 'count': group['count']} for (name, _), group in _ranked(by_grade)
+        ],
+        'vacancy_distribution': [
+            {'vacancy__name': name, 'count': group['count']} for (name, _), group in _ranked(by_vacancy, 10)
+        ],
+        'location_distribution': [
+            {'location': location, 'count': group['count']} for location, group in _ranked(by_location, 10)
+        ],
+        'candidate_avg_by_month': month_series(BenchmarkType.CANDIDATE),
+        'vacancy_avg_by_month': month_series(BenchmarkType.VACANCY),
+        'vacancy_candlestick_data': vacancy_candlestick_data,
+        'available_grades': sorted(available_grades, key=lambda item: item[1]),
+        'available_vacancies': sorted(available_vacancies, key=lambda item: item[1]),
+        'available_locations': sorted(available_locations),
+    }
@@ -0,0 +1,65 @@
+"""
+Порядок грейдов для проверки диапазонов
+
+InterviewRule.is_grade_in_range раньше на каждую проверку загружал все грейды
+и трижды искал имя в списке. Здесь порядок грейдов (как Grade.objects.order_by('name'))
+загружается одним запросом и хранится как карта id -> ранг, поэтому проверка
+диапазона - два сравнения целых чисел без запросов к БД.
+
+Порядок хранится в VersionedLocalCache и перечитывается после изменения Grade.
+"""
+
+from typing import Dict, Iterable, Optional
+
+from logic.utilities.versioned_cache import VersionedLocalCache
+
+
+VERSION_KEY = 'finance_grade_order_version'
+
+
+def _grade_id(grade) -> Optional[int]:
+    """Грейд можно передать объектом или id"""
+    if grade is None or isinstance(grade, int):
+        return grade
+    return getattr(grade, 'pk', None)
+
+
+class GradeOrder:
+    """Ранги грейдов в порядке сортировки по названию"""
+
+    def __init__(self, grade_ids: Iterable[int]):
+        self.ranks: Dict[int, int] = {grade_id: rank for rank, grade_id in enumerate(grade_ids)}
+
+    @classmethod
+    def load(cls) -> 'GradeOrder':
+        """Один запрос: id грейдов в порядке, который использовали правила привлечения"""
+        from .models import Grade
+
+        return cls(Grade.objects.order_by('name').values_list('id', flat=True))
+
+    def rank(self, grade) -> Optional[int]:
+        return self.ranks.get(_grade_id(grade))
+
+    def in_range(self, grade, min_grade, max_grade) -> bool:
+        """Грейд между min_grade и max_grade включительно; неизвестный грейд - False"""
+        grade_rank = self.rank(grade)
+        min_rank = self.rank(min_grade)
+        max_rank = self.rank(max_grade)
+        if grade_rank is None or min_rank is None or max_rank is None:
+            return False
+        return min_rank <= grade_rank <= max_rank
+
+
+grade_order_cache: VersionedLocalCache[GradeOrder] = VersionedLocalCache(
+    VERSION_KEY, GradeOrder.load, description='порядка грейдов'
+)
+
+
+def get_grade_order() -> GradeOrder:
+    """Порядок грейдов текущего процесса; перечитывается после изменения Grade"""
+    return grade_order_cache.get()
+
+
+def invalidate_grade_order():
+    """Сбрасывает порядок грейдов в этом процессе и увеличивает версию для остальных"""
+    grade_order_cache.invalidate()
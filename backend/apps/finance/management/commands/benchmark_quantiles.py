@@ -0,0 +1,73 @@
+"""
+Django команда: бенчмарк движка квантилей на синтетических данных
+"""
+import random
+import statistics
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from apps.finance.quantiles import GroupedQuantiles
+
+GRADES = ['Junior', 'Junior+', 'Middle', 'Middle+', 'Senior', 'Senior+', 'Lead', 'Head']
+LOCATIONS = ['Минск', 'Варшава', 'Вильнюс', 'Тбилиси', 'Белград', 'Remote']
+
+
+class Command(BaseCommand):
+    help = 'Бенчмарк точных квантилей зарплат: однопроходный GroupedQuantiles против statistics.quantiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Количество синтетических бенчмарков')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        rows = []
+        for row_id in range(options['rows']):
+            grade_index = rng.randrange(len(GRADES))
+            salary_from = round(rng.lognormvariate(7.3 + grade_index * 0.2, 0.35), 2)
+            salary_to = round(salary_from * rng.uniform(1.1, 1.6), 2) if rng.random() < 0.8 else None
+            rows.append((row_id, (GRADES[grade_index], rng.choice(LOCATIONS)), salary_from, salary_to))
+
+        started = time.perf_counter()
+        grouped = GroupedQuantiles()
+        for row_id, group_key, salary_from, salary_to in rows:
+            grouped.add(group_key, row_id, (salary_from, salary_to))
+        collected = time.perf_counter()
+        summaries = grouped.summaries(with_outliers=True)
+        finished = time.perf_counter()
+
+        # Эталон: отдельные списки по группам и statistics.quantiles (та же линейная интерполяция)
+        started_reference = time.perf_counter()
+        reference_values = defaultdict(list)
+        for _, group_key, salary_from, _ in rows:
+            reference_values[group_key].append(salary_from)
+        reference = {
+            group_key: statistics.quantiles(values, n=4, method='inclusive')
+            for group_key, values in reference_values.items()
+        }
+        reference_ms = (time.perf_counter() - started_reference) * 1000
+
+        mismatches = sum(
+            1 for group_key, quartiles in reference.items()
+            for expected, actual in zip(quartiles, (
+                summaries[group_key]['salary_from']['p25'],
+                summaries[group_key]['salary_from']['p50'],
+                summaries[group_key]['salary_from']['p75'],
+            ))
+            if abs(expected - actual) > 1e-6
+        )
+        outliers = sum(len(group['salary_from']['outlier_ids']) for group in summaries.values())
+
+        self.stdout.write(self.style.SUCCESS(f"📊 {len(rows)} бенчмарков, групп грейд × локация: {len(grouped)}"))
+        self.stdout.write(f"  сбор колонок (один проход)    {(collected - started) * 1000:10.1f} мс")
+        self.stdout.write(f"  сортировка и сводки + выбросы {(finished - collected) * 1000:10.1f} мс")
+        self.stdout.write(f"  итого                         {(finished - started) * 1000:10.1f} мс "
+                          f"({(finished - started) * 1_000_000 / len(rows):.2f} мкс/строка)")
+        self.stdout.write(f"  statistics.quantiles (только salary_from) {reference_ms:10.1f} мс")
+        self.stdout.write(f"  выбросов salary_from (1.5 × IQR): {outliers}")
+        if mismatches:
+            self.stdout.write(self.style.WARNING(f"⚠️ Расхождений с statistics.quantiles: {mismatches}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("✅ Квартили совпадают со statistics.quantiles"))
@@ -0,0 +1,101 @@
+"""
+Django команда: сравнение перебора SequenceMatcher и MatcherIndex на синтетических данных
+"""
+import random
+import time
+from difflib import SequenceMatcher
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from apps.finance.matcher_index import MatcherIndex, VACANCY_MATCH_THRESHOLD
+
+
+ROLES = ['Backend Engineer', 'Frontend Engineer', 'QA Engineer', 'DevOps Engineer', 'Data Engineer',
+         'Mobile Developer', 'Project Manager', 'System Administrator', 'UX/UI Designer', 'Support Engineer']
+STACKS = ['Java', 'Kotlin', 'Python', 'Go', 'React', 'Angular', 'Vue', '.NET', 'PHP', 'Node.js',
+          'iOS', 'Android', 'Scala', 'Rust', 'C++', 'Ruby', 'Flutter', 'Salesforce', 'SAP', '1C']
+TEAMS = ['Core', 'Payments', 'Platform', 'Growth', 'Search', 'Billing', 'Risk', 'Mobile', 'Data', 'Infra']
+
+
+def _legacy_match(vacancies, ai_vacancy_name):
+    """Прежний алгоритм без обращений к БД: точное совпадение, затем перебор всех активных"""
+    ai_name_lower = ai_vacancy_name.lower().strip()
+    for vacancy in vacancies:
+        if vacancy.name.strip().lower() == ai_name_lower:
+            return vacancy
+    best_match, best_score = None, VACANCY_MATCH_THRESHOLD
+    for vacancy in vacancies:
+        similarity = SequenceMatcher(None, ai_name_lower, vacancy.name.lower()).ratio()
+        ai_words = set(ai_name_lower.split())
+        vacancy_words = set(vacancy.name.lower().split())
+        word_overlap = len(ai_words.intersection(vacancy_words)) / len(ai_words.union(vacancy_words))
+        combined_score = (similarity * 0.7) + (word_overlap * 0.3)
+        if combined_score > best_score:
+            best_score = combined_score
+            best_match = vacancy
+    return best_match
+
+
+def _distort(name, rng):
+    """Название в том виде, как его мог вернуть AI"""
+    variant = rng.random()
+    if variant < 0.3:
+        return name
+    if variant < 0.5:
+        return name.lower()
+    if variant < 0.7:
+        position = rng.randrange(len(name))
+        return name[:position] + name[position + 1:]
+    if variant < 0.85:
+        return f"Senior {name}"
+    return f"{rng.choice(ROLES)} ({rng.choice(STACKS)})"
+
+
+class Command(BaseCommand):
+    help = 'Бенчмарк сопоставления названий вакансий: перебор SequenceMatcher против MatcherIndex'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vacancies', type=int, default=1000, help='Количество наших вакансий')
+        parser.add_argument('--rows', type=int, default=10000, help='Количество бенчмарков от AI')
+        parser.add_argument('--legacy-rows', type=int, default=500,
+                            help='Сколько строк прогнать через прежний алгоритм (он медленный)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        names = set()
+        while len(names) < options['vacancies']:
+            names.add(f"{rng.choice(ROLES)} ({rng.choice(STACKS)}) {rng.choice(TEAMS)} {len(names) % 97}")
+        vacancies = [SimpleNamespace(id=i, name=name, is_active=True) for i, name in enumerate(sorted(names))]
+        rows = [_distort(rng.choice(vacancies).name, rng) for _ in range(options['rows'])]
+
+        started = time.perf_counter()
+        index = MatcherIndex(vacancies, [])
+        build_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        indexed = [index.match_vacancy(row)[0] for row in rows]
+        index_us = (time.perf_counter() - started) * 1_000_000 / len(rows)
+
+        legacy_rows = rows[:options['legacy_rows']]
+        started = time.perf_counter()
+        legacy = [_legacy_match(vacancies, row) for row in legacy_rows]
+        legacy_us = (time.perf_counter() - started) * 1_000_000 / len(legacy_rows)
+
+        mismatches = sum(1 for a, b in zip(legacy, indexed) if a is not b)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"📊 {len(vacancies)} вакансий × {len(rows)} бенчмарков (без учета запросов к БД в прежнем алгоритме):"
+        ))
+        self.stdout.write(f"  построение индекса            {build_ms:10.1f} мс")
+        self.stdout.write(f"  перебор SequenceMatcher       {legacy_us:10.1f} мкс/строка (по {len(legacy_rows)} строкам)")
+        self.stdout.write(f"  MatcherIndex                  {index_us:10.1f} мкс/строка   x{legacy_us / index_us:.0f}")
+        self.stdout.write(
+            f"  {len(rows)} строк: ~{legacy_us * len(rows) / 1_000_000:.1f} с -> {index_us * len(rows) / 1_000_000:.2f} с"
+        )
+        if mismatches:
+            self.stdout.write(self.style.WARNING(f"⚠️ Расхождений с прежним алгоритмом: {mismatches}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ Результаты совпадают на {len(legacy_rows)} строках"))
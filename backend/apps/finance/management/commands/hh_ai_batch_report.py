@@ -0,0 +1,91 @@
+"""
+Django команда для сравнения одиночного и пакетного AI анализа вакансий hh.ru
+"""
+from django.core.management.base import BaseCommand
+
+from apps.finance.models import Grade, HHVacancyTemp
+from apps.finance.tasks import (
+    get_enhanced_ai_prompt, get_hh_ai_metrics, get_hh_ai_pipeline_settings, reset_hh_ai_metrics,
+)
+from apps.gemini.logic.rate_limiter import estimate_tokens
+from apps.vacancies.models import Vacancy
+
+
+def _sample_vacancy_text(raw_data: dict) -> str:
+    """Упрощенный текст вакансии для оценки размера промпта"""
+    snippet = raw_data.get('snippet') or {}
+    salary = raw_data.get('salary') or {}
+    return "\n".join([
+        f"ID вакансии: {raw_data.get('id', '')}",
+        f"Название: {raw_data.get('name', '')}",
+        f"Компания: {(raw_data.get('employer') or {}).get('name', '')}",
+        f"Зарплата: {salary.get('from') or ''}-{salary.get('to') or ''} {salary.get('currency') or ''}",
+        f"Требования: {snippet.get('requirement') or ''}",
+        f"Обязанности: {snippet.get('responsibility') or ''}",
+    ])
+
+
+class Command(BaseCommand):
+    help = 'Токены на бенчмарк и время на 100 вакансий: одиночный и пакетный анализ hh.ru'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sample', type=int, default=50, help='Вакансий очереди для оценки промптов')
+        parser.add_argument('--reset', action='store_true', help='Сбросить накопленные счетчики')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            reset_hh_ai_metrics()
+            self.stdout.write(self.style.SUCCESS('🧹 Счетчики анализа hh.ru сброшены'))
+            return
+
+        self._report_prompt_estimate(options['sample'])
+        self._report_metrics()
+
+    def _report_prompt_estimate(self, sample_size):
+        """Оценка входных токенов на вакансию по реальным вакансиям очереди"""
+        pipeline = get_hh_ai_pipeline_settings()
+        texts = [
+            _sample_vacancy_text(raw_data)
+            for raw_data in HHVacancyTemp.objects.order_by('-created_at').values_list('raw_data', flat=True)[:sample_size]
+        ]
+        if not texts:
+            self.stdout.write(self.style.WARNING('⚠️ Очередь HHVacancyTemp пуста - оценка промптов пропущена'))
+            return
+
+        our_vacancies_text = "\n".join(f"- {name}" for name in Vacancy.objects.values_list('name', flat=True))
+        our_grades_text = "\n".join(f"- {name}" for name in Grade.objects.values_list('name', flat=True))
+
+        self.stdout.write(self.style.SUCCESS(f'📊 Входные токены на вакансию (оценка по {len(texts)} вакансиям):'))
+        batch_sizes = sorted({1, 2, 4, max(1, pipeline['batch_size'])})
+        single_tokens = None
+        for batch_size in batch_sizes:
+            total = 0
+            for start in range(0, len(texts), batch_size):
+                chunk = texts[start:start + batch_size]
+                prompt = get_enhanced_ai_prompt(
+                    "\n\n".join(chunk), our_vacancies_text, our_grades_text, vacancies_count=len(chunk)
+                )
+                total += estimate_tokens(prompt, output_tokens=0)
+            per_vacancy = total / len(texts)
+            single_tokens = single_tokens or per_vacancy
+            self.stdout.write(
+                f'  пакет {batch_size:>2}: {per_vacancy:8.0f} токенов/вакансия   '
+                f'x{single_tokens / per_vacancy:.1f} к одиночному режиму'
+            )
+
+    def _report_metrics(self):
+        """Фактические счетчики, накопленные задачами анализа"""
+        self.stdout.write(self.style.SUCCESS('📈 Фактические метрики анализа:'))
+        for mode, data in get_hh_ai_metrics().items():
+            if not data['requests']:
+                self.stdout.write(f'  {mode:<6}: нет данных')
+                continue
+            self.stdout.write(
+                f"  {mode:<6}: запросов {data['requests']}, вакансий {data['vacancies']}, "
+                f"бенчмарков {data['benchmarks']}, токенов {data['tokens']}"
+            )
+            self.stdout.write(
+                f"          токенов на бенчмарк: {data['tokens_per_benchmark']}, "
+                f"сек на 100 вакансий: {data['request_seconds_per_100']} (запросы), "
+                f"{data['wall_seconds_per_100']} (реальное время)"
+            )
@@ -112,3 +112,56 @@ SPECIALIZATION_NAMES = [
 
 # Объединенные ключевые слова
 ALL_KEYWORDS = SEARCH_KEYWORDS + SPECIALIZATION_NAMES
+
+
+# ==================== ФИЛЬТРАЦИЯ ВАКАНСИЙ (apps.finance.vacancy_filter) ====================
+
+# Подходящие локации: подстроки названия области (города имеют свои ID, поэтому по названию)
+HH_ALLOWED_AREA_KEYWORDS = [
+    'беларусь', 'минск', 'гомель', 'могилев', 'витебск', 'гродно', 'брест', 'польша',
+]
+
+# Исключаемые локации (российские города)
+HH_EXCLUDED_AREA_KEYWORDS = [
+    'москва', 'санкт-петербург', 'нижний новгород', 'екатеринбург', 'новосибирск', 'казань',
+    'челябинск', 'омск', 'самара', 'ростов-на-дону', 'уфа', 'красноярск', 'пермь', 'волгоград',
+    'воронеж', 'саратов', 'краснодар', 'тольятти', 'барнаул', 'ижевск', 'ульяновск', 'владивосток',
+    'ярославль', 'иркутск', 'тюмень', 'хабаровск', 'новокузнецк', 'оренбург', 'кемерово', 'рязань',
+    'томск', 'астрахань', 'пенза', 'липецк', 'тула', 'киров', 'чебоксары', 'калининград', 'брянск',
+    'курск', 'иваново', 'магнитогорск', 'тверь', 'ставрополь', 'белгород', 'архангельск',
+    'владимир', 'сочи', 'курган', 'смоленск', 'калуга', 'чита', 'орел', 'волжский', 'череповец',
+    'мурманск', 'сургут', 'вологда', 'владикавказ', 'саранск', 'тамбов', 'стерлитамак', 'грозный',
+    'якутск', 'кострома', 'комсомольск-на-амуре', 'петрозаводск', 'таганрог', 'нижневартовск',
+    'йошкар-ола', 'братск', 'новороссийск', 'шахты', 'дзержинск', 'орск', 'сыктывкар', 'ангарск',
+    'благовещенск', 'прокопьевск', 'бийск', 'псков', 'энгельс', 'рыбинск', 'балашиха',
+    'северодвинск', 'подольск', 'королев', 'сызрань', 'норильск', 'златоуст', 'каменск-уральский',
+    'мытищи', 'люберцы', 'волгодонск', 'новочеркасск', 'абакан', 'находка', 'уссурийск',
+    'березники', 'салават', 'электросталь', 'мичуринск', 'первоуральск', 'рубцовск', 'альметьевск',
+    'петропавловск-камчатский', 'лысьва', 'серпухов', 'чайковский', 'муром', 'ессентуки',
+    'новошахтинск', 'железногорск', 'зеленодольск', 'киселевск', 'новокуйбышевск', 'сергиев посад',
+    'армавир', 'балаково', 'северск', 'петропавловск', 'камышин', 'минеральные воды', 'кызыл',
+    'новотроицк', 'жуковский', 'елец', 'азов', 'бердск', 'элиста', 'новоалтайск', 'качканар',
+    'усть-илимск', 'серов', 'зеленогорск', 'соликамск', 'мелеуз', 'кирово-чепецк', 'кропоткин',
+    'новоуральск', 'чистополь', 'первомайск', 'димитровград', 'красногорск', 'каспийск', 'губкин',
+    'каменск-шахтинский', 'наро-фоминск', 'кубань', 'егорьевск', 'батайск', 'копейск',
+    'железнодорожный', 'пятигорск', 'коломна', 'реутов', 'керчь', 'североморск', 'ачинск',
+]
+
+# Разрешенные IT роли (по ID)
+HH_ALLOWED_ROLE_IDS = list(HH_PROFESSIONAL_ROLES.values())
+
+# Явно не-IT вакансии (подстроки названия)
+HH_EXCLUDED_TITLE_KEYWORDS = [
+    'бухгалтер', 'кассир', 'продавец', 'менеджер по продажам',
+    'водитель', 'грузчик', 'уборщик', 'охранник', 'секретарь',
+    'оператор', 'консультант', 'администратор ресепшн',
+]
+
+# Минимальные пороги по валютам (чтобы исключить стажировки и низкооплачиваемые позиции)
+HH_MIN_SALARY_THRESHOLDS = {
+    'USD': 500,   # Минимум $500
+    'EUR': 450,   # Минимум €450
+    'PLN': 3000,  # Минимум 3000 PLN
+    'BYN': 1500,  # Минимум 1500 BYN
+    'RUB': 50000, # Минимум 50000 RUB
+}
@@ -0,0 +1,17 @@
+"""
+Django команда для перестройки материализованной статистики бенчмарков (BenchmarkStats)
+"""
+from django.core.management.base import BaseCommand
+
+from apps.finance.benchmark_stats import refresh_benchmark_stats
+
+
+class Command(BaseCommand):
+    help = 'Полная перестройка статистики бенчмарков для дашборда (после деплоя или массовых правок)'
+
+    def handle(self, *args, **options):
+        result = refresh_benchmark_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Статистика перестроена: бенчмарков {result['benchmarks']}, "
+            f"ячеек {result['cells']}, {result['elapsed_ms']} мс"
+        ))
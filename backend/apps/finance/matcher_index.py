@@ -0,0 +1,170 @@
+"""
+Индекс сопоставления названий вакансий и грейдов из ответов AI
+
+Раньше каждый бенчмарк из ответа Gemini выполнял запрос name__iexact, загружал
+все активные вакансии и считал SequenceMatcher с каждой. Индекс строится один
+раз (на процесс, до изменения Vacancy/Grade): точные совпадения - словарь,
+нечеткий поиск - только по кандидатам из инвертированного индекса триграмм,
+грейды - через заранее разрешенную карту синонимов. Сопоставление не делает
+запросов к БД.
+
+Индекс хранится в VersionedLocalCache и перестраивается после изменения
+Vacancy или Grade (сигналы finance).
+"""
+
+from difflib import SequenceMatcher
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from logic.utilities.versioned_cache import VersionedLocalCache
+
+
+VERSION_KEY = 'finance_matcher_index_version'
+
+# Минимальный комбинированный скор нечеткого совпадения вакансии
+VACANCY_MATCH_THRESHOLD = 0.7
+
+# Нормализация грейдов (маппинг синонимов)
+GRADE_SYNONYMS = {
+    'junior': ['Junior', 'junior', 'jun', 'младший'],
+    'junior+': ['Junior+', 'junior+', 'jun+'],
+    'middle': ['Middle', 'middle', 'mid', 'средний'],
+    'middle+': ['Middle+', 'middle+', 'mid+'],
+    'senior': ['Senior', 'senior', 'sen', 'старший', 'ведущий'],
+    'senior+': ['Senior+', 'senior+', 'sen+'],
+    'lead': ['Lead', 'lead', 'лид', 'тимлид', 'руководитель'],
+    'head': ['Head', 'head', 'начальник', 'заведующий']
+}
+
+
+def _trigrams(text: str) -> FrozenSet[str]:
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class MatcherIndex:
+    """Снимок вакансий и грейдов для сопоставления без запросов к БД"""
+
+    def __init__(self, vacancies, grades):
+        # Точные совпадения (как name__iexact(...).first(): первая в порядке queryset)
+        self.vacancies_by_name: Dict[str, object] = {}
+        for vacancy in vacancies:
+            self.vacancies_by_name.setdefault(vacancy.name.strip().lower(), vacancy)
+
+        # Нечеткий поиск только по активным вакансиям
+        self._active: List[Tuple[object, str, FrozenSet[str]]] = []
+        self._trigram_index: Dict[str, List[int]] = {}
+        for vacancy in vacancies:
+            if not vacancy.is_active:
+                continue
+            name_lower = vacancy.name.lower()
+            position = len(self._active)
+            self._active.append((vacancy, name_lower, frozenset(name_lower.split())))
+            for trigram in _trigrams(name_lower):
+                self._trigram_index.setdefault(trigram, []).append(position)
+
+        self.grades_by_name: Dict[str, object] = {}
+        for grade in grades:
+            self.grades_by_name.setdefault(grade.name.strip().lower(), grade)
+
+        # Синоним -> грейд: первый синоним группы, который есть среди наших грейдов
+        self.grades_by_synonym: Dict[str, object] = {}
+        for synonyms in GRADE_SYNONYMS.values():
+            resolved = next(
+                (self.grades_by_name[s.lower()] for s in synonyms if s.lower() in self.grades_by_name),
+                None
+            )
+            if resolved is not None:
+                for synonym in synonyms:
+                    self.grades_by_synonym.setdefault(synonym.lower(), resolved)
+
+    @classmethod
+    def build(cls) -> 'MatcherIndex':
+        from apps.vacancies.models import Vacancy
+        from .models import Grade
+
+        return cls(
+            list(Vacancy.objects.only('id', 'name', 'is_active')),
+            list(Grade.objects.all()),
+        )
+
+    # ==================== ВАКАНСИИ ====================
+
+    def _candidates(self, name_lower: str) -> List[int]:
+        """Позиции вакансий, имеющих хотя бы одну общую триграмму с названием"""
+        candidates = set()
+        for trigram in _trigrams(name_lower):
+            candidates.update(self._trigram_index.get(trigram, ()))
+        return sorted(candidates)
+
+    def match_vacancy(self, ai_vacancy_name: str) -> Tuple[Optional[object], float, bool]:
+        """
+        Сопоставление названия вакансии
+
+        Returns:
+            (вакансия или None, скор, точное ли совпадение)
+        """
+        if not ai_vacancy_name or ai_vacancy_name.strip() == '':
+            return None, 0.0, False
+
+        ai_name_lower = ai_vacancy_name.lower().strip()
+        exact = self.vacancies_by_name.get(ai_name_lower)
+        if exact is not None:
+            return exact, 1.0, True
+
+        ai_words = frozenset(ai_name_lower.split())
+        best_match = None
+        best_score = VACANCY_MATCH_THRESHOLD
+        matcher = SequenceMatcher(None, '', ai_name_lower)
+        ai_length = len(ai_name_lower)
+
+        # Кандидаты в порядке полного перебора: при равном скоре побеждает первая вакансия
+        for position in self._candidates(ai_name_lower):
+            vacancy, name_lower, vacancy_words = self._active[position]
+            word_overlap = len(ai_words & vacancy_words) / len(ai_words | vacancy_words)
+
+            # Верхние оценки ratio отсекают кандидатов без полного SequenceMatcher
+            length_bound = 2 * min(ai_length, len(name_lower)) / (ai_length + len(name_lower))
+            if length_bound * 0.7 + word_overlap * 0.3 <= best_score:
+                continue
+            matcher.set_seq1(name_lower)
+            if matcher.quick_ratio() * 0.7 + word_overlap * 0.3 <= best_score:
+                continue
+
+            combined_score = matcher.ratio() * 0.7 + word_overlap * 0.3
+            if combined_score > best_score:
+                best_score = combined_score
+                best_match = vacancy
+
+        return best_match, best_score, False
+
+    # ==================== ГРЕЙДЫ ====================
+
+    def match_grade(self, ai_grade_name: str) -> Tuple[Optional[object], bool]:
+        """
+        Сопоставление грейда: точное название, затем карта синонимов
+
+        Returns:
+            (грейд или None, точное ли совпадение)
+        """
+        if not ai_grade_name or ai_grade_name.strip() == '':
+            return None, False
+
+        exact = self.grades_by_name.get(ai_grade_name.strip().lower())
+        if exact is not None:
+            return exact, True
+        return self.grades_by_synonym.get(ai_grade_name.lower().strip()), False
+
+
+matcher_index_cache: VersionedLocalCache[MatcherIndex] = VersionedLocalCache(
+    VERSION_KEY, MatcherIndex.build, description='индекса сопоставления'
+)
+
+
+def get_matcher_index() -> MatcherIndex:
+    """Индекс текущего процесса; перестраивается после изменения Vacancy/Grade"""
+    return matcher_index_cache.get()
+
+
+def invalidate_matcher_index():
+    """Сбрасывает индекс в этом процессе и увеличивает версию для остальных"""
+    matcher_index_cache.invalidate()
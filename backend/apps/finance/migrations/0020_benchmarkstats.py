@@ -0,0 +1,46 @@
+# Generated by Django 4.2.16 on 2026-10-17 00:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vacancies', '0014_add_stage_fields_and_remove_invite_prompt'),
+        ('finance', '0019_add_eur_currency_support'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BenchmarkStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('candidate', 'Кандидат'), ('vacancy', 'Вакансия')], max_length=20, verbose_name='Тип бенчмарка')),
+                ('location', models.CharField(max_length=200, verbose_name='Локация')),
+                ('month', models.DateField(help_text='Первый день месяца добавления бенчмарков', verbose_name='Месяц')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Количество бенчмарков')),
+                ('salary_from_sum', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Сумма зарплат от')),
+                ('salary_from_min', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Минимальная зарплата от')),
+                ('salary_from_p25', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Зарплата от, p25')),
+                ('salary_from_p50', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Зарплата от, медиана')),
+                ('salary_from_p75', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Зарплата от, p75')),
+                ('salary_top_sum', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Сумма верхних границ')),
+                ('salary_top_max', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Максимальная верхняя граница')),
+                ('salary_top_p25', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Верхняя граница, p25')),
+                ('salary_top_p50', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Верхняя граница, медиана')),
+                ('salary_top_p75', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Верхняя граница, p75')),
+                ('salary_from_values', models.JSONField(default=list, verbose_name='Зарплаты от (по возрастанию)')),
+                ('salary_top_values', models.JSONField(default=list, verbose_name='Верхние границы (по возрастанию)')),
+                ('refreshed_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+                ('grade', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='benchmark_stats', to='finance.grade', verbose_name='Грейд')),
+                ('vacancy', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='benchmark_stats', to='vacancies.vacancy', verbose_name='Вакансия')),
+            ],
+            options={
+                'verbose_name': 'Статистика бенчмарков',
+                'verbose_name_plural': 'Статистика бенчмарков',
+                'indexes': [models.Index(fields=['vacancy', 'grade', 'month'], name='finance_ben_vacancy_057297_idx')],
+                'unique_together': {('type', 'vacancy', 'grade', 'location', 'month')},
+            },
+        ),
+    ]
@@ -249,15 +249,11 @@ class SalaryRange(models.Model):
         # Вызываем clean для валидации
         self.clean()
         
-        # Всегда пересчитываем курсы валют при сохранении
-        from logic.finance.salary_service import SalaryService
-        min_byn, max_byn = SalaryService.calculate_byn_amounts(self.salary_min_usd, self.salary_max_usd)
-        min_pln, max_pln = SalaryService.calculate_pln_amounts(self.salary_min_usd, self.salary_max_usd)
-        
-        self.salary_min_byn = min_byn
-        self.salary_max_byn = max_byn
-        self.salary_min_pln = min_pln
-        self.salary_max_pln = max_pln
+        # Всегда пересчитываем курсы валют при сохранении (по общему снимку курсов и налогов)
+        from logic.finance.rate_snapshot import get_rate_snapshot
+        amounts = get_rate_snapshot().salary_amounts(self.salary_min_usd, self.salary_max_usd)
+        for field, value in amounts.items():
+            setattr(self, field, value)
         
         super().save(*args, **kwargs)
     
@@ -291,9 +287,8 @@ class SalaryRange(models.Model):
     @classmethod
     def update_all_currency_amounts(cls):
         """Обновляет суммы в других валютах для всех зарплатных вилок"""
-        from .logic.salary_service import SalaryService
-        for salary_range in cls.objects.all():
-            SalaryService.update_salary_range_currency_amounts(salary_range)
+        from logic.finance.salary_service import SalaryService
+        return SalaryService.recalculate_all_currency_amounts()
 
 
 class Domain(models.TextChoices):
@@ -595,6 +590,59 @@ class Benchmark(models.Model):
         return domain_descriptions.get(self.domain, "")
 
 
+class BenchmarkStats(models.Model):
+    """
+    Материализованная статистика активных бенчмарков.
+    Одна строка на тип × вакансию × грейд × локацию × месяц добавления; хранит агрегаты,
+    точные перцентили и отсортированные значения зарплат для объединения ячеек.
+    Обновляется инкрементально (apps.finance.benchmark_stats) и задачей Celery Beat.
+    """
+    
+    type = models.CharField(_("Тип бенчмарка"), max_length=20, choices=BenchmarkType.choices)
+    vacancy = models.ForeignKey(
+        'vacancies.Vacancy',
+        on_delete=models.CASCADE,
+        related_name='benchmark_stats',
+        verbose_name=_('Вакансия')
+    )
+    grade = models.ForeignKey(
+        Grade,
+        on_delete=models.CASCADE,
+        related_name='benchmark_stats',
+        verbose_name=_('Грейд')
+    )
+    location = models.CharField(_("Локация"), max_length=200)
+    month = models.DateField(_("Месяц"), help_text=_("Первый день месяца добавления бенчмарков"))
+    
+    count = models.PositiveIntegerField(_("Количество бенчмарков"), default=0)
+    salary_from_sum = models.DecimalField(_("Сумма зарплат от"), max_digits=16, decimal_places=2, default=0)
+    salary_from_min = models.DecimalField(_("Минимальная зарплата от"), max_digits=12, decimal_places=2)
+    salary_from_p25 = models.DecimalField(_("Зарплата от, p25"), max_digits=12, decimal_places=2)
+    salary_from_p50 = models.DecimalField(_("Зарплата от, медиана"), max_digits=12, decimal_places=2)
+    salary_from_p75 = models.DecimalField(_("Зарплата от, p75"), max_digits=12, decimal_places=2)
+    # Верхняя граница: salary_to, если указана, иначе salary_from
+    salary_top_sum = models.DecimalField(_("Сумма верхних границ"), max_digits=16, decimal_places=2, default=0)
+    salary_top_max = models.DecimalField(_("Максимальная верхняя граница"), max_digits=12, decimal_places=2)
+    salary_top_p25 = models.DecimalField(_("Верхняя граница, p25"), max_digits=12, decimal_places=2)
+    salary_top_p50 = models.DecimalField(_("Верхняя граница, медиана"), max_digits=12, decimal_places=2)
+    salary_top_p75 = models.DecimalField(_("Верхняя граница, p75"), max_digits=12, decimal_places=2)
+    salary_from_values = models.JSONField(_("Зарплаты от (по возрастанию)"), default=list)
+    salary_top_values = models.JSONField(_("Верхние границы (по возрастанию)"), default=list)
+    
+    refreshed_at = models.DateTimeField(_("Обновлено"), auto_now=True)
+    
+    class Meta:
+        verbose_name = _("Статистика бенчмарков")
+        verbose_name_plural = _("Статистика бенчмарков")
+        unique_together = ['type', 'vacancy', 'grade', 'location', 'month']
+        indexes = [
+            models.Index(fields=['vacancy', 'grade', 'month']),
+        ]
+    
+    def __str__(self):
+        return f"{self.vacancy_id}/{self.grade_id} {self.location} {self.month:%Y-%m}: {self.count}"
+
+
 class DataSource(models.TextChoices):
     """Источники данных о вакансиях"""
     HH_RU = "hh_ru", _("HH.ru")
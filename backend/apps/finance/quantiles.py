@@ -0,0 +1,175 @@
+"""
+Точные квантили зарплат бенчмарков
+
+SQLite не умеет считать перцентили, поэтому медиану раньше заменяли средним.
+Здесь квантили считаются по отсортированным значениям с линейной
+интерполяцией между соседними точками (как numpy.percentile по умолчанию).
+
+GroupedQuantiles за один проход по строкам раскладывает значения по группам
+в колонки (значения и id строк), затем сортирует каждую колонку один раз и
+считает p25/p50/p75, IQR и границы выбросов (правило 1.5 × IQR).
+benchmark_quantiles() делает это для таблицы Benchmark одним запросом.
+"""
+
+import heapq
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# Поля зарплат, по которым считаются квантили
+QUANTILE_FIELDS = ('salary_from', 'salary_to')
+
+# Допустимые группировки: имя параметра -> поле запроса
+GROUP_FIELDS = {
+    'type': 'type',
+    'grade': 'grade__name',
+    'vacancy': 'vacancy__name',
+    'location': 'location',
+    'domain': 'domain',
+    'work_format': 'work_format',
+}
+
+# Множитель IQR для границ выбросов (правило Тьюки)
+IQR_FACTOR = 1.5
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> Optional[float]:
+    """
+    Квантиль q (0..1) отсортированной последовательности
+
+    Returns:
+        Значение квантиля или None для пустой последовательности
+    """
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = position - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+def merge_sorted(value_lists: Iterable[Sequence[float]]) -> List[float]:
+    """Слияние уже отсортированных списков значений (например, из нескольких ячеек статистики)"""
+    return list(heapq.merge(*value_lists))
+
+
+def summarize(sorted_values: Sequence[float]) -> Optional[Dict]:
+    """
+    Сводка по отсортированным значениям
+
+    Returns:
+        count, min, p25, p50, p75, max, mean, iqr, lower_fence, upper_fence, outliers
+        или None для пустой последовательности
+    """
+    if not sorted_values:
+        return None
+    p25 = percentile(sorted_values, 0.25)
+    p75 = percentile(sorted_values, 0.75)
+    iqr = p75 - p25
+    lower_fence = p25 - IQR_FACTOR * iqr
+    upper_fence = p75 + IQR_FACTOR * iqr
+    return {
+        'count': len(sorted_values),
+        'min': sorted_values[0],
+        'p25': p25,
+        'p50': percentile(sorted_values, 0.5),
+        'p75': p75,
+        'max': sorted_values[-1],
+        'mean': sum(sorted_values) / len(sorted_values),
+        'iqr': iqr,
+        'lower_fence': lower_fence,
+        'upper_fence': upper_fence,
+        'outliers': sum(1 for value in sorted_values if value < lower_fence or value > upper_fence),
+    }
+
+
+class GroupedQuantiles:
+    """
+    Однопроходный сбор значений по группам
+
+    Пример:
+        grouped = GroupedQuantiles()
+        for row_id, group_key, salary_from, salary_to in rows:
+            grouped.add(group_key, row_id, (salary_from, salary_to))
+        summaries = grouped.summaries()
+    """
+
+    def __init__(self, fields: Sequence[str] = QUANTILE_FIELDS):
+        self.fields = tuple(fields)
+        # группа -> [значения поля 1, id строк поля 1, значения поля 2, id строк поля 2, ...]
+        self._columns: Dict[tuple, List[list]] = {}
+
+    def add(self, group_key: tuple, row_id: int, values: Sequence):
+        """Добавляет строку; пустые значения (None) в квантили не попадают"""
+        columns = self._columns.get(group_key)
+        if columns is None:
+            columns = self._columns[group_key] = [[] for _ in range(2 * len(self.fields))]
+        position = 0
+        for value in values:
+            if value is not None:
+                columns[position].append(value)
+                columns[position + 1].append(row_id)
+            position += 2
+
+    def __len__(self):
+        return len(self._columns)
+
+    def summaries(self, with_outliers: bool = False) -> Dict[tuple, Dict]:
+        """
+        Returns:
+            {группа: {поле: summarize(...)}}; с with_outliers у поля есть
+            outlier_ids - id строк за границами выбросов
+        """
+        result = {}
+        for group_key, columns in self._columns.items():
+            group = {}
+            for position, field in enumerate(self.fields):
+                column, ids = columns[2 * position], columns[2 * position + 1]
+                summary = summarize(sorted(column))
+                if summary is not None and with_outliers:
+                    lower_fence, upper_fence = summary['lower_fence'], summary['upper_fence']
+                    summary['outlier_ids'] = [
+                        row_id for value, row_id in zip(column, ids) if value < lower_fence or value > upper_fence
+                    ]
+                group[field] = summary
+            result[group_key] = group
+        return result
+
+
+def benchmark_quantiles(queryset=None, group_by: Sequence[str] = ('type',), with_outliers: bool = False) -> List[Dict]:
+    """
+    Квантили salary_from/salary_to по группам бенчмарков одним запросом
+
+    Args:
+        queryset: бенчмарки (по умолчанию - активные)
+        group_by: ключи GROUP_FIELDS; пустой - одна группа на весь queryset
+        with_outliers: добавить id бенчмарков-выбросов
+
+    Returns:
+        [{'group': {ключ: значение}, 'salary_from': сводка, 'salary_to': сводка}, ...]
+        по убыванию количества бенчмарков
+    """
+    from .models import Benchmark
+
+    unknown = [key for key in group_by if key not in GROUP_FIELDS]
+    if unknown:
+        raise ValueError(f"Неизвестная группировка: {', '.join(unknown)}")
+    if queryset is None:
+        queryset = Benchmark.objects.filter(is_active=True)
+
+    group_size = len(group_by)
+    grouped = GroupedQuantiles()
+    rows = queryset.order_by().values_list(
+        'id', *(GROUP_FIELDS[key] for key in group_by), *QUANTILE_FIELDS
+    )
+    for row in rows:
+        grouped.add(row[1:1 + group_size], row[0], (
+            float(row[-2]) if row[-2] is not None else None,
+            float(row[-1]) if row[-1] is not None else None,
+        ))
+
+    result = [
+        {'group': dict(zip(group_by, group_key)), **fields}
+        for group_key, fields in grouped.summaries(with_outliers=with_outliers).items()
+    ]
+    result.sort(key=lambda item: -(item['salary_from'] or {}).get('count', 0))
+    return result
@@ -0,0 +1,61 @@
+"""
+Сигналы приложения finance
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.vacancies.models import Vacancy
+
+from logic.finance.rate_snapshot import rate_snapshot_cache
+
+from .benchmark_stats import mark_benchmark_stats_dirty
+from .grade_order import grade_order_cache
+from .matcher_index import matcher_index_cache
+from .models import Benchmark, CurrencyRate, Grade, PLNTax
+
+
+@receiver(post_save, sender=Vacancy)
+@receiver(post_delete, sender=Vacancy)
+@receiver(post_save, sender=Grade)
+@receiver(post_delete, sender=Grade)
+def reset_matcher_index(sender, **kwargs):
+    """Изменение вакансий или грейдов делает индекс сопоставления устаревшим"""
+    matcher_index_cache.invalidate_on_commit()
+
+
+@receiver(post_save, sender=Grade)
+@receiver(post_delete, sender=Grade)
+def reset_grade_order(sender, **kwargs):
+    """Новый, переименованный или удаленный грейд меняет ранги в диапазонах правил"""
+    grade_order_cache.invalidate_on_commit()
+
+
+@receiver(post_save, sender=CurrencyRate)
+@receiver(post_delete, sender=CurrencyRate)
+@receiver(post_save, sender=PLNTax)
+@receiver(post_delete, sender=PLNTax)
+def reset_rate_snapshot(sender, **kwargs):
+    """Курсы НБРБ (update_currency_rates_in_db, админка) и налоги PLN входят в снимок курсов"""
+    rate_snapshot_cache.invalidate_on_commit()
+
+
+@receiver(pre_save, sender=Benchmark)
+def remember_benchmark_stats_pair(sender, instance, raw=False, **kwargs):
+    """При смене вакансии или грейда пересчитать нужно и прежнюю пару"""
+    if instance.pk and not raw:
+        instance._previous_stats_pair = Benchmark.objects.filter(pk=instance.pk).values_list(
+            'vacancy_id', 'grade_id'
+        ).first()
+
+
+@receiver(post_save, sender=Benchmark)
+@receiver(post_delete, sender=Benchmark)
+def refresh_benchmark_stats_pair(sender, instance, raw=False, **kwargs):
+    """Добавление, изменение, деактивация и удаление бенчмарка меняют его ячейки статистики"""
+    if raw:
+        return
+    pairs = {(instance.vacancy_id, instance.grade_id)}
+    previous_pair = getattr(instance, '_previous_stats_pair', None)
+    if previous_pair:
+        pairs.add(previous_pair)
+    mark_benchmark_stats_dirty(pairs)
@@ -6,10 +6,12 @@ from celery import shared_task
 from django.utils import timezone
 from datetime import datetime, timedelta
 
-from .models import Benchmark, BenchmarkSettings, Grade, BenchmarkType, HHVacancyTemp
-# Импорт HHVacancyService временно отключен
-# from .logic.services import HHVacancyService
-from apps.vacancies.models import Vacancy
+from .models import Benchmark, BenchmarkSettings, Grade, HHVacancyTemp
+# HHVacancyService временно отключен: без него потоки AI анализа очереди не запускаются
+try:
+    from .logic.services import HHVacancyService
+except ImportError:
+    HHVacancyService = None
 import time
 
 logger = logging.getLogger('apps.finance')
@@ -24,6 +26,7 @@ def _is_valid_vacancy(vacancy_item: dict) -> bool:
     
     ИСТОЧНИКИ ДАННЫХ:
     - hh.ru API: данные вакансии (area, professional_roles, salary, name)
+    - VacancyFilter: правила из hh_search_constants, скомпилированные один раз
     
     ОБРАБОТКА:
     - Проверка локации (только Беларусь и Польша)
@@ -40,76 +43,12 @@ def _is_valid_vacancy(vacancy_item: dict) -> bool:
     - Передает: результат валидации в fetch_hh_vacancies_task
     - Может вызываться из: fetch_hh_vacancies_task
     """
-    # Проверяем локацию
-    area = vacancy_item.get('area', {})
-    area_id = area.get('id')
-    area_name = area.get('name', '').lower()
-    
-    # Только Беларусь и Польша (но города могут иметь свои ID)
-    # Проверяем по названию области, так как города имеют свои ID
-    if not any(country in area_name for country in ['беларусь', 'минск', 'гомель', 'могилев', 'витебск', 'гродно', 'брест', 'польша']):
-        logger.debug(f"Пропускаем вакансию {vacancy_item.get('id')} - неподходящая локация: {area_name} (ID: {area_id})")
-        return False
-    
-    # Дополнительная проверка по названию области (исключаем Россию)
-    russian_cities = ['москва', 'санкт-петербург', 'нижний новгород', 'екатеринбург', 'новосибирск', 'казань', 'челябинск', 'омск', 'самара', 'ростов-на-дону', 'уфа', 'красноярск', 'пермь', 'волгоград', 'воронеж', 'саратов', 'краснодар', 'тольятти', 'барнаул', 'ижевск', 'ульяновск', 'владивосток', 'ярославль', 'иркутск', 'тюмень', 'хабаровск', 'новокузнецк', 'оренбург', 'кемерово', 'рязань', 'томск', 'астрахань', 'пенза', 'липецк', 'тула', 'киров', 'чебоксары', 'калининград', 'брянск', 'курск', 'иваново', 'магнитогорск', 'тверь', 'ставрополь', 'белгород', 'архангельск', 'владимир', 'сочи', 'курган', 'смоленск', 'калуга', 'чита', 'орел', 'волжский', 'череповец', 'мурманск', 'сургут', 'вологда', 'владикавказ', 'саранск', 'тамбов', 'стерлитамак', 'грозный', 'якутск', 'кострома', 'комсомольск-на-амуре', 'петрозаводск', 'таганрог', 'нижневартовск', 'йошкар-ола', 'братск', 'новороссийск', 'шахты', 'дзержинск', 'орск', 'сыктывкар', 'ангарск', 'благовещенск', 'прокопьевск', 'бийск', 'псков', 'энгельс', 'рыбинск', 'балашиха', 'северодвинск', 'подольск', 'королев', 'сызрань', 'норильск', 'златоуст', 'каменск-уральский', 'мытищи', 'люберцы', 'волгодонск', 'новочеркасск', 'абакан', 'находка', 'уссурийск', 'березники', 'салават', 'электросталь', 'мичуринск', 'первоуральск', 'рубцовск', 'альметьевск', 'петропавловск-камчатский', 'лысьва', 'серпухов', 'чайковский', 'муром', 'ессентуки', 'новошахтинск', 'железногорск', 'зеленодольск', 'киселевск', 'новокуйбышевск', 'сергиев посад', 'армавир', 'балаково', 'северск', 'петропавловск', 'камышин', 'минеральные воды', 'кызыл', 'новотроицк', 'жуковский', 'елец', 'азов', 'бердск', 'элиста', 'новоалтайск', 'качканар', 'усть-илимск', 'серов', 'зеленогорск', 'соликамск', 'мелеуз', 'кирово-чепецк', 'кропоткин', 'новоуральск', 'железногорск', 'чистополь', 'первомайск', 'димитровград', 'красногорск', 'каспийск', 'губкин', 'каменск-шахтинский', 'наро-фоминск', 'кубань', 'егорьевск', 'батайск', 'копейск', 'железнодорожный', 'мурманск', 'пятигорск', 'коломна', 'реутов', 'керчь', 'североморск', 'каменск-уральский', 'ачинск', 'ессентуки', 'новошахтинск', 'железногорск', 'зеленодольск', 'киселевск', 'новокуйбышевск', 'сергиев посад', 'армавир', 'балаково', 'северск', 'петропавловск', 'камышин', 'минеральные воды', 'кызыл', 'новотроицк', 'жуковский', 'елец', 'азов', 'бердск', 'элиста', 'новоалтайск', 'качканар', 'усть-илимск', 'серов', 'зеленогорск', 'соликамск', 'мелеуз', 'кирово-чепецк', 'кропоткин', 'новоуральск', 'железногорск', 'чистополь', 'первомайск', 'димитровград', 'красногорск', 'каспийск', 'губкин', 'каменск-шахтинский', 'наро-фоминск', 'кубань', 'егорьевск', 'батайск', 'копейск', 'железнодорожный', 'мурманск', 'пятигорск', 'коломна', 'реутов', 'керчь', 'североморск', 'ачинск']
-    
-    if any(city in area_name for city in russian_cities):
-        logger.debug(f"Пропускаем вакансию {vacancy_item.get('id')} - российский город: {area_name}")
-        return False
-    
-    # Проверяем специализацию (professional_roles)
-    professional_roles = vacancy_item.get('professional_roles', [])
-    if not professional_roles:
-        logger.debug(f"Пропускаем вакансию {vacancy_item.get('id')} - нет профессиональных ролей")
-        return False
-    
-    # Разрешенные IT роли (по ID)
-    allowed_role_ids = ['96', '34', '160', '73', '107', '112', '113', '121', '124']
-    
-    role_ids = [role.get('id') for role in professional_roles]
-    if not any(role_id in allowed_role_ids for role_id in role_ids):
-        logger.debug(f"Пропускаем вакансию {vacancy_item.get('id')} - неподходящая роль ID: {role_ids}")
-        return False
-    
-    # Дополнительная проверка по названию вакансии (исключаем явно не-IT)
-    vacancy_name = vacancy_item.get('name', '').lower()
-    excluded_keywords = [
-        'бухгалтер', 'кассир', 'продавец', 'менеджер по продажам',
-        'водитель', 'грузчик', 'уборщик', 'охранник', 'секретарь',
-        'оператор', 'консультант', 'администратор ресепшн'
-    ]
-    
-    if any(keyword in vacancy_name for keyword in excluded_keywords):
-        logger.debug(f"Пропускаем вакансию {vacancy_item.get('id')} - не-IT название: {vacancy_name}")
-        return False
-    
-    # Проверяем наличие зарплаты
-    salary = vacancy_item.get('salary')
-    if not salary or (not salary.get('from') and not salary.get('to')):
-        logger.debug(f"Пропускаем вакансию {vacancy_item.get('id')} - отсутствует информация о зарплате")
-        return False
-    
-    # Проверяем минимальные пороги зарплат
-    salary_from = salary.get('from')
-    salary_to = salary.get('to')
-    min_salary = salary_from or salary_to
-    currency = salary.get('currency', '')
-    
-    # Минимальные пороги по валютам (чтобы исключить стажировки и низкооплачиваемые позиции)
-    min_thresholds = {
-        'USD': 500,   # Минимум $500
-        'EUR': 450,   # Минимум €450
-        'PLN': 3000,  # Минимум 3000 PLN
-        'BYN': 1500,  # Минимум 1500 BYN
-        'RUB': 50000, # Минимум 50000 RUB
-    }
+    from .vacancy_filter import REJECTION_REASONS, get_vacancy_filter
     
-    threshold = min_thresholds.get(currency, 0)
-    if threshold and min_salary < threshold:
-        logger.debug(f"Пропускаем вакансию {vacancy_item.get('id')} - зарплата {min_salary} {currency} ниже порога {threshold}")
+    reason = get_vacancy_filter().check(vacancy_item)
+    if reason:
+        logger.debug(f"Пропускаем вакансию {vacancy_item.get('id')} - {REJECTION_REASONS[reason]}")
         return False
-    
     return True
 
 
@@ -382,6 +321,7 @@ def generate_benchmark_statistics():
     - Статистика по типам бенчмарков
     - Статистика по грейдам
     - Статистика по локациям
+    - Точные медианы, квартили и выбросы по типам и грейдам (apps.finance.quantiles)
     - Подсчет общего количества бенчмарков
     
     ВЫХОДЯЩИЕ ДАННЫЕ:
@@ -394,6 +334,7 @@ def generate_benchmark_statistics():
     """
     try:
         from django.db.models import Avg, Count, Min, Max
+        from .quantiles import benchmark_quantiles
         
         # Статистика по типам бенчмарков
         type_stats = Benchmark.objects.filter(is_active=True).values('type').annotate(
@@ -418,9 +359,24 @@ def generate_benchmark_statistics():
             count=Count('id')
         ).order_by('-count')[:10]
         
+        # Avg не заменяет медиану: квантили считаются точно, по одному запросу на группировку
+        def with_quantiles(items, key, group_by):
+            quantiles = {item['group'][group_by]: item for item in benchmark_quantiles(group_by=[group_by])}
+            return [
+                {
+                    **item,
+                    'salary_from_quantiles': quantiles.get(item[key], {}).get('salary_from'),
+                    'salary_to_quantiles': quantiles.get(item[key], {}).get('salary_to'),
+                }
+                for item in items
+            ]
+        
+        type_stats = with_quantiles(type_stats, 'type', 'type')
+        grade_stats = with_quantiles(grade_stats, 'grade__name', 'grade')
+        
         statistics = {
-            'type_stats': list(type_stats),
-            'grade_stats': list(grade_stats),
+            'type_stats': type_stats,
+            'grade_stats': grade_stats,
             'location_stats': list(location_stats),
             'total_benchmarks': Benchmark.objects.filter(is_active=True).count(),
             'generated_at': timezone.now().isoformat()
@@ -440,6 +396,33 @@ def generate_benchmark_statistics():
         return {'success': False, 'message': error_msg}
 
 
+@shared_task
+def refresh_benchmark_stats():
+    """
+    Полная перестройка материализованной статистики бенчмарков (BenchmarkStats)
+    
+    Инкрементальное обновление выполняется при изменении бенчмарков; задача
+    по расписанию исправляет ячейки, затронутые в обход сигналов (queryset.update).
+    
+    ВЫХОДЯЩИЕ ДАННЫЕ:
+    - Словарь с количеством бенчмарков, ячеек и временем перестройки
+    
+    СВЯЗИ:
+    - Использует: apps.finance.benchmark_stats.refresh_benchmark_stats
+    - Может вызываться из: Celery Beat
+    """
+    try:
+        from .benchmark_stats import refresh_benchmark_stats as rebuild_benchmark_stats
+        
+        result = rebuild_benchmark_stats()
+        return {'success': True, **result}
+        
+    except Exception as e:
+        error_msg = f"Ошибка при перестройке статистики бенчмарков: {str(e)}"
+        logger.error(error_msg)
+        return {'success': False, 'message': error_msg}
+
+
 @shared_task(bind=True, max_retries=3)
 def fetch_hh_vacancies_task(self):
     """Временно отключена из-за отсутствия HHVacancyService"""
@@ -474,6 +457,8 @@ def _fetch_hh_vacancies_task_disabled(self):
     """
     try:
         from .management.commands.hh_search_constants import HH_PROFESSIONAL_ROLES, HH_LOCATIONS, ALL_KEYWORDS
+        from .vacancy_filter import format_rejections, get_vacancy_filter
+        from collections import Counter
         from datetime import datetime, timedelta
         
         settings = BenchmarkSettings.load()
@@ -488,6 +473,8 @@ def _fetch_hh_vacancies_task_disabled(self):
         
         # hh_service = HHVacancyService()  # Временно отключено
         total_fetched = 0
+        vacancy_filter = get_vacancy_filter()
+        rejections = Counter()
         
         # Получаем все профессиональные роли и локации
         all_professional_role_ids = list(HH_PROFESSIONAL_ROLES.values())
@@ -520,26 +507,25 @@ def _fetch_hh_vacancies_task_disabled(self):
                 
                     result = hh_service.fetch_vacancies(params)
                     
-                    role_fetched = 0
-                    for item in result.get('items', []):
-                        hh_id = item.get('id')
-                        
-                        # Дедупликация - пропускаем если уже есть
-                        if HHVacancyTemp.objects.filter(hh_id=hh_id).exists():
-                            continue
-                        
-                        # Дополнительная фильтрация на нашей стороне
-                        if not _is_valid_vacancy(item):
-                            continue
-                        
-                        # Сохраняем временную запись
-                        HHVacancyTemp.objects.create(
-                            hh_id=hh_id,
-                            raw_data=item,
-                            processed=False
-                        )
-                        role_fetched += 1
-                        total_fetched += 1
+                    items = result.get('items', [])
+                    
+                    # Дедупликация - пропускаем уже сохраненные (одним запросом на страницу)
+                    known_ids = set(HHVacancyTemp.objects.filter(
+                        hh_id__in=[item.get('id') for item in items]
+                    ).values_list('hh_id', flat=True))
+                    new_items = [item for item in items if item.get('id') not in known_ids]
+                    
+                    # Дополнительная фильтрация на нашей стороне
+                    accepted, page_rejections = vacancy_filter.filter(new_items)
+                    rejections.update(page_rejections)
+                    
+                    # Сохраняем временные записи
+                    HHVacancyTemp.objects.bulk_create(
+                        [HHVacancyTemp(hh_id=item.get('id'), raw_data=item, processed=False) for item in accepted],
+                        ignore_conflicts=True
+                    )
+                    role_fetched = len(accepted)
+                    total_fetched += role_fetched
                     
                     logger.info(f"      ✅ Найдено {role_fetched} новых вакансий для '{keyword}' в {location_name} ({role_name})")
                     
@@ -549,6 +535,8 @@ def _fetch_hh_vacancies_task_disabled(self):
                 time.sleep(delay)
         
         logger.info(f"Собрано {total_fetched} новых вакансий с hh.ru")
+        if rejections:
+            logger.info(f"🚫 Отклонено фильтром: {format_rejections(rejections)}")
         
         # Сохраняем информацию о результате сбора для умной логики
         if total_fetched > 0:
@@ -567,6 +555,342 @@ def _fetch_hh_vacancies_task_disabled(self):
         return {"success": False, "message": str(e)}
 
 
+DEFAULT_HH_AI_PIPELINE_SETTINGS = {
+    'concurrency': 3,            # Сколько потоков параллельно разбирают очередь HHVacancyTemp
+    'lane_lease': 900,           # TTL аренды потока сверх запланированной задержки: после падения воркера поток перезапустит beat
+    'claim_timeout': 3600,       # Неудачно обработанная вакансия берется повторно не раньше чем через час
+    'claim_scan': 100,           # Сколько записей очереди просматривается при захвате
+    'max_schedule_ahead': 3600,  # Дальше этого горизонта запросы не планируются (исчерпан RPD)
+    'error_backoff': 60,         # Пауза потока после ошибки (сек), удваивается при повторных ошибках
+    'max_error_backoff': 900,    # Максимальная пауза потока после ошибок (сек)
+    'batch_size': 8,             # Вакансий в одном запросе к Gemini (1 - без пакетов)
+    'batch_token_budget': 12000, # Максимум токенов текстов вакансий в одном пакете
+    'batch_output_tokens_per_vacancy': 400,  # Резерв ответа модели на одну вакансию пакета
+    'max_output_tokens': 8192,   # Предел maxOutputTokens для пакетного запроса
+}
+
+
+def get_hh_ai_pipeline_settings() -> dict:
+    from django.conf import settings as django_settings
+    pipeline = dict(DEFAULT_HH_AI_PIPELINE_SETTINGS)
+    pipeline.update(getattr(django_settings, 'HH_AI_PIPELINE_SETTINGS', {}) or {})
+    return pipeline
+
+
+def _hh_lane_key(lane: int) -> str:
+    return f"hh_ai_lane:{lane}"
+
+
+def _hh_claim_key(hh_id: str) -> str:
+    return f"hh_ai_claim:{hh_id}"
+
+
+def _hh_daily_remaining() -> int:
+    """Сколько вакансий hh.ru еще можно обработать сегодня"""
+    from datetime import date
+
+    processed_today = HHVacancyTemp.objects.filter(
+        created_at__date=date.today(),
+        processed=True
+    ).count()
+    return BenchmarkSettings.load().max_daily_hh_tasks - processed_today
+
+
+def _claim_hh_vacancies(pipeline: dict, limit: int = 1) -> list:
+    """
+    Захватывает до limit необработанных вакансий очереди
+
+    Захват - ключ в кэше с TTL claim_timeout: параллельные потоки не берут одну
+    вакансию дважды, а вакансия, анализ которой упал, вернется в очередь позже.
+    """
+    from django.core.cache import cache
+
+    candidates = HHVacancyTemp.objects.filter(
+        processed=False
+    ).order_by('created_at').values_list('hh_id', flat=True)[:pipeline['claim_scan']]
+
+    claimed = []
+    for hh_id in candidates:
+        if cache.add(_hh_claim_key(hh_id), 1, pipeline['claim_timeout']):
+            claimed.append(hh_id)
+            if len(claimed) >= limit:
+                break
+    if not claimed:
+        return []
+
+    records = {record.hh_id: record for record in HHVacancyTemp.objects.filter(hh_id__in=claimed, processed=False)}
+    return [records[hh_id] for hh_id in claimed if hh_id in records]
+
+
+def _release_hh_claims(hh_ids):
+    from django.core.cache import cache
+    if hh_ids:
+        cache.delete_many([_hh_claim_key(hh_id) for hh_id in hh_ids])
+
+
+def _schedule_hh_lane(pipeline: dict, lane: int, countdown: float = 0, **kwargs):
+    """
+    Перепланирует поток очереди и продлевает его аренду
+
+    Аренда действует lane_lease секунд после запланированного запуска, поэтому
+    поток, отложенный до слота лимита или после ошибки, не считается упавшим
+    и beat не запускает второй поток с тем же номером.
+    """
+    from django.core.cache import cache
+
+    cache.set(_hh_lane_key(lane), 'scheduled', int(countdown) + pipeline['lane_lease'])
+    drain_hh_vacancy_queue.apply_async(args=[lane], kwargs=kwargs or None, countdown=countdown or None)
+
+
+def _build_hh_batch(pipeline: dict, records: list) -> list:
+    """
+    Собирает пакет вакансий в пределах бюджета токенов
+
+    Вакансии, не поместившиеся в бюджет, освобождаются и попадут в следующий пакет.
+    """
+    from apps.gemini.logic.rate_limiter import estimate_tokens
+
+    batch, used_tokens, overflow = [], 0, []
+    for record in records:
+        vacancy_data = _build_hh_vacancy_data(record)
+        tokens = estimate_tokens(vacancy_data['vacancy_text'], output_tokens=0)
+        if batch and used_tokens + tokens > pipeline['batch_token_budget']:
+            overflow.append(record.hh_id)
+            continue
+        batch.append(vacancy_data)
+        used_tokens += tokens
+    _release_hh_claims(overflow)
+    return batch
+
+
+def _get_gemini_api_key():
+    """API ключ Gemini для фоновой обработки hh.ru"""
+    # Используем пользователя andrei.golubenko (ID: 3) с новым API ключом
+    from django.contrib.auth import get_user_model
+    User = get_user_model()
+    default_user = User.objects.filter(id=3, gemini_api_key__isnull=False).first()
+
+    # Если пользователь ID: 3 не найден, берем первого доступного
+    if not default_user:
+        default_user = User.objects.filter(gemini_api_key__isnull=False).first()
+
+    if not default_user or not default_user.gemini_api_key:
+        return None
+    return default_user.gemini_api_key
+
+
+def _get_hh_vacancy_service():
+    if HHVacancyService is None:
+        raise RuntimeError("HHVacancyService недоступен")
+    return HHVacancyService()
+
+
+def _build_hh_vacancy_data(temp_record) -> dict:
+    """Предобработка записи очереди для AI анализа"""
+    hh_service = _get_hh_vacancy_service()
+    return {
+        'hh_id': temp_record.hh_id,
+        'vacancy_text': hh_service.format_for_ai_analysis_with_vacancies(temp_record.raw_data),
+        'preprocessed_salary': hh_service.preprocess_salary(temp_record.raw_data),
+        'raw_data': temp_record.raw_data
+    }
+
+
+def _build_hh_analysis_prompt(vacancy_data) -> str:
+    """
+    Промпт анализа со списками наших вакансий и грейдов для унификации
+
+    vacancy_data - одна вакансия или список вакансий (пакетный промпт: общая
+    часть и списки вакансий/грейдов передаются один раз на весь пакет)
+    """
+    # Получаем список наших вакансий для унификации
+    hh_service = _get_hh_vacancy_service()
+    our_vacancies_list = hh_service.get_our_vacancies_list()
+    our_vacancies_text = "\n".join([f"- {vacancy}" for vacancy in our_vacancies_list])
+
+    # Получаем список наших грейдов для унификации
+    our_grades_list = list(Grade.objects.values_list('name', flat=True))
+    our_grades_text = "\n".join([f"- {grade}" for grade in our_grades_list])
+
+    if isinstance(vacancy_data, list):
+        return get_enhanced_ai_prompt(
+            "\n\n".join(
+                f"=== ВАКАНСИЯ {number} (ID вакансии: {item['hh_id']}) ===\n{item['vacancy_text']}"
+                for number, item in enumerate(vacancy_data, 1)
+            ),
+            our_vacancies_text,
+            our_grades_text,
+            vacancies_count=len(vacancy_data)
+        )
+
+    return get_enhanced_ai_prompt(
+        vacancy_data['vacancy_text'],
+        our_vacancies_text,
+        our_grades_text
+    )
+
+
+HH_AI_METRICS_FIELDS = ('requests', 'vacancies', 'benchmarks', 'tokens', 'elapsed_ms')
+
+
+def _record_hh_ai_metrics(mode: str, **values):
+    """Накопительные счетчики анализа ('single' / 'batch') для сравнения режимов"""
+    from django.core.cache import cache
+
+    now = int(time.time())
+    cache.add(f"hh_ai_metrics:{mode}:started_at", now, None)
+    cache.set(f"hh_ai_metrics:{mode}:last_at", now, None)
+    for field, value in values.items():
+        key = f"hh_ai_metrics:{mode}:{field}"
+        cache.add(key, 0, None)
+        cache.incr(key, int(value))
+
+
+def get_hh_ai_metrics() -> dict:
+    """
+    Счетчики анализа по режимам с производными метриками
+
+    - tokens_per_benchmark: токенов Gemini на один сохраненный бенчмарк
+    - request_seconds_per_100: время запросов и сохранения на 100 вакансий
+    - wall_seconds_per_100: реальное время (с ожиданием лимитов) на 100 вакансий
+    """
+    from django.core.cache import cache
+
+    metrics = {}
+    for mode in ('single', 'batch'):
+        keys = [f"hh_ai_metrics:{mode}:{field}" for field in HH_AI_METRICS_FIELDS + ('started_at', 'last_at')]
+        values = cache.get_many(keys)
+        data = {field: values.get(f"hh_ai_metrics:{mode}:{field}", 0) for field in HH_AI_METRICS_FIELDS}
+        vacancies = data['vacancies']
+        data['tokens_per_benchmark'] = round(data['tokens'] / data['benchmarks'], 1) if data['benchmarks'] else None
+        data['request_seconds_per_100'] = round(data['elapsed_ms'] / 10 / vacancies, 1) if vacancies else None
+        wall = values.get(f"hh_ai_metrics:{mode}:last_at", 0) - values.get(f"hh_ai_metrics:{mode}:started_at", 0)
+        data['wall_seconds_per_100'] = round(wall * 100 / vacancies, 1) if vacancies and wall else None
+        metrics[mode] = data
+    return metrics
+
+
+def reset_hh_ai_metrics():
+    from django.core.cache import cache
+    cache.delete_many([
+        f"hh_ai_metrics:{mode}:{field}"
+        for mode in ('single', 'batch')
+        for field in HH_AI_METRICS_FIELDS + ('started_at', 'last_at')
+    ])
+
+
+def _request_hh_analysis(api_key: str, prompt: str, max_output_tokens: int = 2048):
+    """
+    Запрос в Gemini и разбор JSON ответа (без ожидания лимитов)
+
+    Returns:
+        (ai_response или None, потраченные токены)
+    """
+    import json
+    import re
+    from apps.gemini.logic.services import GeminiService
+
+    # Отправляем запрос в Gemini
+    gemini_service = GeminiService(api_key)
+    success, response, metadata = gemini_service.generate_content(prompt, max_output_tokens=max_output_tokens)
+    tokens = (metadata or {}).get('usage_metadata', {}).get('totalTokenCount', 0)
+
+    if not success:
+        logger.error(f"Ошибка Gemini API: {response}")
+        return None, tokens
+
+    try:
+        # Извлекаем JSON из markdown блока, если он есть
+        json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response, re.DOTALL)
+        json_text = json_match.group(1) if json_match else response
+
+        # Парсим JSON ответ
+        ai_response = json.loads(json_text)
+    except json.JSONDecodeError as e:
+        logger.error(f"Ошибка парсинга JSON ответа Gemini: {e}")
+        logger.error(f"Ответ: {response}")
+        return None, tokens
+
+    if not isinstance(ai_response, dict):
+        logger.error(f"Ответ Gemini не является JSON объектом: {response}")
+        return None, tokens
+
+    logger.info(f"📋 Structured benchmarks: {len(ai_response.get('structured_benchmarks', []))}")
+    return ai_response, tokens
+
+
+def _run_hh_vacancy_analysis(vacancy_data: dict, api_key: str, prompt: str = None):
+    """Анализ одной вакансии: запрос в Gemini и сохранение результата"""
+    if prompt is None:
+        prompt = _build_hh_analysis_prompt(vacancy_data)
+
+    started = time.monotonic()
+    ai_response, tokens = _request_hh_analysis(api_key, prompt)
+    if ai_response is None:
+        _record_hh_ai_metrics('single', requests=1, tokens=tokens)
+        return False
+    logger.info(f"✅ JSON успешно распарсен для вакансии {vacancy_data['hh_id']}")
+
+    # Сохраняем результат в Benchmark
+    logger.info(f"🚀 Сохраняем результат для вакансии {vacancy_data['hh_id']}")
+    result = save_hh_analysis_result(ai_response, vacancy_data) or {}
+
+    _record_hh_ai_metrics(
+        'single', requests=1, vacancies=1, tokens=tokens,
+        benchmarks=result.get('saved', 0),
+        elapsed_ms=(time.monotonic() - started) * 1000,
+    )
+    logger.info(f"AI анализ завершен для вакансии {vacancy_data['hh_id']}")
+    return True
+
+
+def _run_hh_batch_analysis(batch: list, api_key: str, prompt: str = None) -> list:
+    """
+    Пакетный анализ: один запрос в Gemini на несколько вакансий
+
+    Ответ разбивается по vacancy_id в save_hh_analysis_result. Если ответ
+    некорректен (не JSON, обрезан, нет результатов части вакансий), такие
+    вакансии отправляются на одиночный анализ analyze_hh_vacancy_with_ai.
+
+    Returns:
+        Список hh_id, отправленных на одиночный анализ
+    """
+    if len(batch) == 1:
+        _run_hh_vacancy_analysis(batch[0], api_key, prompt)
+        return []
+
+    pipeline = get_hh_ai_pipeline_settings()
+    if prompt is None:
+        prompt = _build_hh_analysis_prompt(batch)
+    max_output_tokens = min(
+        pipeline['max_output_tokens'],
+        pipeline['batch_output_tokens_per_vacancy'] * len(batch) + 256
+    )
+
+    started = time.monotonic()
+    ai_response, tokens = _request_hh_analysis(api_key, prompt, max_output_tokens=max_output_tokens)
+    results = save_hh_analysis_result(ai_response, batch) if ai_response is not None else None
+    results = results or {}
+
+    saved_vacancies = [item for item in batch if item['hh_id'] in results]
+    _record_hh_ai_metrics(
+        'batch', requests=1, vacancies=len(saved_vacancies), tokens=tokens,
+        benchmarks=sum(result.get('saved', 0) for result in results.values()),
+        elapsed_ms=(time.monotonic() - started) * 1000,
+    )
+
+    fallback = [item for item in batch if item['hh_id'] not in results]
+    if fallback:
+        logger.warning(
+            f"⚠️ Пакет из {len(batch)} вакансий разобран частично, "
+            f"{len(fallback)} отправлено на одиночный анализ"
+        )
+        for item in fallback:
+            analyze_hh_vacancy_with_ai.apply_async(args=[item])
+    logger.info(f"AI анализ пакета завершен: {len(saved_vacancies)} из {len(batch)} вакансий")
+    return [item['hh_id'] for item in fallback]
+
+
 @shared_task
 def process_hh_queue_with_limit():
     """
@@ -578,79 +902,154 @@ def process_hh_queue_with_limit():
     ИСТОЧНИКИ ДАННЫЕ:
     - BenchmarkSettings.load(): максимальное количество задач в день
     - HHVacancyTemp.objects: необработанные вакансии
+    - HH_AI_PIPELINE_SETTINGS: количество параллельных потоков
     
     ОБРАБОТКА:
     - Проверка дневного лимита задач
-    - Получение необработанных вакансий в рамках лимита
-    - Предобработка данных через HHVacancyService
-    - Отправка на AI анализ
+    - Запуск недостающих потоков drain_hh_vacancy_queue (не больше concurrency)
+    - Потоки сами разбирают очередь, соблюдая лимиты Gemini API
     
     ВЫХОДЯЩИЕ ДАННЫЕ:
-    - Словарь с количеством обработанных вакансий
+    - Словарь с запущенными потоками и остатком дневного лимита
     
     СВЯЗИ:
-    - Использует: BenchmarkSettings, HHVacancyTemp, HHVacancyService
-    - Передает: вакансии на AI анализ
-    - Может вызываться из: fetch_hh_vacancies_task
+    - Использует: BenchmarkSettings, HHVacancyTemp, кэш (аренда потоков)
+    - Передает: drain_hh_vacancy_queue
+    - Может вызываться из: Celery beat (process-hh-queue)
     """
-    from datetime import date
-    
-    settings = BenchmarkSettings.load()
-    max_tasks = settings.max_daily_hh_tasks
-    
-    today = date.today()
-    processed_today = HHVacancyTemp.objects.filter(
-        created_at__date=today,
-        processed=True
-    ).count()
-    
-    remaining = max_tasks - processed_today
+    from django.core.cache import cache
+
+    remaining = _hh_daily_remaining()
     if remaining <= 0:
         logger.info("Достигнут дневной лимит задач hh.ru")
         return {"message": "Лимит достигнут"}
-    
-    # Берем необработанные записи
-    unprocessed = HHVacancyTemp.objects.filter(
-        processed=False
-    ).order_by('created_at')[:remaining]
-    
-    hh_service = HHVacancyService()
-    processed_count = 0
-    
-    for temp_record in unprocessed:
-        try:
-            # Предобработка данных
-            preprocessed = hh_service.preprocess_salary(temp_record.raw_data)
-            vacancy_text = hh_service.format_for_ai_analysis_with_vacancies(
-                temp_record.raw_data
+
+    if not HHVacancyTemp.objects.filter(processed=False).exists():
+        return {"started_lanes": [], "remaining": remaining}
+
+    if HHVacancyService is None:
+        logger.warning("HHVacancyService недоступен - потоки AI анализа очереди hh.ru не запускаются")
+        return {"started_lanes": [], "remaining": remaining, "message": "HHVacancyService недоступен"}
+
+    pipeline = get_hh_ai_pipeline_settings()
+    started_lanes = []
+    for lane in range(pipeline['concurrency']):
+        # Поток с живой арендой уже работает - второй не запускаем
+        if cache.add(_hh_lane_key(lane), 'starting', pipeline['lane_lease']):
+            drain_hh_vacancy_queue.apply_async(args=[lane])
+            started_lanes.append(lane)
+
+    logger.info(f"Запущено потоков обработки очереди hh.ru: {len(started_lanes)}")
+    return {"started_lanes": started_lanes, "remaining": remaining}
+
+
+@shared_task
+def drain_hh_vacancy_queue(lane: int, reserved_hh_ids: list = None, failures: int = 0):
+    """
+    Поток обработки очереди hh.ru: один пакет вакансий за вызов, затем перепланирование себя
+
+    ВХОДЯЩИЕ ДАННЫЕ:
+    - lane: номер потока (0..concurrency-1)
+    - reserved_hh_ids: пакет вакансий, для которого лимит Gemini уже зарезервирован
+    - failures: число ошибок подряд (для паузы перед следующей попыткой)
+
+    ОБРАБОТКА:
+    - Остановка потока, если HHVacancyService недоступен (до захвата вакансий)
+    - Продление аренды потока в кэше
+    - Захват пакета вакансий (до batch_size в пределах batch_token_budget)
+    - Резерв лимита RPM/TPM/RPD ключа Gemini на один запрос
+    - Если лимит свободен - анализ сразу, иначе перепланирование через
+      apply_async(countdown=задержка) без ожидания в воркере
+    - После анализа поток перепланирует себя за следующим пакетом; после ошибки
+      захваченные вакансии освобождаются, а поток возвращается через
+      error_backoff * 2^failures секунд (не больше max_error_backoff)
+
+    ВЫХОДЯЩИЕ ДАННЫЕ:
+    - Словарь с состоянием потока
+
+    СВЯЗИ:
+    - Использует: GeminiRateLimiter, HHVacancyTemp, _run_hh_batch_analysis
+    - Может вызываться из: process_hh_queue_with_limit
+    """
+    from django.core.cache import cache
+    from apps.gemini.logic.rate_limiter import GeminiRateLimiter, estimate_tokens
+
+    pipeline = get_hh_ai_pipeline_settings()
+    lane_key = _hh_lane_key(lane)
+
+    def stop(reason):
+        cache.delete(lane_key)
+        if reserved_hh_ids:
+            _release_hh_claims(reserved_hh_ids)
+        logger.info(f"Поток {lane} очереди hh.ru остановлен: {reason}")
+        return {"lane": lane, "stopped": reason}
+
+    if lane >= pipeline['concurrency']:
+        return stop("уменьшено количество потоков")
+    if HHVacancyService is None:
+        return stop("HHVacancyService недоступен")
+    cache.set(lane_key, 'active', pipeline['lane_lease'])
+
+    if _hh_daily_remaining() <= 0:
+        return stop("дневной лимит")
+
+    api_key = _get_gemini_api_key()
+    if not api_key:
+        logger.error("API ключ Gemini не настроен ни у одного пользователя")
+        return stop("нет API ключа")
+
+    batch, claimed_ids = [], list(reserved_hh_ids or [])
+    try:
+        if reserved_hh_ids:
+            records = list(HHVacancyTemp.objects.filter(hh_id__in=reserved_hh_ids, processed=False))
+            if not records:
+                return stop("вакансии уже обработаны")
+            batch = [_build_hh_vacancy_data(record) for record in records]
+            prompt = _build_hh_analysis_prompt(batch if len(batch) > 1 else batch[0])
+        else:
+            records = _claim_hh_vacancies(pipeline, limit=max(1, pipeline['batch_size']))
+            if not records:
+                return stop("очередь пуста")
+            claimed_ids = [record.hh_id for record in records]
+            batch = _build_hh_batch(pipeline, records)
+            prompt = _build_hh_analysis_prompt(batch if len(batch) > 1 else batch[0])
+            hh_ids = [item['hh_id'] for item in batch]
+
+            output_tokens = None
+            if len(batch) > 1:
+                output_tokens = pipeline['batch_output_tokens_per_vacancy'] * len(batch)
+            delay = GeminiRateLimiter(api_key).reserve(
+                estimate_tokens(prompt, output_tokens=output_tokens), max_delay=pipeline['max_schedule_ahead']
             )
-            
-            # Отправляем в AI анализ (синхронно)
-            analyze_hh_vacancy_with_ai({
-                'hh_id': temp_record.hh_id,
-                'vacancy_text': vacancy_text,
-                'preprocessed_salary': preprocessed,
-                'raw_data': temp_record.raw_data
-            })
-            
-            # НЕ помечаем как обработанную здесь - это сделает save_hh_analysis_result после успешного AI анализа
-            processed_count += 1
-            
-        except Exception as e:
-            logger.error(f"Ошибка при обработке вакансии {temp_record.hh_id}: {e}")
-            continue
-    
-    logger.info(f"Отправлено {processed_count} вакансий на AI анализ")
-    return {"processed": processed_count}
+            if delay is None:
+                _release_hh_claims(hh_ids)
+                return stop("лимит Gemini исчерпан на горизонте планирования")
+            if delay > 0:
+                # Слот лимита зарезервирован - вернемся к этому пакету, когда он наступит
+                _schedule_hh_lane(pipeline, lane, countdown=delay, reserved_hh_ids=hh_ids)
+                return {"lane": lane, "hh_ids": hh_ids, "scheduled_in": round(delay, 1)}
+
+        _run_hh_batch_analysis(batch, api_key, prompt)
+    except Exception as e:
+        # Вакансии возвращаются в очередь, поток повторит попытку после паузы
+        _release_hh_claims(claimed_ids)
+        backoff = min(pipeline['error_backoff'] * (2 ** failures), pipeline['max_error_backoff'])
+        logger.error(f"Ошибка при обработке вакансий в потоке {lane}: {e}, повтор через {backoff} с")
+        _schedule_hh_lane(pipeline, lane, countdown=backoff, failures=failures + 1)
+        return {"lane": lane, "error": str(e), "retry_in": backoff}
+
+    _schedule_hh_lane(pipeline, lane)
+    return {"lane": lane, "hh_ids": [item['hh_id'] for item in batch]}
 
 
 @shared_task
-def analyze_hh_vacancy_with_ai(vacancy_data: dict):
+def analyze_hh_vacancy_with_ai(vacancy_data: dict, reserved: bool = False):
     """
     AI анализ вакансии с hh.ru
     
     ВХОДЯЩИЕ ДАННЫЕ:
     - vacancy_data: словарь с данными вакансии (hh_id, vacancy_text, preprocessed_salary, raw_data)
+    - reserved: лимит Gemini для этого запроса уже зарезервирован
     
     ИСТОЧНИКИ ДАННЫЕ:
     - vacancy_data: данные вакансии для анализа
@@ -658,7 +1057,8 @@ def analyze_hh_vacancy_with_ai(vacancy_data: dict):
     - GeminiService: сервис для работы с Gemini API
     
     ОБРАБОТКА:
-    - Рандомная задержка для соблюдения лимитов API
+    - Резерв лимита RPM/TPM/RPD ключа Gemini; если слот в будущем -
+      задача перепланирует себя через apply_async(countdown=...)
     - Получение списка вакансий и грейдов для унификации
     - Создание улучшенного промпта
     - Отправка запроса в Gemini API
@@ -669,88 +1069,30 @@ def analyze_hh_vacancy_with_ai(vacancy_data: dict):
     - Нет прямого возврата (сохраняет результат в БД)
     
     СВЯЗИ:
-    - Использует: GeminiService, User.objects, Grade.objects
+    - Использует: GeminiService, GeminiRateLimiter, User.objects, Grade.objects
     - Передает: результат в save_hh_analysis_result
-    - Может вызываться из: process_hh_queue_with_limit
+    - Может вызываться из: drain_hh_vacancy_queue, вручную
     """
     try:
-        import json
-        import time
-        
-        # Рандомная задержка для соблюдения лимитов Gemini API (13-48 секунд)
-        import random
-        delay = random.uniform(13, 48)
-        time.sleep(delay)
-        
-        settings = BenchmarkSettings.load()
-        
-        # Получаем список наших вакансий для унификации
-        # hh_service = HHVacancyService()  # Временно отключено
-        our_vacancies_list = hh_service.get_our_vacancies_list()
-        our_vacancies_text = "\n".join([f"- {vacancy}" for vacancy in our_vacancies_list])
-        
-        # Получаем список наших грейдов для унификации
-        from .models import Grade
-        our_grades_list = list(Grade.objects.values_list('name', flat=True))
-        our_grades_text = "\n".join([f"- {grade}" for grade in our_grades_list])
-        
-        # Получаем улучшенный промпт
-        prompt = get_enhanced_ai_prompt(
-            vacancy_data['vacancy_text'], 
-            our_vacancies_text, 
-            our_grades_text
-        )
-        
-        # Получаем API ключ из профиля пользователя
-        # Используем пользователя andrei.golubenko (ID: 3) с новым API ключом
-        from django.contrib.auth import get_user_model
-        User = get_user_model()
-        default_user = User.objects.filter(id=3, gemini_api_key__isnull=False).first()
-        
-        # Если пользователь ID: 3 не найден, берем первого доступного
-        if not default_user:
-            default_user = User.objects.filter(gemini_api_key__isnull=False).first()
-        
-        if not default_user or not default_user.gemini_api_key:
+        from apps.gemini.logic.rate_limiter import GeminiRateLimiter, estimate_tokens
+
+        api_key = _get_gemini_api_key()
+        if not api_key:
             logger.error("API ключ Gemini не настроен ни у одного пользователя")
             return
-        
-        api_key = default_user.gemini_api_key
-        
-        # Создаем сервис Gemini
-        from apps.gemini.logic.services import GeminiService
-        gemini_service = GeminiService(api_key)
-        
-        # Отправляем запрос в Gemini
-        success, response, metadata = gemini_service.generate_content(prompt)
-        
-        if success:
-            try:
-                # Извлекаем JSON из markdown блока, если он есть
-                import re
-                json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response, re.DOTALL)
-                if json_match:
-                    json_text = json_match.group(1)
-                else:
-                    json_text = response
-                
-                # Парсим JSON ответ
-                ai_response = json.loads(json_text)
-                logger.info(f"✅ JSON успешно распарсен для вакансии {vacancy_data['hh_id']}")
-                logger.info(f"📋 Structured benchmarks: {len(ai_response.get('structured_benchmarks', []))}")
-            except json.JSONDecodeError as e:
-                logger.error(f"Ошибка парсинга JSON ответа Gemini: {e}")
-                logger.error(f"Ответ: {response}")
+
+        prompt = _build_hh_analysis_prompt(vacancy_data)
+
+        if not reserved:
+            delay = GeminiRateLimiter(api_key).reserve(estimate_tokens(prompt))
+            if delay > 0:
+                analyze_hh_vacancy_with_ai.apply_async(
+                    args=[vacancy_data], kwargs={'reserved': True}, countdown=delay
+                )
+                logger.info(f"Анализ вакансии {vacancy_data['hh_id']} запланирован через {delay:.1f} с")
                 return
-        else:
-            logger.error(f"Ошибка Gemini API: {response}")
-            return
-        
-        # Сохраняем результат в Benchmark
-        logger.info(f"🚀 Сохраняем результат для вакансии {vacancy_data['hh_id']}")
-        save_hh_analysis_result(ai_response, vacancy_data)
-        
-        logger.info(f"AI анализ завершен для вакансии {vacancy_data['hh_id']}")
+
+        _run_hh_vacancy_analysis(vacancy_data, api_key, prompt)
         
     except Exception as e:
         logger.error(f"Ошибка AI анализа для {vacancy_data.get('hh_id')}: {e}")
@@ -758,18 +1100,20 @@ def analyze_hh_vacancy_with_ai(vacancy_data: dict):
 
 
 
-def _find_best_vacancy_match(ai_vacancy_name: str):
+def _find_best_vacancy_match(ai_vacancy_name: str, index=None):
     """
     Находит лучшее соответствие вакансии из наших данных
     
     ВХОДЯЩИЕ ДАННЫЕ:
     - ai_vacancy_name: строка с названием вакансии от AI
+    - index: MatcherIndex (по умолчанию - индекс текущего процесса)
     
     ИСТОЧНИКИ ДАННЫЕ:
-    - Vacancy.objects: все активные вакансии из базы данных
+    - MatcherIndex: снимок вакансий, без запросов к БД
     
     ОБРАБОТКА:
     - Точное совпадение по названию
+    - Кандидаты из индекса триграмм
     - Умное сопоставление по сходству (SequenceMatcher)
     - Дополнительная проверка по ключевым словам
     - Комбинированный скор схожести
@@ -778,64 +1122,38 @@ def _find_best_vacancy_match(ai_vacancy_name: str):
     - Vacancy объект или None если соответствие не найдено
     
     СВЯЗИ:
-    - Использует: Vacancy.objects, SequenceMatcher
+    - Использует: MatcherIndex, SequenceMatcher
     - Передает: найденную вакансию в save_hh_analysis_result
     - Может вызываться из: save_hh_analysis_result
     """
-    from apps.vacancies.models import Vacancy
-    from difflib import SequenceMatcher
+    from .matcher_index import get_matcher_index
     
     if not ai_vacancy_name or ai_vacancy_name.strip() == '':
         return None
     
-    # Сначала точное совпадение
-    exact_match = Vacancy.objects.filter(name__iexact=ai_vacancy_name.strip()).first()
-    if exact_match:
-        logger.info(f"🎯 Точное совпадение найдено: {exact_match.name}")
-        return exact_match
-    
-    # Умное сопоставление по сходству
-    all_vacancies = Vacancy.objects.filter(is_active=True).values_list('id', 'name')
-    best_match = None
-    best_score = 0.7  # Минимальный порог схожести
-    
-    ai_name_lower = ai_vacancy_name.lower().strip()
-    
-    for vacancy_id, vacancy_name in all_vacancies:
-        # Рассчитываем схожесть строк
-        similarity = SequenceMatcher(None, ai_name_lower, vacancy_name.lower()).ratio()
-        
-        # Дополнительные проверки по ключевым словам
-        ai_words = set(ai_name_lower.split())
-        vacancy_words = set(vacancy_name.lower().split())
-        word_overlap = len(ai_words.intersection(vacancy_words)) / len(ai_words.union(vacancy_words))
-        
-        # Комбинированный скор
-        combined_score = (similarity * 0.7) + (word_overlap * 0.3)
-        
-        if combined_score > best_score:
-            best_score = combined_score
-            best_match = vacancy_id
+    matched_vacancy, score, exact = (index or get_matcher_index()).match_vacancy(ai_vacancy_name)
+    if matched_vacancy and exact:
+        logger.info(f"🎯 Точное совпадение найдено: {matched_vacancy.name}")
+        return matched_vacancy
     
-    if best_match:
-        matched_vacancy = Vacancy.objects.get(id=best_match)
-        logger.info(f"🎯 Найдено лучшее соответствие: '{ai_vacancy_name}' -> '{matched_vacancy.name}' (score: {best_score:.2f})")
+    if matched_vacancy:
+        logger.info(f"🎯 Найдено лучшее соответствие: '{ai_vacancy_name}' -> '{matched_vacancy.name}' (score: {score:.2f})")
         return matched_vacancy
     
     logger.warning(f"❌ Соответствие не найдено для: '{ai_vacancy_name}'")
     return None
 
 
-def _find_best_grade_match(ai_grade_name: str):
+def _find_best_grade_match(ai_grade_name: str, index=None):
     """
     Находит лучшее соответствие грейда из наших данных
     
     ВХОДЯЩИЕ ДАННЫЕ:
     - ai_grade_name: строка с названием грейда от AI
+    - index: MatcherIndex (по умолчанию - индекс текущего процесса)
     
     ИСТОЧНИКИ ДАННЫЕ:
-    - Grade.objects: все грейды из базы данных
-    - grade_mapping: словарь с синонимами грейдов
+    - MatcherIndex: снимок грейдов и разрешенная карта синонимов (GRADE_SYNONYMS)
     
     ОБРАБОТКА:
     - Точное совпадение по названию
@@ -846,58 +1164,37 @@ def _find_best_grade_match(ai_grade_name: str):
     - Grade объект или None если соответствие не найдено
     
     СВЯЗИ:
-    - Использует: Grade.objects, grade_mapping
+    - Использует: MatcherIndex
     - Передает: найденный грейд в save_hh_analysis_result
     - Может вызываться из: save_hh_analysis_result
     """
-    from .models import Grade
-    from difflib import SequenceMatcher
+    from .matcher_index import get_matcher_index
     
     if not ai_grade_name or ai_grade_name.strip() == '':
         return None
     
-    # Сначала точное совпадение
-    exact_match = Grade.objects.filter(name__iexact=ai_grade_name.strip()).first()
-    if exact_match:
-        logger.info(f"🎯 Точный грейд найден: {exact_match.name}")
-        return exact_match
-    
-    # Нормализация грейдов (маппинг синонимов)
-    grade_mapping = {
-        'junior': ['Junior', 'junior', 'jun', 'младший'],
-        'junior+': ['Junior+', 'junior+', 'jun+'],
-        'middle': ['Middle', 'middle', 'mid', 'средний'],
-        'middle+': ['Middle+', 'middle+', 'mid+'],
-        'senior': ['Senior', 'senior', 'sen', 'старший', 'ведущий'],
-        'senior+': ['Senior+', 'senior+', 'sen+'],
-        'lead': ['Lead', 'lead', 'лид', 'тимлид', 'руководитель'],
-        'head': ['Head', 'head', 'начальник', 'заведующий']
-    }
-    
-    ai_name_lower = ai_grade_name.lower().strip()
+    grade, exact = (index or get_matcher_index()).match_grade(ai_grade_name)
+    if grade and exact:
+        logger.info(f"🎯 Точный грейд найден: {grade.name}")
+        return grade
     
-    # Поиск по синонимам
-    for canonical_grade, synonyms in grade_mapping.items():
-        if ai_name_lower in [s.lower() for s in synonyms]:
-            # Находим соответствующий грейд в БД
-            for synonym in synonyms:
-                grade = Grade.objects.filter(name__iexact=synonym).first()
-                if grade:
-                    logger.info(f"🎯 Найден грейд через синоним: '{ai_grade_name}' -> '{grade.name}'")
-                    return grade
+    if grade:
+        logger.info(f"🎯 Найден грейд через синоним: '{ai_grade_name}' -> '{grade.name}'")
+        return grade
     
     logger.warning(f"❌ Грейд не найден: '{ai_grade_name}'")
     return None
 
 
-def get_enhanced_ai_prompt(benchmark_data, our_vacancies_text, our_grades_text):
+def get_enhanced_ai_prompt(benchmark_data, our_vacancies_text, our_grades_text, vacancies_count=1):
     """
     Возвращает улучшенный промпт для ИИ анализа
     
     ВХОДЯЩИЕ ДАННЫЕ:
-    - benchmark_data: данные вакансии для анализа
+    - benchmark_data: данные вакансии (или нескольких вакансий пакета) для анализа
     - our_vacancies_text: список наших вакансий
     - our_grades_text: список наших грейдов
+    - vacancies_count: количество вакансий в benchmark_data (больше 1 - пакетный режим)
     
     ИСТОЧНИКИ ДАННЫЕ:
     - benchmark_data: обработанные данные вакансии
@@ -916,16 +1213,30 @@ def get_enhanced_ai_prompt(benchmark_data, our_vacancies_text, our_grades_text):
     СВЯЗИ:
     - Использует: входные данные для формирования промпта
     - Передает: промпт в analyze_hh_vacancy_with_ai
-    - Может вызываться из: analyze_hh_vacancy_with_ai
+    - Может вызываться из: analyze_hh_vacancy_with_ai, drain_hh_vacancy_queue
     """
-    return f"""Ты - эксперт по анализу рынка труда и зарплат в IT-сфере. Проанализируй предоставленную ВАКАНСИЮ и верни структурированные данные.
+    if vacancies_count > 1:
+        subject = f"предоставленные ВАКАНСИИ ({vacancies_count} шт.)"
+        data_title = "ДАННЫЕ ВАКАНСИЙ"
+        first_task = f"Проанализируй КАЖДУЮ из {vacancies_count} вакансий отдельно"
+        batch_requirement = (
+            f"\n- Для КАЖДОЙ из {vacancies_count} вакансий верни ровно один объект в structured_benchmarks "
+            f"с ее vacancy_id из заголовка вакансии (в том числе при skip)"
+        )
+    else:
+        subject = "предоставленную ВАКАНСИЮ"
+        data_title = "ДАННЫЕ ВАКАНСИИ"
+        first_task = "Проанализируй ОДНУ вакансию из данных"
+        batch_requirement = ""
+
+    return f"""Ты - эксперт по анализу рынка труда и зарплат в IT-сфере. Проанализируй {subject} и верни структурированные данные.
 
 ⚠️ КРИТИЧЕСКИ ВАЖНО: 
 - В поле vacancy_name используй ТОЛЬКО названия из списка наших вакансий ИЛИ "skip"
 - В поле grade используй ТОЛЬКО названия из списка наших грейдов ИЛИ "skip"
 - ЗАПРЕЩЕНО создавать новые названия вакансий и грейдов!
 
-ДАННЫЕ ВАКАНСИИ (уже с обработанной зарплатой в USD):
+{data_title} (уже с обработанной зарплатой в USD):
 {benchmark_data}
 
 НАШИ ВАКАНСИИ ДЛЯ СОПОСТАВЛЕНИЯ (используй ТОЛЬКО эти):
@@ -935,7 +1246,7 @@ def get_enhanced_ai_prompt(benchmark_data, our_vacancies_text, our_grades_text):
 {our_grades_text}
 
 ЗАДАЧИ:
-1. Проанализируй ОДНУ вакансию из данных
+1. {first_task}
 2. Сопоставь с НАШИМИ вакансиями по технологиям и обязанностям
 3. Сопоставь с НАШИМИ грейдами по требованиям к опыту
 4. Извлеки дополнительную информацию
@@ -964,7 +1275,7 @@ def get_enhanced_ai_prompt(benchmark_data, our_vacancies_text, our_grades_text):
 {{
     "analysis_metadata": {{
         "analysis_date": "2025-01-22 15:30:00",
-        "total_processed": 1,
+        "total_processed": {vacancies_count},
         "data_source": "hh.ru"
     }},
     "structured_benchmarks": [
@@ -993,7 +1304,7 @@ def get_enhanced_ai_prompt(benchmark_data, our_vacancies_text, our_grades_text):
 - Если грейд неопределим → grade = "skip"  
 - Зарплаты уже обработаны в USD - используй как есть
 - domain только из списка: retail/fintech/gaming/gambling/betting/medtech/telecom/edtech/agritech/proptech/legaltech/govtech/logistics/foodtech/insurtech/martech/adtech/cybersecurity/cleantech/hrtech/traveltech/sporttech/entertainment/ecommerce/blockchain/aiml/iot/cloud
-- При skip обязательно заполни skip_reason
+- При skip обязательно заполни skip_reason{batch_requirement}
 
 Отвечай ТОЛЬКО JSON, без дополнительных комментариев."""
 @shared_task
@@ -1012,13 +1323,14 @@ def update_currency_rates():
     - Тестирование подключения к НБРБ API
     - Получение актуальных курсов валют
     - Обновление записей в базе данных
+    - Пакетный пересчет сумм зарплатных вилок, если курсы изменились
     - Логирование результатов
     
     ВЫХОДЯЩИЕ ДАННЫЕ:
     - Словарь с результатами обновления курсов
     
     СВЯЗИ:
-    - Использует: UnifiedCurrencyService, CurrencyRate модель
+    - Использует: UnifiedCurrencyService, CurrencyRate модель, SalaryService
     - Передает: результат выполнения задачи
     - Может вызываться из: Celery Beat (11:00 и 16:00 в будние дни)
     """
@@ -1058,10 +1370,26 @@ def update_currency_rates():
                 else:
                     logger.warning(f"  ⚠️ {currency}: ошибка - {data['error']}")
             
+            salary_ranges = None
+            if result.get('changed_count'):
+                from logic.finance.salary_service import SalaryService
+                
+                salary_ranges = SalaryService.recalculate_all_currency_amounts()
+                logger.info(
+                    f"💵 Пересчитаны зарплатные вилки: {salary_ranges['total']}, изменено "
+                    f"{salary_ranges['changed_count']} за {salary_ranges['elapsed_ms']} мс "
+                    f"(чтение {salary_ranges['load_ms']} мс, расчет {salary_ranges['compute_ms']} мс, "
+                    f"запись {salary_ranges['write_ms']} мс)"
+                )
+            else:
+                logger.info("💵 Курсы не изменились, пересчет зарплатных вилок не нужен")
+            
             return {
                 'success': True,
                 'message': success_msg,
                 'updated_count': result['updated_count'],
+                'changed_count': result.get('changed_count', 0),
+                'salary_ranges': salary_ranges,
                 'results': result['results']
             }
         else:
@@ -1083,14 +1411,46 @@ def update_currency_rates():
         }
 
 
+def split_hh_batch_result(ai_response: dict, vacancies: list):
+    """
+    Разбивает ответ пакетного анализа по vacancy_id
+
+    Returns:
+        {hh_id: ответ в формате одиночного анализа} или None, если structured_benchmarks
+        некорректен. У вакансий без результатов в пакете - пустой список бенчмарков.
+    """
+    benchmarks = ai_response.get('structured_benchmarks') if isinstance(ai_response, dict) else None
+    if not isinstance(benchmarks, list):
+        return None
+
+    grouped = {str(item['hh_id']): [] for item in vacancies}
+    for benchmark_data in benchmarks:
+        if not isinstance(benchmark_data, dict):
+            return None
+        vacancy_id = str(benchmark_data.get('vacancy_id', '')).strip()
+        if vacancy_id not in grouped:
+            logger.error(f"ID mismatch: {vacancy_id} отсутствует в пакете")
+            continue
+        grouped[vacancy_id].append(benchmark_data)
+
+    metadata = ai_response.get('analysis_metadata', {})
+    result = {}
+    for item in vacancies:
+        items = grouped[str(item['hh_id'])]
+        for benchmark_data in items:
+            benchmark_data['vacancy_id'] = item['hh_id']
+        result[item['hh_id']] = {'analysis_metadata': metadata, 'structured_benchmarks': items}
+    return result
+
+
 @shared_task
-def save_hh_analysis_result(ai_response: dict, vacancy_data: dict):
+def save_hh_analysis_result(ai_response: dict, vacancy_data):
     """
     Сохраняет результат AI анализа в Benchmark с умным сопоставлением
     
     ВХОДЯЩИЕ ДАННЫЕ:
     - ai_response: словарь с ответом AI анализа
-    - vacancy_data: словарь с данными вакансии
+    - vacancy_data: словарь с данными вакансии или список вакансий пакета
     
     ИСТОЧНИКИ ДАННЫЕ:
     - ai_response: структурированные данные от AI
@@ -1101,99 +1461,48 @@ def save_hh_analysis_result(ai_response: dict, vacancy_data: dict):
     - Извлечение structured_benchmarks из AI ответа
     - Умное сопоставление вакансий и грейдов
     - Проверка валидности данных
-    - Создание Benchmark записей
-    - Помечание временной вакансии как обработанной
+    - Дедупликация и запись Benchmark одной транзакцией (BenchmarkIngestBatch)
+    - Помечание временных вакансий как обработанных одним UPDATE
+    - Для пакета: разбиение ответа по vacancy_id, все вакансии пакета - одной
+      транзакцией; вакансии без результатов в ответе не помечаются обработанными
     
     ВЫХОДЯЩИЕ ДАННЫЕ:
-    - Нет прямого возврата (сохраняет в БД)
+    - Для одной вакансии: {'saved': N, 'skipped': M} (None при ошибке)
+    - Для пакета: {hh_id: {'saved': N, 'skipped': M}} по сохраненным вакансиям
+      (None, если ответ пакета некорректен)
     
     СВЯЗИ:
     - Использует: Benchmark, HHVacancyTemp, Grade, Vacancy модели
     - Передает: результат в БД (Benchmark записи)
-    - Может вызываться из: analyze_hh_vacancy_with_ai
+    - Может вызываться из: analyze_hh_vacancy_with_ai, _run_hh_batch_analysis
     """
-    from .models import HHVacancyTemp, BenchmarkType, Grade, Domain
-    from apps.vacancies.models import Vacancy
+    from .benchmark_ingest import BenchmarkIngestBatch
     
     try:
-        logger.info(f"💾 Начинаем сохранение для вакансии {vacancy_data['hh_id']}")
-        
-        benchmarks_data = ai_response.get('structured_benchmarks', [])
-        saved_count = 0
-        skipped_count = 0
+        batch = BenchmarkIngestBatch()
         
-        for benchmark_data in benchmarks_data:
-            # Извлекаем Vacancy_ID
-            vacancy_id = benchmark_data.get('vacancy_id')
-            if vacancy_id != vacancy_data['hh_id']:
-                logger.error(f"ID mismatch: {vacancy_id} != {vacancy_data['hh_id']}")
-                continue
-            
-            # Проверяем, нужно ли пропустить вакансию
-            vacancy_name = benchmark_data.get('vacancy_name', '').strip()
-            if vacancy_name == 'skip':
-                skip_reason = benchmark_data.get('skip_reason', 'Не указана причина')
-                logger.info(f"⏭️ Пропускаем вакансию {vacancy_id}: {skip_reason}")
-                skipped_count += 1
-                continue
+        if isinstance(vacancy_data, list):
+            per_vacancy = split_hh_batch_result(ai_response, vacancy_data)
+            if per_vacancy is None:
+                logger.error(f"❌ Некорректный ответ пакетного анализа ({len(vacancy_data)} вакансий)")
+                return None
             
-            # Умное сопоставление вакансии
-            matched_vacancy = _find_best_vacancy_match(vacancy_name)
-            if not matched_vacancy:
-                logger.warning(f"❌ Не найдено соответствие для вакансии: '{vacancy_name}'")
-                skipped_count += 1
-                continue
-                
-            # Умное сопоставление грейда
-            grade_name = benchmark_data.get('grade', '').strip()
-            if grade_name == 'skip':
-                logger.info(f"⏭️ Пропускаем грейд для вакансии {vacancy_id}")
-                skipped_count += 1
-                continue
-                
-            matched_grade = _find_best_grade_match(grade_name)
-            if not matched_grade:
-                logger.warning(f"❌ Не найден грейд: '{grade_name}'")
-                skipped_count += 1
-                continue
+            for item in vacancy_data:
+                vacancy_response = per_vacancy[item['hh_id']]
+                if not vacancy_response['structured_benchmarks']:
+                    logger.warning(f"⚠️ В ответе пакета нет результатов для вакансии {item['hh_id']}")
+                    continue
+                batch.add(vacancy_response, item)
             
-            # Проверяем, что зарплаты не null (если не skip)
-            salary_from = benchmark_data.get('salary_from')
-            salary_to = benchmark_data.get('salary_to')
-            
-            if not salary_from or not salary_to:
-                logger.warning(f"❌ Отсутствуют зарплаты для вакансии {vacancy_id}")
-                skipped_count += 1
-                continue
-            
-            # Создаем Benchmark
-            benchmark = Benchmark.objects.create(
-                type=BenchmarkType.VACANCY,
-                hh_vacancy_id=vacancy_data['hh_id'],
-                vacancy=matched_vacancy,
-                grade=matched_grade,
-                salary_from=salary_from,
-                salary_to=salary_to,
-                location=benchmark_data.get('location', ''),
-                work_format=benchmark_data.get('work_format', ''),
-                compensation=benchmark_data.get('compensation', ''),
-                benefits=benchmark_data.get('benefits', ''),
-                development=benchmark_data.get('development', ''),
-                technologies=benchmark_data.get('technologies', ''),
-                domain=benchmark_data.get('domain'),
-                notes=f"Источник: hh.ru. Компания: {vacancy_data['raw_data'].get('employer', {}).get('name', '')}",
-                is_active=True
-            )
-            
-            saved_count += 1
-            logger.info(f"✅ Создан Benchmark ID {benchmark.id} для вакансии {matched_vacancy.name} ({matched_grade.name})")
+            return batch.commit()['per_vacancy']
         
-        # Помечаем временную вакансию как обработанную
-        temp_vacancy = HHVacancyTemp.objects.get(hh_id=vacancy_data['hh_id'])
-        temp_vacancy.processed = True
-        temp_vacancy.save()
+        logger.info(f"💾 Начинаем сохранение для вакансии {vacancy_data['hh_id']}")
+        batch.add(ai_response, vacancy_data)
+        result = batch.commit()['per_vacancy'][vacancy_data['hh_id']]
         
-        logger.info(f"🎉 Обработка завершена: сохранено {saved_count}, пропущено {skipped_count}")
+        logger.info(f"🎉 Обработка завершена: сохранено {result['saved']}, пропущено {result['skipped']}")
+        return result
         
     except Exception as e:
         logger.error(f"❌ Ошибка при сохранении результата анализа: {e}")
+        return None
@@ -0,0 +1,553 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+import time
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.vacancies.models import Vacancy
+
+from .benchmark_ingest import BenchmarkIngestBatch, ingest_hh_analysis_results
+from .benchmark_stats import dashboard_statistics, refresh_benchmark_stats
+from .matcher_index import MatcherIndex, get_matcher_index, invalidate_matcher_index
+from logic.base.api_client import APIResponse
+from logic.base.currency_service import currency_service
+from logic.finance.rate_snapshot import RateSnapshot, get_rate_snapshot
+from logic.finance.salary_service import SalaryService
+
+from .quantiles import GroupedQuantiles, benchmark_quantiles, percentile, summarize
+from .models import Benchmark, BenchmarkStats, CurrencyRate, Grade, HHVacancyTemp, PLNTax, SalaryRange
+from .tasks import (
+    _hh_claim_key, _hh_lane_key, drain_hh_vacancy_queue, process_hh_queue_with_limit,
+    save_hh_analysis_result, split_hh_batch_result, update_currency_rates,
+)
+from .vacancy_filter import VacancyFilter
+
+User = get_user_model()
+
+
+def _benchmark(vacancy_id, vacancy_name='Backend Engineer (Java)', grade='Middle'):
+    return {
+        'type': 'vacancy',
+        'vacancy_id': vacancy_id,
+        'vacancy_name': vacancy_name,
+        'grade': grade,
+        'salary_from': 2000,
+        'salary_to': 3000,
+        'location': 'Минск, Беларусь',
+    }
+
+
+class HHBatchAnalysisResultTests(TestCase):
+    """Разбиение и сохранение ответа пакетного анализа вакансий hh.ru"""
+
+    def setUp(self):
+        # Индекс процесса мог быть построен другим тестом с другими вакансиями
+        invalidate_matcher_index()
+        self.addCleanup(invalidate_matcher_index)
+        recruiter = User.objects.create_user(username='recruiter', password='test')
+        recruiter.groups.add(Group.objects.get_or_create(name='Рекрутер')[0])
+        Vacancy.objects.create(
+            name='Backend Engineer (Java)', external_id='java', recruiter=recruiter,
+            invite_title='Инвайт', invite_text='Текст', scorecard_title='Scorecard',
+        )
+        Grade.objects.get_or_create(name='Middle')
+        self.vacancies = []
+        for hh_id in ('101', '102', '103'):
+            raw_data = {'id': hh_id, 'employer': {'name': f'Компания {hh_id}'}}
+            HHVacancyTemp.objects.create(hh_id=hh_id, raw_data=raw_data)
+            self.vacancies.append({'hh_id': hh_id, 'vacancy_text': '', 'raw_data': raw_data})
+
+    def test_split_groups_by_vacancy_id(self):
+        per_vacancy = split_hh_batch_result({
+            'structured_benchmarks': [_benchmark(101), _benchmark('102'), _benchmark('999')]
+        }, self.vacancies)
+
+        self.assertEqual(len(per_vacancy['101']['structured_benchmarks']), 1)
+        # Числовой vacancy_id из ответа приводится к hh_id вакансии
+        self.assertEqual(per_vacancy['101']['structured_benchmarks'][0]['vacancy_id'], '101')
+        self.assertEqual(per_vacancy['103']['structured_benchmarks'], [])
+
+    def test_split_rejects_malformed_batch(self):
+        self.assertIsNone(split_hh_batch_result({'structured_benchmarks': 'oops'}, self.vacancies))
+        self.assertIsNone(split_hh_batch_result({'structured_benchmarks': ['oops']}, self.vacancies))
+
+    def test_batch_save_marks_only_answered_vacancies(self):
+        results = save_hh_analysis_result({
+            'structured_benchmarks': [
+                _benchmark('101'),
+                _benchmark('102', vacancy_name='skip'),
+            ]
+        }, self.vacancies)
+
+        self.assertEqual(results, {'101': {'saved': 1, 'skipped': 0}, '102': {'saved': 0, 'skipped': 1}})
+        self.assertEqual(list(Benchmark.objects.values_list('hh_vacancy_id', flat=True)), ['101'])
+        self.assertEqual(
+            set(HHVacancyTemp.objects.filter(processed=True).values_list('hh_id', flat=True)),
+            {'101', '102'}
+        )
+
+    def test_bulk_ingest_deduplicates_and_reports_reasons(self):
+        Benchmark.objects.create(
+            type='vacancy', hh_vacancy_id='103', vacancy=Vacancy.objects.get(), grade=Grade.objects.get(name='Middle'),
+            salary_from=1000, salary_to=2000,
+        )
+        results = [
+            ({'structured_benchmarks': [_benchmark('101'), _benchmark('101')]}, self.vacancies[0]),
+            ({'structured_benchmarks': [_benchmark('102', grade='Unknown')]}, self.vacancies[1]),
+            ({'structured_benchmarks': [_benchmark('103')]}, self.vacancies[2]),
+        ]
+
+        get_matcher_index()
+        with self.assertNumQueries(7):
+            # SAVEPOINT, проверка существующих, SAVEPOINT, один INSERT, RELEASE, один UPDATE очереди, RELEASE
+            metrics = ingest_hh_analysis_results(results, batch_size=10)
+
+        self.assertEqual(len(metrics), 1)
+        self.assertEqual(metrics[0]['written'], 1)
+        self.assertEqual(metrics[0]['skipped'], {'duplicate': 1, 'grade_not_matched': 1, 'hh_vacancy_exists': 1})
+        self.assertEqual(HHVacancyTemp.objects.filter(processed=True).count(), 3)
+
+    def test_concurrent_insert_does_not_lose_batch(self):
+        deduplicate = BenchmarkIngestBatch._deduplicate
+
+        def deduplicate_then_race(batch):
+            rows = deduplicate(batch)
+            # Параллельный процесс записал бенчмарк для 102 после проверки существующих
+            Benchmark.objects.create(
+                type='vacancy', hh_vacancy_id='102', vacancy=Vacancy.objects.get(),
+                grade=Grade.objects.get(name='Middle'), salary_from=1000, salary_to=2000,
+            )
+            return rows
+
+        results = [
+            ({'structured_benchmarks': [_benchmark('101')]}, self.vacancies[0]),
+            ({'structured_benchmarks': [_benchmark('102')]}, self.vacancies[1]),
+        ]
+        with patch.object(BenchmarkIngestBatch, '_deduplicate', deduplicate_then_race):
+            metrics = ingest_hh_analysis_results(results, batch_size=10)
+
+        self.assertEqual(metrics[0]['written'], 1)
+        self.assertEqual(metrics[0]['skipped'], {'hh_vacancy_exists': 1})
+        self.assertEqual(metrics[0]['per_vacancy']['102'], {'saved': 0, 'skipped': 1})
+        self.assertEqual(Benchmark.objects.get(hh_vacancy_id='101').salary_from, 2000)
+        self.assertEqual(HHVacancyTemp.objects.filter(processed=True).count(), 2)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class HHQueueLaneTests(TestCase):
+    """Потоки AI анализа очереди hh.ru: остановка, ошибки и аренда"""
+
+    def setUp(self):
+        cache.clear()
+        for hh_id in ('201', '202'):
+            HHVacancyTemp.objects.create(hh_id=hh_id, raw_data={'id': hh_id})
+        api_key_patcher = patch('apps.finance.tasks._get_gemini_api_key', return_value='key')
+        api_key_patcher.start()
+        self.addCleanup(api_key_patcher.stop)
+        apply_async_patcher = patch('apps.finance.tasks.drain_hh_vacancy_queue.apply_async')
+        self.apply_async = apply_async_patcher.start()
+        self.addCleanup(apply_async_patcher.stop)
+
+    def _lease_ttl(self, lane=0):
+        return cache._expire_info[cache.make_key(_hh_lane_key(lane))] - time.time()
+
+    def test_lanes_do_not_start_without_vacancy_service(self):
+        with patch('apps.finance.tasks.HHVacancyService', None):
+            self.assertEqual(process_hh_queue_with_limit()['started_lanes'], [])
+            result = drain_hh_vacancy_queue(0)
+
+        self.assertEqual(result['stopped'], 'HHVacancyService недоступен')
+        self.apply_async.assert_not_called()
+        self.assertIsNone(cache.get(_hh_claim_key('201')))
+        self.assertIsNone(cache.get(_hh_lane_key(0)))
+
+    def test_failed_batch_releases_claims_and_backs_off(self):
+        service = Mock()
+        service.return_value.format_for_ai_analysis_with_vacancies.side_effect = ValueError('Ошибка разбора')
+        with patch('apps.finance.tasks.HHVacancyService', service):
+            result = drain_hh_vacancy_queue(0)
+            self.assertEqual(result['retry_in'], 60)
+            self.assertIsNone(cache.get(_hh_claim_key('201')))
+            self.assertIsNone(cache.get(_hh_claim_key('202')))
+            self.apply_async.assert_called_once_with(args=[0], kwargs={'failures': 1}, countdown=60)
+
+            # Повторные ошибки удваивают паузу до max_error_backoff
+            self.assertEqual(drain_hh_vacancy_queue(0, failures=1)['retry_in'], 120)
+            self.assertEqual(drain_hh_vacancy_queue(0, failures=10)['retry_in'], 900)
+        self.assertGreater(self._lease_ttl(), 900 + 800)
+
+    def test_lease_covers_scheduled_delay(self):
+        service = Mock()
+        service.return_value.format_for_ai_analysis_with_vacancies.return_value = 'Текст вакансии'
+        service.return_value.get_our_vacancies_list.return_value = []
+        with patch('apps.finance.tasks.HHVacancyService', service), \
+                patch('apps.gemini.logic.rate_limiter.GeminiRateLimiter.reserve', return_value=1800.0):
+            result = drain_hh_vacancy_queue(0)
+
+        self.assertEqual(result['scheduled_in'], 1800.0)
+        self.assertGreater(self._lease_ttl(), 1800 + 800)
+        # Beat не запускает второй поток с тем же номером, пока первый ждет слота
+        self.apply_async.reset_mock()
+        with patch('apps.finance.tasks.HHVacancyService', service):
+            self.assertNotIn(0, process_hh_queue_with_limit()['started_lanes'])
+
+
+class MatcherIndexTests(SimpleTestCase):
+    """Сопоставление названий вакансий и грейдов без запросов к БД"""
+
+    def setUp(self):
+        self.java = SimpleNamespace(id=1, name='Backend Engineer (Java)', is_active=True)
+        self.react = SimpleNamespace(id=2, name='Frontend Engineer (React)', is_active=True)
+        self.archived = SimpleNamespace(id=3, name='Backend Engineer (Jawa)', is_active=False)
+        self.middle = SimpleNamespace(id=1, name='Middle')
+        self.senior = SimpleNamespace(id=2, name='Senior')
+        self.index = MatcherIndex([self.java, self.react, self.archived], [self.middle, self.senior])
+
+    def test_vacancy_exact_and_fuzzy(self):
+        self.assertEqual(self.index.match_vacancy('  backend engineer (java) ')[0], self.java)
+        # Неактивная вакансия находится только точным совпадением
+        self.assertEqual(self.index.match_vacancy('Backend Engineer (Jawa)')[0], self.archived)
+        vacancy, score, exact = self.index.match_vacancy('Frontend Enginer (React)')
+        self.assertEqual(vacancy, self.react)
+        self.assertFalse(exact)
+        self.assertIsNone(self.index.match_vacancy('Бухгалтер')[0])
+
+    def test_grade_synonyms(self):
+        self.assertEqual(self.index.match_grade('middle'), (self.middle, True))
+        self.assertEqual(self.index.match_grade('Старший'), (self.senior, False))
+        self.assertEqual(self.index.match_grade('lead'), (None, False))
+
+
+class MatcherIndexInvalidationTests(TestCase):
+    """Индекс перестраивается после сохранения грейда"""
+
+    def setUp(self):
+        invalidate_matcher_index()
+        self.addCleanup(invalidate_matcher_index)
+
+    def test_grade_save_invalidates_index(self):
+        self.assertIsNone(get_matcher_index().match_grade('Architect')[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            Grade.objects.create(name='Architect')
+            # До коммита индекс не сбрасывается
+            self.assertIsNone(get_matcher_index().match_grade('Architect')[0])
+        self.assertEqual(get_matcher_index().match_grade('architect')[0].name, 'Architect')
+
+    @patch('logic.utilities.versioned_cache.time.monotonic')
+    def test_index_expires_without_cache(self, monotonic):
+        monotonic.return_value = 1000.0
+        index = get_matcher_index()
+        self.assertIs(get_matcher_index(), index)
+        # Версия в кэше не изменилась (например, кэш недоступен), но индекс устарел
+        monotonic.return_value = 1000.0 + 600
+        self.assertIsNot(get_matcher_index(), index)
+
+
+class VacancyFilterTests(SimpleTestCase):
+    """Предварительный отбор вакансий hh.ru по скомпилированным правилам"""
+
+    def setUp(self):
+        self.filter = VacancyFilter(
+            allowed_area_keywords=['Беларусь', 'Минск', 'Польша'],
+            excluded_area_keywords=['Москва'],
+            allowed_role_ids=[96],
+            excluded_title_keywords=['продавец'],
+            min_salary_thresholds={'USD': 1000},
+        )
+
+    def _item(self, area='Минск', roles=('96',), name='Python Developer', salary=None):
+        return {
+            'area': {'name': area},
+            'professional_roles': [{'id': role} for role in roles],
+            'name': name,
+            'salary': salary if salary is not None else {'from': 2000, 'to': None, 'currency': 'USD'},
+        }
+
+    def test_check_reasons_in_rule_order(self):
+        self.assertIsNone(self.filter.check(self._item()))
+        self.assertEqual(self.filter.check(self._item(area='Берлин')), 'location_not_allowed')
+        self.assertEqual(self.filter.check(self._item(area='Минск, Москва')), 'location_excluded')
+        self.assertEqual(self.filter.check(self._item(roles=())), 'no_roles')
+        self.assertEqual(self.filter.check(self._item(roles=('1',))), 'role_not_allowed')
+        self.assertEqual(self.filter.check(self._item(name='Продавец-консультант')), 'excluded_title')
+        self.assertEqual(self.filter.check(self._item(salary={})), 'no_salary')
+        self.assertEqual(
+            self.filter.check(self._item(salary={'from': None, 'to': 900, 'currency': 'USD'})),
+            'salary_below_threshold'
+        )
+        # Для валют без порога проверяется только наличие зарплаты
+        self.assertIsNone(self.filter.check(self._item(salary={'from': 10, 'currency': 'PLN'})))
+
+    def test_filter_counts_rejections(self):
+        items = [self._item(), self._item(area='Берлин'), self._item(area='Берлин'), self._item(roles=())]
+        accepted, rejections = self.filter.filter(items)
+
+        self.assertEqual(accepted, [items[0]])
+        self.assertEqual(rejections, {'location_not_allowed': 2, 'no_roles': 1})
+
+
+class SalaryRangeRecalculationTests(TestCase):
+    """Пакетный пересчет сумм зарплатных вилок после изменения курсов"""
+
+    def setUp(self):
+        invalidate_matcher_index()
+        self.addCleanup(invalidate_matcher_index)
+        recruiter = User.objects.create_user(username='recruiter', password='test')
+        recruiter.groups.add(Group.objects.get_or_create(name='Рекрутер')[0])
+        CurrencyRate.objects.update_or_create(code='USD', defaults={'rate': Decimal('3.2'), 'scale': 1})
+        CurrencyRate.objects.update_or_create(code='PLN', defaults={'rate': Decimal('8.1'), 'scale': 10})
+        CurrencyRate.objects.update_or_create(code='EUR', defaults={'rate': Decimal('3.5'), 'scale': 1})
+        PLNTax.objects.all().delete()
+        PLNTax.objects.create(name='Подоходный налог', rate=Decimal('12.00'))
+        PLNTax.objects.create(name='Социальные взносы', rate=Decimal('9.76'))
+        for index, grade_name in enumerate(['Junior', 'Middle', 'Senior']):
+            vacancy = Vacancy.objects.create(
+                name=f'Backend Engineer {index}', external_id=f'backend-{index}', recruiter=recruiter,
+                invite_title='Инвайт', invite_text='Текст', scorecard_title='Scorecard',
+            )
+            SalaryRange.objects.create(
+                vacancy=vacancy, grade=Grade.objects.get_or_create(name=grade_name)[0],
+                salary_min_usd=Decimal(1000 * (index + 1)), salary_max_usd=Decimal('1500.55') * (index + 1),
+            )
+
+    def test_recalculation_writes_changed_rows_in_one_update(self):
+        CurrencyRate.objects.filter(code='USD').update(rate=Decimal('3.3'))
+
+        with self.assertNumQueries(6):
+            # курсы, налоги, вилки, SAVEPOINT, один UPDATE, RELEASE
+            result = SalaryService.recalculate_all_currency_amounts()
+
+        self.assertEqual((result['total'], result['changed_count']), (3, 3))
+        salary_range = SalaryRange.objects.get(salary_min_usd=1000)
+        # USD -> BYN по курсу, PLN/EUR: BYN / (курс / scale) / (1 - 0.2176)
+        self.assertEqual(salary_range.salary_min_byn, Decimal('3300.00'))
+        self.assertEqual(salary_range.salary_min_pln, Decimal('5207.15'))
+        self.assertEqual(salary_range.salary_min_eur, Decimal('1205.08'))
+
+        self.assertEqual(SalaryService.recalculate_all_currency_amounts()['changed_count'], 0)
+
+    def test_rates_update_triggers_recalculation_only_on_change(self):
+        nbrb_rates = {
+            'USD': {'Cur_OfficialRate': 3.2, 'Cur_Scale': 1},
+            'PLN': {'Cur_OfficialRate': 8.1, 'Cur_Scale': 10},
+            'EUR': {'Cur_OfficialRate': 3.6, 'Cur_Scale': 1},
+        }
+        with patch.object(currency_service, 'test_connection', return_value=APIResponse(success=True)), \
+                patch.object(currency_service, 'get_all_rates', return_value=nbrb_rates):
+            result = update_currency_rates()
+            self.assertEqual(result['changed_count'], 1)
+            self.assertEqual(result['salary_ranges']['changed_count'], 3)
+
+            result = update_currency_rates()
+            self.assertEqual(result['changed_count'], 0)
+            self.assertIsNone(result['salary_ranges'])
+
+
+class RateSnapshotTests(SimpleTestCase):
+    """Конвертация валют по снимку курсов"""
+
+    def setUp(self):
+        self.snapshot = RateSnapshot({
+            'USD': (Decimal('3.2'), 1),
+            'PLN': (Decimal('8.0'), 10),
+        }, total_tax_rate=Decimal('0.2'))
+
+    def test_convert_through_byn_with_scale(self):
+        self.assertEqual(self.snapshot.convert(Decimal('100'), 'USD', 'BYN'), Decimal('320.0'))
+        self.assertEqual(self.snapshot.convert(Decimal('400'), 'PLN', 'USD'), Decimal('100'))
+        self.assertEqual(self.snapshot.convert(Decimal('100'), 'USD', 'PLN'), Decimal('400'))
+        self.assertEqual(self.snapshot.convert(Decimal('100'), 'USD', 'PLN', gross=True), Decimal('500'))
+        # gross применяется только к PLN и EUR
+        self.assertEqual(self.snapshot.convert(Decimal('100'), 'USD', 'BYN', gross=True), Decimal('320.0'))
+
+    def test_missing_rate_or_amount(self):
+        self.assertIsNone(self.snapshot.convert(Decimal('100'), 'USD', 'EUR'))
+        self.assertEqual(self.snapshot.convert_many([Decimal('1'), None], 'USD', 'BYN'), [Decimal('3.2'), None])
+        self.assertEqual(self.snapshot.salary_amounts(Decimal('100'), None)['salary_min_eur'], None)
+
+
+class RateSnapshotInvalidationTests(TestCase):
+    """Снимок курсов перечитывается после изменения налогов и курсов"""
+
+    def test_tax_and_rate_save_invalidates_snapshot(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            PLNTax.objects.all().delete()
+        self.assertEqual(get_rate_snapshot().total_tax_rate, Decimal('0'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            PLNTax.objects.create(name='Подоходный налог', rate=Decimal('12.00'))
+            # До коммита снимок не сбрасывается: другие процессы еще видят старые строки
+            self.assertEqual(get_rate_snapshot().total_tax_rate, Decimal('0'))
+        self.assertEqual(get_rate_snapshot().total_tax_rate, Decimal('0.12'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CurrencyRate.objects.update_or_create(code='USD', defaults={'rate': Decimal('2.5'), 'scale': 1})
+        self.assertEqual(get_rate_snapshot().convert(Decimal('2'), 'USD', 'BYN'), Decimal('5.0'))
+        # Повторные конвертации не обращаются к БД
+        with self.assertNumQueries(0):
+            get_rate_snapshot().convert_many([Decimal('1'), Decimal('2')], 'USD', 'PLN', gross=True)
+
+
+class BenchmarkStatsTests(TestCase):
+    """Материализованная статистика бенчмарков и дашборд на ее основе"""
+
+    def setUp(self):
+        invalidate_matcher_index()
+        self.addCleanup(invalidate_matcher_index)
+        recruiter = User.objects.create_user(username='recruiter', password='test')
+        recruiter.groups.add(Group.objects.get_or_create(name='Рекрутер')[0])
+        self.vacancy = Vacancy.objects.create(
+            name='Backend Engineer (Java)', external_id='java', recruiter=recruiter,
+            invite_title='Инвайт', invite_text='Текст', scorecard_title='Scorecard',
+        )
+        self.middle = Grade.objects.get_or_create(name='Middle')[0]
+        self.senior = Grade.objects.get_or_create(name='Senior')[0]
+
+    def _create(self, salary_from, salary_to=None, grade=None, location='Минск', benchmark_type='vacancy'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Benchmark.objects.create(
+                type=benchmark_type, vacancy=self.vacancy, grade=grade or self.middle,
+                salary_from=salary_from, salary_to=salary_to, location=location,
+            )
+
+    def test_incremental_refresh_on_create_and_deactivate(self):
+        for salary_from in (1000, 2000, 4000, 10000):
+            self._create(salary_from)
+        cell = BenchmarkStats.objects.get()
+        self.assertEqual((cell.count, cell.salary_from_p50, cell.salary_from_p25), (4, Decimal('3000.00'), Decimal('1750.00')))
+
+        benchmark = Benchmark.objects.get(salary_from=10000)
+        benchmark.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            benchmark.save()
+        self.assertEqual(BenchmarkStats.objects.get().salary_from_p50, Decimal('2000.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            benchmark.grade = self.senior
+            benchmark.is_active = True
+            benchmark.save()
+        self.assertEqual(
+            dict(BenchmarkStats.objects.values_list('grade__name', 'count')), {'Middle': 3, 'Senior': 1}
+        )
+
+    def test_dashboard_reads_stats_in_one_query(self):
+        self._create(1000, 1500)
+        self._create(3000, 4000, grade=self.senior)
+        self._create(2000, location='Варшава', benchmark_type='candidate')
+
+        with self.assertNumQueries(1):
+            stats = dashboard_statistics()
+        self.assertEqual((stats['total_benchmarks'], stats['vacancy_count'], stats['candidate_count']), (3, 2, 1))
+        self.assertEqual((stats['min_amount'], stats['max_amount']), (Decimal('1000'), Decimal('4000')))
+        candle = stats['vacancy_candlestick_data'][0]
+        # Медианы по объединенным ячейкам грейдов, а не средние
+        self.assertEqual((candle['median_min_salary'], candle['median_max_salary'], candle['count']), (2000.0, 2750.0, 2))
+        self.assertEqual(len(stats['available_locations']), 2)
+
+        filtered = dashboard_statistics(grade_ids=[str(self.senior.id)])
+        self.assertEqual((filtered['total_benchmarks'], filtered['avg_amount']), (1, Decimal('3000')))
+        # Списки для фильтров не зависят от выбранных фильтров
+        self.assertEqual(len(filtered['available_grades']), 2)
+
+    def test_value_arrays_are_read_only_for_chart_months(self):
+        self._create(1000, 1500)
+        BenchmarkStats.objects.update(month=date(2000, 1, 1))
+
+        with CaptureQueriesContext(connection) as queries:
+            stats = dashboard_statistics()
+        self.assertEqual(stats['total_benchmarks'], 1)
+        self.assertEqual(stats['vacancy_candlestick_data'], [])
+        # Массивы значений выбираются только под условием свечей вакансий
+        self.assertIn('CASE WHEN', queries[0]['sql'])
+
+    def test_full_rebuild_matches_incremental(self):
+        for salary_from in (1200, 1800, 2600):
+            self._create(salary_from, location='Минск' if salary_from < 2000 else 'Гродно')
+        incremental = sorted(BenchmarkStats.objects.values_list('location', 'count', 'salary_from_p50'))
+
+        result = refresh_benchmark_stats()
+        self.assertEqual((result['benchmarks'], result['cells']), (3, 2))
+        self.assertEqual(sorted(BenchmarkStats.objects.values_list('location', 'count', 'salary_from_p50')), incremental)
+
+    def test_dashboard_view_renders(self):
+        self._create(1000, 1500)
+        self.client.force_login(User.objects.get(username='recruiter'))
+        response = self.client.get(reverse('finance:benchmarks_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_benchmarks'], 1)
+
+
+class QuantileTests(SimpleTestCase):
+    """Квантили с линейной интерполяцией и выбросы по правилу 1.5 × IQR"""
+
+    def test_percentile_interpolates(self):
+        values = [1000.0, 2000.0, 4000.0, 10000.0]
+        self.assertEqual((percentile(values, 0.25), percentile(values, 0.5)), (1750.0, 3000.0))
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_summarize_counts_outliers(self):
+        summary = summarize([10.0, 11.0, 12.0, 13.0, 100.0])
+        self.assertEqual((summary['p25'], summary['p75'], summary['iqr']), (11.0, 13.0, 2.0))
+        self.assertEqual((summary['upper_fence'], summary['outliers']), (16.0, 1))
+
+    def test_grouped_outlier_ids(self):
+        grouped = GroupedQuantiles()
+        for row_id, salary_from in enumerate((10, 11, 12, 13, 100), start=1):
+            grouped.add(('Minsk',), row_id, (float(salary_from), None))
+        grouped.add(('Warsaw',), 6, (None, 5.0))
+
+        summaries = grouped.summaries(with_outliers=True)
+        self.assertEqual(summaries[('Minsk',)]['salary_from']['outlier_ids'], [5])
+        self.assertIsNone(summaries[('Minsk',)]['salary_to'])
+        self.assertEqual(summaries[('Warsaw',)]['salary_to']['count'], 1)
+
+
+class BenchmarkQuantilesTests(TestCase):
+    """Квантили бенчмарков по группам: функция, AJAX и API"""
+
+    def setUp(self):
+        invalidate_matcher_index()
+        self.addCleanup(invalidate_matcher_index)
+        self.user = User.objects.create_user(username='recruiter', password='test')
+        self.user.groups.add(Group.objects.get_or_create(name='Рекрутер')[0])
+        vacancy = Vacancy.objects.create(
+            name='Backend Engineer (Java)', external_id='java', recruiter=self.user,
+            invite_title='Инвайт', invite_text='Текст', scorecard_title='Scorecard',
+        )
+        middle = Grade.objects.get_or_create(name='Middle')[0]
+        for salary_from, location in ((1000, 'Минск'), (2000, 'Минск'), (4000, 'Минск'), (3000, 'Варшава')):
+            Benchmark.objects.create(
+                type='vacancy', vacancy=vacancy, grade=middle,
+                salary_from=salary_from, salary_to=salary_from + 500, location=location,
+            )
+
+    def test_groups_in_one_query(self):
+        with self.assertNumQueries(1):
+            groups = benchmark_quantiles(group_by=['grade', 'location'])
+        self.assertEqual([item['group'] for item in groups], [
+            {'grade': 'Middle', 'location': 'Минск'}, {'grade': 'Middle', 'location': 'Варшава'},
+        ])
+        self.assertEqual((groups[0]['salary_from']['p50'], groups[0]['salary_to']['p75']), (2000.0, 3500.0))
+
+    def test_unknown_group_rejected(self):
+        with self.assertRaises(ValueError):
+            benchmark_quantiles(group_by=['salary'])
+
+    def test_endpoints(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('finance:benchmarks_quantiles'), {'group_by': 'location', 'locations': 'Минск'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['groups'][0]['salary_from']['count'], 3)
+        self.assertEqual(self.client.get(reverse('finance:benchmarks_quantiles'), {'group_by': 'salary'}).status_code, 400)
+
+        response = self.client.get('/api/v1/finance/benchmarks/quantiles/', {'group_by': 'type'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['groups'][0]['salary_from']['count'], 4)
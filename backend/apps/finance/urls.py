@@ -28,6 +28,7 @@ urlpatterns = [
     # Benchmark URLs
     path('benchmarks/', views.benchmarks_dashboard, name='benchmarks_dashboard'),
     path('benchmarks/list/', views.benchmarks_list, name='benchmarks_list'),
+    path('benchmarks/quantiles/', views.benchmarks_quantiles, name='benchmarks_quantiles'),
     path('benchmarks/create/', views.benchmark_create, name='benchmark_create'),
     path('benchmarks/<int:pk>/', views.benchmark_detail, name='benchmark_detail'),
     path('benchmarks/<int:pk>/edit/', views.benchmark_edit, name='benchmark_edit'),
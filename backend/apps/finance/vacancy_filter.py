@@ -0,0 +1,128 @@
+"""
+Предварительный фильтр вакансий hh.ru
+
+Правила (локации, роли, стоп-слова названия, пороги зарплат) загружаются один
+раз из hh_search_constants и компилируются: ID ролей - во frozenset, списки
+подстрок - в автоматы Ахо-Корасик (DictionaryMatcher), поэтому проверка
+вакансии не зависит от длины списков. filter() обрабатывает пакет вакансий
+и возвращает количество отказов по каждому правилу.
+"""
+
+import logging
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from logic.utilities.dictionary_matcher import DictionaryMatcher
+
+logger = logging.getLogger('apps.finance')
+
+
+# Правила в порядке проверки: ключ причины отказа -> описание для логов
+REJECTION_REASONS = {
+    'location_not_allowed': 'неподходящая локация',
+    'location_excluded': 'российский город',
+    'no_roles': 'нет профессиональных ролей',
+    'role_not_allowed': 'неподходящая роль',
+    'excluded_title': 'не-IT название',
+    'no_salary': 'отсутствует информация о зарплате',
+    'salary_below_threshold': 'зарплата ниже порога',
+}
+
+
+class VacancyFilter:
+    """Скомпилированные правила отбора вакансий"""
+
+    AREA_CACHE_SIZE = 10000
+
+    def __init__(self, allowed_area_keywords: Iterable[str], excluded_area_keywords: Iterable[str],
+                 allowed_role_ids: Iterable[str], excluded_title_keywords: Iterable[str],
+                 min_salary_thresholds: Dict[str, int]):
+        self.allowed_areas = DictionaryMatcher({keyword.lower(): keyword for keyword in allowed_area_keywords})
+        self.excluded_areas = DictionaryMatcher({keyword.lower(): keyword for keyword in excluded_area_keywords})
+        self.allowed_role_ids = frozenset(str(role_id) for role_id in allowed_role_ids)
+        self.excluded_titles = DictionaryMatcher({keyword.lower(): keyword for keyword in excluded_title_keywords})
+        self.min_salary_thresholds = dict(min_salary_thresholds)
+        # Названий областей немного (города и страны hh.ru), вердикт по ним запоминается
+        self._area_verdicts: Dict[str, Optional[str]] = {}
+
+    @classmethod
+    def from_constants(cls) -> 'VacancyFilter':
+        from .management.commands.hh_search_constants import (
+            HH_ALLOWED_AREA_KEYWORDS, HH_ALLOWED_ROLE_IDS, HH_EXCLUDED_AREA_KEYWORDS,
+            HH_EXCLUDED_TITLE_KEYWORDS, HH_MIN_SALARY_THRESHOLDS,
+        )
+        return cls(
+            HH_ALLOWED_AREA_KEYWORDS, HH_EXCLUDED_AREA_KEYWORDS, HH_ALLOWED_ROLE_IDS,
+            HH_EXCLUDED_TITLE_KEYWORDS, HH_MIN_SALARY_THRESHOLDS,
+        )
+
+    def _check_area(self, area_name: str) -> Optional[str]:
+        verdict = self._area_verdicts.get(area_name, False)
+        if verdict is False:
+            area_lower = area_name.lower()
+            if self.allowed_areas.search(area_lower) is None:
+                verdict = 'location_not_allowed'
+            elif self.excluded_areas.search(area_lower) is not None:
+                verdict = 'location_excluded'
+            else:
+                verdict = None
+            if len(self._area_verdicts) >= self.AREA_CACHE_SIZE:
+                self._area_verdicts.clear()
+            self._area_verdicts[area_name] = verdict
+        return verdict
+
+    def check(self, vacancy_item: dict) -> Optional[str]:
+        """Причина отказа (ключ REJECTION_REASONS) или None, если вакансия подходит"""
+        reason = self._check_area((vacancy_item.get('area') or {}).get('name', ''))
+        if reason:
+            return reason
+
+        professional_roles = vacancy_item.get('professional_roles') or []
+        if not professional_roles:
+            return 'no_roles'
+        if not any(role.get('id') in self.allowed_role_ids for role in professional_roles):
+            return 'role_not_allowed'
+
+        if self.excluded_titles.search(vacancy_item.get('name', '').lower()) is not None:
+            return 'excluded_title'
+
+        salary = vacancy_item.get('salary')
+        if not salary or (not salary.get('from') and not salary.get('to')):
+            return 'no_salary'
+        min_salary = salary.get('from') or salary.get('to')
+        threshold = self.min_salary_thresholds.get(salary.get('currency', ''), 0)
+        if threshold and min_salary < threshold:
+            return 'salary_below_threshold'
+
+        return None
+
+    def filter(self, items: Iterable[dict]) -> Tuple[List[dict], Counter]:
+        """
+        Отбор пакета вакансий
+
+        Returns:
+            (подходящие вакансии, Counter отказов по правилам)
+        """
+        accepted, rejections = [], Counter()
+        for item in items:
+            reason = self.check(item)
+            if reason is None:
+                accepted.append(item)
+            else:
+                rejections[reason] += 1
+        return accepted, rejections
+
+
+_vacancy_filter: Optional[VacancyFilter] = None
+
+
+def get_vacancy_filter() -> VacancyFilter:
+    """Фильтр, скомпилированный один раз на процесс"""
+    global _vacancy_filter
+    if _vacancy_filter is None:
+        _vacancy_filter = VacancyFilter.from_constants()
+    return _vacancy_filter
+
+
+def format_rejections(rejections: Counter) -> str:
+    return ', '.join(f"{REJECTION_REASONS.get(reason, reason)}: {count}" for reason, count in rejections.most_common())
@@ -5,8 +5,6 @@ from django.core.management import call_command
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from django.db import models
-from django.db.models import Count, Avg, Min, Max, Case, When
 from io import StringIO
 import json
 from .models import Grade, CurrencyRate, PLNTax, SalaryRange, Benchmark, BenchmarkType, BenchmarkSettings, DataSource, VacancyField, HHVacancyTemp
@@ -46,13 +44,13 @@ def benchmarks_dashboard(request):
     - request.user: аутентифицированный пользователь
     
     ИСТОЧНИКИ ДАННЫХ:
-    - Benchmark.objects: все бенчмарки из базы данных
-    - Grade.objects: грейды для фильтрации
-    - Vacancy.objects: вакансии для фильтрации
+    - BenchmarkStats.objects: статистика по типу × вакансии × грейду × локации × месяцу
+    - Benchmark.objects: последние бенчмарки
     
     ОБРАБОТКА:
-    - Фильтрация бенчмарков по грейдам, вакансиям, локациям
-    - Расчет статистики (средние, минимальные, максимальные зарплаты)
+    - Чтение материализованной статистики BenchmarkStats одним запросом
+    - Фильтрация ячеек по грейдам, вакансиям, локациям
+    - Расчет статистики (средние, минимальные, максимальные зарплаты, точные медианы)
     - Группировка по грейдам и типам
     
     ВЫХОДЯЩИЕ ДАННЫЕ:
@@ -64,201 +62,38 @@ def benchmarks_dashboard(request):
     - Передает данные в: finance/benchmarks_dashboard.html
     - Может вызываться из: finance/ URL patterns
     """
-    from decimal import Decimal
-    from django.db.models import Count, Avg, Min, Max, Case, When
-    from django.db import models
+    from .benchmark_stats import dashboard_statistics
     
     # Получаем фильтры из GET параметров
     grade_filter = request.GET.getlist('grades')
     vacancy_filter = request.GET.getlist('vacancies')
     location_filter = request.GET.getlist('locations')
     
-    # Базовый queryset с фильтрами
-    base_queryset = Benchmark.objects.filter(is_active=True)
+    # Вся статистика - одним запросом к материализованной BenchmarkStats
+    stats = dashboard_statistics(grade_filter, vacancy_filter, location_filter)
     
+    # Последние бенчмарки
+    recent_benchmarks = Benchmark.objects.filter(is_active=True)
     if grade_filter:
-        base_queryset = base_queryset.filter(grade_id__in=grade_filter)
+        recent_benchmarks = recent_benchmarks.filter(grade_id__in=grade_filter)
     if vacancy_filter:
-        base_queryset = base_queryset.filter(vacancy_id__in=vacancy_filter)
+        recent_benchmarks = recent_benchmarks.filter(vacancy_id__in=vacancy_filter)
     if location_filter:
-        base_queryset = base_queryset.filter(location__in=location_filter)
-    
-    # Основная статистика
-    total_benchmarks = base_queryset.count()
-    candidate_benchmarks = base_queryset.filter(type='candidate')
-    vacancy_benchmarks = base_queryset.filter(type='vacancy')
-    
-    candidate_count = candidate_benchmarks.count()
-    vacancy_count = vacancy_benchmarks.count()
-    
-    # Статистика по суммам
-    if total_benchmarks > 0:
-        avg_amount = base_queryset.aggregate(avg=Avg('salary_from'))['avg'] or Decimal('0')
-        min_amount = base_queryset.aggregate(min=Min('salary_from'))['min'] or Decimal('0')
-        # Для максимальной зарплаты используем salary_to, если есть, иначе salary_from
-        from django.db.models import Case, When, Value, IntegerField
-        from django.db import models
-        max_amount = base_queryset.aggregate(
-            max=Max(Case(
-                When(salary_to__isnull=False, then='salary_to'),
-                default='salary_from',
-                output_field=models.DecimalField()
-            ))
-        )['max'] or Decimal('0')
-        
-        avg_candidate = candidate_benchmarks.aggregate(avg=Avg('salary_from'))['avg'] or Decimal('0')
-        avg_vacancy = vacancy_benchmarks.aggregate(avg=Avg('salary_from'))['avg'] or Decimal('0')
-    else:
-        avg_amount = min_amount = max_amount = avg_candidate = avg_vacancy = Decimal('0')
-    
-    # Статистика по вакансиям
-    vacancy_stats = base_queryset.values('vacancy__name').annotate(
-        count=Count('id'),
-        avg_amount=Avg('salary_from')
-    ).order_by('-count')[:10]
-    
-    # Статистика по грейдам
-    grade_stats = base_queryset.values('grade__name').annotate(
-        count=Count('id'),
-        avg_amount=Avg('salary_from')
-    ).order_by('-count')[:10]
-    
-    # Статистика по локациям
-    location_stats = base_queryset.values('location').annotate(
-        count=Count('id'),
-        avg_amount=Avg('salary_from')
-    ).order_by('-count')[:10]
-    
-    # Последние бенчмарки
-    recent_benchmarks = base_queryset.select_related('vacancy', 'grade').order_by('-date_added')[:6]
-    
-    # Топ вакансии по количеству бенчмарков
-    top_vacancies = base_queryset.values(
-        'vacancy__name', 'vacancy__id'
-    ).annotate(
-        count=Count('id')
-    ).order_by('-count')[:5]
-    
-    # Топ грейды по количеству бенчмарков
-    top_grades = base_queryset.values(
-        'grade__name', 'grade__id'
-    ).annotate(
-        count=Count('id')
-    ).order_by('-count')[:5]
-    
-    # Данные для круговых графиков
-    # Распределение по грейдам (для кругового графика)
-    grade_distribution = base_queryset.values('grade__name').annotate(
-        count=Count('id')
-    ).order_by('-count')
-    
-    # Распределение по вакансиям (для кругового графика)
-    vacancy_distribution = base_queryset.values('vacancy__name').annotate(
-        count=Count('id')
-    ).order_by('-count')[:10]  # Топ 10 вакансий
-    
-    # Распределение по локациям (для кругового графика)
-    location_distribution = base_queryset.values('location').annotate(
-        count=Count('id')
-    ).order_by('-count')[:10]  # Топ 10 локаций
-    
-    # Данные для линейного графика медианной зарплаты
-    # Группируем по месяцам для последних 12 месяцев
-    from django.db.models.functions import TruncMonth
-    
-    # Получаем данные за последние 12 месяцев
-    from datetime import datetime, timedelta
-    twelve_months_ago = datetime.now() - timedelta(days=365)
-    
-    # Средняя зарплата кандидатов по месяцам (используем Avg вместо Median)
-    candidate_avg_by_month = base_queryset.filter(
-        type='candidate',
-        date_added__gte=twelve_months_ago
-    ).annotate(
-        month=TruncMonth('date_added')
-    ).values('month').annotate(
-        avg_salary=Avg('salary_from')
-    ).order_by('month')
-    
-    # Средняя зарплата вакансий по месяцам (используем Avg вместо Median)
-    vacancy_avg_by_month = base_queryset.filter(
-        type='vacancy',
-        date_added__gte=twelve_months_ago
-    ).annotate(
-        month=TruncMonth('date_added')
-    ).values('month').annotate(
-        avg_salary=Avg('salary_from')
-    ).order_by('month')
-    
-    # Данные для графика-свечек по вакансиям
-    # Группируем по месяцам для каждой вакансии отдельно
-    vacancy_candlestick_data = base_queryset.filter(
-        type='vacancy',
-        date_added__gte=twelve_months_ago
-    ).annotate(
-        month=TruncMonth('date_added')
-    ).values('month', 'vacancy__name', 'vacancy__id').annotate(
-        min_salary=Min('salary_from'),
-        median_min_salary=Avg('salary_from'),  # Используем Avg как приближение к медиане
-        median_max_salary=Avg(Case(
-            When(salary_to__isnull=False, then='salary_to'),
-            default='salary_from',
-            output_field=models.DecimalField()
-        )),
-        max_salary=Max(Case(
-            When(salary_to__isnull=False, then='salary_to'),
-            default='salary_from',
-            output_field=models.DecimalField()
-        )),
-        count=Count('id')
-    ).order_by('month', 'vacancy__name')
-    
-    # Данные для фильтров
-    available_grades = Benchmark.objects.filter(is_active=True).values_list('grade__id', 'grade__name').distinct().order_by('grade__name')
-    available_vacancies = Benchmark.objects.filter(is_active=True).values_list('vacancy__id', 'vacancy__name').distinct().order_by('vacancy__name')
-    available_locations = Benchmark.objects.filter(is_active=True).values_list('location', flat=True).distinct().order_by('location')
+        recent_benchmarks = recent_benchmarks.filter(location__in=location_filter)
+    recent_benchmarks = recent_benchmarks.select_related('vacancy', 'grade').order_by('-date_added')[:6]
     
     context = {
-        'total_benchmarks': total_benchmarks,
-        'candidate_count': candidate_count,
-        'vacancy_count': vacancy_count,
-        'avg_amount': avg_amount,
-        'min_amount': min_amount,
-        'max_amount': max_amount,
-        'avg_candidate': avg_candidate,
-        'avg_vacancy': avg_vacancy,
-        'vacancy_stats': vacancy_stats,
-        'grade_stats': grade_stats,
-        'location_stats': location_stats,
+        **stats,
         'recent_benchmarks': recent_benchmarks,
-        'top_vacancies': top_vacancies,
-        'top_grades': top_grades,
         
         # Данные для графиков (сериализованные в JSON)
-        'grade_distribution': json.dumps([{'grade__name': item['grade__name'], 'count': item['count']} for item in grade_distribution]),
-        'vacancy_distribution': json.dumps([{'vacancy__name': item['vacancy__name'], 'count': item['count']} for item in vacancy_distribution]),
-        'location_distribution': json.dumps([{'location': item['location'], 'count': item['count']} for item in location_distribution]),
+        'grade_distribution': json.dumps(stats['grade_distribution']),
+        'vacancy_distribution': json.dumps(stats['vacancy_distribution']),
+        'location_distribution': json.dumps(stats['location_distribution']),
         'type_comparison_data': [
-            {'type': 'Кандидаты', 'count': candidate_count, 'avg_salary': float(avg_candidate) if avg_candidate else 0},
-            {'type': 'Вакансии', 'count': vacancy_count, 'avg_salary': float(avg_vacancy) if avg_vacancy else 0}
+            {'type': 'Кандидаты', 'count': stats['candidate_count'], 'avg_salary': float(stats['avg_candidate'])},
+            {'type': 'Вакансии', 'count': stats['vacancy_count'], 'avg_salary': float(stats['avg_vacancy'])}
         ],
-        'candidate_avg_by_month': [{'month': item['month'].strftime('%Y-%m-%d') if item['month'] else None, 'avg_salary': float(item['avg_salary']) if item['avg_salary'] else 0} for item in candidate_avg_by_month],
-        'vacancy_avg_by_month': [{'month': item['month'].strftime('%Y-%m-%d') if item['month'] else None, 'avg_salary': float(item['avg_salary']) if item['avg_salary'] else 0} for item in vacancy_avg_by_month],
-        'vacancy_candlestick_data': [{
-            'month': item['month'].strftime('%Y-%m-%d') if item['month'] else None,
-            'vacancy__name': item['vacancy__name'],
-            'vacancy__id': item['vacancy__id'],
-            'min_salary': float(item['min_salary']) if item['min_salary'] else 0,
-            'median_min_salary': float(item['median_min_salary']) if item['median_min_salary'] else 0,
-            'median_max_salary': float(item['median_max_salary']) if item['median_max_salary'] else 0,
-            'max_salary': float(item['max_salary']) if item['max_salary'] else 0,
-            'count': item['count']
-        } for item in vacancy_candlestick_data],
-        
-        # Данные для фильтров
-        'available_grades': available_grades,
-        'available_vacancies': available_vacancies,
-        'available_locations': available_locations,
     }
     return render(request, 'finance/benchmarks_dashboard.html', context)
 
@@ -673,6 +508,53 @@ def delete_pln_tax(request, tax_id):
         return JsonResponse({'success': False, 'message': f'Ошибка при удалении налога: {str(e)}'})
 
 
+@login_required
+@require_http_methods(["GET"])
+def benchmarks_quantiles(request):
+    """
+    Точные квантили зарплат бенчмарков по группам
+    
+    ВХОДЯЩИЕ ДАННЫЕ:
+    - request.GET: group_by (type, grade, vacancy, location, domain, work_format; можно несколько),
+      grades, vacancies, locations (фильтры как на дашборде), outliers=1 (id выбросов)
+    
+    ИСТОЧНИКИ ДАННЫХ:
+    - Benchmark.objects: активные бенчмарки (один запрос)
+    
+    ОБРАБОТКА:
+    - p25/p50/p75, IQR и границы выбросов для salary_from и salary_to
+    
+    ВЫХОДЯЩИЕ ДАННЫЕ:
+    - JSON ответ с квантилями по группам
+    
+    СВЯЗИ:
+    - Использует: apps.finance.quantiles.benchmark_quantiles
+    - Может вызываться из: AJAX запросы
+    """
+    from .quantiles import benchmark_quantiles
+    
+    try:
+        queryset = Benchmark.objects.filter(is_active=True)
+        if request.GET.getlist('grades'):
+            queryset = queryset.filter(grade_id__in=request.GET.getlist('grades'))
+        if request.GET.getlist('vacancies'):
+            queryset = queryset.filter(vacancy_id__in=request.GET.getlist('vacancies'))
+        if request.GET.getlist('locations'):
+            queryset = queryset.filter(location__in=request.GET.getlist('locations'))
+        
+        groups = benchmark_quantiles(
+            queryset,
+            group_by=request.GET.getlist('group_by') or ['type'],
+            with_outliers=request.GET.get('outliers') == '1'
+        )
+        return JsonResponse({'success': True, 'groups': groups})
+        
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({'success': False, 'message': f'Ошибка при расчете квантилей: {str(e)}'})
+
+
 @login_required
 @require_http_methods(["GET"])
 def calculate_pln_taxes(request):
@@ -333,6 +333,25 @@ class BenchmarkViewSet(FinanceAPIViewSet):
             'type_stats': list(type_stats),
             'grade_stats': list(grade_stats)
         })
+    
+    @action(detail=False, methods=['get'], url_path='quantiles')
+    def quantiles(self, request):
+        """
+        Точные квантили salary_from/salary_to по группам
+        
+        Параметры: group_by (можно несколько), outliers=1 и фильтры списка бенчмарков
+        """
+        from .quantiles import benchmark_quantiles
+        
+        try:
+            groups = benchmark_quantiles(
+                self.filter_queryset(self.get_queryset()),
+                group_by=request.query_params.getlist('group_by') or ['type'],
+                with_outliers=request.query_params.get('outliers') == '1'
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'groups': groups})
 
 
 class BenchmarkSettingsViewSet(FinanceAPIViewSet):
@@ -4,6 +4,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from logic.base.response_handler import UnifiedResponseHandler
 from logic.integration.shared.gemini_operations import BaseGeminiOperations
+from apps.gemini.logic.response_cache import gemini_cache_site
 from apps.finance.models import SalaryRange, Benchmark
 from django.db.models import Avg, Min, Max, Count
 
@@ -36,6 +37,7 @@ class FinanceAnalysisService(BaseGeminiOperations):
     def __init__(self):
         super().__init__("", "https://generativelanguage.googleapis.com", timeout=30)
     
+    @gemini_cache_site('finance_analysis')
     def analyze_finance_data(self, analysis_type, data):
         """Прямой анализ финансовых данных без промптов"""
         try:
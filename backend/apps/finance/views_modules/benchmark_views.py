@@ -5,6 +5,7 @@ from django.contrib import messages
 from logic.base.response_handler import UnifiedResponseHandler
 from logic.integration.shared.gemini_operations import BaseGeminiOperations
 from logic.integration.shared.gemini_operations import GeminiPromptManager
+from apps.gemini.logic.response_cache import gemini_cache_site
 from apps.finance.models import Benchmark
 
 class BenchmarkGeminiService(BaseGeminiOperations):
@@ -38,6 +39,7 @@ class BenchmarkGeminiService(BaseGeminiOperations):
     def __init__(self):
         super().__init__("", "https://generativelanguage.googleapis.com", timeout=30)
     
+    @gemini_cache_site('benchmark_analysis')
     def analyze_salary_benchmark(self, benchmark_data, prompt_source='finance'):
         """Анализ зарплатного бенчмарка с использованием промпта из Finance"""
         try:
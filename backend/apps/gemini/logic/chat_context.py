@@ -0,0 +1,138 @@
+"""
+Контекст чата для Gemini в пределах бюджета токенов
+
+В запрос попадают последние сообщения сессии, пока их суммарная оценка
+не превышает history_tokens (и не больше max_messages). Более ранние
+сообщения сворачиваются в сводку, которая хранится в ChatSession
+(history_summary, summary_until_id) и дополняется только новыми вытесненными
+сообщениями - каждое сообщение читается из базы и сворачивается один раз.
+
+Токены оцениваются локально (rate_limiter.estimate_tokens, chars_per_token),
+без запросов к API. Сообщения читаются одним запросом values_list от новых
+к старым, только после summary_until_id.
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+
+from ..models import ChatMessage, ChatSession
+from .rate_limiter import estimate_tokens, get_gemini_rate_limits
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_GEMINI_CHAT_CONTEXT = {
+    'history_tokens': 6000,            # Бюджет последних сообщений в запросе
+    'max_messages': 50,                # Максимум последних сообщений в запросе
+    'summary_tokens': 1000,            # Бюджет сводки ранней истории
+    'summary_chars_per_message': 300,  # Сколько символов сообщения попадает в сводку
+    'message_overhead_tokens': 4,      # Роль и разметка сообщения
+}
+
+ROLE_LABELS = {
+    'user': 'Пользователь',
+    'assistant': 'Ассистент',
+}
+
+SUMMARY_PREFIX = 'Краткое содержание предыдущей части диалога:\n'
+SUMMARY_ACK = 'Понял, учитываю предыдущую часть диалога.'
+
+
+def get_chat_context_settings() -> Dict:
+    config = dict(DEFAULT_GEMINI_CHAT_CONTEXT)
+    config.update(getattr(settings, 'GEMINI_CHAT_CONTEXT', {}) or {})
+    return config
+
+
+def message_tokens(content: str, config: Dict, limits: Dict) -> int:
+    """Оценка токенов сообщения в истории"""
+    return estimate_tokens(content, limits, output_tokens=0) + config['message_overhead_tokens']
+
+
+def fold_into_summary(summary: str, rows: Iterable[Tuple[int, str, str]], config: Dict, limits: Dict) -> str:
+    """
+    Дописывает сообщения (в хронологическом порядке) в сводку
+
+    Каждое сообщение - одна строка "<роль>: <начало текста>". Если сводка
+    больше summary_tokens, отбрасываются самые старые строки.
+    """
+    limit = config['summary_chars_per_message']
+    lines = summary.splitlines() if summary else []
+    for _, role, content in rows:
+        text = ' '.join((content or '').split())
+        if len(text) > limit:
+            text = text[:limit].rstrip() + '…'
+        lines.append(f"{ROLE_LABELS.get(role, role)}: {text}")
+
+    max_chars = config['summary_tokens'] * max(1, limits['chars_per_token'])
+    size = sum(len(line) + 1 for line in lines)
+    while len(lines) > 1 and size > max_chars:
+        size -= len(lines.pop(0)) + 1
+    result = '\n'.join(lines)
+    return result[-max_chars:] if len(result) > max_chars else result
+
+
+def build_chat_history(session: ChatSession, exclude_id: Optional[int] = None,
+                       config: Optional[Dict] = None) -> List[Dict[str, str]]:
+    """
+    История для запроса к Gemini: сводка ранних сообщений + последние сообщения
+
+    Args:
+        session: Сессия чата
+        exclude_id: ID сообщения, которое не входит в историю (текущий запрос пользователя)
+        config: Настройки (по умолчанию GEMINI_CHAT_CONTEXT)
+
+    Returns:
+        list: [{'role': 'user' | 'assistant', 'content': ...}] в хронологическом порядке
+    """
+    config = config or get_chat_context_settings()
+    limits = get_gemini_rate_limits()
+
+    rows = ChatMessage.objects.filter(
+        session_id=session.pk,
+        role__in=ROLE_LABELS,
+        id__gt=session.summary_until_id or 0,
+    )
+    if exclude_id is not None:
+        rows = rows.exclude(pk=exclude_id)
+    rows = rows.order_by('-id').values_list('id', 'role', 'content')
+
+    window, folded, used = [], [], 0
+    for row in rows:
+        if not folded and len(window) < config['max_messages']:
+            tokens = message_tokens(row[2], config, limits)
+            if used + tokens <= config['history_tokens']:
+                window.append(row)
+                used += tokens
+                continue
+        folded.append(row)
+
+    if folded:
+        _update_summary(session, folded, config, limits)
+
+    history = []
+    if session.history_summary:
+        history.append({'role': 'user', 'content': SUMMARY_PREFIX + session.history_summary})
+        if not window or window[-1][1] == 'user':
+            history.append({'role': 'assistant', 'content': SUMMARY_ACK})
+    history.extend({'role': role, 'content': content} for _, role, content in reversed(window))
+    return history
+
+
+def _update_summary(session: ChatSession, folded: List[Tuple[int, str, str]], config: Dict, limits: Dict):
+    """Сворачивает вытесненные из окна сообщения (от новых к старым) в сводку сессии"""
+    previous_until = session.summary_until_id
+    summary = fold_into_summary(session.history_summary, reversed(folded), config, limits)
+    until = folded[0][0]
+
+    # Условное обновление: параллельный запрос мог уже сдвинуть сводку
+    updated = ChatSession.objects.filter(
+        pk=session.pk, summary_until_id=previous_until
+    ).update(history_summary=summary, summary_until_id=until)
+    if not updated:
+        logger.info(f"Сводка сессии {session.pk} уже обновлена другим запросом")
+
+    session.history_summary = summary
+    session.summary_until_id = until
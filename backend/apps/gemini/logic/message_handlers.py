@@ -11,6 +11,8 @@ from rest_framework.response import Response
 from rest_framework import status
 
 from ..models import ChatSession, ChatMessage
+from .chat_context import build_chat_history
+from .response_cache import gemini_cache_site
 from .services import GeminiService
 
 
@@ -88,31 +90,24 @@ class MessageHandler:
         )
     
     @staticmethod
-    def get_message_history(session: ChatSession, limit: int = 20) -> list:
+    def get_message_history(session: ChatSession, exclude_id: Optional[int] = None) -> list:
         """
         Получение истории сообщений для контекста
-        
+
+        Последние сообщения в пределах бюджета токенов и сводка более ранних
+        (см. chat_context.build_chat_history)
+
         Args:
             session: Сессия чата
-            limit: Максимальное количество сообщений
-            
+            exclude_id: ID сообщения, которое передается отдельно как текущий запрос
+
         Returns:
             list: Список сообщений для истории
         """
-        history_messages = ChatMessage.objects.filter(
-            session=session
-        ).order_by('timestamp')[:limit]
-        
-        history = []
-        for msg in history_messages:
-            history.append({
-                'role': msg.role,
-                'content': msg.content
-            })
-        
-        return history
+        return build_chat_history(session, exclude_id=exclude_id)
     
     @staticmethod
+    @gemini_cache_site('chat')
     def send_to_gemini(message: str, history: list, api_key: str) -> Tuple[bool, str, Dict[str, Any]]:
         """
         Отправка сообщения в Gemini API
@@ -194,7 +189,7 @@ class MessageHandler:
             user_message = MessageHandler.create_user_message(chat_session, message)
             
             # Получение истории сообщений
-            history = MessageHandler.get_message_history(chat_session)
+            history = MessageHandler.get_message_history(chat_session, exclude_id=user_message.id)
             
             # Отправка к Gemini
             success, response, metadata = MessageHandler.send_to_gemini(
@@ -223,6 +218,68 @@ class MessageHandler:
         except Exception as e:
             return {'success': False, 'error': f'Внутренняя ошибка сервера: {str(e)}'}
 
+    @staticmethod
+    def stream_message_to_gemini(session_id: int, message: str, user) -> Dict[str, Any]:
+        """
+        Потоковая отправка сообщения в Gemini
+
+        Проверки и сообщение пользователя - до начала потока, чтобы ошибки
+        возвращались обычным JSON. Сообщение ассистента с токенами сохраняется,
+        когда поток завершился.
+
+        Args:
+            session_id: ID сессии чата
+            message: Текст сообщения
+            user: Пользователь Django
+
+        Returns:
+            Dict[str, Any]: {'success': False, 'error': ...} или {'success': True, 'events': генератор событий}
+        """
+        try:
+            is_valid, error = MessageHandler.validate_message_request({
+                'session_id': session_id,
+                'message': message
+            })
+            if not is_valid:
+                return {'success': False, 'error': error}
+
+            has_key, error = MessageHandler.validate_api_key(user)
+            if not has_key:
+                return {'success': False, 'error': error}
+
+            chat_session = MessageHandler.get_chat_session(session_id, user)
+            user_message = MessageHandler.create_user_message(chat_session, message)
+            history = MessageHandler.get_message_history(chat_session, exclude_id=user_message.id)
+
+        except Exception as e:
+            return {'success': False, 'error': f'Внутренняя ошибка сервера: {str(e)}'}
+
+        def events():
+            yield {'type': 'start', 'user_message_id': user_message.id}
+
+            # Заголовки уже отправлены - ошибка передается клиенту событием error
+            try:
+                for event in GeminiService(user.gemini_api_key).stream_content(message, history):
+                    if event['type'] != 'done':
+                        yield event
+                        continue
+
+                    assistant_message = MessageHandler.create_assistant_message(
+                        chat_session, event['text'], event['metadata']
+                    )
+                    MessageHandler.update_session_timestamp(chat_session)
+                    yield {
+                        'type': 'done',
+                        'response': event['text'],
+                        'user_message_id': user_message.id,
+                        'assistant_message_id': assistant_message.id,
+                        'metadata': event['metadata']
+                    }
+            except Exception as e:
+                yield {'type': 'error', 'error': f'Внутренняя ошибка сервера: {str(e)}'}
+
+        return {'success': True, 'events': events()}
+
 
 class MessageApiHandler:
     """Обработчик для API endpoints сообщений"""
@@ -0,0 +1,179 @@
+"""
+Ограничитель запросов к Gemini API по API ключу (RPM / TPM / RPD)
+
+Каждый лимит - token bucket в форме GCRA: в Redis хранится "теоретическое время
+прибытия" (TAT) следующего запроса. Резервирование не блокирует воркер, а
+возвращает задержку, через которую запрос можно выполнить, - задачи Celery
+планируются через apply_async(countdown=...) вместо time.sleep.
+
+Состояние общее для всех воркеров (Redis через django_redis). Если кэш не Redis
+(тесты, локальная разработка), используется состояние внутри процесса.
+"""
+
+import hashlib
+import threading
+import time
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+DEFAULT_GEMINI_RATE_LIMITS = {
+    'rpm': 15,                   # Запросов в минуту
+    'tpm': 1_000_000,            # Токенов в минуту
+    'rpd': 1500,                 # Запросов в сутки
+    'output_tokens_estimate': 2048,  # Резерв токенов на ответ модели
+    'chars_per_token': 4,        # Грубая оценка размера промпта в токенах
+}
+
+# Периоды окон лимитов в секундах
+LIMIT_PERIODS = {
+    'rpm': 60,
+    'tpm': 60,
+    'rpd': 86400,
+}
+
+
+def get_gemini_rate_limits() -> Dict:
+    limits = dict(DEFAULT_GEMINI_RATE_LIMITS)
+    limits.update(getattr(settings, 'GEMINI_RATE_LIMITS', {}) or {})
+    return limits
+
+
+def estimate_tokens(text: str, limits: Optional[Dict] = None, output_tokens: Optional[int] = None) -> int:
+    """Оценка количества токенов запроса (промпт + резерв на ответ)"""
+    limits = limits or get_gemini_rate_limits()
+    if output_tokens is None:
+        output_tokens = limits['output_tokens_estimate']
+    return len(text or '') // max(1, limits['chars_per_token']) + output_tokens
+
+
+# KEYS: TAT ключи бакетов; ARGV: now, max_delay, ttl, затем (стоимость, интервал, допуск) на бакет.
+# Задержка = максимум по бакетам; резерв записывается во все бакеты, только если
+# задержка не превышает max_delay (иначе возвращается -задержка без резерва).
+_RESERVE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local max_delay = tonumber(ARGV[2])
+local ttl = tonumber(ARGV[3])
+local tats = {}
+local delay = 0
+for i, key in ipairs(KEYS) do
+    local base = 3 + (i - 1) * 3
+    local cost = tonumber(ARGV[base + 1])
+    local interval = tonumber(ARGV[base + 2])
+    local burst = tonumber(ARGV[base + 3])
+    local tat = tonumber(redis.call('GET', key) or '0')
+    if tat < now then tat = now end
+    tats[i] = tat
+    local wait = tat + cost * interval - burst - now
+    if wait > delay then delay = wait end
+end
+if max_delay >= 0 and delay > max_delay then
+    return tostring(-delay)
+end
+for i, key in ipairs(KEYS) do
+    local base = 3 + (i - 1) * 3
+    local cost = tonumber(ARGV[base + 1])
+    local interval = tonumber(ARGV[base + 2])
+    local start = now + delay
+    local tat = tats[i]
+    if tat < start then tat = start end
+    redis.call('SET', key, tostring(tat + cost * interval), 'EX', ttl)
+end
+return tostring(delay)
+"""
+
+
+class GeminiRateLimiter:
+    """
+    Общий лимитер запросов для одного API ключа Gemini
+
+    Пример:
+        limiter = GeminiRateLimiter(api_key)
+        delay = limiter.reserve(estimate_tokens(prompt))
+        task.apply_async(args=[...], countdown=delay)
+    """
+
+    KEY_PREFIX = 'gemini_rate'
+
+    _local_state: Dict[str, float] = {}
+    _local_lock = threading.Lock()
+
+    def __init__(self, api_key: str, limits: Optional[Dict] = None):
+        self.limits = limits or get_gemini_rate_limits()
+        # Ключ API не попадает в Redis в открытом виде
+        self.key_hash = hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()[:16]
+        self._redis = self._get_redis()
+
+    @staticmethod
+    def _get_redis():
+        try:
+            from django_redis import get_redis_connection
+            from django_redis.cache import RedisCache
+        except ImportError:
+            return None
+        if not isinstance(caches['default'], RedisCache):
+            return None
+        return get_redis_connection('default')
+
+    def _buckets(self, tokens: int):
+        """(ключ, стоимость, интервал на единицу, допуск всплеска) для каждого лимита"""
+        buckets = []
+        for name, period in LIMIT_PERIODS.items():
+            capacity = self.limits.get(name)
+            if not capacity:
+                continue
+            cost = min(tokens if name == 'tpm' else 1, capacity)
+            interval = period / capacity
+            buckets.append((f'{self.KEY_PREFIX}:{self.key_hash}:{name}', cost, interval, capacity * interval))
+        return buckets
+
+    def reserve(self, tokens: int = 0, max_delay: Optional[float] = None) -> Optional[float]:
+        """
+        Резервирует запрос стоимостью tokens токенов
+
+        Returns:
+            Задержка в секундах до момента, когда запрос можно выполнить (0 - сразу),
+            или None, если задержка больше max_delay (резерв не сделан)
+        """
+        buckets = self._buckets(tokens)
+        if not buckets:
+            return 0.0
+        now = time.time()
+        limit = -1 if max_delay is None else max_delay
+
+        if self._redis is not None:
+            args = [now, limit, max(LIMIT_PERIODS.values()) * 2]
+            for _, cost, interval, burst in buckets:
+                args.extend([cost, interval, burst])
+            delay = float(self._redis.eval(_RESERVE_SCRIPT, len(buckets), *[b[0] for b in buckets], *args))
+        else:
+            delay = self._reserve_local(buckets, now, limit)
+
+        return None if delay < 0 else delay
+
+    def _reserve_local(self, buckets, now: float, max_delay: float) -> float:
+        """Тот же алгоритм, что и в Lua скрипте, для кэша без Redis"""
+        with self._local_lock:
+            tats = [max(self._local_state.get(key, 0.0), now) for key, _, _, _ in buckets]
+            delay = max(
+                [0.0] + [tat + cost * interval - burst - now
+                         for tat, (_, cost, interval, burst) in zip(tats, buckets)]
+            )
+            if max_delay >= 0 and delay > max_delay:
+                return -delay
+            start = now + delay
+            for tat, (key, cost, interval, _) in zip(tats, buckets):
+                self._local_state[key] = max(tat, start) + cost * interval
+            return delay
+
+    def reset(self):
+        """Сбрасывает состояние лимитов ключа"""
+        keys = [bucket[0] for bucket in self._buckets(0)]
+        if self._redis is not None:
+            self._redis.delete(*keys)
+        else:
+            with self._local_lock:
+                for key in keys:
+                    self._local_state.pop(key, None)
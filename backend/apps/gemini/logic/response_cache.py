@@ -0,0 +1,305 @@
+"""
+Кэш ответов Gemini для одинаковых запросов
+
+Повторный анализ HR-скрининга, анализ бенчмарков и финансов, подбор времени
+встречи часто отправляют побайтно одинаковые запросы. Ключ кэша - sha256 от
+модели и полного тела запроса (contents, generationConfig, safetySettings),
+поэтому ответ переиспользуется только для действительно одинакового запроса.
+API ключ в ключ кэша не входит, поэтому проверки подключения не кэшируются.
+
+TTL задается по месту вызова (GEMINI_RESPONSE_CACHE['ttls']); место вызова
+выбирается декоратором / контекстным менеджером gemini_cache_site. Чат не
+кэшируется (TTL 0). Размер ограничен max_entries: в Redis порядок обращений
+хранится в sorted set, при переполнении удаляются давно не читавшиеся ответы.
+Счетчики попаданий, промахов и сэкономленных токенов - gemini_cache_stats.
+
+Если кэш не Redis (тесты, локальная разработка), используется LRU внутри
+процесса. Ошибки кэша не влияют на запросы: запрос просто уходит в API.
+"""
+
+import contextvars
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import ContextDecorator
+from typing import Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_SITE = 'default'
+
+DEFAULT_GEMINI_RESPONSE_CACHE = {
+    'enabled': True,
+    'max_entries': 5000,  # Максимум ответов в кэше (LRU)
+    'ttls': {             # TTL по месту вызова (сек); 0 - не кэшировать
+        DEFAULT_SITE: 3600,
+        'chat': 0,
+        'test_connection': 0,  # Проверка ключа должна доходить до API
+        'hr_screening': 86400,
+        'benchmark_analysis': 21600,
+        'finance_analysis': 3600,
+        'invite_time': 600,
+    },
+}
+
+_current_site = contextvars.ContextVar('gemini_cache_site', default=DEFAULT_SITE)
+
+
+def get_gemini_response_cache_settings() -> Dict:
+    config = dict(DEFAULT_GEMINI_RESPONSE_CACHE)
+    overrides = dict(getattr(settings, 'GEMINI_RESPONSE_CACHE', {}) or {})
+    ttls = dict(config['ttls'])
+    ttls.update(overrides.pop('ttls', {}) or {})
+    config.update(overrides)
+    config['ttls'] = ttls
+    return config
+
+
+class gemini_cache_site(ContextDecorator):
+    """
+    Место вызова для запросов к Gemini внутри блока или функции
+
+    Пример:
+        @gemini_cache_site('hr_screening')
+        def analyze_with_gemini(self): ...
+
+        with gemini_cache_site('chat'):
+            service.generate_content(message, history)
+    """
+
+    def __init__(self, site: str):
+        self.site = site
+        self._token = None
+
+    def _recreate_cm(self):
+        # Отдельный экземпляр на каждый вызов декорированной функции (потоки, рекурсия)
+        return gemini_cache_site(self.site)
+
+    def __enter__(self):
+        self._token = _current_site.set(self.site)
+        return self
+
+    def __exit__(self, *exc_info):
+        _current_site.reset(self._token)
+        return False
+
+
+def current_cache_site() -> str:
+    return _current_site.get()
+
+
+def make_cache_key(model: str, request_data: Dict) -> str:
+    """sha256 от модели и канонического JSON тела запроса"""
+    payload = json.dumps(
+        {'model': model, 'request': request_data},
+        sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _saved_tokens(response_data: Dict) -> int:
+    return int((response_data.get('usageMetadata') or {}).get('totalTokenCount') or 0)
+
+
+# KEYS: запись, sorted set LRU, счетчики; ARGV: now, место вызова.
+# Чтение записи и обновление ее позиции в LRU одним обращением к Redis.
+_GET_SCRIPT = """
+local value = redis.call('GET', KEYS[1])
+if value then
+    redis.call('ZADD', KEYS[2], ARGV[1], KEYS[1])
+    redis.call('HINCRBY', KEYS[3], 'hits', 1)
+    redis.call('HINCRBY', KEYS[3], ARGV[2] .. ':hits', 1)
+else
+    redis.call('ZREM', KEYS[2], KEYS[1])
+    redis.call('HINCRBY', KEYS[3], 'misses', 1)
+    redis.call('HINCRBY', KEYS[3], ARGV[2] .. ':misses', 1)
+end
+return value
+"""
+
+# KEYS: запись, sorted set LRU; ARGV: значение, ttl, now, max_entries, max_ttl.
+# Запись, удаление из LRU истекших и вытеснение самых старых сверх max_entries.
+_SET_SCRIPT = """
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+redis.call('ZADD', KEYS[2], ARGV[3], KEYS[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', tonumber(ARGV[3]) - tonumber(ARGV[5]))
+local overflow = redis.call('ZCARD', KEYS[2]) - tonumber(ARGV[4])
+if overflow > 0 then
+    local evicted = redis.call('ZRANGE', KEYS[2], 0, overflow - 1)
+    redis.call('ZREMRANGEBYRANK', KEYS[2], 0, overflow - 1)
+    redis.call('DEL', unpack(evicted))
+    return #evicted
+end
+return 0
+"""
+
+
+class GeminiResponseCache:
+    """Хранилище ответов Gemini: Redis (общий для воркеров) или LRU внутри процесса"""
+
+    KEY_PREFIX = 'gemini_cache'
+
+    _local_entries: 'OrderedDict[str, Tuple[float, str]]' = OrderedDict()
+    _local_stats: Dict[str, int] = {}
+    _local_lock = threading.Lock()
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = config or get_gemini_response_cache_settings()
+        self.lru_key = f'{self.KEY_PREFIX}:lru'
+        self.stats_key = f'{self.KEY_PREFIX}:stats'
+        self._redis = self._get_redis()
+
+    @staticmethod
+    def _get_redis():
+        try:
+            from django_redis import get_redis_connection
+            from django_redis.cache import RedisCache
+        except ImportError:
+            return None
+        if not isinstance(caches['default'], RedisCache):
+            return None
+        return get_redis_connection('default')
+
+    def ttl_for(self, site: str) -> int:
+        if not self.config.get('enabled'):
+            return 0
+        ttls = self.config['ttls']
+        return int(ttls.get(site, ttls.get(DEFAULT_SITE, 0)) or 0)
+
+    def _entry_key(self, key: str) -> str:
+        return f'{self.KEY_PREFIX}:entry:{key}'
+
+    def get(self, key: str, site: str = DEFAULT_SITE) -> Optional[Dict]:
+        entry_key = self._entry_key(key)
+        if self._redis is not None:
+            value = self._redis.eval(_GET_SCRIPT, 3, entry_key, self.lru_key, self.stats_key, time.time(), site)
+        else:
+            value = self._get_local(entry_key, site)
+        if value is None:
+            return None
+        response_data = json.loads(value)
+        self._count('saved_tokens', site, _saved_tokens(response_data))
+        return response_data
+
+    def set(self, key: str, response_data: Dict, ttl: int):
+        value = json.dumps(response_data, ensure_ascii=False)
+        entry_key = self._entry_key(key)
+        max_ttl = max(self.config['ttls'].values() or [ttl])
+        if self._redis is not None:
+            evicted = self._redis.eval(
+                _SET_SCRIPT, 2, entry_key, self.lru_key,
+                value, ttl, time.time(), self.config['max_entries'], max(ttl, max_ttl)
+            )
+        else:
+            evicted = self._set_local(entry_key, value, ttl)
+        if evicted:
+            self._count('evictions', None, int(evicted))
+
+    def _count(self, name: str, site: Optional[str], amount: int):
+        if not amount:
+            return
+        fields = [name] + ([f'{site}:{name}'] if site else [])
+        if self._redis is not None:
+            pipe = self._redis.pipeline()
+            for field in fields:
+                pipe.hincrby(self.stats_key, field, amount)
+            pipe.execute()
+        else:
+            with self._local_lock:
+                for field in fields:
+                    self._local_stats[field] = self._local_stats.get(field, 0) + amount
+
+    def _get_local(self, entry_key: str, site: str) -> Optional[str]:
+        with self._local_lock:
+            entry = self._local_entries.get(entry_key)
+            if entry is not None and entry[0] <= time.time():
+                del self._local_entries[entry_key]
+                entry = None
+            outcome = 'misses' if entry is None else 'hits'
+            for field in (outcome, f'{site}:{outcome}'):
+                self._local_stats[field] = self._local_stats.get(field, 0) + 1
+            if entry is None:
+                return None
+            self._local_entries.move_to_end(entry_key)
+            return entry[1]
+
+    def _set_local(self, entry_key: str, value: str, ttl: int) -> int:
+        with self._local_lock:
+            self._local_entries[entry_key] = (time.time() + ttl, value)
+            self._local_entries.move_to_end(entry_key)
+            evicted = 0
+            while len(self._local_entries) > self.config['max_entries']:
+                self._local_entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def stats(self) -> Dict[str, int]:
+        """Счетчики: hits, misses, saved_tokens, evictions, а также <место вызова>:<счетчик>; entries - размер"""
+        if self._redis is not None:
+            stats = {
+                field.decode() if isinstance(field, bytes) else field: int(value)
+                for field, value in self._redis.hgetall(self.stats_key).items()
+            }
+            stats['entries'] = int(self._redis.zcard(self.lru_key))
+        else:
+            with self._local_lock:
+                stats = dict(self._local_stats)
+                stats['entries'] = len(self._local_entries)
+        return stats
+
+    def clear(self):
+        """Удаляет все ответы и счетчики"""
+        if self._redis is not None:
+            entries = self._redis.zrange(self.lru_key, 0, -1)
+            if entries:
+                self._redis.delete(*entries)
+            self._redis.delete(self.lru_key, self.stats_key)
+        else:
+            with self._local_lock:
+                self._local_entries.clear()
+                self._local_stats.clear()
+
+
+def cached_generate(model: str, request_data: Dict,
+                    send: Callable[[], Tuple[bool, Dict, Optional[str]]]) -> Tuple[bool, Dict, Optional[str]]:
+    """
+    Ответ из кэша или send() с сохранением успешного ответа
+
+    Args:
+        model: модель Gemini (часть ключа)
+        request_data: тело запроса generateContent
+        send: выполняет запрос к API, возвращает (успех, ответ, ошибка)
+
+    Returns:
+        (успех, ответ, ошибка) как у send()
+    """
+    site = current_cache_site()
+    try:
+        cache = GeminiResponseCache()
+        ttl = cache.ttl_for(site)
+        if ttl <= 0:
+            return send()
+        key = make_cache_key(model, request_data)
+        cached = cache.get(key, site)
+    except Exception as e:
+        logger.warning(f"Кэш ответов Gemini недоступен: {e}")
+        return send()
+
+    if cached is not None:
+        return True, cached, None
+
+    success, response_data, error = send()
+    # Кэшируем только ответы с текстом (не блокировки safety и не ошибки)
+    if success and (response_data.get('candidates') or [{}])[0].get('content'):
+        try:
+            cache.set(key, response_data, ttl)
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить ответ Gemini в кэш: {e}")
+    return success, response_data, error
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from ..models import ChatSession, ChatMessage
+from .session_queries import get_last_message, get_message_count
 
 
 class ChatMessageSerializer(serializers.ModelSerializer):
@@ -30,19 +31,11 @@ class ChatSessionSerializer(serializers.ModelSerializer):
     
     def get_messages_count(self, obj):
         """Возвращает количество сообщений в сессии"""
-        return obj.messages.count()
+        return get_message_count(obj)
     
     def get_last_message(self, obj):
         """Возвращает последнее сообщение"""
-        last_msg = obj.messages.last()
-        if last_msg:
-            return {
-                'id': last_msg.id,
-                'role': last_msg.role,
-                'content': last_msg.content[:100] + '...' if len(last_msg.content) > 100 else last_msg.content,
-                'timestamp': last_msg.timestamp
-            }
-        return None
+        return get_last_message(obj)
 
 
 class ChatSessionDetailSerializer(serializers.ModelSerializer):
@@ -1,10 +1,36 @@
 import requests
 import json
 import time
-from typing import Dict, List, Optional, Tuple
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from django.conf import settings
 from django.core.exceptions import ValidationError
 
+from .response_cache import cached_generate, gemini_cache_site
+
+
+def iter_sse_data(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Данные событий Server-Sent Events из строк потока
+    
+    Несколько строк data: одного события склеиваются через перевод строки,
+    событие завершается пустой строкой; комментарии (":") пропускаются.
+    """
+    data_lines = []
+    for line in lines:
+        if not line:
+            if data_lines:
+                yield '\n'.join(data_lines)
+                data_lines = []
+            continue
+        if line.startswith(':'):
+            continue
+        field, _, value = line.partition(':')
+        if field == 'data':
+            data_lines.append(value[1:] if value.startswith(' ') else value)
+    if data_lines:
+        yield '\n'.join(data_lines)
+
 
 class GeminiService:
     """
@@ -14,6 +40,9 @@ class GeminiService:
     BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
     MODEL = "gemini-2.0-flash"
     
+    # (подключение, ожидание следующего фрагмента) для потоковых ответов, секунды
+    STREAM_TIMEOUT = (10, 60)
+    
     def __init__(self, api_key: str):
         """
         Инициализация сервиса с API ключом
@@ -31,6 +60,23 @@ class GeminiService:
         })
     
     def _make_request(self, endpoint: str, data: Dict, max_retries: int = 2) -> Tuple[bool, Dict, Optional[str]]:
+        """
+        Запрос к Gemini API; ответы generateContent берутся из кэша одинаковых запросов
+        
+        Args:
+            endpoint: Конечная точка API
+            data: Данные для отправки
+            max_retries: Максимальное количество повторных попыток
+            
+        Returns:
+            Tuple[bool, Dict, Optional[str]]: (успех, ответ, ошибка)
+        """
+        send = partial(self._send_request, endpoint, data, max_retries)
+        if not endpoint.endswith(':generateContent'):
+            return send()
+        return cached_generate(endpoint.rsplit(':', 1)[0], data, send)
+    
+    def _send_request(self, endpoint: str, data: Dict, max_retries: int = 2) -> Tuple[bool, Dict, Optional[str]]:
         """
         Выполняет запрос к Gemini API с повторными попытками
         
@@ -104,13 +150,15 @@ class GeminiService:
         # Если все попытки исчерпаны
         return False, {}, "Превышено максимальное количество попыток"
     
-    def generate_content(self, prompt: str, history: List[Dict] = None) -> Tuple[bool, str, Dict]:
+    def generate_content(self, prompt: str, history: List[Dict] = None,
+                         max_output_tokens: int = 2048) -> Tuple[bool, str, Dict]:
         """
         Генерирует контент с помощью Gemini API
         
         Args:
             prompt: Текст запроса пользователя
             history: История предыдущих сообщений
+            max_output_tokens: Максимальная длина ответа в токенах
             
         Returns:
             Tuple[bool, str, Dict]: (успех, ответ, метаданные)
@@ -118,6 +166,148 @@ class GeminiService:
         if not prompt.strip():
             return False, "Запрос не может быть пустым", {}
         
+        data = self._build_request_data(prompt, history, max_output_tokens)
+        
+        # Выполняем запрос
+        success, response_data, error = self._make_request(
+            f"models/{self.MODEL}:generateContent", 
+            data
+        )
+        
+        if not success:
+            return False, error, {}
+        
+        # Извлекаем ответ
+        try:
+            if 'candidates' in response_data and response_data['candidates']:
+                candidate = response_data['candidates'][0]
+                if 'content' in candidate and 'parts' in candidate['content']:
+                    response_text = candidate['content']['parts'][0]['text']
+                    
+                    # Метаданные
+                    metadata = {
+                        'response_time': response_data.get('response_time', 0),
+                        'usage_metadata': response_data.get('usageMetadata', {}),
+                        'finish_reason': candidate.get('finishReason', ''),
+                        'safety_ratings': candidate.get('safetyRatings', [])
+                    }
+                    
+                    return True, response_text, metadata
+                else:
+                    return False, "Не удалось извлечь ответ из API", {}
+            else:
+                return False, "API не вернул кандидатов", {}
+                
+        except (KeyError, IndexError, TypeError) as e:
+            return False, f"Ошибка обработки ответа: {str(e)}", {}
+    
+    def stream_content(self, prompt: str, history: List[Dict] = None,
+                       max_output_tokens: int = 2048, max_retries: int = 2) -> Iterator[Dict]:
+        """
+        Потоковая генерация через :streamGenerateContent?alt=sse
+        
+        Args:
+            prompt: Текст запроса пользователя
+            history: История предыдущих сообщений
+            max_output_tokens: Максимальная длина ответа в токенах
+            max_retries: Повторы при 429/503 и сетевых ошибках (только до первого фрагмента)
+            
+        Yields:
+            {'type': 'chunk', 'text': фрагмент} по мере генерации, затем один из
+            {'type': 'done', 'text': полный ответ, 'metadata': {...}} или
+            {'type': 'error', 'error': сообщение}. В metadata, кроме полей
+            generate_content, есть time_to_first_token (секунды).
+        """
+        if not prompt.strip():
+            yield {'type': 'error', 'error': "Запрос не может быть пустым"}
+            return
+        
+        data = self._build_request_data(prompt, history, max_output_tokens)
+        url = f"{self.BASE_URL}/models/{self.MODEL}:streamGenerateContent?alt=sse&key={self.api_key}"
+        start_time = time.time()
+        
+        for attempt in range(max_retries + 1):
+            try:
+                response = self.session.post(url, json=data, stream=True, timeout=self.STREAM_TIMEOUT)
+            except requests.exceptions.RequestException as e:
+                if attempt < max_retries:
+                    time.sleep(2)
+                    continue
+                yield {'type': 'error', 'error': f"Ошибка подключения к API: {str(e)}"}
+                return
+            
+            if response.status_code == 200:
+                break
+            
+            try:
+                error_message = response.json().get('error', {}).get('message', response.text)
+            except ValueError:
+                error_message = response.text
+            response.close()
+            
+            if response.status_code in (429, 503) and attempt < max_retries:
+                time.sleep((attempt + 1) * (3 if response.status_code == 429 else 2))
+                continue
+            if response.status_code == 429:
+                yield {'type': 'error', 'error': "Превышен лимит запросов. Пожалуйста, подождите немного."}
+            elif response.status_code == 503:
+                yield {'type': 'error', 'error': "Модель Gemini перегружена. Пожалуйста, попробуйте позже."}
+            else:
+                yield {'type': 'error', 'error': f"Ошибка API ({response.status_code}): {error_message}"}
+            return
+        
+        parts = []
+        metadata = {'usage_metadata': {}, 'finish_reason': '', 'safety_ratings': []}
+        time_to_first_token = None
+        
+        try:
+            # SSE без charset: requests иначе отдал бы байты вместо строк
+            response.encoding = 'utf-8'
+            # chunk_size=None - фрагменты отдаются по мере поступления, без буферизации
+            for payload in iter_sse_data(response.iter_lines(chunk_size=None, decode_unicode=True)):
+                try:
+                    event = json.loads(payload)
+                except json.JSONDecodeError:
+                    continue
+                
+                if event.get('error'):
+                    yield {'type': 'error', 'error': event['error'].get('message', 'Ошибка API')}
+                    return
+                if event.get('usageMetadata'):
+                    metadata['usage_metadata'] = event['usageMetadata']
+                
+                candidates = event.get('candidates') or []
+                if not candidates:
+                    continue
+                candidate = candidates[0]
+                if candidate.get('finishReason'):
+                    metadata['finish_reason'] = candidate['finishReason']
+                if candidate.get('safetyRatings'):
+                    metadata['safety_ratings'] = candidate['safetyRatings']
+                text = ''.join(
+                    part.get('text', '') for part in (candidate.get('content') or {}).get('parts', [])
+                )
+                if text:
+                    if time_to_first_token is None:
+                        time_to_first_token = time.time() - start_time
+                    parts.append(text)
+                    yield {'type': 'chunk', 'text': text}
+        except requests.exceptions.RequestException as e:
+            yield {'type': 'error', 'error': f"Поток ответа прерван: {str(e)}"}
+            return
+        finally:
+            response.close()
+        
+        if not parts:
+            yield {'type': 'error', 'error': "API не вернул кандидатов"}
+            return
+        
+        metadata['response_time'] = time.time() - start_time
+        metadata['time_to_first_token'] = time_to_first_token
+        yield {'type': 'done', 'text': ''.join(parts), 'metadata': metadata}
+    
+    def _build_request_data(self, prompt: str, history: Optional[List[Dict]], max_output_tokens: int) -> Dict:
+        """Тело запроса generateContent/streamGenerateContent"""
         # Формируем содержимое для API
         contents = []
         
@@ -126,7 +316,8 @@ class GeminiService:
             for msg in history:
                 if msg.get('role') in ['user', 'assistant']:
                     contents.append({
-                        "role": msg['role'],
+                        # В Gemini API ответы модели имеют роль "model"
+                        "role": 'model' if msg['role'] == 'assistant' else 'user',
                         "parts": [{"text": msg['content']}]
                     })
         
@@ -137,13 +328,13 @@ class GeminiService:
         })
         
         # Данные для API
-        data = {
+        return {
             "contents": contents,
             "generationConfig": {
                 "temperature": 0.7,
                 "topK": 40,
                 "topP": 0.95,
-                "maxOutputTokens": 2048,
+                "maxOutputTokens": max_output_tokens,
             },
             "safetySettings": [
                 {
@@ -164,40 +355,8 @@ class GeminiService:
                 }
             ]
         }
-        
-        # Выполняем запрос
-        success, response_data, error = self._make_request(
-            f"models/{self.MODEL}:generateContent", 
-            data
-        )
-        
-        if not success:
-            return False, error, {}
-        
-        # Извлекаем ответ
-        try:
-            if 'candidates' in response_data and response_data['candidates']:
-                candidate = response_data['candidates'][0]
-                if 'content' in candidate and 'parts' in candidate['content']:
-                    response_text = candidate['content']['parts'][0]['text']
-                    
-                    # Метаданные
-                    metadata = {
-                        'response_time': response_data.get('response_time', 0),
-                        'usage_metadata': response_data.get('usageMetadata', {}),
-                        'finish_reason': candidate.get('finishReason', ''),
-                        'safety_ratings': candidate.get('safetyRatings', [])
-                    }
-                    
-                    return True, response_text, metadata
-                else:
-                    return False, "Не удалось извлечь ответ из API", {}
-            else:
-                return False, "API не вернул кандидатов", {}
-                
-        except (KeyError, IndexError, TypeError) as e:
-            return False, f"Ошибка обработки ответа: {str(e)}", {}
     
+    @gemini_cache_site('test_connection')
     def test_connection(self) -> Tuple[bool, str]:
         """
         Тестирует подключение к Gemini API
@@ -0,0 +1,117 @@
+"""
+Запросы к сессиям чата без N+1
+
+Количество сообщений и последнее сообщение сессии считаются в том же
+запросе, что и сами сессии (Count и Subquery), а сериализаторы читают
+аннотации вместо obj.messages.count() / obj.messages.last() на каждую сессию.
+Статистика пользователя собирается одним агрегирующим запросом.
+"""
+
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from django.db.models import Count, Max, OuterRef, Q, QuerySet, Subquery, Sum
+from django.db.models.functions import Substr
+from django.utils import timezone
+
+from ..models import ChatMessage, ChatSession
+
+
+LAST_MESSAGE_PREVIEW_CHARS = 100
+
+
+def with_message_stats(queryset: Optional[QuerySet] = None, last_message: bool = True) -> QuerySet:
+    """
+    Сессии с аннотациями message_count и last_message_* (id, role, preview, timestamp)
+
+    Args:
+        queryset: QuerySet сессий (по умолчанию все сессии)
+        last_message: добавлять ли поля последнего сообщения
+    """
+    if queryset is None:
+        queryset = ChatSession.objects.all()
+    if not queryset.query.order_by:
+        # Meta.ordering не применяется к запросам с GROUP BY
+        queryset = queryset.order_by(*ChatSession._meta.ordering)
+    queryset = queryset.annotate(message_count=Count('messages'))
+    if not last_message:
+        return queryset
+
+    last = ChatMessage.objects.filter(session=OuterRef('pk')).order_by('-timestamp', '-id')
+    return queryset.annotate(
+        last_message_id=Subquery(last.values('id')[:1]),
+        last_message_role=Subquery(last.values('role')[:1]),
+        # Символ сверх превью нужен, чтобы понять, обрезано ли сообщение
+        last_message_preview=Subquery(
+            last.annotate(preview=Substr('content', 1, LAST_MESSAGE_PREVIEW_CHARS + 1)).values('preview')[:1]
+        ),
+        last_message_timestamp=Subquery(last.values('timestamp')[:1]),
+    )
+
+
+def message_preview(content: str) -> str:
+    """Первые LAST_MESSAGE_PREVIEW_CHARS символов сообщения"""
+    if len(content) > LAST_MESSAGE_PREVIEW_CHARS:
+        return content[:LAST_MESSAGE_PREVIEW_CHARS] + '...'
+    return content
+
+
+def get_message_count(session: ChatSession) -> int:
+    """Количество сообщений: из аннотации или отдельным запросом"""
+    count = getattr(session, 'message_count', None)
+    return session.messages.count() if count is None else count
+
+
+def get_last_message(session: ChatSession) -> Optional[Dict[str, Any]]:
+    """Последнее сообщение сессии (id, role, content, timestamp): из аннотаций или отдельным запросом"""
+    if hasattr(session, 'last_message_id'):
+        if session.last_message_id is None:
+            return None
+        return {
+            'id': session.last_message_id,
+            'role': session.last_message_role,
+            'content': message_preview(session.last_message_preview),
+            'timestamp': session.last_message_timestamp,
+        }
+
+    message = session.messages.order_by('-timestamp', '-id').first()
+    if message is None:
+        return None
+    return {
+        'id': message.id,
+        'role': message.role,
+        'content': message_preview(message.content),
+        'timestamp': message.timestamp,
+    }
+
+
+def get_chat_totals(sessions: QuerySet, active_days: int = 7, recent_days: int = 30) -> Dict[str, Any]:
+    """
+    Статистика по сессиям и их сообщениям одним запросом
+
+    Args:
+        sessions: QuerySet сессий (например, сессии пользователя)
+        active_days: за сколько дней обновленные активные сессии считаются recently_active
+        recent_days: за сколько дней сообщения считаются recent
+
+    Returns:
+        Dict: total_sessions, active_sessions, recently_active_sessions, total_messages,
+        user_messages, assistant_messages, recent_messages, total_tokens, last_activity
+    """
+    now = timezone.now()
+    totals = sessions.order_by().aggregate(
+        total_sessions=Count('id', distinct=True),
+        active_sessions=Count('id', distinct=True, filter=Q(is_active=True)),
+        recently_active_sessions=Count(
+            'id', distinct=True,
+            filter=Q(is_active=True, updated_at__gte=now - timedelta(days=active_days))
+        ),
+        total_messages=Count('messages'),
+        user_messages=Count('messages', filter=Q(messages__role='user')),
+        assistant_messages=Count('messages', filter=Q(messages__role='assistant')),
+        recent_messages=Count('messages', filter=Q(messages__timestamp__gte=now - timedelta(days=recent_days))),
+        total_tokens=Sum('messages__tokens_used'),
+        last_activity=Max('messages__timestamp'),
+    )
+    totals['total_tokens'] = totals['total_tokens'] or 0
+    return totals
@@ -2,12 +2,12 @@
 Обработчики для получения статистики
 Содержит общую логику для получения статистики пользователя
 """
-from typing import Dict, Any, List
-from django.db.models import Count, Sum, Avg
+from typing import Dict, Any, List, Optional
 from django.contrib.auth import get_user_model
 
-from ..models import ChatSession, ChatMessage
+from ..models import ChatSession
 from .serializers import ChatSessionSerializer
+from .session_queries import get_chat_totals, with_message_stats
 
 User = get_user_model()
 
@@ -39,10 +39,10 @@ class StatsHandler:
         Returns:
             List[ChatSession]: Список активных сессий
         """
-        return ChatSession.objects.filter(
+        return with_message_stats(ChatSession.objects.filter(
             user=user, 
             is_active=True
-        ).order_by('-updated_at')[:10]
+        )).order_by('-updated_at')[:10]
     
     @staticmethod
     def get_recent_sessions(user, limit: int = 5) -> List[ChatSession]:
@@ -56,49 +56,49 @@ class StatsHandler:
         Returns:
             List[ChatSession]: Список последних сессий
         """
-        return ChatSession.objects.filter(user=user).order_by('-created_at')[:limit]
+        return with_message_stats(
+            ChatSession.objects.filter(user=user).select_related('user')
+        ).order_by('-created_at')[:limit]
     
     @staticmethod
-    def calculate_session_stats(sessions) -> Dict[str, int]:
+    def calculate_session_stats(sessions, totals: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
         """
         Расчет статистики по сессиям
         
         Args:
             sessions: QuerySet сессий
+            totals: Уже посчитанный get_chat_totals(sessions)
             
         Returns:
             Dict[str, int]: Статистика сессий
         """
-        total_sessions = sessions.count()
-        active_sessions = sessions.filter(is_active=True).count()
+        totals = totals or get_chat_totals(sessions)
         
         return {
-            'total_sessions': total_sessions,
-            'active_sessions': active_sessions
+            'total_sessions': totals['total_sessions'],
+            'active_sessions': totals['active_sessions']
         }
     
     @staticmethod
-    def calculate_message_stats(sessions) -> Dict[str, Any]:
+    def calculate_message_stats(sessions, totals: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Расчет статистики по сообщениям
         
         Args:
             sessions: QuerySet сессий
+            totals: Уже посчитанный get_chat_totals(sessions)
             
         Returns:
             Dict[str, Any]: Статистика сообщений
         """
-        # Получаем все сообщения для сессий пользователя
-        messages = ChatMessage.objects.filter(session__in=sessions)
-        
-        total_messages = messages.count()
-        total_tokens = messages.aggregate(
-            total=Sum('tokens_used')
-        )['total'] or 0
+        totals = totals or get_chat_totals(sessions)
+        total_sessions = totals['total_sessions']
+        total_messages = totals['total_messages']
+        total_tokens = totals['total_tokens']
         
         # Средние значения
         average_messages_per_session = (
-            total_messages / sessions.count() if sessions.count() > 0 else 0
+            total_messages / total_sessions if total_sessions > 0 else 0
         )
         average_tokens_per_message = (
             total_tokens / total_messages if total_messages > 0 else 0
@@ -126,11 +126,14 @@ class StatsHandler:
             # Получаем сессии пользователя
             sessions = StatsHandler.get_user_sessions(user)
             
+            # Сессии и сообщения - одним агрегирующим запросом
+            totals = get_chat_totals(sessions)
+            
             # Статистика сессий
-            session_stats = StatsHandler.calculate_session_stats(sessions)
+            session_stats = StatsHandler.calculate_session_stats(sessions, totals)
             
             # Статистика сообщений
-            message_stats = StatsHandler.calculate_message_stats(sessions)
+            message_stats = StatsHandler.calculate_message_stats(sessions, totals)
             
             # Последние сессии
             recent_sessions = StatsHandler.get_recent_sessions(user)
@@ -0,0 +1,47 @@
+"""
+Потоковые ответы Gemini для браузера (Server-Sent Events)
+
+События GeminiService.stream_content и обработчиков ({'type': 'start' | 'chunk' | 'done' | 'error', ...})
+отдаются клиенту как SSE: строка "event: <type>", затем "data: <JSON без type>".
+"""
+import json
+from typing import Dict, Iterable, Iterator
+
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+
+def format_sse(event: Dict) -> str:
+    """Одно событие в формате text/event-stream"""
+    payload = {key: value for key, value in event.items() if key != 'type'}
+    return f"event: {event['type']}\ndata: {json.dumps(payload, ensure_ascii=False, default=str)}\n\n"
+
+
+def _encode(events: Iterable[Dict]) -> Iterator[str]:
+    for event in events:
+        yield format_sse(event)
+
+
+def sse_response(events: Iterable[Dict]) -> StreamingHttpResponse:
+    """StreamingHttpResponse, который отправляет каждое событие сразу, без буферизации прокси"""
+    response = StreamingHttpResponse(_encode(events), content_type='text/event-stream; charset=utf-8')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Позволяет DRF action принять Accept: text/event-stream
+
+    Потоковый ответ отдается StreamingHttpResponse напрямую, рендерер нужен
+    для согласования формата и для ошибок до начала потока (событие error).
+    """
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            return format_sse({'type': 'error', **data}).encode(self.charset)
+        return data
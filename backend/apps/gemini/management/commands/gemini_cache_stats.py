@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from apps.gemini.logic.response_cache import GeminiResponseCache
+
+
+class Command(BaseCommand):
+    help = 'Показать статистику кэша ответов Gemini (попадания, промахи, сэкономленные токены)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help='Очистить кэш ответов и счетчики')
+
+    def handle(self, *args, **options):
+        cache = GeminiResponseCache()
+
+        if options['clear']:
+            cache.clear()
+            self.stdout.write(self.style.SUCCESS('🧹 Кэш ответов Gemini очищен'))
+            return
+
+        stats = cache.stats()
+        hits, misses = stats.get('hits', 0), stats.get('misses', 0)
+        hit_rate = hits / (hits + misses) * 100 if hits + misses else 0
+
+        self.stdout.write(self.style.SUCCESS('📊 Статистика кэша ответов Gemini:'))
+        self.stdout.write(f'Ответов в кэше: {stats["entries"]}')
+        self.stdout.write(f'Попаданий: {hits}, промахов: {misses} ({hit_rate:.1f}% попаданий)')
+        self.stdout.write(f'Сэкономлено токенов: {stats.get("saved_tokens", 0)}')
+        self.stdout.write(f'Вытеснено (LRU): {stats.get("evictions", 0)}')
+
+        sites = sorted({field.split(':', 1)[0] for field in stats if ':' in field})
+        if sites:
+            self.stdout.write('\n📋 По местам вызова:')
+            for site in sites:
+                self.stdout.write(
+                    f'  {site}: попаданий {stats.get(f"{site}:hits", 0)}, '
+                    f'промахов {stats.get(f"{site}:misses", 0)}, '
+                    f'токенов {stats.get(f"{site}:saved_tokens", 0)}'
+                )
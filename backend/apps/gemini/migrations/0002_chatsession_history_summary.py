@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-17 00:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gemini', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatsession',
+            name='history_summary',
+            field=models.TextField(blank=True, default='', help_text='Краткое содержание сообщений, не попадающих в окно контекста', verbose_name='Сводка ранней истории'),
+        ),
+        migrations.AddField(
+            model_name='chatsession',
+            name='summary_until_id',
+            field=models.PositiveIntegerField(blank=True, help_text='ID последнего сообщения, включенного в сводку', null=True, verbose_name='Сводка до сообщения'),
+        ),
+    ]
@@ -28,6 +28,18 @@ class ChatSession(models.Model):
         default=True, 
         verbose_name='Активна'
     )
+    history_summary = models.TextField(
+        blank=True,
+        default='',
+        verbose_name='Сводка ранней истории',
+        help_text='Краткое содержание сообщений, не попадающих в окно контекста'
+    )
+    summary_until_id = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='Сводка до сообщения',
+        help_text='ID последнего сообщения, включенного в сводку'
+    )
 
     class Meta:
         verbose_name = 'Сессия чата'
@@ -1,6 +1,7 @@
 """Сериализаторы для Gemini приложения"""
 from rest_framework import serializers
 from .models import ChatSession, ChatMessage
+from .logic.session_queries import get_last_message, get_message_count
 
 
 class ChatMessageSerializer(serializers.ModelSerializer):
@@ -82,7 +83,7 @@ class ChatSessionSerializer(serializers.ModelSerializer):
     
     ОБРАБОТКА:
     - Сериализация полей сессии чата
-    - Вычисляемые поля: message_count, last_message
+    - Вычисляемые поля: message_count, last_message (из аннотаций queryset, без запроса на сессию)
     - Автоматическое заполнение created_at, updated_at
     
     ВЫХОДЯЩИЕ ДАННЫЕ:
@@ -103,17 +104,17 @@ class ChatSessionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
     
     def get_message_count(self, obj):
-        """Получить количество сообщений в сессии"""
-        return obj.messages.count()
+        """Получить количество сообщений в сессии (аннотация session_queries.with_message_stats)"""
+        return get_message_count(obj)
     
     def get_last_message(self, obj):
-        """Получить последнее сообщение в сессии"""
-        last_msg = obj.messages.order_by('-timestamp').first()
+        """Получить последнее сообщение в сессии (аннотации session_queries.with_message_stats)"""
+        last_msg = get_last_message(obj)
         if last_msg:
             return {
-                'content': last_msg.content[:100] + '...' if len(last_msg.content) > 100 else last_msg.content,
-                'timestamp': last_msg.timestamp,
-                'role': last_msg.role
+                'content': last_msg['content'],
+                'timestamp': last_msg['timestamp'],
+                'role': last_msg['role']
             }
         return None
 
@@ -153,7 +154,7 @@ class ChatSessionDetailSerializer(serializers.ModelSerializer):
     
     def get_message_count(self, obj):
         """Получить количество сообщений в сессии"""
-        return obj.messages.count()
+        return get_message_count(obj)
 
 
 class ChatSessionCreateSerializer(serializers.ModelSerializer):
@@ -0,0 +1,443 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .logic.chat_context import SUMMARY_ACK, SUMMARY_PREFIX, build_chat_history
+from .logic.rate_limiter import GeminiRateLimiter
+from .logic.stats_handlers import StatsHandler
+from .logic.response_cache import GeminiResponseCache, gemini_cache_site
+from .logic.services import GeminiService, iter_sse_data
+from .models import ChatMessage, ChatSession
+
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class GeminiRateLimiterTests(SimpleTestCase):
+    """Резервирование лимитов Gemini по API ключу"""
+
+    def _limiter(self, **limits):
+        limiter = GeminiRateLimiter('test-key', limits=limits)
+        limiter.reset()
+        return limiter
+
+    @patch('apps.gemini.logic.rate_limiter.time.time', return_value=1000.0)
+    def test_rpm_burst_then_spacing(self, _):
+        limiter = self._limiter(rpm=3)
+        self.assertEqual([limiter.reserve() for _ in range(3)], [0.0, 0.0, 0.0])
+        # Дальше - по одному запросу каждые 60 / 3 = 20 секунд
+        self.assertAlmostEqual(limiter.reserve(), 20.0)
+        self.assertAlmostEqual(limiter.reserve(), 40.0)
+
+    @patch('apps.gemini.logic.rate_limiter.time.time', return_value=1000.0)
+    def test_tpm_limits_large_requests(self, _):
+        limiter = self._limiter(rpm=100, tpm=1000)
+        self.assertEqual(limiter.reserve(tokens=1000), 0.0)
+        # Бакет токенов пуст: 500 токенов восстановятся за 30 секунд
+        self.assertAlmostEqual(limiter.reserve(tokens=500), 30.0)
+
+    @patch('apps.gemini.logic.rate_limiter.time.time', return_value=1000.0)
+    def test_max_delay_does_not_reserve(self, _):
+        limiter = self._limiter(rpm=1)
+        self.assertEqual(limiter.reserve(), 0.0)
+        self.assertIsNone(limiter.reserve(max_delay=10))
+        # Отказ не сдвинул очередь: следующий слот все еще через 60 секунд
+        self.assertAlmostEqual(limiter.reserve(), 60.0)
+
+    def test_keys_are_isolated(self):
+        first = self._limiter(rpm=1)
+        second = GeminiRateLimiter('other-key', limits={'rpm': 1})
+        second.reset()
+        self.assertEqual(first.reserve(), 0.0)
+        self.assertEqual(second.reserve(), 0.0)
+
+
+def _sse_event(text, finish_reason=None, usage=None):
+    candidate = {'content': {'role': 'model', 'parts': [{'text': text}]}}
+    if finish_reason:
+        candidate['finishReason'] = finish_reason
+    event = {'candidates': [candidate]}
+    if usage:
+        event['usageMetadata'] = usage
+    return event
+
+
+class FakeGeminiServer:
+    """
+    Локальный HTTP сервер, отвечающий как :streamGenerateContent?alt=sse
+
+    События отправляются chunked-фрагментами; если задан release, после первого
+    события сервер ждет его, чтобы проверить, что клиент получил фрагмент до конца ответа.
+    """
+
+    def __init__(self, events, status=200, release=None):
+        self.events = events
+        self.status = status
+        self.release = release
+        self.paths = []
+        self.release_timed_out = False
+
+    def __enter__(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                fake.paths.append(self.path)
+                if fake.status != 200:
+                    body = json.dumps({'error': {'message': 'API key not valid'}}).encode()
+                    self.send_response(fake.status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                for position, event in enumerate(fake.events):
+                    data = f"data: {json.dumps(event, ensure_ascii=False)}\r\n\r\n".encode()
+                    self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+                    self.wfile.flush()
+                    if position == 0 and fake.release is not None and not fake.release.wait(5):
+                        fake.release_timed_out = True
+                self.wfile.write(b'0\r\n\r\n')
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.patcher = patch.object(GeminiService, 'BASE_URL', f'http://127.0.0.1:{self.server.server_port}/v1beta')
+        self.patcher.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.patcher.stop()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+STREAM_EVENTS = [
+    _sse_event('Привет, '),
+    _sse_event('чем помочь?', finish_reason='STOP',
+               usage={'promptTokenCount': 30, 'candidatesTokenCount': 12, 'totalTokenCount': 42}),
+]
+
+
+class GeminiStreamingTests(SimpleTestCase):
+    """Потоковая генерация через :streamGenerateContent?alt=sse"""
+
+    def test_iter_sse_data(self):
+        lines = [': keep-alive', 'data: {"a":', 'data: 1}', '', 'event: x', 'data:{"b": 2}', '']
+        self.assertEqual(list(iter_sse_data(lines)), ['{"a":\n1}', '{"b": 2}'])
+
+    def test_first_chunk_arrives_before_response_completes(self):
+        release = threading.Event()
+        with FakeGeminiServer(STREAM_EVENTS, release=release) as server:
+            stream = GeminiService('test-key').stream_content('Привет')
+            first = next(stream)
+            release.set()
+            rest = list(stream)
+
+        self.assertFalse(server.release_timed_out)
+        self.assertEqual(first, {'type': 'chunk', 'text': 'Привет, '})
+        done = rest[-1]
+        self.assertEqual(done['type'], 'done')
+        self.assertEqual(done['text'], 'Привет, чем помочь?')
+        self.assertEqual(done['metadata']['usage_metadata']['totalTokenCount'], 42)
+        self.assertEqual(done['metadata']['finish_reason'], 'STOP')
+        self.assertLessEqual(done['metadata']['time_to_first_token'], done['metadata']['response_time'])
+        self.assertEqual(server.paths, ['/v1beta/models/gemini-2.0-flash:streamGenerateContent?alt=sse&key=test-key'])
+
+    def test_api_error_becomes_error_event(self):
+        with FakeGeminiServer([], status=400):
+            events = list(GeminiService('test-key').stream_content('Привет'))
+        self.assertEqual(events, [{'type': 'error', 'error': 'Ошибка API (400): API key not valid'}])
+
+
+class ChatStreamingViewTests(TestCase):
+    """Потоковый ответ чата сохраняет сообщение ассистента с токенами"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='chat', password='test', gemini_api_key='test-key')
+        self.session = ChatSession.objects.create(user=self.user, title='Чат')
+        self.client.force_login(self.user)
+
+    def _events(self, response):
+        body = b''.join(response.streaming_content).decode()
+        return [
+            (block.split('\n')[0][len('event: '):], json.loads(block.split('\n')[1][len('data: '):]))
+            for block in body.strip().split('\n\n')
+        ]
+
+    def test_stream_message_persists_assistant_message(self):
+        with FakeGeminiServer(STREAM_EVENTS):
+            response = self.client.post(
+                reverse('gemini:stream_message'),
+                json.dumps({'session_id': self.session.id, 'message': 'Привет'}),
+                content_type='application/json',
+            )
+            self.assertEqual(response['Content-Type'], 'text/event-stream; charset=utf-8')
+            events = self._events(response)
+
+        self.assertEqual([name for name, _ in events], ['start', 'chunk', 'chunk', 'done'])
+        assistant = ChatMessage.objects.get(id=events[-1][1]['assistant_message_id'])
+        self.assertEqual((assistant.role, assistant.content, assistant.tokens_used), ('assistant', 'Привет, чем помочь?', 42))
+        self.assertEqual(self.session.messages.count(), 2)
+
+    def test_viewset_stream_message_error_is_not_persisted(self):
+        with FakeGeminiServer([], status=400):
+            response = self.client.post(
+                f'/api/v1/gemini/chat-sessions/{self.session.id}/stream_message/',
+                {'content': 'Привет'}, HTTP_ACCEPT='text/event-stream',
+            )
+            events = self._events(response)
+
+        self.assertEqual([name for name, _ in events], ['start', 'error'])
+        self.assertEqual(list(self.session.messages.values_list('role', flat=True)), ['user'])
+
+    def test_failure_after_start_becomes_error_event(self):
+        with FakeGeminiServer(STREAM_EVENTS), \
+                patch('apps.gemini.logic.message_handlers.MessageHandler.create_assistant_message',
+                      side_effect=RuntimeError('сбой')):
+            response = self.client.post(
+                reverse('gemini:stream_message'),
+                json.dumps({'session_id': self.session.id, 'message': 'Привет'}),
+                content_type='application/json',
+            )
+            events = self._events(response)
+
+        self.assertEqual([name for name, _ in events], ['start', 'chunk', 'chunk', 'error'])
+        self.assertEqual(events[-1][1], {'error': 'Внутренняя ошибка сервера: сбой'})
+
+
+GENERATE_RESPONSE = {
+    'candidates': [{'content': {'role': 'model', 'parts': [{'text': '{"grade": "Middle"}'}]}, 'finishReason': 'STOP'}],
+    'usageMetadata': {'totalTokenCount': 42},
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class GeminiResponseCacheTests(SimpleTestCase):
+    """Кэш ответов generateContent по хэшу модели и тела запроса"""
+
+    def setUp(self):
+        GeminiResponseCache().clear()
+        patcher = patch.object(GeminiService, '_send_request', return_value=(True, GENERATE_RESPONSE, None))
+        self.send = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_identical_requests_are_served_from_cache(self):
+        with gemini_cache_site('hr_screening'):
+            first = GeminiService('key-1').generate_content('Проанализируй кандидата')
+            # Ключ API не входит в ключ кэша: тот же запрос другого пользователя тоже попадает
+            second = GeminiService('key-2').generate_content('Проанализируй кандидата')
+
+        self.assertEqual(self.send.call_count, 1)
+        self.assertEqual(first[1], second[1])
+        stats = GeminiResponseCache().stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['saved_tokens']), (1, 1, 42))
+        self.assertEqual((stats['hr_screening:hits'], stats['entries']), (1, 1))
+
+    def test_generation_config_is_part_of_key(self):
+        GeminiService('key').generate_content('Промпт', max_output_tokens=1024)
+        GeminiService('key').generate_content('Промпт', max_output_tokens=2048)
+        self.assertEqual(self.send.call_count, 2)
+
+    def test_chat_and_connection_test_are_not_cached(self):
+        for _ in range(2):
+            with gemini_cache_site('chat'):
+                GeminiService('key').generate_content('Привет', [{'role': 'user', 'content': 'Привет'}])
+            GeminiService('key').test_connection()
+        self.assertEqual(self.send.call_count, 4)
+        self.assertEqual(GeminiResponseCache().stats()['entries'], 0)
+
+    def test_errors_are_not_cached(self):
+        self.send.return_value = (False, {}, 'Превышен лимит запросов')
+        GeminiService('key').generate_content('Промпт')
+        GeminiService('key').generate_content('Промпт')
+        self.assertEqual(self.send.call_count, 2)
+
+    def test_cache_failure_falls_through_to_api(self):
+        with patch.object(GeminiResponseCache, 'get', side_effect=ConnectionError('redis down')):
+            success, response, _ = GeminiService('key').generate_content('Промпт')
+        self.assertTrue(success)
+        self.assertEqual(response, '{"grade": "Middle"}')
+
+    def test_lru_evicts_least_recently_read(self):
+        cache = GeminiResponseCache({'enabled': True, 'max_entries': 2, 'ttls': {'default': 60}})
+        cache.set('a', GENERATE_RESPONSE, 60)
+        cache.set('b', GENERATE_RESPONSE, 60)
+        self.assertIsNotNone(cache.get('a'))
+        cache.set('c', GENERATE_RESPONSE, 60)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+
+CONTEXT_CONFIG = {
+    'history_tokens': 40,
+    'max_messages': 50,
+    'summary_tokens': 100,
+    'summary_chars_per_message': 20,
+    'message_overhead_tokens': 4,
+}
+
+
+class ChatContextTests(TestCase):
+    """История чата в пределах бюджета токенов со сводкой ранних сообщений"""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='context', password='test')
+        self.session = ChatSession.objects.create(user=user, title='Чат')
+
+    def _add(self, *contents):
+        return [
+            ChatMessage.objects.create(session=self.session, role=('user', 'assistant')[i % 2], content=content)
+            for i, content in enumerate(contents)
+        ]
+
+    def test_short_session_is_sent_whole_without_current_message(self):
+        messages = self._add('Привет', 'Здравствуйте', 'Вопрос')
+        with self.assertNumQueries(1):
+            history = build_chat_history(self.session, exclude_id=messages[-1].id, config=CONTEXT_CONFIG)
+
+        self.assertEqual(history, [
+            {'role': 'user', 'content': 'Привет'},
+            {'role': 'assistant', 'content': 'Здравствуйте'},
+        ])
+        self.assertEqual(self.session.history_summary, '')
+
+    def test_old_messages_are_folded_into_stored_summary(self):
+        # 40 символов = 10 токенов + 4 на сообщение: в окно из 40 токенов входят 2 последних
+        messages = self._add(*[f'{i:02d}' + 'я' * 38 for i in range(6)])
+        history = build_chat_history(self.session, config=CONTEXT_CONFIG)
+
+        self.assertEqual([item['content'][:2] for item in history[2:]], ['04', '05'])
+        # Окно начинается с сообщения пользователя: после сводки - ответ модели, чтобы роли чередовались
+        self.assertEqual(history[1], {'role': 'assistant', 'content': SUMMARY_ACK})
+        self.assertTrue(history[0]['content'].startswith(SUMMARY_PREFIX + 'Пользователь: 00'))
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.summary_until_id, messages[3].id)
+        self.assertEqual(len(self.session.history_summary.splitlines()), 4)
+
+        # Следующий запрос читает только сообщения после сводки и дописывает в нее вытесненные
+        self._add('06' + 'я' * 38)
+        history = build_chat_history(self.session, config=CONTEXT_CONFIG)
+        self.assertEqual([item['content'][:2] for item in history[1:]], ['05', '06'])
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.summary_until_id, messages[4].id)
+        self.assertIn('Ассистент: 01', self.session.history_summary)
+
+    def test_summary_is_trimmed_to_budget(self):
+        self._add(*[f'{i:02d}' + 'я' * 38 for i in range(60)])
+        build_chat_history(self.session, config=CONTEXT_CONFIG)
+
+        self.session.refresh_from_db()
+        self.assertLessEqual(len(self.session.history_summary), 100 * 4)
+        # Отбрасываются самые старые строки
+        self.assertIn(': 57', self.session.history_summary)
+        self.assertNotIn(': 00', self.session.history_summary)
+
+    def test_assistant_turns_use_model_role(self):
+        request_data = GeminiService('key')._build_request_data(
+            'Вопрос', [{'role': 'user', 'content': 'Привет'}, {'role': 'assistant', 'content': 'Здравствуйте'}], 100
+        )
+        self.assertEqual([item['role'] for item in request_data['contents']], ['user', 'model', 'user'])
+
+
+class ChatSessionQueryCountTests(TestCase):
+    """
+    Регрессия N+1: число запросов эндпоинтов сессий не зависит от количества сессий
+
+    assertQueriesIndependentOfSessions выполняет запрос на 2 и на 12 сессиях
+    с сообщениями и сравнивает число SQL запросов.
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='sessions', password='test')
+        self.client.force_login(self.user)
+        self._add_sessions(2)
+
+    def _add_sessions(self, count):
+        for _ in range(count):
+            session = ChatSession.objects.create(user=self.user, title='Чат')
+            ChatMessage.objects.bulk_create([
+                ChatMessage(session=session, role='user', content='Вопрос ' * 30, tokens_used=5),
+                ChatMessage(session=session, role='assistant', content='Ответ', tokens_used=7),
+            ])
+
+    def _count_queries(self, call):
+        with CaptureQueriesContext(connection) as queries:
+            call()
+        return len(queries)
+
+    def assertQueriesIndependentOfSessions(self, call):
+        few = self._count_queries(call)
+        self._add_sessions(10)
+        self.assertEqual(self._count_queries(call), few)
+        return few
+
+    def _get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content[:500])
+        return response
+
+    def test_session_list(self):
+        self.assertQueriesIndependentOfSessions(lambda: self._get('/api/v1/gemini/chat-sessions/'))
+
+        sessions = self._get('/api/v1/gemini/chat-sessions/').json()
+        sessions = sessions.get('results') or sessions['data']
+        self.assertEqual(len(sessions), 12)
+        self.assertEqual(sessions[0]['message_count'], 2)
+        self.assertEqual(sessions[0]['last_message']['content'], 'Ответ')
+
+    def test_session_detail(self):
+        session = ChatSession.objects.filter(user=self.user).first()
+        data = self._get(f'/api/v1/gemini/chat-sessions/{session.id}/').json()['data']
+        self.assertEqual((data['message_count'], len(data['messages'])), (2, 2))
+
+    def test_my_sessions(self):
+        self.assertQueriesIndependentOfSessions(lambda: self._get('/api/v1/gemini/chat-sessions/my_sessions/'))
+
+    def test_stats_are_one_aggregate(self):
+        self.assertQueriesIndependentOfSessions(lambda: self._get('/api/v1/gemini/chat-sessions/stats/'))
+
+        data = self._get('/api/v1/gemini/chat-sessions/stats/').json()['data']
+        self.assertEqual(
+            (data['total_sessions'], data['total_messages'], data['user_messages'], data['assistant_messages']),
+            (12, 24, 12, 12)
+        )
+
+    def test_stats_handler(self):
+        few = self.assertQueriesIndependentOfSessions(lambda: StatsHandler.get_user_stats(self.user))
+        # Агрегат + последние сессии с аннотациями
+        self.assertEqual(few, 2)
+
+        stats = StatsHandler.get_user_stats(self.user)
+        self.assertEqual((stats['total_sessions'], stats['total_messages'], stats['total_tokens']), (12, 24, 144))
+        self.assertEqual(stats['recent_sessions'][0]['messages_count'], 2)
+
+    def test_dashboard(self):
+        self.assertQueriesIndependentOfSessions(lambda: self._get('/api/v1/gemini/chat-sessions/dashboard_stats/'))
+
+        data = self._get('/api/v1/gemini/chat-sessions/dashboard_stats/').json()['data']
+        self.assertEqual((data['total_sessions'], data['total_messages']), (12, 24))
+        self.assertEqual(data['recent_sessions'][0]['message_count'], 2)
+        self.assertQueriesIndependentOfSessions(
+            lambda: list(StatsHandler.get_dashboard_context(self.user)['chat_sessions'])
+        )
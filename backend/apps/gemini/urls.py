@@ -16,6 +16,7 @@ urlpatterns = [
     
     # AJAX endpoints
     path('api/send-message/', views.send_message, name='send_message'),
+    path('api/stream-message/', views.stream_message, name='stream_message'),
     path('api/test-api-key/', views.test_api_key, name='test_api_key'),
     
     # Управление сессиями
@@ -227,6 +227,37 @@ def send_message(request):
         })
 
 
+@login_required
+@csrf_exempt
+@require_http_methods(["POST"])
+def stream_message(request):
+    """
+    AJAX endpoint для потоковой отправки сообщения в чат (text/event-stream)
+    
+    События: start (user_message_id), chunk (text), затем done (response,
+    assistant_message_id, metadata с usage_metadata и time_to_first_token) или error.
+    Ошибки до начала потока возвращаются обычным JSON.
+    """
+    from apps.gemini.logic.message_handlers import MessageHandler
+    from apps.gemini.logic.streaming import sse_response
+    
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'success': False,
+            'error': 'Неверный JSON в запросе'
+        }, status=400)
+    
+    result = MessageHandler.stream_message_to_gemini(
+        data.get('session_id'), (data.get('message') or '').strip(), request.user
+    )
+    if not result['success']:
+        return JsonResponse(result, status=400)
+    
+    return sse_response(result['events'])
+
+
 @login_required
 def delete_session(request, session_id):
     """
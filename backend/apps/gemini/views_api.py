@@ -2,6 +2,7 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.renderers import JSONRenderer
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
 
@@ -18,6 +19,9 @@ from logic.ai_analysis.gemini_api import (
     GeminiApiViewSet as LogicGeminiApiViewSet
 )
 from logic.base.response_handler import UnifiedResponseHandler
+from .logic.message_handlers import MessageHandler
+from .logic.session_queries import with_message_stats
+from .logic.streaming import EventStreamRenderer, sse_response
 
 User = get_user_model()
 
@@ -63,7 +67,7 @@ class ChatSessionViewSet(LogicChatSessionViewSet):
         
         ОБРАБОТКА:
         - Проверка аутентификации пользователя
-        - Получение активных сессий пользователя
+        - Получение активных сессий пользователя с количеством и последним сообщением (один запрос)
         - Сортировка по дате создания
         - Сериализация данных
         - Формирование ответа через UnifiedResponseHandler
@@ -81,7 +85,9 @@ class ChatSessionViewSet(LogicChatSessionViewSet):
                 response_data = UnifiedResponseHandler.error_response("Пользователь не аутентифицирован")
                 return Response(response_data, status=status.HTTP_401_UNAUTHORIZED)
             
-            sessions = ChatSession.objects.filter(user=request.user, is_active=True).order_by('-created_at')
+            sessions = with_message_stats(
+                ChatSession.objects.filter(user=request.user, is_active=True)
+            ).order_by('-created_at')
             serializer = ChatSessionSerializer(sessions, many=True)
             
             response_data = UnifiedResponseHandler.success_response(
@@ -111,6 +117,7 @@ class ChatSessionViewSet(LogicChatSessionViewSet):
         - Проверка аутентификации пользователя
         - Получение статистики по сессиям и сообщениям
         - Подсчет активных сессий, общего количества сообщений
+        - Сериализация последних сессий и сообщений
         - Формирование ответа через UnifiedResponseHandler
         
         ВЫХОДЯЩИЕ ДАННЫЕ:
@@ -131,6 +138,15 @@ class ChatSessionViewSet(LogicChatSessionViewSet):
                 response_data = UnifiedResponseHandler.error_response(dashboard_data['error'])
                 return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
             
+            # Контекст дашборда содержит модели - сериализуем их для JSON
+            dashboard_data.pop('user', None)
+            dashboard_data['recent_sessions'] = ChatSessionSerializer(
+                dashboard_data['recent_sessions'], many=True
+            ).data
+            dashboard_data['recent_messages'] = ChatMessageSerializer(
+                dashboard_data['recent_messages'], many=True
+            ).data
+            
             response_data = UnifiedResponseHandler.success_response(
                 dashboard_data,
                 "Данные дашборда получены"
@@ -195,6 +211,54 @@ class ChatSessionViewSet(LogicChatSessionViewSet):
             response_data = UnifiedResponseHandler.error_response(str(e))
             return Response(response_data, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    
+    @action(detail=True, methods=['post'], renderer_classes=[JSONRenderer, EventStreamRenderer])
+    def stream_message(self, request, pk=None):
+        """
+        Отправить сообщение в сессию чата с потоковым ответом
+        
+        ВХОДЯЩИЕ ДАННЫЕ:
+        - pk: ID сессии
+        - request.data: content (текст сообщения)
+        - request.user: аутентифицированный пользователь с API ключом Gemini
+        
+        ИСТОЧНИКИ ДАННЫЕ:
+        - ChatSession.objects: сессия пользователя
+        - Gemini API: :streamGenerateContent?alt=sse
+        
+        ОБРАБОТКА:
+        - Валидация через ChatMessageCreateSerializer
+        - Сохранение сообщения пользователя, затем фрагменты ответа по мере генерации
+        - Сохранение сообщения ассистента с токенами после завершения потока
+        
+        ВЫХОДЯЩИЕ ДАННЫЕ:
+        - text/event-stream: события start, chunk, done или error
+        - DRF Response с ошибкой, если поток не начат
+        
+        СВЯЗИ:
+        - Использует: MessageHandler.stream_message_to_gemini, sse_response
+        - Передает: StreamingHttpResponse
+        - Может вызываться из: DRF API endpoints (fetch с чтением потока)
+        """
+        session = self.get_object()
+        serializer = ChatMessageCreateSerializer(data=request.data)
+        
+        if not serializer.is_valid():
+            response_data = UnifiedResponseHandler.error_response(
+                "Ошибка валидации данных",
+                400
+            )
+            response_data['errors'] = serializer.errors
+            return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+        
+        result = MessageHandler.stream_message_to_gemini(
+            session.id, serializer.validated_data['content'], request.user
+        )
+        if not result['success']:
+            response_data = UnifiedResponseHandler.error_response(result['error'], 400)
+            return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+        
+        return sse_response(result['events'])
 
 class ChatMessageViewSet(LogicChatMessageViewSet):
     """ViewSet для просмотра сообщений чата - расширенная версия"""
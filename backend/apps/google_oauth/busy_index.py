@@ -0,0 +1,145 @@
+"""
+Индекс занятости календаря
+
+Строится один раз на снимок событий календаря: время событий разбирается и
+приводится к одному часовому поясу, интервалы сортируются по началу. Проверка
+занятости слота и поиск пересекающихся событий выполняются через bisect,
+количество событий на дату - через словарь.
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import date as date_type, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytz
+
+
+class BusyIntervalIndex:
+    """Отсортированные интервалы занятости с запросами за O(log n)"""
+
+    def __init__(self, events: Optional[List[Dict[str, Any]]], timezone_name: str = 'Europe/Minsk'):
+        self.timezone = pytz.timezone(timezone_name)
+        self.events = list(events or [])
+
+        intervals = []
+        self._events_by_date: Dict[date_type, List[Dict[str, Any]]] = defaultdict(list)
+        for event in self.events:
+            start_data = event.get('start', {}) or {}
+            if start_data.get('dateTime'):
+                start = self._parse(start_data['dateTime'])
+                end = self._parse((event.get('end', {}) or {}).get('dateTime'))
+                if start is None:
+                    continue
+                self._events_by_date[start.date()].append(event)
+                if end is not None and end > start:
+                    intervals.append((start, end, event))
+            elif start_data.get('date'):
+                # События на весь день учитываются в количестве встреч, но не занимают слоты
+                try:
+                    self._events_by_date[date_type.fromisoformat(start_data['date'])].append(event)
+                except ValueError:
+                    continue
+
+        intervals.sort(key=lambda interval: interval[0])
+        self._starts = [interval[0] for interval in intervals]
+        self._intervals = intervals
+
+        # Максимальное окончание среди первых i+1 интервалов: позволяет за O(log n)
+        # понять, есть ли пересечение, не перебирая все начавшиеся раньше события
+        self._max_end = []
+        current_max = None
+        for _, end, _ in intervals:
+            current_max = end if current_max is None or end > current_max else current_max
+            self._max_end.append(current_max)
+
+    @classmethod
+    def ensure(cls, events, timezone_name: str = 'Europe/Minsk') -> 'BusyIntervalIndex':
+        """Возвращает индекс как есть или строит его из списка событий"""
+        if isinstance(events, cls):
+            return events
+        return cls(events, timezone_name)
+
+    def __len__(self):
+        return len(self.events)
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def _parse(self, value: Optional[str]) -> Optional[datetime]:
+        if not value:
+            return None
+        try:
+            if value.endswith('Z'):
+                value = value[:-1] + '+00:00'
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+        return self._normalize(parsed)
+
+    def _normalize(self, value: datetime) -> datetime:
+        """Наивное время считается временем календаря, aware приводится к нему"""
+        if value.tzinfo is None:
+            return self.timezone.localize(value)
+        return value.astimezone(self.timezone)
+
+    # ==================== ЗАПРОСЫ ====================
+
+    def overlapping(self, start: datetime, end: datetime) -> List[Tuple[datetime, datetime, Dict[str, Any]]]:
+        """События, пересекающиеся с интервалом [start, end), в порядке начала"""
+        start, end = self._normalize(start), self._normalize(end)
+        hi = bisect_left(self._starts, end)
+        result = []
+        i = hi - 1
+        while i >= 0 and self._max_end[i] > start:
+            interval = self._intervals[i]
+            if interval[1] > start:
+                result.append(interval)
+            i -= 1
+        result.reverse()
+        return result
+
+    def first_conflict(self, start: datetime, end: datetime) -> Optional[Tuple[datetime, datetime, Dict[str, Any]]]:
+        """Первое событие, занимающее интервал [start, end), или None"""
+        conflicts = self.overlapping(start, end)
+        return conflicts[0] if conflicts else None
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        """Свободен ли интервал [start, end)"""
+        start, end = self._normalize(start), self._normalize(end)
+        hi = bisect_left(self._starts, end)
+        return hi == 0 or self._max_end[hi - 1] <= start
+
+    def busy_minutes(self, start: datetime, end: datetime) -> float:
+        """Максимальное пересечение одного события с интервалом [start, end) в минутах"""
+        start, end = self._normalize(start), self._normalize(end)
+        longest = 0.0
+        for event_start, event_end, _ in self.overlapping(start, end):
+            overlap = (min(end, event_end) - max(start, event_start)).total_seconds() / 60
+            longest = max(longest, overlap)
+        return longest
+
+    def free_hours(self, day: date_type, start_hour: int, end_hour: int,
+                   min_overlap_minutes: int = 30) -> List[Tuple[int, bool]]:
+        """
+        Почасовые слоты дня: [(час, занят), ...]
+
+        Слот считается занятым, если одно событие пересекает его не меньше чем
+        на min_overlap_minutes минут.
+        """
+        slots = []
+        for hour in range(start_hour, end_hour):
+            slot_start = self.timezone.localize(datetime(day.year, day.month, day.day, hour))
+            slot_end = slot_start + timedelta(hours=1)
+            slots.append((hour, self.busy_minutes(slot_start, slot_end) >= min_overlap_minutes))
+        return slots
+
+    def events_on(self, day: date_type) -> List[Dict[str, Any]]:
+        """События, начинающиеся в указанную дату (в часовом поясе календаря)"""
+        if isinstance(day, datetime):
+            day = self._normalize(day).date() if day.tzinfo else day.date()
+        return self._events_by_date.get(day, [])
+
+    def count_on(self, day: date_type) -> int:
+        """Количество событий, начинающихся в указанную дату"""
+        return len(self.events_on(day))
@@ -0,0 +1,240 @@
+from datetime import datetime, time as dt_time, timedelta
+from typing import Dict, Any, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from googleapiclient.errors import HttpError
+import logging
+
+from .models import CalendarSyncState, SyncedCalendarEvent
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_CALENDAR_SYNC_SETTINGS = {
+    'enabled': True,
+    'past_days': 1,              # Окно полной синхронизации: N дней назад...
+    'future_days': 120,          # ...и N дней вперед
+    'full_sync_interval': 86400, # Полная синхронизация раз в сутки (сдвигает окно)
+    'max_staleness': 900,        # Старше этого локальное хранилище не используется для чтения
+}
+
+
+def get_calendar_sync_settings() -> Dict[str, Any]:
+    sync_settings = dict(DEFAULT_CALENDAR_SYNC_SETTINGS)
+    sync_settings.update(getattr(settings, 'GOOGLE_CALENDAR_SYNC_SETTINGS', {}) or {})
+    return sync_settings
+
+
+def _parse_event_time(value: Optional[Dict[str, Any]]) -> Optional[datetime]:
+    """Преобразует start/end события (dateTime или date для событий на весь день)"""
+    if not value:
+        return None
+    if value.get('dateTime'):
+        parsed = parse_datetime(value['dateTime'])
+        if parsed and timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+    if value.get('date'):
+        parsed = parse_date(value['date'])
+        if parsed:
+            return timezone.make_aware(datetime.combine(parsed, dt_time.min))
+    return None
+
+
+class CalendarSyncService:
+    """
+    Инкрементальная синхронизация Google Calendar в локальное хранилище
+
+    Первая (полная) синхронизация загружает окно событий и сохраняет nextSyncToken.
+    Последующие запросы передают syncToken и получают только изменения: новые и
+    измененные события обновляются, отмененные удаляются. Если Google отвечает
+    410 Gone (токен устарел), хранилище очищается и выполняется полная синхронизация.
+    """
+
+    def __init__(self, user, calendar_service=None):
+        self.user = user
+        self._calendar_service = calendar_service
+
+    def _get_calendar_service(self):
+        if self._calendar_service is None:
+            from .services import GoogleOAuthService, GoogleCalendarService
+            self._calendar_service = GoogleCalendarService(GoogleOAuthService(self.user))
+        return self._calendar_service
+
+    def _list_fields(self) -> str:
+        from .services import GoogleCalendarService
+        return f'nextPageToken,nextSyncToken,items({GoogleCalendarService.EVENT_FIELDS})'
+
+    # ==================== СИНХРОНИЗАЦИЯ ====================
+
+    def sync(self, calendar_id: str = 'primary', force_full: bool = False) -> Dict[str, Any]:
+        """
+        Синхронизирует календарь (инкрементально, если есть syncToken)
+
+        Returns:
+            Словарь со статистикой: mode, upserted, deleted
+        """
+        service = self._get_calendar_service()._get_service()
+        if not service:
+            return {'success': False, 'error': 'Google Calendar недоступен'}
+
+        state, _ = CalendarSyncState.objects.get_or_create(user=self.user, calendar_id=calendar_id)
+        sync_settings = get_calendar_sync_settings()
+
+        full_sync_due = (
+            not state.last_full_sync_at or
+            (timezone.now() - state.last_full_sync_at).total_seconds() >= sync_settings['full_sync_interval']
+        )
+
+        try:
+            if state.sync_token and not force_full and not full_sync_due:
+                try:
+                    result = self._incremental_sync(service, state)
+                except HttpError as e:
+                    if e.resp.status != 410:
+                        raise
+                    logger.info(f"syncToken устарел для {self.user.username}/{calendar_id}, полная синхронизация")
+                    result = self._full_sync(service, state, sync_settings)
+            else:
+                result = self._full_sync(service, state, sync_settings)
+        except HttpError as e:
+            state.last_error = str(e)[:1000]
+            state.save(update_fields=['last_error'])
+            logger.error(f"Ошибка синхронизации календаря {self.user.username}/{calendar_id}: {e}")
+            return {'success': False, 'error': str(e)}
+
+        return dict(result, success=True)
+
+    def _fetch_pages(self, service, **params):
+        """Загружает все страницы events.list, возвращает (события, nextSyncToken)"""
+        items = []
+        page_token = None
+        while True:
+            response = service.events().list(
+                singleEvents=True,
+                showDeleted=True,
+                maxResults=2500,
+                fields=self._list_fields(),
+                pageToken=page_token,
+                **params
+            ).execute()
+            items.extend(response.get('items', []))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return items, response.get('nextSyncToken', '')
+
+    def _full_sync(self, service, state: CalendarSyncState, sync_settings: Dict[str, Any]) -> Dict[str, Any]:
+        now = timezone.now()
+        items, sync_token = self._fetch_pages(
+            service,
+            calendarId=state.calendar_id,
+            timeMin=(now - timedelta(days=sync_settings['past_days'])).isoformat(),
+            timeMax=(now + timedelta(days=sync_settings['future_days'])).isoformat(),
+        )
+
+        with transaction.atomic():
+            SyncedCalendarEvent.objects.filter(user=self.user, calendar_id=state.calendar_id).delete()
+            upserted, deleted = self._apply(state.calendar_id, items)
+            state.sync_token = sync_token
+            state.last_full_sync_at = now
+            state.last_sync_at = now
+            state.last_error = ''
+            state.save()
+
+        print(f"📅 Полная синхронизация календаря {self.user.username}/{state.calendar_id}: {upserted} событий")
+        return {'mode': 'full', 'upserted': upserted, 'deleted': deleted}
+
+    def _incremental_sync(self, service, state: CalendarSyncState) -> Dict[str, Any]:
+        items, sync_token = self._fetch_pages(
+            service,
+            calendarId=state.calendar_id,
+            syncToken=state.sync_token,
+        )
+
+        with transaction.atomic():
+            upserted, deleted = self._apply(state.calendar_id, items)
+            state.sync_token = sync_token or state.sync_token
+            state.last_sync_at = timezone.now()
+            state.last_error = ''
+            state.save(update_fields=['sync_token', 'last_sync_at', 'last_error'])
+
+        if upserted or deleted:
+            print(f"📅 Изменения календаря {self.user.username}/{state.calendar_id}: +{upserted} / -{deleted}")
+        return {'mode': 'incremental', 'upserted': upserted, 'deleted': deleted}
+
+    def _apply(self, calendar_id: str, items: List[Dict[str, Any]]):
+        """Применяет изменения к хранилищу: cancelled удаляются, остальные обновляются"""
+        cancelled = [item['id'] for item in items if item.get('status') == 'cancelled']
+        active = {item['id']: item for item in items if item.get('status') != 'cancelled'}
+
+        deleted = 0
+        if cancelled:
+            deleted, _ = SyncedCalendarEvent.objects.filter(
+                user=self.user, calendar_id=calendar_id, event_id__in=cancelled
+            ).delete()
+
+        if active:
+            existing = {
+                event.event_id: event
+                for event in SyncedCalendarEvent.objects.filter(
+                    user=self.user, calendar_id=calendar_id, event_id__in=list(active)
+                )
+            }
+            to_create, to_update = [], []
+            for event_id, item in active.items():
+                event = existing.get(event_id) or SyncedCalendarEvent(
+                    user=self.user, calendar_id=calendar_id, event_id=event_id
+                )
+                event.data = item
+                event.start_time = _parse_event_time(item.get('start'))
+                event.end_time = _parse_event_time(item.get('end'))
+                event.updated_at = timezone.now()
+                (to_update if event.pk else to_create).append(event)
+
+            SyncedCalendarEvent.objects.bulk_create(to_create, batch_size=500)
+            SyncedCalendarEvent.objects.bulk_update(
+                to_update, ['data', 'start_time', 'end_time', 'updated_at'], batch_size=500
+            )
+
+        return len(active), deleted
+
+    # ==================== ЧТЕНИЕ ====================
+
+    def is_fresh(self, calendar_id: str = 'primary', days_ahead: int = 0) -> bool:
+        """Хранилище синхронизировано, не устарело и покрывает запрошенный период"""
+        sync_settings = get_calendar_sync_settings()
+        if not sync_settings['enabled'] or days_ahead > sync_settings['future_days']:
+            return False
+        state = CalendarSyncState.objects.filter(
+            user=self.user, calendar_id=calendar_id
+        ).exclude(sync_token='').only('last_sync_at').first()
+        if not state or not state.last_sync_at:
+            return False
+        return (timezone.now() - state.last_sync_at).total_seconds() < sync_settings['max_staleness']
+
+    def get_events(self, calendar_id: str = 'primary', max_results: int = 100,
+                   days_ahead: int = 100) -> List[Dict[str, Any]]:
+        """События из локального хранилища в том же виде, что отдает events.list"""
+        now = timezone.now()
+        return list(
+            SyncedCalendarEvent.objects.filter(
+                user=self.user,
+                calendar_id=calendar_id,
+                end_time__gt=now,
+                start_time__lt=now + timedelta(days=days_ahead),
+            ).order_by('start_time').values_list('data', flat=True)[:max_results]
+        )
+
+    def store_event(self, event: Dict[str, Any], calendar_id: str = 'primary'):
+        """Сохраняет событие, созданное приложением, не дожидаясь следующей синхронизации"""
+        if event and event.get('id'):
+            self._apply(calendar_id, [event])
+
+    def remove_event(self, event_id: str, calendar_id: str = 'primary'):
+        """Удаляет событие из хранилища после удаления в Google"""
+        SyncedCalendarEvent.objects.filter(
+            user=self.user, calendar_id=calendar_id, event_id=event_id
+        ).delete()
@@ -3,12 +3,230 @@
 Поддерживает: русский/английский, опечатки, неправильную раскладку, относительные даты
 """
 
+import logging
 import re
+import threading
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional, Tuple, Dict, List
+from typing import Optional, Tuple, Dict, List, Pattern, Union
 from decimal import Decimal
 import pytz
 
+from .busy_index import BusyIntervalIndex
+from logic.utilities.dictionary_matcher import DictionaryMatcher
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ParserTables:
+    """
+    Неизменяемые таблицы парсера: словари, раскладка, относительные даты и
+    скомпилированные регулярные выражения. Создаются один раз на процесс и
+    разделяются всеми экземплярами EnhancedDateTimeParser.
+    """
+    WEEKDAYS: Dict[str, int]
+    MONTHS: Dict[str, int]
+    KEYBOARD_MAPPING: Dict[str, str]
+    KEYBOARD_TRANSLATION: Dict[int, str]
+    WEEKDAYS_MATCHER: DictionaryMatcher
+    MONTHS_MATCHER: DictionaryMatcher
+    COMMON_KEYBOARD_ERRORS: Dict[str, str]
+    RELATIVE_DATES: Dict[str, Union[int, str]]
+    DATE_PATTERNS: List[Pattern]
+    DAY_BEFORE_MONTH_PATTERN: Pattern
+    YEAR_AFTER_MONTH_PATTERN: Pattern
+    TIME_PATTERNS: List[Pattern]
+    TIME_COLON_PATTERN: Pattern
+    TIME_DOT_DASH_PATTERN: Pattern
+    TIME_CONTEXT_PATTERN: Pattern
+    TIME_KEYWORD_PATTERN: Pattern
+    WEEKDAY_HOUR_PATTERN: Pattern
+    PREPOSITION_HOUR_PATTERN: Pattern
+    END_NUMBER_PATTERN: Pattern
+    NON_WORD_PATTERN: Pattern
+    URL_PATTERN: Pattern
+    WHITESPACE_PATTERN: Pattern
+
+
+def _build_keyboard_translation(mapping: Dict[str, str]) -> Dict[int, str]:
+    table = {}
+    for source, target in mapping.items():
+        table[ord(source)] = target
+        if source.upper() != source:
+            table[ord(source.upper())] = target.upper()
+    return table
+
+
+def _build_parser_tables() -> ParserTables:
+    """Загрузка всех словарей из библиотеки форматов"""
+    # Импорт полных словарей из библиотеки
+    try:
+        from .weekdays_full import WEEKDAYS as WEEKDAYS_FULL
+        from .months_full import MONTHS as MONTHS_FULL
+
+        WEEKDAYS = WEEKDAYS_FULL
+        MONTHS = MONTHS_FULL
+        logger.info(f"Загружены полные словари: {len(WEEKDAYS)} дней недели, {len(MONTHS)} месяцев")
+    except ImportError as e:
+        logger.warning(f"Не удалось загрузить полные словари, используем базовые: {e}")
+
+        # Базовые словари (fallback)
+        WEEKDAYS = {
+            'понедельник': 0, 'пн': 0, 'пон': 0, 'понед': 0,
+            'gy': 0, 'gj': 0, 'monday': 0, 'mon': 0,
+            'вторник': 1, 'вт': 1, 'втор': 1,
+            'ds': 1, 'cu': 1, 'tuesday': 1, 'tue': 1,
+            'среда': 2, 'ср': 2, 'сред': 2,
+            'ch': 2, 'cc': 2, 'wednesday': 2, 'wed': 2,
+            'четверг': 3, 'чт': 3, 'четв': 3,
+            'xn': 3, 'db': 3, 'thursday': 3, 'thu': 3,
+            'пятница': 4, 'пт': 4, 'пятн': 4,
+            'gn': 4, 'friday': 4, 'fri': 4,
+            'суббота': 5, 'сб': 5, 'субб': 5,
+            'saturday': 5, 'sat': 5,
+            'воскресенье': 6, 'вс': 6, 'воскр': 6,
+            'sunday': 6, 'sun': 6,
+        }
+
+        MONTHS = {
+            'январь': 1, 'янв': 1, 'january': 1, 'jan': 1, 'zydfhm': 1,
+            'февраль': 2, 'фев': 2, 'february': 2, 'feb': 2, 'atdhfkm': 2,
+            'март': 3, 'мар': 3, 'march': 3, 'mar': 3, 'vfhn': 3,
+            'апрель': 4, 'апр': 4, 'april': 4, 'apr': 4, 'fghtkm': 4,
+            'май': 5, 'may': 5, 'vfq': 5,
+            'июнь': 6, 'июн': 6, 'june': 6, 'jun': 6, 'bym': 6,
+            'июль': 7, 'июл': 7, 'july': 7, 'jul': 7, 'bkm': 7,
+            'август': 8, 'авг': 8, 'august': 8, 'aug': 8, 'fduecn': 8,
+            'сентябрь': 9, 'сен': 9, 'сент': 9, 'september': 9, 'sep': 9, 'ctynzhm': 9,
+            'октябрь': 10, 'окт': 10, 'october': 10, 'oct': 10, 'jrnzhm': 10,
+            'ноябрь': 11, 'ноя': 11, 'нояб': 11, 'november': 11, 'nov': 11, 'yjzhm': 11,
+            'декабрь': 12, 'дек': 12, 'december': 12, 'dec': 12, 'ltrfhm': 12,
+        }
+
+    # Неправильная раскладка клавиатуры
+    KEYBOARD_MAPPING = {
+        # Английские буквы → Русские (QWERTY → ЙЦУКЕН)
+        'q': 'й', 'w': 'ц', 'e': 'у', 'r': 'к', 't': 'е', 'y': 'н',
+        'u': 'г', 'i': 'ш', 'o': 'щ', 'p': 'з', '[': 'х', ']': 'ъ',
+        'a': 'ф', 's': 'ы', 'd': 'в', 'f': 'а', 'g': 'п', 'h': 'р',
+        'j': 'о', 'k': 'л', 'l': 'д', ';': 'ж', "'": 'э',
+        'z': 'я', 'x': 'ч', 'c': 'с', 'v': 'м', 'b': 'и', 'n': 'т',
+        'm': 'ь', ',': 'б', '.': 'ю', '/': '.',
+
+        # Русские буквы → Английские (ЙЦУКЕН → QWERTY)
+        'й': 'q', 'ц': 'w', 'у': 'e', 'к': 'r', 'е': 't', 'н': 'y',
+        'г': 'u', 'ш': 'i', 'щ': 'o', 'з': 'p', 'х': '[', 'ъ': ']',
+        'ф': 'a', 'ы': 's', 'в': 'd', 'а': 'f', 'п': 'g', 'р': 'h',
+        'о': 'j', 'л': 'k', 'д': 'l', 'ж': ';', 'э': "'",
+        'я': 'z', 'ч': 'x', 'с': 'c', 'м': 'v', 'и': 'b', 'т': 'n',
+        'ь': 'm', 'б': ',', 'ю': '.', '.': '/'
+    }
+
+    # Таблица для str.translate (с заглавными вариантами букв)
+    KEYBOARD_TRANSLATION = _build_keyboard_translation(KEYBOARD_MAPPING)
+
+    # Автоматы поиска вхождений словарей (строятся один раз на процесс)
+    WEEKDAYS_MATCHER = DictionaryMatcher.for_dictionary(WEEKDAYS)
+    MONTHS_MATCHER = DictionaryMatcher.for_dictionary(MONTHS)
+
+    # Частые ошибки раскладки
+    COMMON_KEYBOARD_ERRORS = {
+        'GY': 'ПН', 'ds': 'вт', 'ch': 'ср', 'xn': 'чт', 'gn': 'пт',
+        'c,': 'сб', 'dc': 'вс',
+        'pfdnhf': 'завтра', 'ctuljyz': 'сегодня', 'gjcrfx': 'после',
+        'jrn': 'окт', 'yjz': 'ноя', 'ltrf,hm': 'декабрь'
+    }
+
+    # Относительные даты
+    RELATIVE_DATES = {
+        'сегодня': 0, 'сёдня': 0, 'седня': 0, 'today': 0, 'ctuljyz': 0,
+        'завтра': 1, 'завтро': 1, 'завр': 1, 'tomorrow': 1, 'pfdnhf': 1,
+        'послезавтра': 2, 'послезавтро': 2,
+        'через день': 1,
+        'через два дня': 2,
+        'через три дня': 3,
+        'через неделю': 7,
+        'на следующей неделе': 'next_week',
+        'следующая неделя': 'next_week',
+        'след неделе': 'next_week',
+        'next week': 'next_week'
+    }
+
+    # Регулярные выражения для парсинга
+    DATE_PATTERNS = [re.compile(pattern) for pattern in [
+        r'(\d{1,2})\.(\d{1,2})\.(\d{2,4})',      # DD.MM.YYYY
+        r'(\d{1,2})\.(\d{1,2})',                 # DD.MM
+        r'(\d{1,2})/(\d{1,2})/(\d{2,4})',       # DD/MM/YYYY
+        r'(\d{1,2})/(\d{1,2})',                  # DD/MM
+        r'(\d{1,2})-(\d{1,2})-(\d{2,4})',       # DD-MM-YYYY
+        r'(\d{1,2})-(\d{1,2})',                  # DD-MM
+        r'(\d{4})-(\d{1,2})-(\d{1,2})',         # YYYY-MM-DD (ISO)
+    ]]
+
+    DAY_BEFORE_MONTH_PATTERN = re.compile(r'(\d{1,2})\s*$')
+    YEAR_AFTER_MONTH_PATTERN = re.compile(r'\w*\s*(\d{4})?')
+
+    TIME_PATTERNS = [re.compile(pattern) for pattern in [
+        r'(\d{1,2})[:\.\-](\d{2})',             # HH:MM, HH.MM, HH-MM
+        r'(\d{1,2})\s*(?:ч|час|h|час\.|h\.)',   # HH час
+        r'(?:^|\s)(\d{1,2})(?:\s|$)',           # просто число (час)
+    ]]
+    
+    # Паттерны extract_time и нормализации текста
+    TIME_COLON_PATTERN = re.compile(r'(\d{1,2}):(\d{2})')
+    TIME_DOT_DASH_PATTERN = re.compile(r'(\d{1,2})[\.\-](\d{2})')
+    TIME_CONTEXT_PATTERN = re.compile(r'(?:в|к|время|час|ч|time|at)', re.IGNORECASE)
+    TIME_KEYWORD_PATTERN = TIME_PATTERNS[1]
+    WEEKDAY_HOUR_PATTERN = re.compile(
+        r'(?:пн|вт|ср|чт|пт|сб|вс|понедельник|вторник|среда|четверг|пятница|суббота|воскресенье|monday|tuesday|wednesday|thursday|friday|saturday|sunday|mon|tue|wed|thu|fri|sat|sun|gy|ds|ch|xn|gn)\s+(?:в\s+)?(\d{1,2})(?:\s|$)',
+        re.IGNORECASE
+    )
+    PREPOSITION_HOUR_PATTERN = re.compile(r'(?:в|к|после|до|около|примерно|d)\s+(\d{1,2})(?:\s|$)', re.IGNORECASE)
+    END_NUMBER_PATTERN = re.compile(r'\s(\d{1,2})$')
+    NON_WORD_PATTERN = re.compile(r'[^\w]')
+    URL_PATTERN = re.compile(r'https?://\S+')
+    WHITESPACE_PATTERN = re.compile(r'\s+')
+
+    return ParserTables(
+        WEEKDAYS=WEEKDAYS,
+        MONTHS=MONTHS,
+        KEYBOARD_MAPPING=KEYBOARD_MAPPING,
+        KEYBOARD_TRANSLATION=KEYBOARD_TRANSLATION,
+        WEEKDAYS_MATCHER=WEEKDAYS_MATCHER,
+        MONTHS_MATCHER=MONTHS_MATCHER,
+        COMMON_KEYBOARD_ERRORS=COMMON_KEYBOARD_ERRORS,
+        RELATIVE_DATES=RELATIVE_DATES,
+        DATE_PATTERNS=DATE_PATTERNS,
+        DAY_BEFORE_MONTH_PATTERN=DAY_BEFORE_MONTH_PATTERN,
+        YEAR_AFTER_MONTH_PATTERN=YEAR_AFTER_MONTH_PATTERN,
+        TIME_PATTERNS=TIME_PATTERNS,
+        TIME_COLON_PATTERN=TIME_COLON_PATTERN,
+        TIME_DOT_DASH_PATTERN=TIME_DOT_DASH_PATTERN,
+        TIME_CONTEXT_PATTERN=TIME_CONTEXT_PATTERN,
+        TIME_KEYWORD_PATTERN=TIME_KEYWORD_PATTERN,
+        WEEKDAY_HOUR_PATTERN=WEEKDAY_HOUR_PATTERN,
+        PREPOSITION_HOUR_PATTERN=PREPOSITION_HOUR_PATTERN,
+        END_NUMBER_PATTERN=END_NUMBER_PATTERN,
+        NON_WORD_PATTERN=NON_WORD_PATTERN,
+        URL_PATTERN=URL_PATTERN,
+        WHITESPACE_PATTERN=WHITESPACE_PATTERN,
+    )
+
+
+_parser_tables: Optional[ParserTables] = None
+_parser_tables_lock = threading.Lock()
+
+
+def get_parser_tables() -> ParserTables:
+    """Общие таблицы парсера (ленивая инициализация при первом обращении)"""
+    global _parser_tables
+    if _parser_tables is None:
+        with _parser_tables_lock:
+            if _parser_tables is None:
+                _parser_tables = _build_parser_tables()
+    return _parser_tables
+
 
 class EnhancedDateTimeParser:
     """
@@ -16,16 +234,16 @@ class EnhancedDateTimeParser:
     с поддержкой всех форматов из библиотеки date-time-formats.md
     """
 
+    TIME_SLOTS = [0, 15, 30, 45]
+
     def __init__(self, user=None, timezone_name: str = 'Europe/Minsk'):
         self.user = user
         self.timezone = pytz.timezone(timezone_name)
         
-        # Бизнес-часы из настроек пользователя
+        # Бизнес-часы из настроек пользователя (единственное состояние экземпляра,
+        # кроме часового пояса; словари и паттерны общие для всех экземпляров)
         self.BUSINESS_HOURS = self._get_user_business_hours()
-        self.TIME_SLOTS = [0, 15, 30, 45]
-        
-        # Импорт словарей из библиотеки
-        self._load_dictionaries()
+        self.tables = get_parser_tables()
     
     def _get_user_business_hours(self):
         """
@@ -58,119 +276,13 @@ class EnhancedDateTimeParser:
         # Fallback к захардкоженным значениям, если пользователь не настроен
         return {'start': 11, 'end': 18}
     
-    def _load_dictionaries(self):
-        """Загрузка всех словарей из библиотеки форматов"""
-        
-        # Импорт полных словарей из библиотеки
-        try:
-            from .weekdays_full import WEEKDAYS as WEEKDAYS_FULL
-            from .months_full import MONTHS as MONTHS_FULL
-            
-            self.WEEKDAYS = WEEKDAYS_FULL
-            self.MONTHS = MONTHS_FULL
-            print(f"✅ [PARSER_INIT] Загружены полные словари: {len(self.WEEKDAYS)} дней недели, {len(self.MONTHS)} месяцев")
-        except ImportError as e:
-            print(f"⚠️ [PARSER_INIT] Не удалось загрузить полные словари, используем базовые: {e}")
-            
-            # Базовые словари (fallback)
-            self.WEEKDAYS = {
-                'понедельник': 0, 'пн': 0, 'пон': 0, 'понед': 0,
-                'gy': 0, 'gj': 0, 'monday': 0, 'mon': 0,
-                'вторник': 1, 'вт': 1, 'втор': 1,
-                'ds': 1, 'cu': 1, 'tuesday': 1, 'tue': 1,
-                'среда': 2, 'ср': 2, 'сред': 2,
-                'ch': 2, 'cc': 2, 'wednesday': 2, 'wed': 2,
-                'четверг': 3, 'чт': 3, 'четв': 3,
-                'xn': 3, 'db': 3, 'thursday': 3, 'thu': 3,
-                'пятница': 4, 'пт': 4, 'пятн': 4,
-                'gn': 4, 'friday': 4, 'fri': 4,
-                'суббота': 5, 'сб': 5, 'субб': 5,
-                'saturday': 5, 'sat': 5,
-                'воскресенье': 6, 'вс': 6, 'воскр': 6,
-                'sunday': 6, 'sun': 6,
-            }
-            
-            self.MONTHS = {
-                'январь': 1, 'янв': 1, 'january': 1, 'jan': 1, 'zydfhm': 1,
-                'февраль': 2, 'фев': 2, 'february': 2, 'feb': 2, 'atdhfkm': 2,
-                'март': 3, 'мар': 3, 'march': 3, 'mar': 3, 'vfhn': 3,
-                'апрель': 4, 'апр': 4, 'april': 4, 'apr': 4, 'fghtkm': 4,
-                'май': 5, 'may': 5, 'vfq': 5,
-                'июнь': 6, 'июн': 6, 'june': 6, 'jun': 6, 'bym': 6,
-                'июль': 7, 'июл': 7, 'july': 7, 'jul': 7, 'bkm': 7,
-                'август': 8, 'авг': 8, 'august': 8, 'aug': 8, 'fduecn': 8,
-                'сентябрь': 9, 'сен': 9, 'сент': 9, 'september': 9, 'sep': 9, 'ctynzhm': 9,
-                'октябрь': 10, 'окт': 10, 'october': 10, 'oct': 10, 'jrnzhm': 10,
-                'ноябрь': 11, 'ноя': 11, 'нояб': 11, 'november': 11, 'nov': 11, 'yjzhm': 11,
-                'декабрь': 12, 'дек': 12, 'december': 12, 'dec': 12, 'ltrfhm': 12,
-            }
-        
-        # Неправильная раскладка клавиатуры
-        self.KEYBOARD_MAPPING = {
-            # Английские буквы → Русские (QWERTY → ЙЦУКЕН)
-            'q': 'й', 'w': 'ц', 'e': 'у', 'r': 'к', 't': 'е', 'y': 'н',
-            'u': 'г', 'i': 'ш', 'o': 'щ', 'p': 'з', '[': 'х', ']': 'ъ',
-            'a': 'ф', 's': 'ы', 'd': 'в', 'f': 'а', 'g': 'п', 'h': 'р',
-            'j': 'о', 'k': 'л', 'l': 'д', ';': 'ж', "'": 'э',
-            'z': 'я', 'x': 'ч', 'c': 'с', 'v': 'м', 'b': 'и', 'n': 'т',
-            'm': 'ь', ',': 'б', '.': 'ю', '/': '.',
-            
-            # Русские буквы → Английские (ЙЦУКЕН → QWERTY)
-            'й': 'q', 'ц': 'w', 'у': 'e', 'к': 'r', 'е': 't', 'н': 'y',
-            'г': 'u', 'ш': 'i', 'щ': 'o', 'з': 'p', 'х': '[', 'ъ': ']',
-            'ф': 'a', 'ы': 's', 'в': 'd', 'а': 'f', 'п': 'g', 'р': 'h',
-            'о': 'j', 'л': 'k', 'д': 'l', 'ж': ';', 'э': "'",
-            'я': 'z', 'ч': 'x', 'с': 'c', 'м': 'v', 'и': 'b', 'т': 'n',
-            'ь': 'm', 'б': ',', 'ю': '.', '.': '/'
-        }
-        
-        # Частые ошибки раскладки
-        self.COMMON_KEYBOARD_ERRORS = {
-            'GY': 'ПН', 'ds': 'вт', 'ch': 'ср', 'xn': 'чт', 'gn': 'пт',
-            'c,': 'сб', 'dc': 'вс',
-            'pfdnhf': 'завтра', 'ctuljyz': 'сегодня', 'gjcrfx': 'после',
-            'jrn': 'окт', 'yjz': 'ноя', 'ltrf,hm': 'декабрь'
-        }
-        
-        # Относительные даты
-        self.RELATIVE_DATES = {
-            'сегодня': 0, 'сёдня': 0, 'седня': 0, 'today': 0, 'ctuljyz': 0,
-            'завтра': 1, 'завтро': 1, 'завр': 1, 'tomorrow': 1, 'pfdnhf': 1,
-            'послезавтра': 2, 'послезавтро': 2,
-            'через день': 1,
-            'через два дня': 2,
-            'через три дня': 3,
-            'через неделю': 7,
-            'на следующей неделе': 'next_week',
-            'следующая неделя': 'next_week',
-            'след неделе': 'next_week',
-            'next week': 'next_week'
-        }
-        
-        # Регулярные выражения для парсинга
-        self.DATE_PATTERNS = [
-            r'(\d{1,2})\.(\d{1,2})\.(\d{2,4})',      # DD.MM.YYYY
-            r'(\d{1,2})\.(\d{1,2})',                 # DD.MM
-            r'(\d{1,2})/(\d{1,2})/(\d{2,4})',       # DD/MM/YYYY
-            r'(\d{1,2})/(\d{1,2})',                  # DD/MM
-            r'(\d{1,2})-(\d{1,2})-(\d{2,4})',       # DD-MM-YYYY
-            r'(\d{1,2})-(\d{1,2})',                  # DD-MM
-            r'(\d{4})-(\d{1,2})-(\d{1,2})',         # YYYY-MM-DD (ISO)
-        ]
-        
-        self.TIME_PATTERNS = [
-            r'(\d{1,2})[:\.\-](\d{2})',             # HH:MM, HH.MM, HH-MM
-            r'(\d{1,2})\s*(?:ч|час|h|час\.|h\.)',   # HH час
-            r'(?:^|\s)(\d{1,2})(?:\s|$)',           # просто число (час)
-        ]
-    
     def fix_keyboard_layout(self, text: str) -> Tuple[str, List[Dict]]:
         """Исправление неправильной раскладки клавиатуры"""
         corrections = []
         original_text = text.lower()
         
         # Исправление частых ошибок раскладки
-        for wrong, correct in self.COMMON_KEYBOARD_ERRORS.items():
+        for wrong, correct in self.tables.COMMON_KEYBOARD_ERRORS.items():
             if wrong.lower() in original_text:
                 text = text.replace(wrong.lower(), correct.lower())
                 corrections.append({
@@ -185,31 +297,23 @@ class EnhancedDateTimeParser:
         corrected_words = []
         
         for word in words:
-            clean_word = re.sub(r'[^\w]', '', word.lower())
+            clean_word = self.tables.NON_WORD_PATTERN.sub('', word.lower())
             
             # Проверяем, есть ли это слово уже в наших словарях
-            if clean_word in self.WEEKDAYS or clean_word in self.MONTHS or clean_word in self.RELATIVE_DATES:
+            if clean_word in self.tables.WEEKDAYS or clean_word in self.tables.MONTHS or clean_word in self.tables.RELATIVE_DATES:
                 # Слово уже правильное, не трогаем
                 corrected_words.append(word)
                 continue
             
             # Пробуем посимвольное исправление раскладки
-            corrected_word = ''
-            for char in word:
-                if char.lower() in self.KEYBOARD_MAPPING:
-                    corrected_char = self.KEYBOARD_MAPPING[char.lower()]
-                    if char.isupper():
-                        corrected_char = corrected_char.upper()
-                    corrected_word += corrected_char
-                else:
-                    corrected_word += char
+            corrected_word = word.translate(self.tables.KEYBOARD_TRANSLATION)
             
             # Проверяем, стало ли слово правильным после исправления
-            corrected_clean = re.sub(r'[^\w]', '', corrected_word.lower())
+            corrected_clean = self.tables.NON_WORD_PATTERN.sub('', corrected_word.lower())
             if corrected_word != word and (
-                corrected_clean in self.WEEKDAYS or 
-                corrected_clean in self.MONTHS or 
-                corrected_clean in self.RELATIVE_DATES
+                corrected_clean in self.tables.WEEKDAYS or 
+                corrected_clean in self.tables.MONTHS or 
+                corrected_clean in self.tables.RELATIVE_DATES
             ):
                 corrections.append({
                     'type': 'keyboard_layout',
@@ -230,10 +334,10 @@ class EnhancedDateTimeParser:
             return "", []
         
         # Удаление URL
-        text = re.sub(r'https?://\S+', '', text)
+        text = self.tables.URL_PATTERN.sub('', text)
         
         # Нормализация пробелов
-        text = re.sub(r'\s+', ' ', text.strip())
+        text = self.tables.WHITESPACE_PATTERN.sub(' ', text.strip())
         
         # Приведение к нижнему регистру
         text = text.lower()
@@ -251,14 +355,14 @@ class EnhancedDateTimeParser:
         words = text_lower.split()
         for word in words:
             # Убираем знаки препинания
-            clean_word = re.sub(r'[^\w]', '', word)
-            if clean_word in self.WEEKDAYS:
-                return self.WEEKDAYS[clean_word]
+            clean_word = self.tables.NON_WORD_PATTERN.sub('', word)
+            if clean_word in self.tables.WEEKDAYS:
+                return self.tables.WEEKDAYS[clean_word]
         
-        # Затем ищем вхождение в строке
-        for weekday_name, weekday_num in self.WEEKDAYS.items():
-            if weekday_name in text_lower:
-                return weekday_num
+        # Затем ищем самое длинное вхождение в строке (один проход автомата)
+        match = self.tables.WEEKDAYS_MATCHER.longest(text_lower)
+        if match:
+            return match.value
         
         # Если не найдено, пробуем без исправления раскладки в исходном тексте
         # (потому что fix_keyboard_layout может испортить правильные русские слова)
@@ -272,14 +376,14 @@ class EnhancedDateTimeParser:
         words = text_lower.split()
         for word in words:
             # Убираем знаки препинания
-            clean_word = re.sub(r'[^\w]', '', word)
-            if clean_word in self.MONTHS:
-                return self.MONTHS[clean_word]
+            clean_word = self.tables.NON_WORD_PATTERN.sub('', word)
+            if clean_word in self.tables.MONTHS:
+                return self.tables.MONTHS[clean_word]
         
-        # Затем ищем вхождение в строке
-        for month_name, month_num in self.MONTHS.items():
-            if month_name in text_lower:
-                return month_num
+        # Затем ищем самое длинное вхождение в строке (один проход автомата)
+        match = self.tables.MONTHS_MATCHER.longest(text_lower)
+        if match:
+            return match.value
         
         return None
     
@@ -289,7 +393,7 @@ class EnhancedDateTimeParser:
         minsk_tz = pytz.timezone('Europe/Minsk')
         current_date = datetime.now(minsk_tz)
         
-        for relative_word, days_offset in self.RELATIVE_DATES.items():
+        for relative_word, days_offset in self.tables.RELATIVE_DATES.items():
             if relative_word in text_lower:
                 if days_offset == 'next_week':
                     # Следующая неделя - понедельник
@@ -304,8 +408,8 @@ class EnhancedDateTimeParser:
     
     def extract_date_from_patterns(self, text: str) -> Optional[datetime]:
         """Извлечение даты из числовых паттернов"""
-        for pattern in self.DATE_PATTERNS:
-            matches = list(re.finditer(pattern, text))
+        for pattern in self.tables.DATE_PATTERNS:
+            matches = list(pattern.finditer(text))
             for match in matches:
                 try:
                     groups = match.groups()
@@ -337,28 +441,31 @@ class EnhancedDateTimeParser:
     
     def extract_date_with_month_name(self, text: str) -> Optional[datetime]:
         """Извлечение даты с текстовым месяцем"""
-        # Паттерн: DD месяц [YYYY]
-        for month_name, month_num in self.MONTHS.items():
-            pattern = rf'(\d{{1,2}})\s*{month_name}\w*\s*(\d{{4}})?'
-            match = re.search(pattern, text, re.IGNORECASE)
-            
-            if match:
-                try:
-                    day = int(match.group(1))
-                    year = int(match.group(2)) if match.group(2) else datetime.now().year
-                    
-                    if 1 <= day <= 31:
-                        return datetime(year, month_num, day)
-                except (ValueError, AttributeError):
-                    continue
+        # Паттерн: DD месяц [YYYY]. Вхождения месяцев находит автомат, затем
+        # проверяем число перед месяцем и год после; приоритет у самых длинных
+        text_lower = text.lower()
+        hits = sorted(self.tables.MONTHS_MATCHER.find_all(text_lower), key=lambda hit: (-hit.length, hit.start))
+        
+        for hit in hits:
+            day_match = self.tables.DAY_BEFORE_MONTH_PATTERN.search(text_lower, 0, hit.start)
+            if not day_match:
+                continue
+            year_match = self.tables.YEAR_AFTER_MONTH_PATTERN.match(text_lower, hit.end)
+            try:
+                day = int(day_match.group(1))
+                year = int(year_match.group(1)) if year_match and year_match.group(1) else datetime.now().year
+                
+                if 1 <= day <= 31:
+                    return datetime(year, hit.value, day)
+            except (ValueError, AttributeError):
+                continue
         
         return None
     
     def extract_time(self, text: str) -> Optional[Tuple[int, int]]:
         """Извлечение времени из текста"""
         # Сначала ищем время с разделителем : (двоеточие - это точно время)
-        time_pattern_colon = r'(\d{1,2}):(\d{2})'
-        matches = list(re.finditer(time_pattern_colon, text))
+        matches = list(self.tables.TIME_COLON_PATTERN.finditer(text))
         
         for match in matches:
             try:
@@ -371,8 +478,7 @@ class EnhancedDateTimeParser:
                 continue
         
         # Ищем время с точкой или тире, НО проверяем контекст более тщательно
-        time_pattern_dot_dash = r'(\d{1,2})[\.\-](\d{2})'
-        matches = list(re.finditer(time_pattern_dot_dash, text))
+        matches = list(self.tables.TIME_DOT_DASH_PATTERN.finditer(text))
         
         for match in matches:
             try:
@@ -388,7 +494,7 @@ class EnhancedDateTimeParser:
                     if hour <= 31 and minute <= 12:
                         # Это скорее дата, чем время - пропускаем
                         # Исключение: если есть явные временные маркеры
-                        if not re.search(r'(?:в|к|время|час|ч|time|at)', context_before + context_after, re.IGNORECASE):
+                        if not self.tables.TIME_CONTEXT_PATTERN.search(context_before + context_after):
                             continue
                     
                     # Если минута > 31, это точно не дата
@@ -403,8 +509,7 @@ class EnhancedDateTimeParser:
                 continue
         
         # Ищем время с ключевыми словами (час, ч, h)
-        time_pattern_with_keyword = r'(\d{1,2})\s*(?:ч|час|h|час\.|h\.)'
-        matches = list(re.finditer(time_pattern_with_keyword, text))
+        matches = list(self.tables.TIME_KEYWORD_PATTERN.finditer(text))
         for match in matches:
             try:
                 hour = int(match.group(1))
@@ -415,8 +520,7 @@ class EnhancedDateTimeParser:
         
         # Ищем просто число (час) после дня недели или предлога "в"
         # Паттерн 1: день недели + число
-        weekday_hour_pattern = r'(?:пн|вт|ср|чт|пт|сб|вс|понедельник|вторник|среда|четверг|пятница|суббота|воскресенье|monday|tuesday|wednesday|thursday|friday|saturday|sunday|mon|tue|wed|thu|fri|sat|sun|gy|ds|ch|xn|gn)\s+(?:в\s+)?(\d{1,2})(?:\s|$)'
-        matches = list(re.finditer(weekday_hour_pattern, text, re.IGNORECASE))
+        matches = list(self.tables.WEEKDAY_HOUR_PATTERN.finditer(text))
         for match in matches:
             try:
                 hour = int(match.group(1))
@@ -426,8 +530,7 @@ class EnhancedDateTimeParser:
                 continue
         
         # Паттерн 2: просто "в ЧЧ" или "к ЧЧ" (также учитываем "d" после исправления раскладки)
-        preposition_hour_pattern = r'(?:в|к|после|до|около|примерно|d)\s+(\d{1,2})(?:\s|$)'
-        matches = list(re.finditer(preposition_hour_pattern, text, re.IGNORECASE))
+        matches = list(self.tables.PREPOSITION_HOUR_PATTERN.finditer(text))
         for match in matches:
             try:
                 hour = int(match.group(1))
@@ -437,8 +540,7 @@ class EnhancedDateTimeParser:
                 continue
         
         # Паттерн 3: просто число в конце строки (если нет других чисел)
-        end_number_pattern = r'\s(\d{1,2})$'
-        match = re.search(end_number_pattern, text)
+        match = self.tables.END_NUMBER_PATTERN.search(text)
         if match:
             try:
                 hour = int(match.group(1))
@@ -523,38 +625,16 @@ class EnhancedDateTimeParser:
             slot_start = dt
             slot_end = dt + timedelta(minutes=45)
             
-            for booking in existing_bookings:
-                try:
-                    # Получаем время начала и конца события
-                    event_start_str = booking.get('start', {}).get('dateTime') or booking.get('start', {}).get('date')
-                    event_end_str = booking.get('end', {}).get('dateTime') or booking.get('end', {}).get('date')
-                    
-                    if not event_start_str or not event_end_str:
-                        continue
-                    
-                    # Парсим даты событий
-                    from dateutil import parser as date_parser
-                    event_start = date_parser.parse(event_start_str)
-                    event_end = date_parser.parse(event_end_str)
-                    
-                    # Проверяем пересечение
-                    # Слот занят, если:
-                    # 1. Начало слота находится внутри события
-                    # 2. Конец слота находится внутри события
-                    # 3. Слот полностью перекрывает событие
-                    if (event_start <= slot_start < event_end) or \
-                       (event_start < slot_end <= event_end) or \
-                       (slot_start <= event_start and slot_end >= event_end):
-                        print(f"⚠️ [SLOT_CHECK] Слот {dt.strftime('%d.%m %H:%M')} занят событием: {booking.get('summary', 'Без названия')}")
-                        return {
-                            'summary': booking.get('summary', 'Без названия'),
-                            'start': event_start.strftime('%d.%m %H:%M'),
-                            'end': event_end.strftime('%d.%m %H:%M')
-                        }
-                
-                except Exception as e:
-                    print(f"⚠️ [SLOT_CHECK] Ошибка проверки события: {e}")
-                    continue
+            busy_index = BusyIntervalIndex.ensure(existing_bookings, self.timezone.zone)
+            conflict = busy_index.first_conflict(slot_start, slot_end)
+            if conflict:
+                event_start, event_end, booking = conflict
+                print(f"⚠️ [SLOT_CHECK] Слот {dt.strftime('%d.%m %H:%M')} занят событием: {booking.get('summary', 'Без названия')}")
+                return {
+                    'summary': booking.get('summary', 'Без названия'),
+                    'start': event_start.strftime('%d.%m %H:%M'),
+                    'end': event_end.strftime('%d.%m %H:%M')
+                }
             
             print(f"✅ [SLOT_CHECK] Слот {dt.strftime('%d.%m %H:%M')} свободен")
             return None
@@ -653,6 +733,10 @@ class EnhancedDateTimeParser:
                 'parsed_datetime': None
             }
         
+        # Индекс занятости строится один раз и переиспользуется для всех проверок слотов
+        if existing_bookings:
+            existing_bookings = BusyIntervalIndex.ensure(existing_bookings, self.timezone.zone)
+        
         # Нормализация текста
         normalized_text, normalization_corrections = self.normalize_text(text)
         all_corrections = normalization_corrections.copy()
@@ -0,0 +1,192 @@
+import contextlib
+import io
+import re
+import time
+import tracemalloc
+
+import pytz
+from django.core.management.base import BaseCommand
+
+from apps.google_oauth.enhanced_datetime_parser import EnhancedDateTimeParser, _build_parser_tables
+
+
+# Типичные ответы кандидатов рекрутеру (опечатки, неправильная раскладка, транслит)
+DEFAULT_CORPUS = [
+    'Добрый день! Мне удобно во вторник в 14:00',
+    'Здравствуйте, давайте в среду после обеда, часа в 3',
+    'могу 15 октября в 11:30, ссылку пришлите пожалуйста',
+    'Привет) завтра в 16 ок?',
+    'ds d 15',
+    'Lj,hsq ltym! Vjue d gznybwe d 12',
+    'в четверк с утра свободна',
+    'Можно на следующей неделе в понедельнк в 12-00?',
+    'Hi, Thursday 3pm works for me',
+    '25 ноября 2025 в 10:15 подойдет',
+    'к сожалению в пт не получится, давайте 3 декабря',
+    'послезавтра около 13',
+    'удобно 12.11 в 17:45, спасибо за приглашение',
+    'Добрый вечер. Смогу только в субботу, либо в пн с 11 до 13',
+    'sentyabr 18, 14:00',
+    'Доброе утро! Собеседование в сред 10 сентебря в 15:30 подходит',
+]
+
+
+class _LegacyDateTimeParser(EnhancedDateTimeParser):
+    """Прежний конструктор: каждый экземпляр заново строит словари, раскладку и паттерны"""
+
+    def __init__(self, user=None, timezone_name: str = 'Europe/Minsk'):
+        self.user = user
+        self.timezone = pytz.timezone(timezone_name)
+        self.BUSINESS_HOURS = self._get_user_business_hours()
+        self.tables = _build_parser_tables()
+
+
+class _NullWriter(io.TextIOBase):
+    """Отбрасывает вывод парсера, не накапливая его в памяти (иначе он попадает в замер пика)"""
+
+    def write(self, text):
+        return len(text)
+
+
+def _legacy_extract(dictionary, text):
+    """Прежний алгоритм: точное слово, затем перебор словаря подстрокой"""
+    text_lower = text.lower()
+    for word in text_lower.split():
+        clean_word = re.sub(r'[^\w]', '', word)
+        if clean_word in dictionary:
+            return dictionary[clean_word]
+    for name, value in dictionary.items():
+        if name in text_lower:
+            return value
+    return None
+
+
+def _legacy_month_name_date(months, text):
+    """Прежний алгоритм: отдельный regex на каждый вариант месяца"""
+    for month_name, month_num in months.items():
+        match = re.search(rf'(\d{{1,2}})\s*{month_name}\w*\s*(\d{{4}})?', text, re.IGNORECASE)
+        if match and 1 <= int(match.group(1)) <= 31:
+            return month_num
+    return None
+
+
+def _legacy_keyboard(mapping, word):
+    corrected_word = ''
+    for char in word:
+        if char.lower() in mapping:
+            corrected_char = mapping[char.lower()]
+            if char.isupper():
+                corrected_char = corrected_char.upper()
+            corrected_word += corrected_char
+        else:
+            corrected_word += char
+    return corrected_word
+
+
+class Command(BaseCommand):
+    help = 'Микробенчмарк поиска месяцев и дней недели в EnhancedDateTimeParser (до/после)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', type=str, help='Файл с сообщениями кандидатов (по одному на строку)')
+        parser.add_argument('--repeat', type=int, default=20, help='Количество проходов по корпусу')
+
+    def _measure(self, func, corpus, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for text in corpus:
+                func(text)
+        elapsed = time.perf_counter() - started
+        return elapsed * 1_000_000 / (repeat * len(corpus))
+
+    def _peak_allocation(self, func, runs=5):
+        """Пиковый объем памяти, выделенной за вызов (КБ, медиана по нескольким запускам)"""
+        func()  # Прогрев: ленивые импорты и кэши не входят в замер
+        peaks = []
+        for _ in range(runs):
+            tracemalloc.start()
+            try:
+                func()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            peaks.append(peak / 1024)
+        return sorted(peaks)[len(peaks) // 2]
+
+    def _report_construction(self, corpus, repeat):
+        """Стоимость конструктора и разбора сообщений новым экземпляром парсера: до и после"""
+        results = {}
+        with contextlib.redirect_stdout(_NullWriter()):
+            EnhancedDateTimeParser()  # Первичная загрузка словарей не входит в замер
+            for label, parser_class in (('до', _LegacyDateTimeParser), ('после', EnhancedDateTimeParser)):
+                def parse_with_new_parser():
+                    parser = parser_class()
+                    for text in corpus:
+                        parser.parse_datetime(text)
+
+                results[label] = (
+                    self._measure(lambda _: parser_class(), [None], repeat * 50),
+                    self._peak_allocation(parser_class),
+                    self._measure(lambda _: parse_with_new_parser(), [None], repeat) / len(corpus),
+                    self._peak_allocation(parse_with_new_parser),
+                )
+
+        self.stdout.write(self.style.SUCCESS("📊 Конструктор EnhancedDateTimeParser и parse_datetime с новым экземпляром:"))
+        for label, (constructor_us, constructor_kb, parse_us, parse_kb) in results.items():
+            self.stdout.write(
+                f"  {label:<6} конструктор {constructor_us:8.1f} мкс, пик {constructor_kb:6.1f} КБ   "
+                f"parse_datetime {parse_us:7.1f} мкс/сообщение, пик на корпус {parse_kb:6.1f} КБ"
+            )
+
+    def _report(self, title, before, after):
+        speedup = before / after if after else float('inf')
+        self.stdout.write(f"  {title:<28} до: {before:10.1f} мкс   после: {after:8.1f} мкс   x{speedup:.0f}")
+
+    def handle(self, *args, **options):
+        corpus = DEFAULT_CORPUS
+        if options['file']:
+            with open(options['file'], encoding='utf-8') as corpus_file:
+                corpus = [line.strip() for line in corpus_file if line.strip()]
+
+        repeat = options['repeat']
+        self._report_construction(corpus, repeat)
+
+        with contextlib.redirect_stdout(_NullWriter()):
+            parser = EnhancedDateTimeParser()
+            normalized = [parser.normalize_text(text)[0] for text in corpus]
+
+        self.stdout.write(self.style.SUCCESS(
+            f"📊 Корпус: {len(corpus)} сообщений, словари: {len(parser.tables.MONTHS)} месяцев, "
+            f"{len(parser.tables.WEEKDAYS)} дней недели, время на одно сообщение:"
+        ))
+
+        self._report(
+            'extract_month',
+            self._measure(lambda text: _legacy_extract(parser.tables.MONTHS, text), normalized, repeat),
+            self._measure(parser.extract_month, normalized, repeat),
+        )
+        self._report(
+            'extract_weekday',
+            self._measure(lambda text: _legacy_extract(parser.tables.WEEKDAYS, text), normalized, repeat),
+            self._measure(parser.extract_weekday, normalized, repeat),
+        )
+        self._report(
+            'extract_date_with_month_name',
+            self._measure(lambda text: _legacy_month_name_date(parser.tables.MONTHS, text), normalized, max(1, repeat // 10)),
+            self._measure(parser.extract_date_with_month_name, normalized, repeat),
+        )
+        words = [word for text in corpus for word in text.split()]
+        self._report(
+            'раскладка (на слово)',
+            self._measure(lambda word: _legacy_keyboard(parser.tables.KEYBOARD_MAPPING, word), words, repeat),
+            self._measure(lambda word: word.translate(parser.tables.KEYBOARD_TRANSLATION), words, repeat),
+        )
+
+        mismatches = [
+            text for text in normalized
+            if (_legacy_extract(parser.tables.MONTHS, text) is None) != (parser.extract_month(text) is None)
+            or (_legacy_extract(parser.tables.WEEKDAYS, text) is None) != (parser.extract_weekday(text) is None)
+        ]
+        if mismatches:
+            self.stdout.write(self.style.WARNING(f"⚠️ Найдено/не найдено различается для {len(mismatches)} сообщений:"))
+            for text in mismatches:
+                self.stdout.write(f"  - {text}")
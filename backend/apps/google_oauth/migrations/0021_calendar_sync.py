@@ -0,0 +1,61 @@
+# Generated by Django 4.2.16 on 2026-10-17 00:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('google_oauth', '0020_auto_20251015_0133'),
+    ]
+
+    operations = [
+        # Колонка уже удалена RunSQL в 0020, синхронизируем только состояние миграций
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveField(
+                    model_name='invite',
+                    name='multiple_slots_data',
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SyncedCalendarEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('calendar_id', models.CharField(default='primary', max_length=255, verbose_name='ID календаря')),
+                ('event_id', models.CharField(max_length=1024, verbose_name='ID события')),
+                ('start_time', models.DateTimeField(blank=True, null=True, verbose_name='Начало')),
+                ('end_time', models.DateTimeField(blank=True, null=True, verbose_name='Окончание')),
+                ('data', models.JSONField(default=dict, verbose_name='Данные события')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='synced_calendar_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Событие календаря',
+                'verbose_name_plural': 'События календаря',
+                'indexes': [models.Index(fields=['user', 'calendar_id', 'end_time', 'start_time'], name='google_oaut_user_id_0797bb_idx')],
+                'unique_together': {('user', 'calendar_id', 'event_id')},
+            },
+        ),
+        migrations.CreateModel(
+            name='CalendarSyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('calendar_id', models.CharField(default='primary', max_length=255, verbose_name='ID календаря')),
+                ('sync_token', models.TextField(blank=True, verbose_name='Sync token')),
+                ('last_full_sync_at', models.DateTimeField(blank=True, null=True, verbose_name='Последняя полная синхронизация')),
+                ('last_sync_at', models.DateTimeField(blank=True, null=True, verbose_name='Последняя синхронизация')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='calendar_sync_states', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Состояние синхронизации календаря',
+                'verbose_name_plural': 'Состояния синхронизации календарей',
+                'unique_together': {('user', 'calendar_id')},
+            },
+        ),
+    ]
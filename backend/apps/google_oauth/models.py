@@ -5,6 +5,8 @@ from django.utils.translation import gettext_lazy as _
 from datetime import timedelta
 import json
 
+from apps.gemini.logic.response_cache import gemini_cache_site
+
 User = get_user_model()
 
 
@@ -93,7 +95,50 @@ class GoogleOAuthAccount(models.Model):
 
 
 # Модели для хранения API данных удалены - теперь данные кэшируются в Redis
-# GoogleCalendarEvent, GoogleDriveFile, GoogleSheet больше не нужны
+# GoogleDriveFile, GoogleSheet больше не нужны. События календаря хранятся локально
+# и обновляются инкрементально по syncToken (см. calendar_sync.py)
+
+
+class CalendarSyncState(models.Model):
+    """Состояние инкрементальной синхронизации календаря (nextSyncToken)"""
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='calendar_sync_states')
+    calendar_id = models.CharField(max_length=255, default='primary', verbose_name="ID календаря")
+    sync_token = models.TextField(blank=True, verbose_name="Sync token")
+    last_full_sync_at = models.DateTimeField(blank=True, null=True, verbose_name="Последняя полная синхронизация")
+    last_sync_at = models.DateTimeField(blank=True, null=True, verbose_name="Последняя синхронизация")
+    last_error = models.TextField(blank=True, verbose_name="Последняя ошибка")
+    
+    class Meta:
+        verbose_name = "Состояние синхронизации календаря"
+        verbose_name_plural = "Состояния синхронизации календарей"
+        unique_together = [['user', 'calendar_id']]
+    
+    def __str__(self):
+        return f"{self.user.username}: {self.calendar_id}"
+
+
+class SyncedCalendarEvent(models.Model):
+    """Локальная копия события Google Calendar"""
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='synced_calendar_events')
+    calendar_id = models.CharField(max_length=255, default='primary', verbose_name="ID календаря")
+    event_id = models.CharField(max_length=1024, verbose_name="ID события")
+    start_time = models.DateTimeField(blank=True, null=True, verbose_name="Начало")
+    end_time = models.DateTimeField(blank=True, null=True, verbose_name="Окончание")
+    data = models.JSONField(default=dict, verbose_name="Данные события")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
+    
+    class Meta:
+        verbose_name = "Событие календаря"
+        verbose_name_plural = "События календаря"
+        unique_together = [['user', 'calendar_id', 'event_id']]
+        indexes = [
+            models.Index(fields=['user', 'calendar_id', 'end_time', 'start_time']),
+        ]
+    
+    def __str__(self):
+        return f"{self.data.get('summary', self.event_id)} ({self.start_time})"
 
 
 class SyncSettings(models.Model):
@@ -438,9 +483,8 @@ class Invite(models.Model):
             
             # Получаем account_id из настроек пользователя
             try:
-                from apps.huntflow.services import HuntflowService
-                service = HuntflowService(self.user)
-                accounts = service.get_accounts()
+                from apps.huntflow.accounts_cache import HuntflowAccountsCache
+                accounts = HuntflowAccountsCache.get_accounts(self.user)
                 if accounts and 'items' in accounts and len(accounts['items']) > 0:
                     account_id = accounts['items'][0]['id']
                     print(f"🔍 GET_CANDIDATE_INFO: Автоматически получен account_id: {account_id}")
@@ -1769,6 +1813,7 @@ class Invite(models.Model):
             print(f"❌ Ошибка генерации текста приглашения: {e}")
             return f"Ошибка генерации приглашения: {str(e)}"
     
+    @gemini_cache_site('invite_time')
     def analyze_time_with_gemini(self):
         """
         Анализирует время встречи с помощью Gemini AI на основе исходного текста и слотов календаря
@@ -2306,6 +2351,10 @@ class Invite(models.Model):
         # Начинаем с завтрашнего дня (исключаем сегодня)
         start_date = now + timedelta(days=1)
         
+        # Индекс занятости строится один раз на весь набор событий
+        from apps.google_oauth.busy_index import BusyIntervalIndex
+        busy_index = BusyIntervalIndex.ensure(events_data)
+        
         # Генерируем слоты на 2 недели (14 дней) начиная с завтрашнего дня
         for i in range(14):
             current_date = start_date + timedelta(days=i)
@@ -2318,7 +2367,7 @@ class Invite(models.Model):
             date_str = current_date.strftime('%d.%m.%Y')
             
             # Вычисляем доступные слоты для этого дня
-            available_slots = self._calculate_available_slots_for_day(events_data, current_date)
+            available_slots = self._calculate_available_slots_for_day(busy_index, current_date)
             
             if available_slots and available_slots != 'Нет свободных слотов':
                 time_slots[date_str] = f"{weekday}: {available_slots}"
@@ -2326,9 +2375,12 @@ class Invite(models.Model):
         return time_slots
     
     def _calculate_available_slots_for_day(self, events_data, date):
-        """Вычисляет доступные слоты для дня используя логику из calendar_events.html"""
-        from datetime import datetime
-        import pytz
+        """
+        Вычисляет доступные слоты для дня используя логику из calendar_events.html
+        
+        events_data - список событий или готовый BusyIntervalIndex
+        """
+        from apps.google_oauth.busy_index import BusyIntervalIndex
         
         # Рабочие часы из настроек пользователя
         if hasattr(self.user, 'interview_start_time') and hasattr(self.user, 'interview_end_time'):
@@ -2354,60 +2406,15 @@ class Invite(models.Model):
             work_start_hour = 11
             work_end_hour = 18
         
-        # Создаем массив слотов по часам
-        slots = []
-        for hour in range(work_start_hour, work_end_hour):
-            slots.append({
-                'hour': hour,
-                'is_occupied': False
-            })
-        
-        # Получаем события на этот день
-        day_events = [event for event in events_data if self._is_event_on_date(event, date)]
+        busy_index = BusyIntervalIndex.ensure(events_data)
+        day_events = busy_index.events_on(date)
         print(f"🤖 SLOTS_DEBUG: Дата {date.strftime('%d.%m.%Y')}: найдено {len(day_events)} событий")
-        for event in day_events:
-            print(f"🤖 SLOTS_DEBUG: Событие: {event.get('summary', 'Без названия')} с {event.get('start', {}).get('dateTime', 'Нет времени')}")
         
-        # Отмечаем занятые слоты
-        for event in day_events:
-            if event.get('start', {}).get('date'):  # Событие на весь день
-                continue
-            
-            try:
-                start_data = event.get('start', {})
-                end_data = event.get('end', {})
-                
-                if 'dateTime' in start_data and 'dateTime' in end_data:
-                    start_time_str = start_data['dateTime']
-                    end_time_str = end_data['dateTime']
-                    
-                    # События уже в правильном часовом поясе (+03:00), не нужно конвертировать
-                    event_start = datetime.fromisoformat(start_time_str)
-                    event_end = datetime.fromisoformat(end_time_str)
-                    
-                    # Если событие в UTC (заканчивается на Z), конвертируем в Minsk
-                    if start_time_str.endswith('Z'):
-                        event_start = event_start.replace(tzinfo=pytz.UTC).astimezone(pytz.timezone('Europe/Minsk'))
-                    if end_time_str.endswith('Z'):
-                        event_end = event_end.replace(tzinfo=pytz.UTC).astimezone(pytz.timezone('Europe/Minsk'))
-                    
-                    print(f"🤖 SLOTS_DEBUG: Обрабатываем событие {event.get('summary', 'Без названия')} с {event_start.time()} до {event_end.time()}")
-                    
-                    # Отмечаем занятые слоты
-                    for slot in slots:
-                        slot_start = datetime(date.year, date.month, date.day, slot['hour'], 0, 0)
-                        slot_end = datetime(date.year, date.month, date.day, slot['hour'] + 1, 0, 0)
-                        
-                        # Проверяем пересечение (минимум 30 минут)
-                        overlap_start = max(slot_start, event_start.replace(tzinfo=None))
-                        overlap_end = min(slot_end, event_end.replace(tzinfo=None))
-                        overlap_duration = (overlap_end - overlap_start).total_seconds()
-                        
-                        if overlap_duration >= 30 * 60:  # 30 минут
-                            slot['is_occupied'] = True
-                            print(f"🤖 SLOTS_DEBUG: Слот {slot['hour']}:00-{slot['hour']+1}:00 занят событием {event.get('summary', 'Без названия')}")
-            except Exception as e:
-                continue
+        # Отмечаем занятые слоты (пересечение с событием минимум 30 минут)
+        slots = [
+            {'hour': hour, 'is_occupied': is_occupied}
+            for hour, is_occupied in busy_index.free_hours(date, work_start_hour, work_end_hour, min_overlap_minutes=30)
+        ]
         
         # Формируем строку доступных слотов (как в JavaScript коде)
         available_ranges = []
@@ -2442,34 +2449,6 @@ class Invite(models.Model):
             # Если нет событий календаря, показываем все рабочие часы
             return f"{work_start_hour}-{work_end_hour - 1}"
     
-    def _is_event_on_date(self, event, target_date):
-        """Проверяет, происходит ли событие в указанную дату"""
-        from datetime import datetime
-        import pytz
-        
-        try:
-            start_data = event.get('start', {})
-            if 'dateTime' in start_data:
-                start_time_str = start_data['dateTime']
-                
-                if start_time_str.endswith('Z'):
-                    start_time_str = start_time_str[:-1] + '+00:00'
-                
-                event_start = datetime.fromisoformat(start_time_str)
-                if event_start.tzinfo is None:
-                    # Если нет информации о часовом поясе, считаем что это Minsk
-                    event_start = pytz.timezone('Europe/Minsk').localize(event_start)
-                else:
-                    event_start = event_start.astimezone(pytz.timezone('Europe/Minsk'))
-                
-                return event_start.date() == target_date.date()
-            elif 'date' in start_data:
-                event_date = datetime.fromisoformat(start_data['date']).date()
-                return event_date == target_date.date()
-        except Exception as e:
-            pass
-        return False
-    
 
 
 class ScorecardPathSettings(models.Model):
@@ -3161,6 +3140,7 @@ class HRScreening(models.Model):
             print(f"❌ HR_SCREENING_GET_FIELDS_SCHEMA: Ошибка при получении схемы полей: {str(e)}")
             return False, f"Ошибка при получении схемы полей: {str(e)}"
     
+    @gemini_cache_site('hr_screening')
     def analyze_with_gemini(self):
         """Анализирует данные с помощью Gemini AI"""
         try:
@@ -3182,26 +3162,7 @@ class HRScreening(models.Model):
             success, response_text, metadata = gemini_service.generate_content(prompt)
             
             if success and response_text:
-                # Очищаем ответ от markdown блоков
-                cleaned_response = response_text.strip()
-                if cleaned_response.startswith('```json'):
-                    cleaned_response = cleaned_response[7:]  # Убираем ```json
-                if cleaned_response.endswith('```'):
-                    cleaned_response = cleaned_response[:-3]  # Убираем ```
-                cleaned_response = cleaned_response.strip()
-                
-                self.gemini_analysis = cleaned_response
-                
-                # Извлекаем зарплату и определяем грейд
-                print(f"🔍 HR_SCREENING_ANALYSIS: Вызываем _extract_salary_and_determine_grade")
-                try:
-                    self._extract_salary_and_determine_grade(cleaned_response)
-                    print(f"🔍 HR_SCREENING_ANALYSIS: Метод _extract_salary_and_determine_grade завершен успешно")
-                except Exception as e:
-                    print(f"❌ HR_SCREENING_ANALYSIS: Ошибка в _extract_salary_and_determine_grade: {e}")
-                    import traceback
-                    traceback.print_exc()
-                
+                self._apply_gemini_analysis(response_text)
                 return True, "Анализ завершен успешно"
             else:
                 return False, f"Ошибка Gemini API: {metadata.get('error', 'Неизвестная ошибка')}"
@@ -3209,6 +3170,64 @@ class HRScreening(models.Model):
         except Exception as e:
             return False, f"Ошибка при анализе с Gemini: {str(e)}"
     
+    def stream_analysis_with_gemini(self):
+        """
+        Потоковый анализ с помощью Gemini AI
+        
+        Генератор событий GeminiService.stream_content: фрагменты ответа отдаются
+        по мере генерации, после завершения потока ответ обрабатывается так же,
+        как в analyze_with_gemini (грейд, сохранение), и отдается событие done.
+        """
+        from apps.gemini.logic.services import GeminiService
+        
+        if not self.user.gemini_api_key:
+            yield {'type': 'error', 'error': "У пользователя не настроен API ключ Gemini"}
+            return
+        
+        # Ответ уже начат - ошибка передается клиенту событием error
+        try:
+            prompt_success, prompt = self._prepare_gemini_prompt()
+            if not prompt_success:
+                yield {'type': 'error', 'error': prompt}
+                return
+            
+            for event in GeminiService(self.user.gemini_api_key).stream_content(prompt):
+                if event['type'] != 'done':
+                    yield event
+                    continue
+                
+                self._apply_gemini_analysis(event['text'])
+                yield {
+                    'type': 'done',
+                    'analysis': self.gemini_analysis,
+                    'determined_grade': self.determined_grade,
+                    'metadata': event['metadata']
+                }
+        except Exception as e:
+            yield {'type': 'error', 'error': f'Ошибка анализа: {str(e)}'}
+    
+    def _apply_gemini_analysis(self, response_text):
+        """Сохраняет ответ Gemini без markdown блоков, извлекает зарплату и определяет грейд"""
+        # Очищаем ответ от markdown блоков
+        cleaned_response = response_text.strip()
+        if cleaned_response.startswith('```json'):
+            cleaned_response = cleaned_response[7:]  # Убираем ```json
+        if cleaned_response.endswith('```'):
+            cleaned_response = cleaned_response[:-3]  # Убираем ```
+        cleaned_response = cleaned_response.strip()
+        
+        self.gemini_analysis = cleaned_response
+        
+        # Извлекаем зарплату и определяем грейд
+        print(f"🔍 HR_SCREENING_ANALYSIS: Вызываем _extract_salary_and_determine_grade")
+        try:
+            self._extract_salary_and_determine_grade(cleaned_response)
+            print(f"🔍 HR_SCREENING_ANALYSIS: Метод _extract_salary_and_determine_grade завершен успешно")
+        except Exception as e:
+            print(f"❌ HR_SCREENING_ANALYSIS: Ошибка в _extract_salary_and_determine_grade: {e}")
+            import traceback
+            traceback.print_exc()
+    
     def _get_user_account_id(self):
         """Получает реальный account_id пользователя из Huntflow"""
         try:
@@ -3416,18 +3435,13 @@ class HRScreening(models.Model):
             return amount
         
         try:
-            from apps.finance.models import CurrencyRate
+            from logic.finance.rate_snapshot import get_rate_snapshot
             
-            # Получаем последний курс валюты
-            rate = CurrencyRate.objects.filter(
-                code=currency
-            ).order_by('-fetched_at').first()
-            
-            if rate:
-                return amount / rate.rate
-            else:
-                print(f"⚠️ Курс валюты {currency} не найден, используем 1:1")
-                return amount
+            converted = get_rate_snapshot().convert(amount, currency, 'USD')
+            if converted is not None:
+                return converted
+            print(f"⚠️ Курс валюты {currency} не найден, используем 1:1")
+            return amount
                 
         except Exception as e:
             print(f"❌ Ошибка при конвертации валюты: {e}")
@@ -3482,11 +3496,12 @@ class HRScreening(models.Model):
         """Получает ID уровня из Huntflow по названию грейда"""
         try:
             from apps.huntflow.services import HuntflowService
+            from apps.huntflow.accounts_cache import HuntflowAccountsCache
             
             huntflow_service = HuntflowService(self.user)
             
             # Получаем схему полей кандидата
-            accounts = huntflow_service.get_accounts()
+            accounts = HuntflowAccountsCache.get_accounts(self.user)
             if not accounts or 'items' not in accounts or not accounts['items']:
                 print("❌ Не удалось получить список аккаунтов")
                 return None
@@ -235,6 +235,15 @@ class GoogleOAuthService:
 class GoogleCalendarService:
     """Сервис для работы с Google Calendar"""
     
+    # Поля событий, которые используются в приложении (проекция для events.list)
+    EVENT_FIELDS = (
+        'id,status,summary,description,location,start,end,attendees,organizer,creator,'
+        'conferenceData,hangoutLink,htmlLink,created,updated,transparency,eventType,'
+        'recurringEventId,visibility'
+    )
+    EVENT_LIST_FIELDS = f'nextPageToken,items({EVENT_FIELDS})'
+    EVENTS_PAGE_SIZE = 250  # Максимум, который Google Calendar отдает за одну страницу
+    
     def __init__(self, oauth_service):
         self.oauth_service = oauth_service
         self.service = None
@@ -250,6 +259,11 @@ class GoogleCalendarService:
         
         return self.service
     
+    def _get_sync_service(self):
+        """Сервис инкрементальной синхронизации календаря"""
+        from .calendar_sync import CalendarSyncService
+        return CalendarSyncService(self.oauth_service.user, calendar_service=self)
+    
     def get_calendars(self):
         """Получить список календарей"""
         service = self._get_service()
@@ -307,7 +321,14 @@ class GoogleCalendarService:
     
     def get_events(self, calendar_id='primary', max_results=100, days_ahead=100):
         """Получить события календаря (ближайшие события на указанное количество дней вперед)"""
-        # Сначала проверяем кэш
+        # Если календарь синхронизируется в фоне, читаем из локального хранилища
+        sync_service = self._get_sync_service()
+        if sync_service.is_fresh(calendar_id, days_ahead):
+            events = sync_service.get_events(calendar_id, max_results=max_results, days_ahead=days_ahead)
+            print(f"📦 Получены события календаря из локального хранилища: {len(events)} событий")
+            return events
+        
+        # Затем проверяем кэш
         user_id = self.oauth_service.user.id
         cached_events = GoogleAPICache.get_calendar_events(user_id, calendar_id, days_ahead)
         
@@ -330,29 +351,26 @@ class GoogleCalendarService:
             # Время окончания - через указанное количество дней
             time_max = (now + timedelta(days=days_ahead)).isoformat() + 'Z'
             
-            events_result = service.events().list(
-                calendarId=calendar_id,
-                timeMin=time_min,
-                timeMax=time_max,
-                maxResults=max_results,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-            
-            # Получаем полную информацию о каждом событии
+            # Один постраничный list с проекцией полей вместо отдельного get на каждое событие:
+            # list уже возвращает полные ресурсы событий, нужно лишь не отрезать используемые поля
             events = []
-            for event in events_result.get('items', []):
-                try:
-                    # Запрашиваем полную информацию о событии
-                    full_event = service.events().get(
-                        calendarId=calendar_id,
-                        eventId=event['id']
-                    ).execute()
-                    events.append(full_event)
-                except Exception as e:
-                    print(f"Ошибка получения полной информации о событии {event.get('id', 'unknown')}: {e}")
-                    # Если не удалось получить полную информацию, используем базовую
-                    events.append(event)
+            page_token = None
+            while len(events) < max_results:
+                events_result = service.events().list(
+                    calendarId=calendar_id,
+                    timeMin=time_min,
+                    timeMax=time_max,
+                    maxResults=min(max_results - len(events), self.EVENTS_PAGE_SIZE),
+                    singleEvents=True,
+                    orderBy='startTime',
+                    fields=self.EVENT_LIST_FIELDS,
+                    pageToken=page_token
+                ).execute()
+                
+                events.extend(events_result.get('items', []))
+                page_token = events_result.get('nextPageToken')
+                if not page_token:
+                    break
             
             # Сохраняем в кэш
             GoogleAPICache.set_calendar_events(user_id, events, calendar_id, days_ahead)
@@ -465,6 +483,8 @@ class GoogleCalendarService:
             print(f"⏱️ Длительность: {duration_minutes} минут")
             print(f"🔗 Ссылка на событие: {created_event.get('htmlLink', '')}")
             
+            self._get_sync_service().store_event(created_event, calendar_id)
+            
             return created_event
             
         except HttpError as e:
@@ -502,11 +522,13 @@ class GoogleCalendarService:
             ).execute()
             
             print(f"✅ Событие успешно удалено: {event_id}")
+            self._get_sync_service().remove_event(event_id, calendar_id)
             return True
             
         except HttpError as e:
             if e.resp.status == 410:  # Событие уже удалено
                 print(f"⚠️ Событие уже удалено: {event_id}")
+                self._get_sync_service().remove_event(event_id, calendar_id)
                 return True
             else:
                 print(f"❌ Ошибка удаления события: {e}")
@@ -519,10 +541,11 @@ class GoogleCalendarService:
             traceback.print_exc()
             return False
     
-    def sync_events(self, oauth_account, days_ahead=100):
-        """Синхронизировать события календаря (данные кэшируются, не сохраняются в БД)"""
+    def sync_events(self, oauth_account=None, days_ahead=100):
+        """Синхронизировать события календаря в локальное хранилище (инкрементально по syncToken)"""
+        result = self._get_sync_service().sync()
         events = self.get_events(days_ahead=days_ahead)
-        print(f"🔄 Синхронизация событий календаря: {len(events)} событий (кэшированы)")
+        print(f"🔄 Синхронизация событий календаря ({result.get('mode', 'error')}): {len(events)} событий")
         return len(events)
 
 
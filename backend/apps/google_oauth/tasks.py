@@ -121,3 +121,42 @@ def validate_oauth_tokens():
             'success': False,
             'error': str(e)
         }
+
+
+@shared_task
+def sync_google_calendars(calendar_id='primary'):
+    """
+    Инкрементальная синхронизация календарей всех пользователей
+    
+    Запускается каждые 2 минуты. Загружает только изменения по syncToken и
+    обновляет локальное хранилище, из которого читают представления.
+    """
+    from .calendar_sync import CalendarSyncService, get_calendar_sync_settings
+    
+    if not get_calendar_sync_settings()['enabled']:
+        return {'success': True, 'skipped': True}
+    
+    synced_count = 0
+    failed_count = 0
+    
+    accounts = GoogleOAuthAccount.objects.select_related('user')
+    for account in accounts:
+        if not account.has_scope('https://www.googleapis.com/auth/calendar'):
+            continue
+        try:
+            result = CalendarSyncService(account.user).sync(calendar_id)
+            if result.get('success'):
+                synced_count += 1
+            else:
+                failed_count += 1
+        except Exception as e:
+            failed_count += 1
+            logger.error(f"❌ Ошибка синхронизации календаря для {account.user.username}: {e}")
+    
+    logger.info(f"📅 Синхронизация календарей завершена. Успешно: {synced_count}, Ошибок: {failed_count}")
+    
+    return {
+        'success': True,
+        'synced_count': synced_count,
+        'failed_count': failed_count
+    }
@@ -1,3 +1,255 @@
-from django.test import TestCase
+import json
+from datetime import date, datetime
+from unittest.mock import Mock, patch
 
-# Create your tests here.
+import pytz
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpMockSequence
+
+from apps.gemini.tests import STREAM_EVENTS, FakeGeminiServer
+
+from .busy_index import BusyIntervalIndex
+from .calendar_sync import CalendarSyncService
+from .models import CalendarSyncState, HRScreening, SyncedCalendarEvent
+from .services import GoogleCalendarService
+
+User = get_user_model()
+
+
+def _event(event_id, day, status='confirmed'):
+    return {
+        'id': event_id,
+        'status': status,
+        'summary': f'Встреча {event_id}',
+        'start': {'dateTime': f'2030-01-{day:02d}T10:00:00+00:00'},
+        'end': {'dateTime': f'2030-01-{day:02d}T11:00:00+00:00'},
+    }
+
+
+def _response(items, sync_token=None, status='200'):
+    body = {'items': items}
+    if sync_token:
+        body['nextSyncToken'] = sync_token
+    return ({'status': status}, json.dumps(body))
+
+
+class _CountingHttp(HttpMockSequence):
+    """Фейковый транспорт: отдает ответы по очереди и запоминает запрошенные URI"""
+
+    def __init__(self, iterable):
+        super().__init__(iterable)
+        self.uris = []
+
+    def request(self, uri, *args, **kwargs):
+        self.uris.append(uri)
+        return super().request(uri, *args, **kwargs)
+
+
+def _page(start, count, next_token=None):
+    items = [
+        {
+            'id': f'event{i}',
+            'summary': f'Встреча {i}',
+            'start': {'dateTime': '2030-01-01T10:00:00Z'},
+            'end': {'dateTime': '2030-01-01T11:00:00Z'},
+            'attendees': [{'email': 'candidate@example.com'}],
+        }
+        for i in range(start, start + count)
+    ]
+    body = {'items': items}
+    if next_token:
+        body['nextPageToken'] = next_token
+    return ({'status': '200'}, json.dumps(body))
+
+
+class CalendarEventsCallCountTests(SimpleTestCase):
+    """GoogleCalendarService.get_events: один запрос list на страницу, без get на каждое событие"""
+
+    def _make_service(self, responses):
+        http = _CountingHttp(responses)
+        api = build('calendar', 'v3', http=http, static_discovery=True)
+        oauth_service = Mock()
+        oauth_service.user.id = 1
+        calendar_service = GoogleCalendarService(oauth_service)
+        calendar_service.service = api
+        # Локальное хранилище синхронизации не используется - проверяем путь через API
+        calendar_service._get_sync_service = Mock(return_value=Mock(is_fresh=Mock(return_value=False)))
+        return calendar_service, http
+
+    @patch('apps.google_oauth.services.GoogleAPICache')
+    def test_single_request_for_one_page(self, cache_mock):
+        """100 событий загружаются одним запросом list"""
+        cache_mock.get_calendar_events.return_value = None
+        calendar_service, http = self._make_service([_page(0, 100)])
+
+        events = calendar_service.get_events(max_results=100, days_ahead=100)
+
+        self.assertEqual(len(events), 100)
+        self.assertEqual(len(http.uris), 1)
+        self.assertIn('fields=', http.uris[0])
+        self.assertEqual(events[0]['attendees'][0]['email'], 'candidate@example.com')
+        cache_mock.set_calendar_events.assert_called_once()
+
+    @patch('apps.google_oauth.services.GoogleAPICache')
+    def test_pages_until_limit(self, cache_mock):
+        """Страницы догружаются по nextPageToken, пока не набран max_results"""
+        cache_mock.get_calendar_events.return_value = None
+        calendar_service, http = self._make_service([
+            _page(0, 250, next_token='page2'),
+            _page(250, 50, next_token='page3'),
+        ])
+
+        events = calendar_service.get_events(max_results=300, days_ahead=100)
+
+        self.assertEqual(len(events), 300)
+        self.assertEqual(len(http.uris), 2)
+        self.assertIn('pageToken=page2', http.uris[1])
+
+    @patch('apps.google_oauth.services.GoogleAPICache')
+    def test_cache_hit_makes_no_requests(self, cache_mock):
+        """При попадании в кэш запросов к API нет"""
+        cache_mock.get_calendar_events.return_value = [{'id': 'cached'}]
+        calendar_service, http = self._make_service([])
+
+        self.assertEqual(calendar_service.get_events(), [{'id': 'cached'}])
+        self.assertEqual(http.uris, [])
+
+
+class CalendarSyncServiceTests(TestCase):
+    """Инкрементальная синхронизация календаря по syncToken"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='sync_user', password='test')
+
+    def _sync_service(self, responses):
+        http = HttpMockSequence(responses)
+        calendar_service = Mock()
+        calendar_service._get_service.return_value = build('calendar', 'v3', http=http, static_discovery=True)
+        return CalendarSyncService(self.user, calendar_service=calendar_service)
+
+    def test_full_then_incremental_sync(self):
+        """Полная синхронизация сохраняет токен, инкрементальная применяет только изменения"""
+        result = self._sync_service([
+            _response([_event('a', 1), _event('b', 2)], sync_token='token-1'),
+        ]).sync()
+        self.assertEqual(result['mode'], 'full')
+        self.assertEqual(CalendarSyncState.objects.get(user=self.user).sync_token, 'token-1')
+        self.assertEqual(SyncedCalendarEvent.objects.filter(user=self.user).count(), 2)
+
+        result = self._sync_service([
+            _response([_event('a', 1, status='cancelled'), _event('c', 3)], sync_token='token-2'),
+        ]).sync()
+        self.assertEqual(result['mode'], 'incremental')
+        self.assertEqual(result['deleted'], 1)
+        self.assertEqual(
+            set(SyncedCalendarEvent.objects.filter(user=self.user).values_list('event_id', flat=True)),
+            {'b', 'c'}
+        )
+        self.assertEqual(CalendarSyncState.objects.get(user=self.user).sync_token, 'token-2')
+
+    def test_gone_falls_back_to_full_sync(self):
+        """Ответ 410 Gone на syncToken приводит к полной пересинхронизации"""
+        self._sync_service([_response([_event('a', 1)], sync_token='token-1')]).sync()
+
+        result = self._sync_service([
+            ({'status': '410'}, json.dumps({'error': {'code': 410, 'message': 'Gone'}})),
+            _response([_event('z', 5)], sync_token='token-new'),
+        ]).sync()
+
+        self.assertEqual(result['mode'], 'full')
+        self.assertEqual(
+            list(SyncedCalendarEvent.objects.filter(user=self.user).values_list('event_id', flat=True)),
+            ['z']
+        )
+        self.assertEqual(CalendarSyncState.objects.get(user=self.user).sync_token, 'token-new')
+
+    def test_reads_from_store_when_fresh(self):
+        """Свежее хранилище отдает события в порядке начала"""
+        sync_service = self._sync_service([
+            _response([_event('late', 9), _event('early', 2)], sync_token='token-1'),
+        ])
+        self.assertFalse(sync_service.is_fresh())
+        sync_service.sync()
+
+        self.assertTrue(sync_service.is_fresh(days_ahead=100))
+        events = sync_service.get_events(days_ahead=3650)
+        self.assertEqual([event['id'] for event in events], ['early', 'late'])
+
+
+class BusyIntervalIndexTests(SimpleTestCase):
+    """Индекс занятости календаря"""
+
+    def setUp(self):
+        self.minsk = pytz.timezone('Europe/Minsk')
+        self.index = BusyIntervalIndex([
+            # 12:00-13:00 по Минску, записано в UTC
+            {'id': 'utc', 'summary': 'UTC', 'start': {'dateTime': '2030-01-10T09:00:00Z'},
+             'end': {'dateTime': '2030-01-10T10:00:00Z'}},
+            {'id': 'long', 'summary': 'Длинная', 'start': {'dateTime': '2030-01-10T08:00:00+03:00'},
+             'end': {'dateTime': '2030-01-10T11:15:00+03:00'}},
+            {'id': 'allday', 'summary': 'Весь день', 'start': {'date': '2030-01-10'}, 'end': {'date': '2030-01-11'}},
+            {'id': 'next', 'summary': 'Завтра', 'start': {'dateTime': '2030-01-11T15:00:00+03:00'},
+             'end': {'dateTime': '2030-01-11T15:30:00+03:00'}},
+        ])
+
+    def _at(self, day, hour, minute=0):
+        return self.minsk.localize(datetime(2030, 1, day, hour, minute))
+
+    def test_is_free_and_conflict(self):
+        self.assertFalse(self.index.is_free(self._at(10, 12, 30), self._at(10, 13, 15)))
+        self.assertTrue(self.index.is_free(self._at(10, 13), self._at(10, 13, 45)))
+        # Событие 08:00-11:15 начинается раньше, но пересекает слот 11:00
+        self.assertEqual(self.index.first_conflict(self._at(10, 11), self._at(10, 11, 45))[2]['id'], 'long')
+        # Наивное время трактуется как время календаря
+        self.assertFalse(self.index.is_free(datetime(2030, 1, 11, 15, 15), datetime(2030, 1, 11, 16)))
+
+    def test_free_hours_require_min_overlap(self):
+        slots = dict(self.index.free_hours(date(2030, 1, 10), 11, 15))
+        self.assertEqual(slots, {11: False, 12: True, 13: False, 14: False})
+
+    def test_events_per_date(self):
+        self.assertEqual(self.index.count_on(date(2030, 1, 10)), 3)
+        self.assertEqual(self.index.count_on(date(2030, 1, 11)), 1)
+        self.assertEqual(self.index.count_on(date(2030, 1, 12)), 0)
+
+
+@patch.object(HRScreening, '_extract_salary_and_determine_grade')
+@patch.object(HRScreening, '_prepare_gemini_prompt', return_value=(True, 'Проанализируй кандидата'))
+class HRScreeningStreamAnalysisViewTests(TestCase):
+    """Потоковый анализ HR-скрининга (text/event-stream)"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='hr', password='test', gemini_api_key='test-key')
+        self.user.user_permissions.add(Permission.objects.get(codename='change_hrscreening'))
+        self.screening = HRScreening.objects.create(user=self.user, input_data='Ответы кандидата')
+        self.client.force_login(self.user)
+        self.url = reverse('google_oauth:hr_screening_stream_analysis', args=[self.screening.pk])
+
+    def _events(self, response):
+        body = b''.join(response.streaming_content).decode()
+        return [
+            (block.split('\n')[0][len('event: '):], json.loads(block.split('\n')[1][len('data: '):]))
+            for block in body.strip().split('\n\n')
+        ]
+
+    def test_stream_ends_with_analysis(self, *mocks):
+        with FakeGeminiServer(STREAM_EVENTS):
+            response = self.client.post(self.url)
+            self.assertEqual(response['Content-Type'], 'text/event-stream; charset=utf-8')
+            events = self._events(response)
+
+        self.assertEqual([name for name, _ in events], ['chunk', 'chunk', 'done'])
+        self.assertEqual(events[-1][1]['analysis'], 'Привет, чем помочь?')
+        self.assertEqual(events[-1][1]['metadata']['usage_metadata']['totalTokenCount'], 42)
+
+    def test_failure_after_stream_start_becomes_error_event(self, *mocks):
+        with FakeGeminiServer(STREAM_EVENTS), \
+                patch.object(HRScreening, '_apply_gemini_analysis', side_effect=RuntimeError('сбой')):
+            events = self._events(self.client.post(self.url))
+
+        self.assertEqual([name for name, _ in events], ['chunk', 'chunk', 'error'])
+        self.assertEqual(events[-1][1], {'error': 'Ошибка анализа: сбой'})
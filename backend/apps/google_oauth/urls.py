@@ -54,6 +54,7 @@ urlpatterns = [
     path('hr-screening/<int:pk>/', views.hr_screening_detail, name='hr_screening_detail'),
     path('hr-screening/<int:pk>/delete/', views.hr_screening_delete, name='hr_screening_delete'),
     path('hr-screening/<int:pk>/retry-analysis/', views.hr_screening_retry_analysis, name='hr_screening_retry_analysis'),
+    path('hr-screening/<int:pk>/stream-analysis/', views.hr_screening_stream_analysis, name='hr_screening_stream_analysis'),
     
     # Объединенный рабочий процесс
     path('combined-workflow/', views.combined_workflow, name='combined_workflow'),
@@ -2354,6 +2354,11 @@ def get_meetings_count(request):
                 'debug': 'Нет кэшированных событий'
             })
         
+        # Индекс событий по датам строится один раз для всех запрошенных дат
+        from apps.google_oauth.busy_index import BusyIntervalIndex
+        busy_index = BusyIntervalIndex(cached_events)
+        current_year = datetime.now().year
+        
         meetings_count = {}
         
         # Обрабатываем каждую дату
@@ -2361,41 +2366,10 @@ def get_meetings_count(request):
             try:
                 # Парсим дату (формат: DD.MM)
                 day, month = date_str.split('.')
-                current_year = datetime.now().year
                 target_date = datetime(current_year, int(month), int(day)).date()
                 
-                # Подсчитываем события на эту дату
-                day_events_count = 0
-                for event in cached_events:
-                    try:
-                        # Получаем дату начала события
-                        start_data = event.get('start', {})
-                        if 'dateTime' in start_data:
-                            # Событие с конкретным временем
-                            start_time_str = start_data['dateTime']
-                            if start_time_str.endswith('Z'):
-                                start_time_str = start_time_str[:-1] + '+00:00'
-                            event_start = datetime.fromisoformat(start_time_str)
-                            # Конвертируем из UTC в локальное время
-                            minsk_tz = pytz.timezone('Europe/Minsk')
-                            event_start = event_start.replace(tzinfo=pytz.UTC).astimezone(minsk_tz)
-                            event_date = event_start.date()
-                        elif 'date' in start_data:
-                            # Событие на весь день
-                            event_date = datetime.fromisoformat(start_data['date']).date()
-                        else:
-                            continue
-                        
-                        # Проверяем, совпадает ли дата
-                        if event_date == target_date:
-                            day_events_count += 1
-                            
-                    except Exception as e:
-                        print(f"❌ Ошибка обработки события {event.get('id', 'unknown')}: {e}")
-                        continue
-                
-                meetings_count[date_str] = day_events_count
-                print(f"📅 Дата {date_str}: {day_events_count} событий")
+                meetings_count[date_str] = busy_index.count_on(target_date)
+                print(f"📅 Дата {date_str}: {meetings_count[date_str]} событий")
                 
             except Exception as e:
                 print(f"❌ Ошибка обработки даты {date_str}: {e}")
@@ -2773,6 +2747,17 @@ def hr_screening_retry_analysis(request, pk):
         })
 
 
+@login_required
+@permission_required('google_oauth.change_hrscreening', raise_exception=True)
+@require_POST
+def hr_screening_stream_analysis(request, pk):
+    """Повторный анализ HR-скрининга с потоковым ответом Gemini (text/event-stream)"""
+    from apps.gemini.logic.streaming import sse_response
+    
+    hr_screening = get_object_or_404(HRScreening, pk=pk, user=request.user)
+    return sse_response(hr_screening.stream_analysis_with_gemini())
+
+
 @login_required
 @permission_required('google_oauth.view_googleoauthaccount', raise_exception=True)
 def gdata_automation(request):
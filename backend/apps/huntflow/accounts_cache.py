@@ -0,0 +1,180 @@
+import hashlib
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.google_oauth.cache_service import CacheService
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class HuntflowAccountsCache:
+    """
+    Кэш списка организаций Huntflow (GET /accounts)
+
+    Два уровня: in-memory кэш процесса перед Redis. Запись в Redis считается свежей
+    API_CACHE_TIMEOUT['huntflow_accounts'] секунд, после этого еще STALE_TTL секунд
+    отдается устаревшее значение, а обновление выполняется в фоне (stale-while-revalidate).
+    Ключ включает активную систему и отпечаток учетных данных, поэтому переключение
+    системы или смена токена сразу приводят к новому запросу. Ключ в Redis содержит
+    также версию пользователя: invalidate() увеличивает ее, не перебирая ключи.
+    Пустой ответ (нет организаций или не работают учетные данные) хранится EMPTY_TTL
+    секунд, чтобы сайдбар не запрашивал /accounts на каждой странице.
+    """
+
+    SERVICE = 'huntflow_accounts'
+    LOCAL_TTL = 60        # Время жизни записи в памяти процесса (секунды)
+    STALE_TTL = 86400     # Сколько можно отдавать устаревшие данные (секунды)
+    REFRESH_LOCK_TTL = 60
+    EMPTY_TTL = 300       # Время хранения пустого ответа (секунды)
+
+    _local: Dict[str, Any] = {}
+    _local_lock = threading.Lock()
+
+    @classmethod
+    def _fresh_ttl(cls) -> int:
+        return settings.API_CACHE_TIMEOUT.get(cls.SERVICE, 43200)
+
+    @staticmethod
+    def _credential_fingerprint(user) -> str:
+        """Отпечаток текущих учетных данных (сам токен в ключ не попадает)"""
+        if user.active_system == 'prod':
+            credential = user.huntflow_access_token or user.huntflow_prod_api_key
+            base_url = user.huntflow_prod_url
+        else:
+            credential = user.huntflow_sandbox_api_key
+            base_url = user.huntflow_sandbox_url
+        return hashlib.sha256(f"{base_url}|{credential}".encode()).hexdigest()[:12]
+
+    @classmethod
+    def _cache_key(cls, user) -> str:
+        return CacheService._generate_cache_key(
+            cls.SERVICE,
+            user.id,
+            system=user.active_system,
+            credential=cls._credential_fingerprint(user),
+        )
+
+    @classmethod
+    def _version_key(cls, user_id: int) -> str:
+        return f"{cls.SERVICE}_version_{user_id}"
+
+    @classmethod
+    def _redis_key(cls, user, key: str) -> str:
+        try:
+            version = cache.get(cls._version_key(user.id)) or 1
+        except Exception:
+            version = 1
+        return f"{key}_v{version}"
+
+    @classmethod
+    def get_accounts(cls, user, force_refresh: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Получает список организаций пользователя
+
+        Args:
+            user: Пользователь с настройками Huntflow
+            force_refresh: Игнорировать кэш и запросить API
+
+        Returns:
+            Ответ Huntflow API ({'items': [...]}) или None
+        """
+        key = cls._cache_key(user)
+
+        if not force_refresh:
+            local_entry = cls._local.get(key)
+            if local_entry and local_entry[0] > time.monotonic():
+                return local_entry[1]
+
+        redis_key = cls._redis_key(user, key)
+        if not force_refresh:
+            cached = cls._get_redis_entry(redis_key)
+            if cached is not None:
+                age = (timezone.now() - datetime.fromisoformat(cached['cached_at'])).total_seconds()
+                if age >= cls._fresh_ttl():
+                    cls._schedule_refresh(user, key, redis_key)
+                cls._set_local(key, cached['data'])
+                return cached['data']
+
+        return cls._fetch_and_store(user, key, redis_key)
+
+    @classmethod
+    def invalidate(cls, user_id: int):
+        """Сбрасывает кэш организаций пользователя для всех систем"""
+        prefix = f"api_cache_{cls.SERVICE}_{user_id}_"
+        with cls._local_lock:
+            for key in [k for k in cls._local if k.startswith(prefix)]:
+                cls._local.pop(key, None)
+        version_key = cls._version_key(user_id)
+        try:
+            if not cache.add(version_key, 2, None):
+                cache.incr(version_key)
+        except Exception as e:
+            logger.warning(f"Не удалось сбросить кэш организаций Huntflow: {e}")
+
+    @classmethod
+    def _get_redis_entry(cls, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            cached = cache.get(key)
+        except Exception as e:
+            logger.warning(f"Кэш организаций Huntflow недоступен: {e}")
+            return None
+        if cached and cached.get('cached_at') and 'data' in cached:
+            return cached
+        return None
+
+    @classmethod
+    def _set_local(cls, key: str, data):
+        with cls._local_lock:
+            cls._local[key] = (time.monotonic() + cls.LOCAL_TTL, data)
+
+    @classmethod
+    def _fetch_and_store(cls, user, key: str, redis_key: str) -> Optional[Dict[str, Any]]:
+        from .services import HuntflowService
+
+        accounts = HuntflowService(user).get_accounts()
+        timeout = cls._fresh_ttl() + cls.STALE_TTL if accounts else cls.EMPTY_TTL
+
+        cache_data = {
+            'data': accounts,
+            'cached_at': timezone.now().isoformat(),
+            'service': cls.SERVICE,
+            'user_id': user.id,
+            'params': {'system': user.active_system},
+        }
+        try:
+            cache.set(redis_key, cache_data, timeout)
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить организации Huntflow в кэш: {e}")
+        cls._set_local(key, accounts)
+        return accounts
+
+    @classmethod
+    def _schedule_refresh(cls, user, key: str, redis_key: str):
+        """Фоновое обновление устаревшей записи (одно на ключ во всех процессах)"""
+        try:
+            if not cache.add(f"{redis_key}_refresh", 1, cls.REFRESH_LOCK_TTL):
+                return
+        except Exception:
+            return
+
+        def refresh():
+            from django.db import connection
+            try:
+                cls._fetch_and_store(user, key, redis_key)
+            except Exception as e:
+                logger.warning(f"Фоновое обновление организаций Huntflow не удалось: {e}")
+            finally:
+                try:
+                    cache.delete(f"{redis_key}_refresh")
+                except Exception:
+                    pass
+                connection.close()
+
+        threading.Thread(target=refresh, daemon=True).start()
@@ -0,0 +1,233 @@
+import atexit
+import json
+import queue
+import random
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+from django.conf import settings
+from django.utils import timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_LOG_SETTINGS = {
+    'mode': 'buffered',           # buffered | celery | sync
+    'batch_size': 50,             # Сбрасываем буфер при накоплении N записей
+    'flush_interval': 2.0,        # ...или не реже чем раз в N секунд
+    'max_queue_size': 10000,      # При переполнении новые записи отбрасываются
+    'success_sample_rate': 1.0,   # Доля сохраняемых успешных ответов (ошибки пишутся всегда)
+    'max_response_chars': 10000,  # Ответы длиннее не парсятся и сохраняются обрезанными
+}
+
+
+def _get_log_settings() -> Dict[str, Any]:
+    log_settings = dict(DEFAULT_LOG_SETTINGS)
+    log_settings.update(getattr(settings, 'HUNTFLOW_LOG_SETTINGS', {}) or {})
+    return log_settings
+
+
+def build_log_rows(entries: List[Dict[str, Any]]) -> List[Any]:
+    """
+    Превращает сырые записи очереди в объекты HuntflowLog
+
+    Парсинг JSON ответа выполняется здесь, вне потока запроса к API.
+    """
+    from .models import HuntflowLog
+
+    rows = []
+    for entry in entries:
+        response_text = entry.get('response_text') or ''
+        response_data = {}
+        if response_text and not entry['is_error']:
+            if entry.get('truncated'):
+                response_data = {'raw_response': response_text, 'truncated': True}
+            else:
+                try:
+                    response_data = json.loads(response_text)
+                except ValueError:
+                    response_data = {'raw_response': response_text[:1000]}
+
+        rows.append(HuntflowLog(
+            log_type='ERROR' if entry['is_error'] else entry['method'],
+            endpoint=entry['endpoint'],
+            method=entry['method'],
+            status_code=entry['status_code'],
+            request_data=entry['request_data'] or {},
+            response_data=response_data,
+            error_message=response_text if entry['is_error'] else '',
+            user_id=entry['user_id'],
+            created_at=entry['created_at'],
+        ))
+    return rows
+
+
+def write_log_entries(entries: List[Dict[str, Any]], max_attempts: int = 3) -> int:
+    """Записывает пачку логов одним bulk_create с повтором при блокировке SQLite"""
+    from django.db import OperationalError, transaction
+    from .models import HuntflowLog
+
+    if not entries:
+        return 0
+
+    rows = build_log_rows(entries)
+    for attempt in range(max_attempts):
+        try:
+            with transaction.atomic():
+                HuntflowLog.objects.bulk_create(rows, batch_size=500)
+            return len(rows)
+        except OperationalError as e:
+            if 'locked' not in str(e).lower() or attempt == max_attempts - 1:
+                raise
+            time.sleep(0.5 * (attempt + 1))
+    return 0
+
+
+class HuntflowLogWriter:
+    """
+    Буферизованная запись логов Huntflow API
+
+    Запрос к API только кладет запись в очередь. Фоновый поток сбрасывает очередь
+    пачками через bulk_create (mode='buffered') или отправляет пачку в Celery задачу
+    write_huntflow_logs (mode='celery'). В режиме 'sync' запись выполняется сразу.
+    """
+
+    def __init__(self):
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._flush_event = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._stats = {'queued': 0, 'written': 0, 'sampled_out': 0, 'dropped': 0, 'failed': 0}
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Снимок счетчиков записи логов"""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _count(self, name: str, value: int = 1):
+        # Счетчики обновляются из потоков запросов и фонового потока записи
+        with self._stats_lock:
+            self._stats[name] += value
+
+    def record(self, user_id: int, method: str, endpoint: str, status_code: Optional[int],
+               request_data: Any, response_text: str, is_error: bool = False):
+        """
+        Ставит запись лога в очередь
+
+        Args:
+            user_id: ID пользователя
+            method: HTTP метод
+            endpoint: Endpoint API
+            status_code: Код ответа (None для сетевых ошибок)
+            request_data: Данные запроса
+            response_text: Тело ответа или текст ошибки
+            is_error: Признак ошибки запроса
+        """
+        log_settings = _get_log_settings()
+        is_success = not is_error and status_code is not None and 200 <= status_code < 300
+
+        if is_success and random.random() >= log_settings['success_sample_rate']:
+            self._count('sampled_out')
+            return
+
+        max_chars = log_settings['max_response_chars']
+        response_text = response_text or ''
+        truncated = len(response_text) > max_chars
+        entry = {
+            'user_id': user_id,
+            'method': method,
+            'endpoint': endpoint[:500],
+            'status_code': status_code,
+            'request_data': request_data if isinstance(request_data, (dict, list)) else {},
+            'response_text': response_text[:max_chars],
+            'truncated': truncated,
+            'is_error': is_error,
+            'created_at': timezone.now(),
+        }
+
+        if log_settings['mode'] == 'sync':
+            self._write([entry])
+            return
+
+        self._ensure_started(log_settings)
+        try:
+            self._queue.put_nowait(entry)
+            self._count('queued')
+        except queue.Full:
+            self._count('dropped')
+            return
+
+        if self._queue.qsize() >= log_settings['batch_size']:
+            self._flush_event.set()
+
+    def flush(self):
+        """Синхронно сбрасывает все накопленные записи"""
+        if self._queue is None:
+            return
+        batch = self._drain()
+        if batch:
+            self._dispatch(batch, _get_log_settings())
+
+    def _ensure_started(self, log_settings: Dict[str, Any]):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if self._queue is None:
+                self._queue = queue.Queue(maxsize=log_settings['max_queue_size'])
+            self._thread = threading.Thread(
+                target=self._run, name='huntflow-log-writer', daemon=True
+            )
+            self._thread.start()
+
+    def _drain(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        batch = []
+        while limit is None or len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        from django.db import close_old_connections
+
+        while True:
+            log_settings = _get_log_settings()
+            self._flush_event.wait(timeout=log_settings['flush_interval'])
+            self._flush_event.clear()
+
+            close_old_connections()
+            while True:
+                batch = self._drain(limit=log_settings['batch_size'])
+                if not batch:
+                    break
+                self._dispatch(batch, log_settings)
+
+    def _dispatch(self, batch: List[Dict[str, Any]], log_settings: Dict[str, Any]):
+        if log_settings['mode'] == 'celery':
+            try:
+                from .tasks import write_huntflow_logs
+                payload = [dict(entry, created_at=entry['created_at'].isoformat()) for entry in batch]
+                write_huntflow_logs.delay(payload)
+                self._count('written', len(batch))
+                return
+            except Exception as e:
+                logger.warning(f"Не удалось отправить логи Huntflow в Celery, пишем локально: {e}")
+        self._write(batch)
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        try:
+            self._count('written', write_log_entries(batch))
+        except Exception as e:
+            self._count('failed', len(batch))
+            print(f"⚠️ Не удалось сохранить логи Huntflow ({len(batch)} шт.): {e}")
+
+
+huntflow_log_writer = HuntflowLogWriter()
+atexit.register(huntflow_log_writer.flush)
@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
 from apps.huntflow.services import HuntflowService
+from apps.huntflow.log_writer import huntflow_log_writer
 
 
 class Command(BaseCommand):
@@ -74,6 +75,9 @@ class Command(BaseCommand):
             else:
                 self.stdout.write('❌ Не удалось получить метки')
         
+        # Логи пишутся в фоне пачками - сбрасываем буфер перед проверкой
+        huntflow_log_writer.flush()
+        
         self.stdout.write(self.style.SUCCESS('\n=== ТЕСТИРОВАНИЕ ЗАВЕРШЕНО ==='))
         self.stdout.write('\nТеперь проверьте логи в админке Django:')
         self.stdout.write('http://127.0.0.1:8000/admin/huntflow/huntflowlog/')
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from apps.accounts.models import User
+from apps.huntflow.accounts_cache import HuntflowAccountsCache
+from apps.huntflow.services import HuntflowService
+
+
+class Command(BaseCommand):
+    help = 'Прогревает кэш справочников Huntflow (статусы, метки, поля, схема анкеты, вакансии)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=str, help='Имя пользователя (по умолчанию все с настроенным Huntflow)')
+        parser.add_argument('--force', action='store_true', help='Перезапросить данные даже при наличии кэша')
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(
+            Q(huntflow_access_token__gt='') | Q(huntflow_prod_api_key__gt='') | Q(huntflow_sandbox_api_key__gt='')
+        )
+        if options['user']:
+            users = users.filter(username=options['user'])
+
+        if not users.exists():
+            self.stdout.write(self.style.WARNING("Нет пользователей с настроенным Huntflow"))
+            return
+
+        force = options['force']
+        for user in users:
+            self.stdout.write(f"👤 {user.username} ({user.active_system})")
+            accounts = HuntflowAccountsCache.get_accounts(user, force_refresh=force)
+            if not accounts or not accounts.get('items'):
+                self.stdout.write(self.style.ERROR("  Не удалось получить организации"))
+                continue
+
+            service = HuntflowService(user)
+            for account in accounts['items']:
+                account_id = account['id']
+                loaded = {
+                    'статусы': service.get_vacancy_statuses(account_id, force_refresh=force),
+                    'метки': service.get_tags(account_id, force_refresh=force),
+                    'доп. поля': service.get_vacancy_additional_fields(account_id, force_refresh=force),
+                    'анкета': service.get_applicant_questionary_schema(account_id, force_refresh=force),
+                    'вакансии': service.get_vacancies(account_id, force_refresh=force, count=100),
+                }
+                summary = ', '.join(f"{name}: {'✓' if data else '✗'}" for name, data in loaded.items())
+                self.stdout.write(f"  🏢 {account.get('name', account_id)} - {summary}")
+
+        self.stdout.write(self.style.SUCCESS("Кэш справочников Huntflow прогрет"))
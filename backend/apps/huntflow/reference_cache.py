@@ -0,0 +1,175 @@
+import hashlib
+import threading
+import time
+from typing import Dict, Any, Optional, Callable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class HuntflowReferenceCache:
+    """
+    Кэш справочных данных организации Huntflow
+
+    Статусы, метки, дополнительные поля вакансий, схема анкеты и список вакансий
+    меняются редко, поэтому хранятся в Redis по ключу (система, account_id) и
+    дублируются в памяти процесса. Для меток и статусов строятся индексы
+    имя -> ID, так что поиск метки по имени не требует запроса к API.
+
+    Инвалидация версионная: запись в Huntflow (создание метки, изменение вакансии)
+    увеличивает версию организации, и все процессы перечитывают данные.
+    """
+
+    KINDS = ('statuses', 'tags', 'additional_fields', 'questionary_schema', 'vacancies')
+    INDEXED_KINDS = ('statuses', 'tags')
+    LOCAL_TTL = 30  # Сколько секунд процесс доверяет своей копии без проверки версии
+    MAX_LOCAL_ENTRIES = 500  # Ограничение копий в памяти процесса (организации × справочники × параметры)
+
+    _local: Dict[str, Any] = {}
+    _local_lock = threading.Lock()
+
+    def __init__(self, user):
+        self.user = user
+
+    # ==================== КЛЮЧИ ====================
+
+    def _system_key(self) -> str:
+        """Идентификатор системы: prod/sandbox + хэш базового URL"""
+        if self.user.active_system == 'prod':
+            base_url = self.user.huntflow_prod_url
+        else:
+            base_url = self.user.huntflow_sandbox_url
+        url_hash = hashlib.md5((base_url or '').encode()).hexdigest()[:8]
+        return f"{self.user.active_system}_{url_hash}"
+
+    def _version_key(self, account_id) -> str:
+        return f"huntflow_ref_version_{self._system_key()}_{account_id}"
+
+    def _data_key(self, kind: str, account_id, version: int, params: Optional[Dict[str, Any]] = None) -> str:
+        key = f"huntflow_ref_{kind}_{self._system_key()}_{account_id}_v{version}"
+        if params:
+            params_str = '_'.join(f"{k}_{v}" for k, v in sorted(params.items()))
+            key += f"_{hashlib.md5(params_str.encode()).hexdigest()[:8]}"
+        return key
+
+    @staticmethod
+    def _timeout(kind: str) -> int:
+        timeouts = settings.API_CACHE_TIMEOUT
+        if kind == 'vacancies':
+            return timeouts.get('huntflow_vacancies_list', 300)
+        return timeouts.get('huntflow_reference', 3600)
+
+    def _get_version(self, account_id) -> int:
+        try:
+            return cache.get(self._version_key(account_id)) or 1
+        except Exception:
+            return 1
+
+    # ==================== ЧТЕНИЕ ====================
+
+    def get(self, kind: str, account_id, loader: Callable[[], Any], params: Optional[Dict[str, Any]] = None,
+            force_refresh: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Возвращает справочник из кэша или загружает его через loader
+
+        Args:
+            kind: Тип справочника (см. KINDS)
+            account_id: ID организации
+            loader: Функция запроса к API при промахе кэша
+            params: Параметры запроса, влияющие на результат (для списка вакансий)
+            force_refresh: Игнорировать кэш
+
+        Returns:
+            Запись вида {'data': ответ API, 'index': {имя: ID}} или None
+        """
+        local_key = self._data_key(kind, account_id, 0, params)
+
+        if not force_refresh:
+            local_entry = self._local.get(local_key)
+            if local_entry and local_entry[0] > time.monotonic():
+                return local_entry[1]
+
+        version = self._get_version(account_id)
+        key = self._data_key(kind, account_id, version, params)
+
+        if not force_refresh:
+            local_entry = self._local.get(local_key)
+            if local_entry and local_entry[2] == version:
+                # Версия не изменилась - продлеваем локальную копию
+                self._set_local(local_key, local_entry[1], version)
+                return local_entry[1]
+
+            try:
+                cached = cache.get(key)
+            except Exception as e:
+                logger.warning(f"Кэш справочников Huntflow недоступен: {e}")
+                cached = None
+            if cached is not None:
+                entry = self._build_entry(kind, cached['data'])
+                self._set_local(local_key, entry, version)
+                return entry
+
+        data = loader()
+        if not data:
+            return None
+
+        try:
+            cache.set(key, {'data': data, 'cached_at': timezone.now().isoformat()}, self._timeout(kind))
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить справочник Huntflow в кэш: {e}")
+
+        entry = self._build_entry(kind, data)
+        self._set_local(local_key, entry, version)
+        return entry
+
+    def get_data(self, kind: str, account_id, loader: Callable[[], Any], **kwargs) -> Optional[Dict[str, Any]]:
+        """Как get(), но возвращает только ответ API"""
+        entry = self.get(kind, account_id, loader, **kwargs)
+        return entry['data'] if entry else None
+
+    @staticmethod
+    def _build_entry(kind: str, data) -> Dict[str, Any]:
+        index = {}
+        if kind in HuntflowReferenceCache.INDEXED_KINDS and isinstance(data, dict):
+            for item in data.get('items', []):
+                name = item.get('name')
+                if name is not None and name not in index:
+                    index[name] = item.get('id')
+        return {'data': data, 'index': index}
+
+    @classmethod
+    def _set_local(cls, key: str, entry, version: int):
+        now = time.monotonic()
+        with cls._local_lock:
+            # Повторная запись переносит ключ в конец: порядок словаря - от давно обновленных
+            cls._local.pop(key, None)
+            if len(cls._local) >= cls.MAX_LOCAL_ENTRIES:
+                # Сначала копии с истекшим LOCAL_TTL, затем самые давние
+                for expired_key in [k for k, (expires_at, _, _) in cls._local.items() if expires_at <= now]:
+                    del cls._local[expired_key]
+                while len(cls._local) >= cls.MAX_LOCAL_ENTRIES:
+                    del cls._local[next(iter(cls._local))]
+            cls._local[key] = (now + cls.LOCAL_TTL, entry, version)
+
+    # ==================== ИНВАЛИДАЦИЯ ====================
+
+    def invalidate(self, account_id):
+        """Увеличивает версию справочников организации и сбрасывает локальные копии"""
+        version_key = self._version_key(account_id)
+        try:
+            try:
+                cache.incr(version_key)
+            except ValueError:
+                cache.set(version_key, 2, None)
+        except Exception as e:
+            logger.warning(f"Не удалось обновить версию справочников Huntflow: {e}")
+
+        prefix_parts = [f"huntflow_ref_{kind}_{self._system_key()}_{account_id}_" for kind in self.KINDS]
+        with self._local_lock:
+            for key in [k for k in self._local if any(k.startswith(p) for p in prefix_parts)]:
+                self._local.pop(key, None)
+        print(f"🗑️ Сброшен кэш справочников Huntflow для организации {account_id}")
@@ -1,13 +1,65 @@
 import requests
-from typing import Dict, Any, List, Optional
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Callable
 from django.conf import settings
 from apps.google_oauth.cache_service import HuntflowAPICache
+from logic.base.http_pool import http_pool
 from .token_service import HuntflowTokenService
+from .log_writer import huntflow_log_writer
+from .reference_cache import HuntflowReferenceCache
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+_parallel_executor = None
+_parallel_executor_lock = threading.Lock()
+
+
+def _get_parallel_executor() -> ThreadPoolExecutor:
+    """Общий ограниченный пул потоков для параллельных запросов к Huntflow"""
+    global _parallel_executor
+    if _parallel_executor is None:
+        with _parallel_executor_lock:
+            if _parallel_executor is None:
+                max_workers = getattr(settings, 'HUNTFLOW_PARALLEL_SETTINGS', {}).get('max_workers', 8)
+                _parallel_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='huntflow-fetch')
+    return _parallel_executor
+
+
+def _run_in_worker(call: Callable[[], Any]) -> Any:
+    """Выполняет вызов в потоке пула и закрывает его соединение с БД"""
+    from django.db import connection
+    try:
+        return call()
+    finally:
+        connection.close()
+
+
+@dataclass
+class ParallelResult:
+    """
+    Результат параллельной загрузки набора запросов
+    
+    data - результаты успешных вызовов по имени, errors - ошибки и таймауты по имени,
+    timings - длительность каждого вызова в секундах
+    """
+    data: Dict[str, Any] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+    
+    def get(self, name: str, default: Any = None) -> Any:
+        value = self.data.get(name)
+        return default if value is None else value
+    
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
 class HuntflowService:
     """Сервис для работы с Huntflow API с поддержкой токенной аутентификации"""
     
@@ -20,6 +72,7 @@ class HuntflowService:
         """
         self.user = user
         self.token_service = HuntflowTokenService(user)
+        self.reference_cache = HuntflowReferenceCache(user)
     
     def _get_base_url(self) -> str:
         """Получает базовый URL для API запросов"""
@@ -475,7 +528,7 @@ class HuntflowService:
                 request_data = kwargs['data']
             
             # Выполняем запрос
-            response = requests.request(
+            response = http_pool.request(
                 method=method,
                 url=url,
                 timeout=30,
@@ -492,7 +545,7 @@ class HuntflowService:
                     kwargs['headers'] = headers
                     
                     # Повторяем запрос
-                    response = requests.request(
+                    response = http_pool.request(
                         method=method,
                         url=url,
                         timeout=30,
@@ -526,6 +579,82 @@ class HuntflowService:
             logger.error(f"Ошибка запроса: {e}")
             return None
     
+    def fetch_parallel(self, calls: Dict[str, Callable[[], Any]], timeout: float = None, timeouts: Dict[str, float] = None) -> ParallelResult:
+        """
+        Выполняет независимые GET запросы параллельно на общем пуле потоков
+        
+        Args:
+            calls: Словарь имя -> вызов без аргументов (например, functools.partial(self.get_tags, account_id))
+            timeout: Таймаут каждого вызова в секундах (по умолчанию HUNTFLOW_PARALLEL_SETTINGS['timeout'])
+            timeouts: Индивидуальные таймауты по имени вызова
+            
+        Таймаут вызова отсчитывается от начала его выполнения в потоке пула, а не от
+        постановки в очередь; ожидание свободного потока ограничено queue_timeout.
+            
+        Returns:
+            ParallelResult: результаты успешных вызовов и ошибки остальных.
+            Общее время равно самому медленному вызову, а не сумме всех.
+        """
+        parallel_settings = getattr(settings, 'HUNTFLOW_PARALLEL_SETTINGS', {})
+        default_timeout = timeout or parallel_settings.get('timeout', 30)
+        queue_timeout = parallel_settings.get('queue_timeout', default_timeout)
+        timeouts = timeouts or {}
+        result = ParallelResult()
+        
+        if not calls:
+            return result
+        
+        # Обновляем токен один раз до запуска потоков, чтобы не обновлять его параллельно
+        try:
+            self._get_headers()
+        except Exception as e:
+            result.errors = {name: str(e) for name in calls}
+            return result
+        
+        executor = _get_parallel_executor()
+        started_at = time.monotonic()
+        call_started = {}  # Имя -> время начала выполнения в потоке пула
+        
+        def run(name, call):
+            call_started[name] = time.monotonic()
+            return _run_in_worker(call)
+        
+        def deadline(name):
+            if name in call_started:
+                return call_started[name] + timeouts.get(name, default_timeout)
+            return started_at + queue_timeout
+        
+        def finish(name):
+            result.timings[name] = round(time.monotonic() - call_started.get(name, started_at), 3)
+        
+        names = {executor.submit(run, name, call): name for name, call in calls.items()}
+        pending = set(names)
+        while pending:
+            wait_for = min(deadline(names[future]) for future in pending) - time.monotonic()
+            done, pending = wait(pending, timeout=max(wait_for, 0), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = names[future]
+                try:
+                    result.data[name] = future.result()
+                except Exception as e:
+                    result.errors[name] = str(e)
+                finish(name)
+            
+            now = time.monotonic()
+            for future in [f for f in pending if deadline(names[f]) <= now]:
+                name = names[future]
+                pending.discard(future)
+                if future.cancel():
+                    result.errors[name] = f"Нет свободного потока за {queue_timeout} с"
+                else:
+                    result.errors[name] = f"Превышено время ожидания ({timeouts.get(name, default_timeout)} с)"
+                finish(name)
+        
+        if result.errors:
+            logger.warning(f"Параллельная загрузка Huntflow: ошибки {result.errors}")
+        print(f"⚡ Параллельная загрузка Huntflow: {len(calls)} запросов за {time.monotonic() - started_at:.2f} с")
+        return result
+    
     def get_accounts(self) -> Optional[List[Dict[str, Any]]]:
         """
         Получает список доступных организаций
@@ -535,12 +664,13 @@ class HuntflowService:
         """
         return self._make_request('GET', '/accounts')
     
-    def get_vacancies(self, account_id: int, **params) -> Optional[Dict[str, Any]]:
+    def get_vacancies(self, account_id: int, force_refresh: bool = False, **params) -> Optional[Dict[str, Any]]:
         """
-        Получает список вакансий
+        Получает список вакансий (с кэшированием в справочниках организации)
         
         Args:
             account_id: ID организации
+            force_refresh: Игнорировать кэш
             **params: Дополнительные параметры (count, page, state, etc.)
             
         Returns:
@@ -551,7 +681,12 @@ class HuntflowService:
         if query_params:
             endpoint += f"?{query_params}"
         
-        return self._make_request('GET', endpoint)
+        return self.reference_cache.get_data(
+            'vacancies', account_id,
+            lambda: self._make_request('GET', endpoint),
+            params={k: v for k, v in params.items() if v is not None},
+            force_refresh=force_refresh
+        )
     
     def get_vacancy(self, account_id: int, vacancy_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -582,29 +717,39 @@ class HuntflowService:
         
         return vacancy_data
     
-    def get_vacancy_statuses(self, account_id: int) -> Optional[Dict[str, Any]]:
+    def get_vacancy_statuses(self, account_id: int, force_refresh: bool = False) -> Optional[Dict[str, Any]]:
         """
-        Получает список статусов вакансий
+        Получает список статусов вакансий (с кэшированием в справочниках организации)
         
         Args:
             account_id: ID организации
+            force_refresh: Игнорировать кэш
             
         Returns:
             Список статусов или None
         """
-        return self._make_request('GET', f"/accounts/{account_id}/vacancies/statuses")
+        return self.reference_cache.get_data(
+            'statuses', account_id,
+            lambda: self._make_request('GET', f"/accounts/{account_id}/vacancies/statuses"),
+            force_refresh=force_refresh
+        )
     
-    def get_vacancy_additional_fields(self, account_id: int) -> Optional[Dict[str, Any]]:
+    def get_vacancy_additional_fields(self, account_id: int, force_refresh: bool = False) -> Optional[Dict[str, Any]]:
         """
-        Получает схему дополнительных полей вакансий
+        Получает схему дополнительных полей вакансий (с кэшированием в справочниках организации)
         
         Args:
             account_id: ID организации
+            force_refresh: Игнорировать кэш
             
         Returns:
             Схема полей или None
         """
-        return self._make_request('GET', f"/accounts/{account_id}/vacancies/additional_fields")
+        return self.reference_cache.get_data(
+            'additional_fields', account_id,
+            lambda: self._make_request('GET', f"/accounts/{account_id}/vacancies/additional_fields"),
+            force_refresh=force_refresh
+        )
     
     def update_vacancy(self, account_id: int, vacancy_id: int, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
@@ -622,9 +767,10 @@ class HuntflowService:
         result = self._make_request('PATCH', f"/accounts/{account_id}/vacancies/{vacancy_id}", json=data)
         
         if result:
-            # Сбрасываем кэш для этой вакансии
+            # Сбрасываем кэш для этой вакансии и справочники организации (список вакансий)
             user_id = self.user.id
             HuntflowAPICache.clear_vacancy(user_id, account_id, vacancy_id)
+            self.reference_cache.invalidate(account_id)
             print(f"🗑️ Сброшен кэш для вакансии: {vacancy_id}")
             
             # Получаем обновленные данные и сохраняем в кэш
@@ -636,17 +782,22 @@ class HuntflowService:
         
         return result
     
-    def get_applicant_questionary_schema(self, account_id: int) -> Optional[Dict[str, Any]]:
+    def get_applicant_questionary_schema(self, account_id: int, force_refresh: bool = False) -> Optional[Dict[str, Any]]:
         """
-        Получает схему анкеты кандидата
+        Получает схему анкеты кандидата (с кэшированием в справочниках организации)
         
         Args:
             account_id: ID организации
+            force_refresh: Игнорировать кэш
             
         Returns:
             Схема анкеты или None
         """
-        return self._make_request('GET', f"/accounts/{account_id}/applicants/questionary")
+        return self.reference_cache.get_data(
+            'questionary_schema', account_id,
+            lambda: self._make_request('GET', f"/accounts/{account_id}/applicants/questionary"),
+            force_refresh=force_refresh
+        )
     
     def get_applicants(self, account_id: int, **params) -> Optional[Dict[str, Any]]:
         """
@@ -721,17 +872,36 @@ class HuntflowService:
         """
         return self._make_request('GET', f"/accounts/{account_id}/applicants/{applicant_id}/logs")
     
-    def get_tags(self, account_id: int) -> Optional[Dict[str, Any]]:
+    def get_tags(self, account_id: int, force_refresh: bool = False) -> Optional[Dict[str, Any]]:
         """
-        Получает список меток организации
+        Получает список меток организации (с кэшированием в справочниках организации)
         
         Args:
             account_id: ID организации
+            force_refresh: Игнорировать кэш
             
         Returns:
             Список меток или None
         """
-        return self._make_request('GET', f"/accounts/{account_id}/tags")
+        entry = self.get_tags_entry(account_id, force_refresh=force_refresh)
+        return entry['data'] if entry else None
+    
+    def get_tags_entry(self, account_id: int, force_refresh: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Получает метки организации вместе с индексом имя -> ID
+        
+        Args:
+            account_id: ID организации
+            force_refresh: Игнорировать кэш
+            
+        Returns:
+            Запись справочного кэша {'data': ответ API, 'index': {имя: ID}} или None
+        """
+        return self.reference_cache.get(
+            'tags', account_id,
+            lambda: self._make_request('GET', f"/accounts/{account_id}/tags"),
+            force_refresh=force_refresh
+        )
     
     def update_applicant(self, account_id: int, applicant_id: int, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
@@ -1081,33 +1251,20 @@ class HuntflowService:
     
     def _log_request(self, method: str, endpoint: str, status_code: int, request_data: dict, response_text: str, is_error: bool = False):
         """
-        Логирует запрос к Huntflow API в базу данных
+        Логирует запрос к Huntflow API
+        
+        Запись ставится в очередь HuntflowLogWriter и сохраняется пачкой в фоне,
+        поэтому время запроса к API не включает запись в базу данных
         """
         try:
-            from .models import HuntflowLog
-            
-            # Определяем тип лога
-            log_type = 'ERROR' if is_error else method
-            
-            # Парсим ответ если это JSON
-            response_data = {}
-            if response_text and not is_error:
-                try:
-                    import json
-                    response_data = json.loads(response_text)
-                except:
-                    response_data = {'raw_response': response_text[:1000]}  # Ограничиваем размер
-            
-            # Создаем лог
-            HuntflowLog.objects.create(
-                log_type=log_type,
-                endpoint=endpoint,
+            huntflow_log_writer.record(
+                user_id=self.user.id,
                 method=method,
+                endpoint=endpoint,
                 status_code=status_code,
                 request_data=request_data,
-                response_data=response_data,
-                error_message=response_text if is_error else '',
-                user=self.user
+                response_text=response_text,
+                is_error=is_error
             )
         except Exception as e:
             print(f"⚠️ Не удалось сохранить лог: {e}")
@@ -1148,7 +1305,8 @@ class HuntflowService:
             print(f"🔍 API запрос: POST {url}")
             print(f"📤 Файл: {file_name} ({len(file_data)} байт)")
             
-            response = requests.post(
+            response = http_pool.request(
+                'POST',
                 url=url,
                 headers=headers,
                 files=files,
@@ -1859,14 +2017,16 @@ class HuntflowService:
         try:
             print(f"🔍 Ищем тег: {tag_name}")
             
-            # Сначала пытаемся найти существующий тег
-            tags_response = self._make_request('GET', f"/accounts/{account_id}/tags")
-            
-            if tags_response and 'items' in tags_response:
-                for tag in tags_response['items']:
-                    if tag.get('name') == tag_name:
-                        print(f"✅ Найден существующий тег: {tag_name} (ID: {tag['id']})")
-                        return tag['id']
+            # Сначала ищем существующий тег по индексу справочного кэша
+            tags_entry = self.get_tags_entry(account_id)
+            tag_id = tags_entry['index'].get(tag_name) if tags_entry else None
+            if tag_id is None and tags_entry is not None:
+                # Метку могли создать в Huntflow или другим процессом после загрузки кэша
+                tags_entry = self.get_tags_entry(account_id, force_refresh=True)
+                tag_id = tags_entry['index'].get(tag_name) if tags_entry else None
+            if tag_id is not None:
+                print(f"✅ Найден существующий тег: {tag_name} (ID: {tag_id})")
+                return tag_id
             
             # Если тег не найден, создаем новый
             print(f"🔍 Создаем новый тег: {tag_name}")
@@ -1877,6 +2037,7 @@ class HuntflowService:
             new_tag = self._make_request('POST', f"/accounts/{account_id}/tags", json=tag_data)
             
             if new_tag and 'id' in new_tag:
+                self.reference_cache.invalidate(account_id)
                 print(f"✅ Создан новый тег: {tag_name} (ID: {new_tag['id']})")
                 return new_tag['id']
             else:
@@ -1901,20 +2062,18 @@ class HuntflowService:
         try:
             print(f"🔍 Ищем тег для исполнителя: {assignee_name}")
             
-            # Получаем все теги из Huntflow
-            tags_response = self._make_request('GET', f"/accounts/{account_id}/tags")
+            # Получаем теги из справочного кэша (запрос к API только при промахе)
+            tags_entry = self.get_tags_entry(account_id)
+            tags_response = tags_entry['data'] if tags_entry else None
             
             if tags_response and 'items' in tags_response:
                 print(f"📋 Найдено тегов: {len(tags_response['items'])}")
                 
-                # Ищем тег по точному совпадению имени
-                for tag in tags_response['items']:
-                    tag_name = tag.get('name', '')
-                    print(f"  - Проверяем тег: '{tag_name}'")
-                    
-                    if tag_name == assignee_name:
-                        print(f"✅ Найден точный тег: {tag_name} (ID: {tag['id']})")
-                        return tag['id']
+                # Ищем тег по точному совпадению имени через индекс
+                tag_id = tags_entry['index'].get(assignee_name)
+                if tag_id is not None:
+                    print(f"✅ Найден точный тег: {assignee_name} (ID: {tag_id})")
+                    return tag_id
                 
                 # Если точного совпадения нет, ищем по частичному совпадению
                 print(f"🔍 Точного совпадения нет, ищем частичное совпадение...")
@@ -1968,6 +2127,7 @@ class HuntflowService:
             result = self._make_request('POST', f"/accounts/{account_id}/tags", json=tag_data)
             
             if result and 'id' in result:
+                self.reference_cache.invalidate(account_id)
                 print(f"✅ Тег {tag_name} создан с ID: {result['id']}")
                 return result['id']
             else:
@@ -2329,7 +2489,8 @@ class HuntflowService:
                 print(f"🔍 Обновляем основные поля кандидата {candidate_id}")
                 print(f"📤 Данные для обновления: {main_fields}")
                 
-                response = requests.patch(
+                response = http_pool.request(
+                    'PATCH',
                     url,
                     headers=self.headers,
                     json=main_fields,
@@ -2351,7 +2512,8 @@ class HuntflowService:
                 print(f"🔍 Обновляем дополнительные поля кандидата {candidate_id}")
                 print(f"📤 Данные для обновления: {additional_fields}")
                 
-                response = requests.patch(
+                response = http_pool.request(
+                    'PATCH',
                     url,
                     headers=self.headers,
                     json=additional_fields,
@@ -200,3 +200,18 @@ def get_token_health_status(user, now):
     
     # Здоровый: токены валидны более 24 часов
     return 'healthy'
+
+@shared_task
+def write_huntflow_logs(entries):
+    """
+    Записывает пачку логов Huntflow API одним bulk_create
+    Используется HuntflowLogWriter в режиме 'celery'
+    """
+    from .log_writer import write_log_entries
+    
+    for entry in entries:
+        entry['created_at'] = datetime.fromisoformat(entry['created_at'])
+    
+    written = write_log_entries(entries)
+    logger.info(f"📝 Записано логов Huntflow: {written}")
+    return {'written': written}
@@ -1,3 +1,337 @@
-from django.test import TestCase
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from .accounts_cache import HuntflowAccountsCache
+from .log_writer import HuntflowLogWriter
+from .models import HuntflowLog
+from .reference_cache import HuntflowReferenceCache
+from .services import HuntflowService
+from .views import _parse_pages
+
+User = get_user_model()
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+ACCOUNTS = {'items': [{'id': 11, 'name': 'Организация'}]}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class HuntflowAccountsCacheTests(TestCase):
+    """Кэш списка организаций Huntflow для сайдбара и определения account_id"""
+
+    def setUp(self):
+        cache.clear()
+        HuntflowAccountsCache._local.clear()
+        self.user = User.objects.create_user(
+            username='hf_user', password='test', active_system='sandbox',
+            huntflow_sandbox_url='https://sandbox.example.com', huntflow_sandbox_api_key='key-1',
+        )
+        patcher = patch('apps.huntflow.services.HuntflowService')
+        self.service_class = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.service_class.return_value.get_accounts.return_value = ACCOUNTS
+
+    def _api_calls(self):
+        return self.service_class.return_value.get_accounts.call_count
+
+    def test_repeated_lookups_use_cache(self):
+        for _ in range(3):
+            self.assertEqual(HuntflowAccountsCache.get_accounts(self.user), ACCOUNTS)
+        self.assertEqual(self._api_calls(), 1)
+
+        # Запись в Redis переживает сброс памяти процесса
+        HuntflowAccountsCache._local.clear()
+        HuntflowAccountsCache.get_accounts(self.user)
+        self.assertEqual(self._api_calls(), 1)
+
+    def test_force_refresh(self):
+        HuntflowAccountsCache.get_accounts(self.user)
+        HuntflowAccountsCache.get_accounts(self.user, force_refresh=True)
+        self.assertEqual(self._api_calls(), 2)
+
+    def test_empty_response_is_cached_briefly(self):
+        # Учетные данные не работают: /accounts не запрашивается на каждой странице
+        self.service_class.return_value.get_accounts.return_value = None
+        with patch('apps.huntflow.accounts_cache.cache.set', wraps=cache.set) as cache_set:
+            self.assertIsNone(HuntflowAccountsCache.get_accounts(self.user))
+        self.assertEqual(cache_set.call_args.args[2], HuntflowAccountsCache.EMPTY_TTL)
+
+        HuntflowAccountsCache._local.clear()
+        self.assertIsNone(HuntflowAccountsCache.get_accounts(self.user))
+        self.assertEqual(self._api_calls(), 1)
+
+    def test_invalidate_bumps_version(self):
+        HuntflowAccountsCache.get_accounts(self.user)
+        with patch.object(cache, 'keys', create=True) as keys:
+            HuntflowAccountsCache.invalidate(self.user.pk)
+        keys.assert_not_called()
+
+        HuntflowAccountsCache.get_accounts(self.user)
+        self.assertEqual(self._api_calls(), 2)
+
+    @override_settings(API_CACHE_TIMEOUT={'huntflow_accounts': 0})
+    def test_stale_entry_is_served_while_refreshing(self):
+        HuntflowAccountsCache.get_accounts(self.user)
+        HuntflowAccountsCache._local.clear()
+        with patch.object(HuntflowAccountsCache, '_schedule_refresh') as schedule_refresh:
+            self.assertEqual(HuntflowAccountsCache.get_accounts(self.user), ACCOUNTS)
+        schedule_refresh.assert_called_once()
+        self.assertEqual(self._api_calls(), 1)
+
+    def test_credential_change_uses_new_entry(self):
+        HuntflowAccountsCache.get_accounts(self.user)
+
+        with patch.object(HuntflowAccountsCache, 'invalidate', wraps=HuntflowAccountsCache.invalidate) as invalidate:
+            self.user.first_name = 'Имя'
+            self.user.save(update_fields=['first_name'])
+            invalidate.assert_not_called()
+
+            self.user.huntflow_sandbox_api_key = 'key-2'
+            self.user.save()
+            invalidate.assert_called_once_with(self.user.pk)
+
+        HuntflowAccountsCache.get_accounts(self.user)
+        self.assertEqual(self._api_calls(), 2)
+
+
+# Фоновый поток не сбрасывает очередь сам - тесты вызывают flush()
+BUFFERED_LOGS = {'mode': 'buffered', 'batch_size': 10000, 'flush_interval': 3600}
+
+
+class HuntflowLogWriterTests(TestCase):
+    """Буферизованная запись логов Huntflow API"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='log_user', password='test')
+        self.writer = HuntflowLogWriter()
+
+    def _record(self, status_code=200, response_text='{"ok": true}', is_error=False):
+        self.writer.record(self.user.id, 'GET', '/accounts', status_code, {'page': 1}, response_text, is_error)
+
+    @override_settings(HUNTFLOW_LOG_SETTINGS=BUFFERED_LOGS)
+    def test_records_are_written_in_one_batch_on_flush(self):
+        for _ in range(5):
+            self._record()
+        self._record(status_code=500, response_text='Internal error', is_error=True)
+        self.assertEqual(HuntflowLog.objects.count(), 0)
+
+        with patch.object(HuntflowLog.objects, 'bulk_create', wraps=HuntflowLog.objects.bulk_create) as bulk_create:
+            self.writer.flush()
+        bulk_create.assert_called_once()
+
+        self.assertEqual(HuntflowLog.objects.filter(log_type='GET', response_data={'ok': True}).count(), 5)
+        self.assertEqual(HuntflowLog.objects.get(log_type='ERROR').error_message, 'Internal error')
+        self.assertEqual(self.writer.stats['queued'], 6)
+        self.assertEqual(self.writer.stats['written'], 6)
+
+    @override_settings(HUNTFLOW_LOG_SETTINGS={'mode': 'sync', 'success_sample_rate': 0.0, 'max_response_chars': 5})
+    def test_sampling_keeps_errors_and_truncates(self):
+        self._record()
+        self._record(status_code=404, response_text='Not found', is_error=True)
+
+        self.assertEqual(self.writer.stats['sampled_out'], 1)
+        self.assertEqual(list(HuntflowLog.objects.values_list('error_message', flat=True)), ['Not f'])
+
+    @override_settings(HUNTFLOW_LOG_SETTINGS=dict(BUFFERED_LOGS, max_queue_size=2))
+    def test_full_queue_drops_records(self):
+        for _ in range(3):
+            self._record()
+        self.assertEqual(self.writer.stats['dropped'], 1)
+
+    @override_settings(HUNTFLOW_LOG_SETTINGS=BUFFERED_LOGS)
+    def test_stats_are_exact_under_concurrent_records(self):
+        def record_many():
+            for _ in range(200):
+                self._record()
+
+        threads = [threading.Thread(target=record_many) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.writer.stats['queued'], 1600)
+        self.writer._drain()
+
+
+class HuntflowFetchParallelTests(SimpleTestCase):
+    """Параллельная загрузка данных страницы кандидата"""
+
+    def setUp(self):
+        self.service = HuntflowService(Mock(id=1, active_system='sandbox'))
+        patcher = patch.object(HuntflowService, '_get_headers', return_value={})
+        self.get_headers = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def _slow(value, delay=0.2):
+        def call():
+            time.sleep(delay)
+            return value
+        return call
+
+    def test_calls_run_concurrently(self):
+        started_at = time.monotonic()
+        result = self.service.fetch_parallel({name: self._slow(name) for name in ('applicant', 'tags', 'statuses')})
+        elapsed = time.monotonic() - started_at
+
+        self.assertTrue(result.ok)
+        self.assertEqual(result.data, {'applicant': 'applicant', 'tags': 'tags', 'statuses': 'statuses'})
+        # Последовательно - не меньше 0.6 с
+        self.assertLess(elapsed, 0.5)
+        self.get_headers.assert_called_once()
+
+    def test_failed_and_slow_calls_do_not_fail_the_bundle(self):
+        def broken():
+            raise ValueError('Ошибка API')
+
+        result = self.service.fetch_parallel(
+            {'applicant': self._slow({'id': 1}, 0), 'logs': broken, 'vacancies': self._slow([], 1.0)},
+            timeouts={'vacancies': 0.1},
+        )
+
+        self.assertFalse(result.ok)
+        self.assertEqual(result.get('applicant'), {'id': 1})
+        self.assertEqual(result.get('logs', 'нет'), 'нет')
+        self.assertEqual(result.errors['logs'], 'Ошибка API')
+        self.assertIn('Превышено время ожидания', result.errors['vacancies'])
+        self.assertEqual(set(result.timings), {'applicant', 'logs', 'vacancies'})
+
+    def test_timeout_starts_when_call_starts(self):
+        # Один поток: второй вызов ждет в очереди, пока выполняется первый
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        with patch('apps.huntflow.services._get_parallel_executor', return_value=executor):
+            result = self.service.fetch_parallel(
+                {'first': self._slow(1), 'second': self._slow(2)}, timeouts={'second': 0.3}
+            )
+
+        self.assertTrue(result.ok, result.errors)
+        self.assertLess(result.timings['second'], 0.3)
+
+    @override_settings(HUNTFLOW_PARALLEL_SETTINGS={'queue_timeout': 0.1})
+    def test_queued_call_gives_up_without_free_worker(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        with patch('apps.huntflow.services._get_parallel_executor', return_value=executor):
+            result = self.service.fetch_parallel({'first': self._slow(1), 'second': self._slow(2)})
+
+        self.assertEqual(result.data, {'first': 1})
+        self.assertEqual(result.errors, {'second': 'Нет свободного потока за 0.1 с'})
+
+    def test_token_error_skips_all_calls(self):
+        self.get_headers.side_effect = RuntimeError('Токен недействителен')
+        call = Mock()
+
+        result = self.service.fetch_parallel({'applicant': call, 'tags': call})
+
+        call.assert_not_called()
+        self.assertEqual(result.errors, {'applicant': 'Токен недействителен', 'tags': 'Токен недействителен'})
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class HuntflowReferenceCacheTests(SimpleTestCase):
+    """Справочники организации Huntflow и поиск меток по имени"""
+
+    TAGS = {'items': [{'id': 1, 'name': 'clickup-new'}, {'id': 2, 'name': 'Иван Петров'}]}
+
+    def setUp(self):
+        cache.clear()
+        HuntflowReferenceCache._local.clear()
+        self.user = Mock(id=1, active_system='sandbox', huntflow_sandbox_url='https://sandbox.example.com')
+        self.service = HuntflowService(self.user)
+        patcher = patch.object(HuntflowService, '_make_request', side_effect=self._api)
+        self.make_request = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.created = []
+
+    def _api(self, method, endpoint, **kwargs):
+        if method == 'POST':
+            tag = {'id': 10 + len(self.created), 'name': kwargs['json']['name']}
+            self.created.append(tag)
+            return tag
+        return {'items': self.TAGS['items'] + self.created}
+
+    def _tag_requests(self):
+        return [c for c in self.make_request.call_args_list if c.args == ('GET', '/accounts/5/tags')]
+
+    def test_tags_are_loaded_once(self):
+        for _ in range(3):
+            self.assertEqual(self.service.get_tags(5), self.TAGS)
+        self.assertEqual(self.service._find_tag_by_name(5, 'Иван Петров'), 2)
+        self.assertEqual(len(self._tag_requests()), 1)
+
+        # Другой процесс: локальной копии нет, данные берутся из общего кэша
+        HuntflowReferenceCache._local.clear()
+        self.assertEqual(HuntflowService(self.user).get_tags_entry(5)['index']['clickup-new'], 1)
+        self.assertEqual(len(self._tag_requests()), 1)
+
+    def test_tag_lookup_uses_index_then_partial_match(self):
+        self.assertEqual(self.service._get_or_create_tag(5, 'clickup-new'), 1)
+        self.assertEqual(self.service._find_tag_by_name(5, 'Петров'), 2)
+        self.assertEqual(self.make_request.call_count, 1)
+
+    def test_created_tag_invalidates_cache(self):
+        self.assertEqual(self.service._get_or_create_tag(5, 'Новая метка'), 10)
+        # Промах индекса: метки перечитываются из API перед созданием
+        self.assertEqual(len(self._tag_requests()), 2)
+
+        # Версия организации увеличена: все процессы перечитывают метки
+        HuntflowReferenceCache._local.clear()
+        self.assertEqual(self.service._get_or_create_tag(5, 'Новая метка'), 10)
+        self.assertEqual(len(self._tag_requests()), 3)
+        self.assertEqual(len(self.created), 1)
+
+    def test_tag_created_elsewhere_is_not_duplicated(self):
+        self.service.get_tags(5)
+        # Метку создали в Huntflow после загрузки кэша
+        self.TAGS = {'items': self.TAGS['items'] + [{'id': 7, 'name': 'Внешняя метка'}]}
+
+        self.assertEqual(self.service._get_or_create_tag(5, 'Внешняя метка'), 7)
+        self.assertEqual(self.created, [])
+        self.assertEqual(self.service._get_or_create_tag(5, 'Внешняя метка'), 7)
+        self.assertEqual(len(self._tag_requests()), 2)
+
+    def test_local_copies_are_capped(self):
+        with patch.object(HuntflowReferenceCache, 'MAX_LOCAL_ENTRIES', 3):
+            for account_id in range(5):
+                self.service.get_tags(account_id)
+            # Вытесняются самые давние копии
+            self.assertEqual(
+                [key.rsplit('_', 2)[1] for key in HuntflowReferenceCache._local], ['2', '3', '4']
+            )
+
+    def test_systems_do_not_share_entries(self):
+        self.service.get_tags(5)
+        self.user.active_system = 'prod'
+        self.user.huntflow_prod_url = 'https://prod.example.com'
+        self.service.get_tags(5)
+        self.assertEqual(len(self._tag_requests()), 2)
+
+
+@override_settings(HUNTFLOW_PARALLEL_SETTINGS={'max_pages': 3})
+class HuntflowPagesParameterTests(TestCase):
+    """Параметр pages=1,2,3 списков вакансий и кандидатов"""
+
+    def _pages(self, value):
+        return _parse_pages(RequestFactory().get('/', {'pages': value}))
+
+    def test_invalid_and_repeated_pages_are_skipped(self):
+        self.assertEqual(self._pages(''), [])
+        self.assertEqual(self._pages('2, 1,x,2,0,-3,1.5,'), [2, 1])
+
+    def test_too_many_pages_are_rejected(self):
+        with self.assertRaisesMessage(ValueError, 'не больше 3 страниц'):
+            self._pages('1,2,3,4')
+
+        self.client.force_login(User.objects.create_user(username='pages_user', password='test'))
+        with patch('apps.huntflow.views.HuntflowService') as service_class:
+            response = self.client.get(reverse('huntflow:get_vacancies_ajax', args=[5]), {'pages': '1,2,3,4'})
+        self.assertEqual(response.status_code, 400)
+        service_class.return_value.fetch_parallel.assert_not_called()
@@ -1,7 +1,7 @@
-import requests
 import time
 from django.utils import timezone
 from django.conf import settings
+from logic.base.http_pool import http_pool
 import logging
 
 logger = logging.getLogger(__name__)
@@ -59,7 +59,7 @@ class HuntflowTokenService:
                 
                 logger.info(f"Обновляем токен для пользователя {self.user.username} (попытка {attempt + 1}/{max_retries})")
                 
-                response = requests.post(url, json=data, headers=headers, timeout=30)
+                response = http_pool.request('POST', url, json=data, headers=headers, timeout=30)
                 
                 if response.status_code == 200:
                     token_data = response.json()
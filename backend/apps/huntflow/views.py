@@ -10,12 +10,15 @@ from logic.base.response_handler import UnifiedResponseHandler
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.conf import settings
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 import json
+from functools import partial
 
 from .services import HuntflowService
+from .accounts_cache import HuntflowAccountsCache
 
 
 def get_correct_account_id(user, fallback_account_id=None):
@@ -27,12 +30,10 @@ def get_correct_account_id(user, fallback_account_id=None):
     - fallback_account_id: резервный account_id если не удалось получить из API
     
     ИСТОЧНИКИ ДАННЫХ:
-    - HuntflowService: сервис для работы с Huntflow API
-    - Huntflow API: получение списка аккаунтов пользователя
+    - HuntflowAccountsCache: кэшированный список аккаунтов пользователя
     
     ОБРАБОТКА:
-    - Создание HuntflowService для пользователя
-    - Получение списка аккаунтов из API
+    - Получение списка аккаунтов из кэша (API запрашивается только при промахе)
     - Извлечение первого доступного account_id
     - Обработка ошибок с fallback значением
     
@@ -40,17 +41,16 @@ def get_correct_account_id(user, fallback_account_id=None):
     - account_id: правильный ID аккаунта для работы с Huntflow API
     
     СВЯЗИ:
-    - Использует: HuntflowService, Huntflow API
+    - Использует: HuntflowAccountsCache
     - Передает: account_id для использования в других функциях
     - Может вызываться из: huntflow views, services
     """
     try:
-        huntflow_service = HuntflowService(user)
-        accounts = huntflow_service.get_accounts()
+        accounts = HuntflowAccountsCache.get_accounts(user)
         
         if accounts and 'items' in accounts and accounts['items']:
             account_id = accounts['items'][0]['id']
-            print(f"🔍 Получен account_id из API: {account_id}")
+            print(f"🔍 Получен account_id: {account_id}")
             return account_id
         else:
             print(f"⚠️ Не удалось получить account_id из API, используем fallback: {fallback_account_id}")
@@ -141,7 +141,7 @@ def vacancies_list(request, account_id):
     
     ВХОДЯЩИЕ ДАННЫЕ:
     - account_id: ID организации
-    - request.GET: page, count, state (параметры фильтрации)
+    - request.GET: page или pages (через запятую), count, state (параметры фильтрации)
     - request.user: аутентифицированный пользователь
     
     ИСТОЧНИКИ ДАННЫХ:
@@ -289,7 +289,7 @@ def applicants_list(request, account_id):
     
     ВХОДЯЩИЕ ДАННЫЕ:
     - account_id: ID организации
-    - request.GET: page, count, status, vacancy (параметры фильтрации)
+    - request.GET: page или pages (через запятую), count, status, vacancy (параметры фильтрации)
     - request.user: аутентифицированный пользователь
     
     ИСТОЧНИКИ ДАННЫХ:
@@ -404,6 +404,7 @@ def applicant_detail(request, account_id, applicant_id):
     
     ОБРАБОТКА:
     - Получение правильного account_id через get_correct_account_id
+    - Параллельная загрузка всех данных страницы через HuntflowService.fetch_parallel
     - Получение информации о кандидате и его анкете
     - Получение схемы анкеты
     - Получение логов кандидата для поиска комментариев
@@ -425,27 +426,36 @@ def applicant_detail(request, account_id, applicant_id):
         
         huntflow_service = HuntflowService(request.user)
         
-        # Получаем информацию о кандидате с правильным account_id
-        applicant = huntflow_service.get_applicant(correct_account_id, applicant_id)
+        # Все данные страницы независимы - загружаем их параллельно
+        bundle = huntflow_service.fetch_parallel({
+            'applicant': partial(huntflow_service.get_applicant, correct_account_id, applicant_id),
+            'questionary': partial(huntflow_service.get_applicant_questionary, correct_account_id, applicant_id),
+            'questionary_schema': partial(huntflow_service.get_applicant_questionary_schema, correct_account_id),
+            'applicant_logs': partial(huntflow_service.get_applicant_logs, correct_account_id, applicant_id),
+            'statuses': partial(huntflow_service.get_vacancy_statuses, correct_account_id),
+            'vacancies': partial(huntflow_service.get_vacancies, correct_account_id, count=100),
+            'tags': partial(huntflow_service.get_tags, correct_account_id),
+            'accounts': partial(HuntflowAccountsCache.get_accounts, request.user),
+        })
+        
+        # Информация о кандидате с правильным account_id
+        applicant = bundle.get('applicant')
         
         if not applicant:
             messages.error(request, 'Кандидат не найден')
             return redirect('huntflow:applicants_list', account_id=correct_account_id)
         
-        # Получаем анкету кандидата
-        questionary = huntflow_service.get_applicant_questionary(correct_account_id, applicant_id)
+        # Анкета кандидата и ее схема
+        questionary = bundle.get('questionary')
+        questionary_schema = bundle.get('questionary_schema')
         
-        # Получаем схему анкеты
-        questionary_schema = huntflow_service.get_applicant_questionary_schema(correct_account_id)
+        # Логи кандидата для поиска комментариев
+        applicant_logs = bundle.get('applicant_logs')
         
-        # Получаем логи кандидата для поиска комментариев
-        applicant_logs = huntflow_service.get_applicant_logs(correct_account_id, applicant_id)
-        # print(f"DEBUG: Получены логи кандидата {applicant_id}: {applicant_logs}")
-        
-        # Получаем статусы, вакансии и метки для обогащения данных
-        statuses = huntflow_service.get_vacancy_statuses(correct_account_id)
-        vacancies = huntflow_service.get_vacancies(correct_account_id, count=100)
-        tags = huntflow_service.get_tags(correct_account_id)
+        # Статусы, вакансии и метки для обогащения данных
+        statuses = bundle.get('statuses')
+        vacancies = bundle.get('vacancies')
+        tags = bundle.get('tags')
         
         # Создаем словари для быстрого поиска
         statuses_dict = {}
@@ -583,8 +593,8 @@ def applicant_detail(request, account_id, applicant_id):
                     'required': False
                 }
         
-        # Получаем информацию об организации для хлебных крошек
-        accounts = huntflow_service.get_accounts()
+        # Информация об организации для хлебных крошек
+        accounts = bundle.get('accounts')
         account_name = f'Организация {account_id}'
         if accounts and 'items' in accounts:
             for account in accounts['items']:
@@ -639,6 +649,7 @@ def applicant_edit(request, account_id, applicant_id):
     
     ОБРАБОТКА:
     - Получение правильного account_id через get_correct_account_id
+    - Параллельная загрузка всех данных страницы через HuntflowService.fetch_parallel
     - Получение текущих данных кандидата
     - Обработка POST запроса для обновления данных
     - Обновление основных полей кандидата
@@ -662,23 +673,32 @@ def applicant_edit(request, account_id, applicant_id):
         
         huntflow_service = HuntflowService(request.user)
         
-        # Получаем информацию о кандидате с правильным account_id
-        applicant = huntflow_service.get_applicant(correct_account_id, applicant_id)
+        # Все данные формы независимы - загружаем их параллельно
+        bundle = huntflow_service.fetch_parallel({
+            'applicant': partial(huntflow_service.get_applicant, correct_account_id, applicant_id),
+            'questionary': partial(huntflow_service.get_applicant_questionary, correct_account_id, applicant_id),
+            'questionary_schema': partial(huntflow_service.get_applicant_questionary_schema, correct_account_id),
+            'statuses': partial(huntflow_service.get_vacancy_statuses, correct_account_id),
+            'vacancies': partial(huntflow_service.get_vacancies, correct_account_id, count=100),
+            'tags': partial(huntflow_service.get_tags, correct_account_id),
+            'accounts': partial(HuntflowAccountsCache.get_accounts, request.user),
+        })
+        
+        # Информация о кандидате с правильным account_id
+        applicant = bundle.get('applicant')
         
         if not applicant:
             messages.error(request, 'Кандидат не найден')
             return redirect('huntflow:applicants_list', account_id=correct_account_id)
         
-        # Получаем анкету кандидата
-        questionary = huntflow_service.get_applicant_questionary(correct_account_id, applicant_id)
-        
-        # Получаем схему анкеты
-        questionary_schema = huntflow_service.get_applicant_questionary_schema(correct_account_id)
+        # Анкета кандидата и ее схема
+        questionary = bundle.get('questionary')
+        questionary_schema = bundle.get('questionary_schema')
         
-        # Получаем статусы, вакансии и метки для обогащения данных
-        statuses = huntflow_service.get_vacancy_statuses(correct_account_id)
-        vacancies = huntflow_service.get_vacancies(correct_account_id, count=100)
-        tags = huntflow_service.get_tags(correct_account_id)
+        # Статусы, вакансии и метки для обогащения данных
+        statuses = bundle.get('statuses')
+        vacancies = bundle.get('vacancies')
+        tags = bundle.get('tags')
         
         # Создаем словари для быстрого поиска
         statuses_dict = {}
@@ -928,8 +948,8 @@ def applicant_edit(request, account_id, applicant_id):
             except Exception as e:
                 messages.error(request, f'Ошибка при обновлении: {str(e)}')
         
-        # Получаем информацию об организации для хлебных крошек
-        accounts = huntflow_service.get_accounts()
+        # Информация об организации для хлебных крошек
+        accounts = bundle.get('accounts')
         account_name = f'Организация {correct_account_id}'
         if accounts and 'items' in accounts:
             for account in accounts['items']:
@@ -1091,6 +1111,54 @@ def create_comment_ajax(request, account_id, applicant_id):
         })
 
 
+def _merge_paged_results(bundle, pages):
+    """
+    Объединяет страницы списка, загруженные параллельно через fetch_parallel
+    
+    ВХОДЯЩИЕ ДАННЫЕ:
+    - bundle: ParallelResult с ключами page_<номер>
+    - pages: список номеров страниц в порядке запроса
+    
+    ВЫХОДЯЩИЕ ДАННЫЕ:
+    - словарь в формате ответа Huntflow со склеенным items и списком незагруженных страниц
+    """
+    merged = {'items': [], 'loaded_pages': [], 'failed_pages': {}}
+    for page in pages:
+        key = f'page_{page}'
+        page_data = bundle.get(key)
+        if page_data:
+            merged['items'].extend(page_data.get('items', []))
+            merged['loaded_pages'].append(page)
+            for meta_key in ('count', 'total_pages', 'total_items'):
+                if meta_key in page_data:
+                    merged[meta_key] = page_data[meta_key]
+        else:
+            merged['failed_pages'][page] = bundle.errors.get(key, 'Пустой ответ API')
+    return merged
+
+
+def _parse_pages(request):
+    """
+    Список страниц из параметра pages=1,2,3 (пустой список, если не передан)
+    
+    Нечисловые и неположительные значения пропускаются, повторы убираются.
+    Больше HUNTFLOW_PARALLEL_SETTINGS['max_pages'] страниц - ValueError.
+    """
+    pages = []
+    for value in request.GET.get('pages', '').split(','):
+        try:
+            page = int(value.strip())
+        except ValueError:
+            continue
+        if page > 0 and page not in pages:
+            pages.append(page)
+    
+    max_pages = getattr(settings, 'HUNTFLOW_PARALLEL_SETTINGS', {}).get('max_pages', 10)
+    if len(pages) > max_pages:
+        raise ValueError(f'Можно запросить не больше {max_pages} страниц за раз')
+    return pages
+
+
 @login_required
 @require_http_methods(["GET"])
 def get_vacancies_ajax(request, account_id):
@@ -1109,6 +1177,7 @@ def get_vacancies_ajax(request, account_id):
     ОБРАБОТКА:
     - Получение параметров фильтрации из GET запроса
     - Получение списка вакансий через HuntflowService
+    - Для нескольких страниц - параллельная загрузка и объединение результатов
     
     ВЫХОДЯЩИЕ ДАННЫЕ:
     - JsonResponse с данными вакансий
@@ -1126,13 +1195,31 @@ def get_vacancies_ajax(request, account_id):
         count = request.GET.get('count', 30)
         state = request.GET.get('state', '')
         
-        # Получаем вакансии
-        vacancies = huntflow_service.get_vacancies(
-            account_id=account_id,
-            page=page,
-            count=count,
-            state=state if state else None
-        )
+        try:
+            pages = _parse_pages(request)
+        except ValueError as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
+        if len(pages) > 1:
+            # Несколько страниц загружаем параллельно
+            bundle = huntflow_service.fetch_parallel({
+                f'page_{page_number}': partial(
+                    huntflow_service.get_vacancies,
+                    account_id=account_id,
+                    page=page_number,
+                    count=count,
+                    state=state if state else None
+                )
+                for page_number in pages
+            })
+            vacancies = _merge_paged_results(bundle, pages)
+        else:
+            # Получаем вакансии
+            vacancies = huntflow_service.get_vacancies(
+                account_id=account_id,
+                page=pages[0] if pages else page,
+                count=count,
+                state=state if state else None
+            )
         
         return JsonResponse({
             'success': True,
@@ -1164,6 +1251,7 @@ def get_applicants_ajax(request, account_id):
     ОБРАБОТКА:
     - Получение параметров фильтрации из GET запроса
     - Получение списка кандидатов через HuntflowService
+    - Для нескольких страниц - параллельная загрузка и объединение результатов
     
     ВЫХОДЯЩИЕ ДАННЫЕ:
     - JsonResponse с данными кандидатов
@@ -1182,14 +1270,33 @@ def get_applicants_ajax(request, account_id):
         status = request.GET.get('status', '')
         vacancy = request.GET.get('vacancy', '')
         
-        # Получаем кандидатов
-        applicants = huntflow_service.get_applicants(
-            account_id=account_id,
-            page=page,
-            count=count,
-            status=status if status else None,
-            vacancy=vacancy if vacancy else None
-        )
+        try:
+            pages = _parse_pages(request)
+        except ValueError as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
+        if len(pages) > 1:
+            # Несколько страниц загружаем параллельно
+            bundle = huntflow_service.fetch_parallel({
+                f'page_{page_number}': partial(
+                    huntflow_service.get_applicants,
+                    account_id=account_id,
+                    page=page_number,
+                    count=count,
+                    status=status if status else None,
+                    vacancy=vacancy if vacancy else None
+                )
+                for page_number in pages
+            })
+            applicants = _merge_paged_results(bundle, pages)
+        else:
+            # Получаем кандидатов
+            applicants = huntflow_service.get_applicants(
+                account_id=account_id,
+                page=pages[0] if pages else page,
+                count=count,
+                status=status if status else None,
+                vacancy=vacancy if vacancy else None
+            )
         
         return JsonResponse({
             'success': True,
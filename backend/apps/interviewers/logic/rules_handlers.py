@@ -5,6 +5,7 @@
 from typing import Dict, Any, Optional
 from django.shortcuts import get_object_or_404
 from django.contrib import messages
+from django.http import Http404
 from django.db.models import Q
 
 from ..models import InterviewRule
@@ -216,6 +217,44 @@ class RuleHandler:
             }
 
 
+    @staticmethod
+    def check_grades_in_range_logic(rule_id: int, grade_ids) -> Dict[str, Any]:
+        """
+        Пакетная проверка грейдов для правила (например, грейды нескольких кандидатов)
+
+        Args:
+            rule_id: ID правила
+            grade_ids: ID грейдов
+
+        Returns:
+            Dict[str, Any]: Результат проверки по каждому грейду
+        """
+        try:
+            rule = get_object_or_404(InterviewRule, pk=rule_id)
+
+            from apps.finance.models import Grade
+            grade_names = dict(Grade.objects.filter(id__in=grade_ids).values_list('id', 'name'))
+            in_range = rule.grades_in_range(grade_names)
+
+            return {
+                'success': True,
+                'rule_name': rule.name,
+                'grade_range': rule.get_grade_range(),
+                'grades': [
+                    {'grade_id': grade_id, 'grade_name': grade_name, 'is_in_range': in_range[grade_id]}
+                    for grade_id, grade_name in grade_names.items()
+                ]
+            }
+
+        except Http404:
+            raise
+        except Exception as e:
+            return {
+                'success': False,
+                'message': f'Ошибка: {str(e)}'
+            }
+
+
 class RuleApiHandler:
     """Обработчик для API endpoints правил"""
 
@@ -297,6 +336,29 @@ class RuleApiHandler:
 
         return RuleHandler.check_grade_in_range_logic(rule_id, grade_id)
 
+    @staticmethod
+    def check_grades_handler(data: Dict[str, Any], request) -> Dict[str, Any]:
+        """
+        Обработчик API для пакетной проверки грейдов
+
+        Args:
+            data: Данные запроса
+            request: HTTP запрос
+
+        Returns:
+            Dict[str, Any]: Результат проверки по каждому грейду
+        """
+        rule_id = data.get('pk') or data.get('id')
+        grade_ids = data.get('grade_ids')
+
+        if not grade_ids:
+            return {
+                'success': False,
+                'message': 'grade_ids обязателен'
+            }
+
+        return RuleHandler.check_grades_in_range_logic(rule_id, grade_ids)
+
     @staticmethod
     def get_stats_handler(data: Dict[str, Any], request) -> Dict[str, Any]:
         """
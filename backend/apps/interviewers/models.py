@@ -175,21 +175,19 @@ class InterviewRule(models.Model):
         return f"{self.min_grade.name} - {self.max_grade.name}"
     
     def is_grade_in_range(self, grade):
-        """Проверить, входит ли грейд в диапазон правила"""
-        # Получаем все грейды между min_grade и max_grade
-        from apps.finance.models import Grade
-        grades = Grade.objects.all().order_by('name')
-        grade_names = [g.name for g in grades]
-        
-        try:
-            min_index = grade_names.index(self.min_grade.name)
-            max_index = grade_names.index(self.max_grade.name)
-            grade_index = grade_names.index(grade.name)
-            
-            return min_index <= grade_index <= max_index
-        except (ValueError, AttributeError):
-            return False
-    
+        """Проверить, входит ли грейд (объект или id) в диапазон правила"""
+        from apps.finance.grade_order import get_grade_order
+        return get_grade_order().in_range(grade, self.min_grade_id, self.max_grade_id)
+
+    def grades_in_range(self, grades):
+        """Пакетная проверка: {id грейда: входит ли в диапазон} без запросов на каждый грейд"""
+        from apps.finance.grade_order import get_grade_order
+        order = get_grade_order()
+        return {
+            getattr(grade, 'pk', grade): order.in_range(grade, self.min_grade_id, self.max_grade_id)
+            for grade in grades
+        }
+
     @classmethod
     def get_active_rule(cls):
         """Получить активное правило"""
@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.finance.grade_order import get_grade_order
+from apps.finance.models import Grade
+
+from .models import InterviewRule
+
+User = get_user_model()
+
+
+class GradeOrderTests(TestCase):
+    """Диапазоны грейдов правил привлечения по закэшированным рангам"""
+
+    def setUp(self):
+        self.junior, self.middle, self.senior = (
+            Grade.objects.get_or_create(name=name)[0] for name in ('Junior', 'Middle', 'Senior')
+        )
+        self.rule = InterviewRule.objects.create(name='Middle+', min_grade=self.middle, max_grade=self.senior)
+
+    def test_range_checks_without_queries(self):
+        get_grade_order()
+        with self.assertNumQueries(0):
+            self.assertTrue(self.rule.is_grade_in_range(self.middle))
+            self.assertFalse(self.rule.is_grade_in_range(self.junior))
+            self.assertFalse(self.rule.is_grade_in_range(None))
+            self.assertEqual(
+                self.rule.grades_in_range([self.junior.id, self.senior.id]), {self.junior.id: False, self.senior.id: True}
+            )
+
+    def test_matches_name_order(self):
+        # Порядок по названию, как в прежней реализации через список имен
+        names = list(Grade.objects.order_by('name').values_list('name', flat=True))
+        for grade in Grade.objects.all():
+            expected = names.index('Middle') <= names.index(grade.name) <= names.index('Senior')
+            self.assertEqual(self.rule.is_grade_in_range(grade), expected, grade.name)
+
+    def test_new_grade_invalidates_order(self):
+        get_grade_order()
+        with self.captureOnCommitCallbacks(execute=True):
+            principal = Grade.objects.create(name='Principal')
+        self.assertTrue(self.rule.is_grade_in_range(principal))
+        self.assertEqual(self.rule.grades_in_range([principal, self.junior]), {principal.id: True, self.junior.id: False})
+
+
+class CheckGradesApiTests(TestCase):
+    """Пакетная проверка грейдов через API правил привлечения"""
+
+    def setUp(self):
+        self.junior, self.middle, self.senior = (
+            Grade.objects.get_or_create(name=name)[0] for name in ('Junior', 'Middle', 'Senior')
+        )
+        self.rule = InterviewRule.objects.create(name='Middle+', min_grade=self.middle, max_grade=self.senior)
+        self.client.force_login(User.objects.create_user(username='rules_user', password='test'))
+        self.url = reverse('interview-rule-check-grades', args=[self.rule.pk])
+
+    def test_checks_all_grades(self):
+        response = self.client.post(self.url, {'grade_ids': [self.junior.id, self.senior.id]}, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['rule_name'], 'Middle+')
+        self.assertEqual(
+            {grade['grade_id']: grade['is_in_range'] for grade in response.json()['grades']},
+            {self.junior.id: False, self.senior.id: True}
+        )
+
+    def test_requires_list_of_grade_ids(self):
+        for payload in ({}, {'grade_ids': []}, {'grade_ids': '1,2'}, {'grade_ids': [1, 'x']}, {'grade_ids': [True]}):
+            response = self.client.post(self.url, payload, content_type='application/json')
+            self.assertEqual(response.status_code, 400, payload)
+            self.assertEqual(response.json()['message'], 'grade_ids должен быть непустым списком целых чисел')
+
+    def test_missing_rule_is_404(self):
+        url = reverse('interview-rule-check-grades', args=[self.rule.pk + 100])
+        response = self.client.post(url, {'grade_ids': [self.junior.id]}, content_type='application/json')
+        self.assertEqual(response.status_code, 404)
@@ -2,7 +2,9 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Count, Q
+from django.http import Http404
 from .models import Interviewer, InterviewRule
+from .logic.rules_handlers import RuleApiHandler
 from .serializers import (
     InterviewerSerializer, InterviewerCreateSerializer, InterviewerListSerializer,
     InterviewRuleSerializer, InterviewRuleCreateSerializer, InterviewerStatsSerializer
@@ -21,4 +23,22 @@ class InterviewerViewSet(LogicInterviewerViewSet):
 
 class InterviewRuleViewSet(LogicInterviewRuleViewSet):
     """ViewSet для управления правилами интервью - расширенная версия"""
-    permission_classes = [permissions.IsAuthenticated]
\ No newline at end of file
+    permission_classes = [permissions.IsAuthenticated]
+
+    @action(detail=True, methods=['post'], url_path='check-grades')
+    def check_grades(self, request, pk=None):
+        """Пакетная проверка грейдов (например, грейдов нескольких кандидатов) для правила"""
+        grade_ids = request.data.get('grade_ids')
+        if (not isinstance(grade_ids, list) or not grade_ids
+                or not all(isinstance(grade_id, int) and not isinstance(grade_id, bool) for grade_id in grade_ids)):
+            return Response(
+                {'success': False, 'message': 'grade_ids должен быть непустым списком целых чисел'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            result = RuleApiHandler.check_grades_handler({'pk': pk, 'grade_ids': grade_ids}, request)
+        except Http404:
+            # BaseAPIViewSet.handle_exception отвечает 500 на любое исключение
+            return Response({'success': False, 'message': 'Правило не найдено'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(result, status=status.HTTP_200_OK if result['success'] else status.HTTP_400_BAD_REQUEST)
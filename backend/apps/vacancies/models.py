@@ -373,51 +373,19 @@ class SalaryRange(models.Model):
     def _calculate_other_currencies(self):
         """Рассчитывает зарплаты в других валютах на основе курсов и налогов"""
         try:
-            from apps.finance.models import CurrencyRate, PLNTax
-            from decimal import Decimal
+            from logic.finance.rate_snapshot import get_rate_snapshot
             
-            # Получаем курсы валют
-            usd_rate = CurrencyRate.objects.get(code='USD')
-            pln_rate = CurrencyRate.objects.get(code='PLN')
-            eur_rate = CurrencyRate.objects.get(code='EUR')
+            snapshot = get_rate_snapshot()
+            if not snapshot.has_rates('USD', 'PLN', 'EUR'):
+                # Если курсы не найдены, оставляем поля пустыми
+                return
             
-            # Получаем налоговые ставки для PLN/EUR
-            active_taxes = PLNTax.objects.filter(is_active=True)
-            total_tax_rate = sum(tax.rate_decimal for tax in active_taxes) if active_taxes.exists() else Decimal('0')
-            
-            # Рассчитываем BYN (net - как есть по курсу)
-            if self.salary_min_usd:
-                self.salary_min_byn = Decimal(str(self.salary_min_usd)) * usd_rate.rate
-            if self.salary_max_usd:
-                self.salary_max_byn = Decimal(str(self.salary_max_usd)) * usd_rate.rate
-            
-            # Рассчитываем PLN (gross - с налогами)
-            if self.salary_min_usd:
-                # USD -> BYN -> PLN (net) с учетом scale
-                byn_amount = Decimal(str(self.salary_min_usd)) * usd_rate.rate
-                pln_net = byn_amount / (pln_rate.rate / pln_rate.scale)
-                # PLN net -> PLN gross = net / (1 - налоги)
-                self.salary_min_pln = pln_net / (1 - total_tax_rate) if total_tax_rate < 1 else pln_net
-            if self.salary_max_usd:
-                byn_amount = Decimal(str(self.salary_max_usd)) * usd_rate.rate
-                pln_net = byn_amount / (pln_rate.rate / pln_rate.scale)
-                self.salary_max_pln = pln_net / (1 - total_tax_rate) if total_tax_rate < 1 else pln_net
-            
-            # Рассчитываем EUR (gross - с налогами)
-            if self.salary_min_usd:
-                # USD -> BYN -> EUR (net) с учетом scale
-                byn_amount = Decimal(str(self.salary_min_usd)) * usd_rate.rate
-                eur_net = byn_amount / (eur_rate.rate / eur_rate.scale)
-                # EUR net -> EUR gross = net / (1 - налоги)
-                self.salary_min_eur = eur_net / (1 - total_tax_rate) if total_tax_rate < 1 else eur_net
-            if self.salary_max_usd:
-                byn_amount = Decimal(str(self.salary_max_usd)) * usd_rate.rate
-                eur_net = byn_amount / (eur_rate.rate / eur_rate.scale)
-                self.salary_max_eur = eur_net / (1 - total_tax_rate) if total_tax_rate < 1 else eur_net
+            # BYN - net по курсу, PLN и EUR - gross с учетом налогов
+            amounts = snapshot.salary_amounts(self.salary_min_usd or None, self.salary_max_usd or None)
+            for field, value in amounts.items():
+                if value is not None:
+                    setattr(self, field, value)
                 
-        except CurrencyRate.DoesNotExist:
-            # Если курсы не найдены, оставляем поля пустыми
-            pass
         except Exception as e:
             # Логируем ошибку, но не прерываем сохранение
             print(f"Ошибка при расчете валют для {self.grade.name}: {e}")
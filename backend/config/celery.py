@@ -65,6 +65,10 @@ app.conf.beat_schedule = {
         'task': 'apps.finance.tasks.generate_benchmark_statistics',
         'schedule': 3600.0,  # Каждый час
     },
+    'refresh-benchmark-stats': {
+        'task': 'apps.finance.tasks.refresh_benchmark_stats',
+        'schedule': crontab(minute=30, hour=3),  # Каждую ночь в 03:30
+    },
     
     # Обновление курсов валют НБРБ (11:00 и 16:00 в будние дни)
     'update-currency-rates-morning': {
@@ -107,6 +111,10 @@ app.conf.beat_schedule = {
         'task': 'apps.google_oauth.tasks.validate_oauth_tokens',
         'schedule': 3600.0,  # Каждый час
     },
+    'sync-google-calendars': {
+        'task': 'apps.google_oauth.tasks.sync_google_calendars',
+        'schedule': 120.0,  # Каждые 2 минуты (инкрементально по syncToken)
+    },
     
     # ClickUp задачи (работают по требованию через веб-интерфейс)
     # Массовый импорт и синхронизация запускаются вручную через UI
@@ -237,6 +237,102 @@ API_CACHE_TIMEOUT = {
     'huntflow_candidates': 300,     # 5 минут
     'huntflow_vacancies': 14400,    # 4 часа
     'huntflow_accounts': 43200,     # 12 часов
+    'huntflow_reference': 3600,     # 1 час (статусы, метки, поля, схема анкеты)
+    'huntflow_vacancies_list': 300, # 5 минут (список вакансий организации)
+}
+
+# Общий пул HTTP соединений для внешних API (logic.base.http_pool)
+HTTP_POOL_SETTINGS = {
+    'pool_connections': 10,  # Количество пулов (хостов) в адаптере
+    'pool_maxsize': 20,      # Максимум keep-alive соединений на хост
+    'pool_block': False,
+    'max_retries': 3,        # Повторы только для идемпотентных методов
+    'backoff_factor': 0.5,
+    'status_forcelist': [502, 503, 504],
+    'retry_methods': ['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'],
+    'hosts': {
+        # 429 ClickUp обрабатывает сам (apps.clickup_int.fetcher), чтобы учитывать лимиты
+        'api.clickup.com': {'respect_retry_after_header': False},
+    },
+}
+
+# Параллельная загрузка данных Huntflow (HuntflowService.fetch_parallel)
+HUNTFLOW_PARALLEL_SETTINGS = {
+    'max_workers': 8,   # Размер общего пула потоков на процесс
+    'timeout': 30,      # Таймаут одного вызова с начала выполнения по умолчанию (секунды)
+    'queue_timeout': 30,  # Сколько вызов может ждать свободного потока (секунды)
+    'max_pages': 10,    # Максимум страниц в одном запросе pages=1,2,3
+}
+
+# Параллельная загрузка страниц ClickUp с учетом X-RateLimit-* (apps.clickup_int.fetcher)
+CLICKUP_FETCH_SETTINGS = {
+    'max_concurrency': 4,       # Максимум страниц в работе одновременно
+    'max_pages': 100,           # Ограничение числа страниц списка
+    'max_retries': 5,           # Повторы запроса после 429
+    'retry_after_default': 5,   # Пауза после 429 без заголовков (сек), растет экспоненциально
+    'max_backoff': 60,
+    'reserve_requests': 2,      # Остаток лимита, при котором ждем сброса окна
+}
+
+# Запись логов Huntflow API (apps.huntflow.log_writer)
+HUNTFLOW_LOG_SETTINGS = {
+    'mode': 'buffered',           # buffered - фоновый bulk_create, celery - задача write_huntflow_logs, sync - сразу
+    'batch_size': 50,
+    'flush_interval': 2.0,        # секунды
+    'max_queue_size': 10000,
+    'success_sample_rate': 1.0,   # 0.1 = сохранять 10% успешных ответов, ошибки сохраняются всегда
+    'max_response_chars': 10000,
+}
+
+# Инкрементальная синхронизация Google Calendar (syncToken)
+GOOGLE_CALENDAR_SYNC_SETTINGS = {
+    'enabled': True,
+    'past_days': 1,               # Окно полной синхронизации: дней назад
+    'future_days': 120,           # Окно полной синхронизации: дней вперед
+    'full_sync_interval': 86400,  # Полная синхронизация раз в сутки (сдвигает окно)
+    'max_staleness': 900,         # Если хранилище старше (сек), читаем напрямую из API
+}
+
+# Лимиты Gemini API на один API ключ (общие для всех воркеров через Redis)
+GEMINI_RATE_LIMITS = {
+    'rpm': 15,                       # Запросов в минуту
+    'tpm': 1_000_000,                # Токенов в минуту
+    'rpd': 1500,                     # Запросов в сутки
+    'output_tokens_estimate': 2048,  # Резерв токенов на ответ модели
+}
+
+# Кэш ответов Gemini для одинаковых запросов (apps.gemini.logic.response_cache)
+GEMINI_RESPONSE_CACHE = {
+    'enabled': True,
+    'max_entries': 5000,   # Максимум ответов в Redis (вытесняются давно не читавшиеся)
+    'ttls': {              # TTL по месту вызова (сек); 0 - не кэшировать
+        'default': 3600,
+        'chat': 0,
+        'hr_screening': 86400,
+        'benchmark_analysis': 21600,
+        'finance_analysis': 3600,
+        'invite_time': 600,
+    },
+}
+
+# История чата Gemini в пределах бюджета токенов (apps.gemini.logic.chat_context)
+GEMINI_CHAT_CONTEXT = {
+    'history_tokens': 6000,            # Последние сообщения в запросе
+    'max_messages': 50,
+    'summary_tokens': 1000,            # Сводка более ранних сообщений (хранится в ChatSession)
+    'summary_chars_per_message': 300,
+}
+
+# Обработка очереди hh.ru через Gemini
+HH_AI_PIPELINE_SETTINGS = {
+    'concurrency': 3,            # Параллельных потоков разбора очереди HHVacancyTemp
+    'lane_lease': 900,           # TTL аренды потока сверх запланированной задержки (сек)
+    'claim_timeout': 3600,       # Повтор вакансии после неудачного анализа не раньше (сек)
+    'max_schedule_ahead': 3600,  # Горизонт планирования запросов по лимитам (сек)
+    'error_backoff': 60,         # Пауза потока после ошибки (сек), удваивается при повторных ошибках
+    'max_error_backoff': 900,
+    'batch_size': 8,             # Вакансий в одном запросе к Gemini (1 - без пакетов)
+    'batch_token_budget': 12000, # Максимум токенов текстов вакансий в одном пакете
 }
 
 # Celery настройки
@@ -5,6 +5,7 @@ from rest_framework.response import Response
 from logic.base.api_views import BaseAPIViewSet
 from logic.base.response_handler import UnifiedResponseHandler
 from apps.gemini.models import ChatSession, ChatMessage
+from apps.gemini.logic.session_queries import with_message_stats
 from apps.gemini.serializers import (
     ChatSessionSerializer, ChatSessionDetailSerializer, 
     ChatSessionCreateSerializer, ChatMessageSerializer,
@@ -37,15 +38,21 @@ class ChatSessionViewSet(BaseAPIViewSet):
         
         ВХОДЯЩИЕ ДАННЫЕ: self.request с аутентифицированным пользователем
         ИСТОЧНИКИ ДАННЫХ: База данных (модель ChatSession)
-        ОБРАБОТКА: Фильтрация сессий чата по текущему пользователю
+        ОБРАБОТКА: Фильтрация сессий чата по текущему пользователю, аннотации количества
+            и последнего сообщения для list/retrieve (без запроса на каждую сессию)
         ВЫХОДЯЩИЕ ДАННЫЕ: QuerySet с отфильтрованными сессиями или пустой QuerySet
-        СВЯЗИ: apps.gemini.models.ChatSession
+        СВЯЗИ: apps.gemini.models.ChatSession, apps.gemini.logic.session_queries
         ФОРМАТ: Django QuerySet
         """
         queryset = super().get_queryset()
-        if hasattr(self.request, 'user') and self.request.user.is_authenticated:
-            return queryset.filter(user=self.request.user)
-        return queryset.none()
+        if not (hasattr(self.request, 'user') and self.request.user.is_authenticated):
+            return queryset.none()
+        queryset = queryset.filter(user=self.request.user)
+        if self.action == 'list':
+            return with_message_stats(queryset)
+        if self.action == 'retrieve':
+            return with_message_stats(queryset, last_message=False).prefetch_related('messages')
+        return queryset
     
     def get_serializer_class(self):
         """
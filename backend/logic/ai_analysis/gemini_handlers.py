@@ -3,6 +3,8 @@ import json
 import logging
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from apps.gemini.logic.chat_context import build_chat_history
+from apps.gemini.logic.session_queries import get_chat_totals, with_message_stats
 from apps.gemini.models import ChatSession, ChatMessage
 from logic.ai_analysis.gemini_services import GeminiService
 
@@ -68,15 +70,9 @@ class MessageApiHandler:
                 timestamp=timezone.now()
             )
             
-            # Получаем историю сообщений
-            messages = ChatMessage.objects.filter(session=session).order_by('timestamp')
-            messages_data = []
-            
-            for msg in messages:
-                messages_data.append({
-                    'role': msg.role,
-                    'content': msg.content
-                })
+            # История в пределах бюджета токенов (ранние сообщения - в сводке сессии)
+            messages_data = build_chat_history(session, exclude_id=user_message.id)
+            messages_data.append({'role': 'user', 'content': content})
             
             # Отправляем запрос к Gemini
             gemini_service = GeminiService(request.user.gemini_api_key)
@@ -130,7 +126,7 @@ class MessageApiHandler:
         
         ВХОДЯЩИЕ ДАННЫЕ: session (ChatSession), content (текст), user (пользователь)
         ИСТОЧНИКИ ДАННЫХ: База данных (ChatMessage), Gemini API
-        ОБРАБОТКА: Создание сообщения пользователя, отправка в Gemini AI, создание ответа
+        ОБРАБОТКА: Создание сообщения пользователя, история в пределах бюджета токенов, отправка в Gemini AI, создание ответа
         ВЫХОДЯЩИЕ ДАННЫЕ: Словарь с результатом операции и ID сообщений
         СВЯЗИ: apps.gemini.models.ChatMessage, logic.ai_analysis.gemini_services.GeminiService
         ФОРМАТ: Словарь с ключами success, user_message_id, assistant_message_id
@@ -144,15 +140,9 @@ class MessageApiHandler:
                 timestamp=timezone.now()
             )
             
-            # Получаем историю сообщений
-            messages = ChatMessage.objects.filter(session=session).order_by('timestamp')
-            messages_data = []
-            
-            for msg in messages:
-                messages_data.append({
-                    'role': msg.role,
-                    'content': msg.content
-                })
+            # История в пределах бюджета токенов (ранние сообщения - в сводке сессии)
+            messages_data = build_chat_history(session, exclude_id=user_message.id)
+            messages_data.append({'role': 'user', 'content': content})
             
             # Отправляем запрос к Gemini
             gemini_service = GeminiService(user.gemini_api_key)
@@ -270,23 +260,23 @@ class StatsApiHandler:
         
         ВХОДЯЩИЕ ДАННЫЕ: data, request.user
         ИСТОЧНИКИ ДАННЫХ: База данных (ChatSession, ChatMessage)
-        ОБРАБОТКА: Получение статистики сессий и сообщений, последние записи
+        ОБРАБОТКА: Получение статистики сессий и сообщений (один агрегирующий запрос), последние записи
         ВЫХОДЯЩИЕ ДАННЫЕ: Контекст для отображения дашборда
-        СВЯЗИ: apps.gemini.models (ChatSession, ChatMessage)
+        СВЯЗИ: apps.gemini.models (ChatSession, ChatMessage), apps.gemini.logic.session_queries
         ФОРМАТ: Словарь с контекстом дашборда
         """
         try:
             user = request.user
             
-            # Получаем статистику сессий
-            total_sessions = ChatSession.objects.filter(user=user, is_active=True).count()
-            recent_sessions = ChatSession.objects.filter(
+            # Статистика сессий и сообщений одним запросом
+            totals = get_chat_totals(ChatSession.objects.filter(user=user))
+            total_sessions = totals['active_sessions']
+            total_messages = totals['total_messages']
+            recent_sessions = with_message_stats(ChatSession.objects.filter(
                 user=user, 
                 is_active=True
-            ).order_by('-updated_at')[:5]
+            )).order_by('-updated_at')[:5]
             
-            # Получаем статистику сообщений
-            total_messages = ChatMessage.objects.filter(session__user=user).count()
             recent_messages = ChatMessage.objects.filter(
                 session__user=user
             ).order_by('-timestamp')[:10]
@@ -319,63 +309,29 @@ class StatsApiHandler:
         
         ВХОДЯЩИЕ ДАННЫЕ: data, request.user
         ИСТОЧНИКИ ДАННЫХ: База данных (ChatSession, ChatMessage)
-        ОБРАБОТКА: Агрегация статистики по сессиям, сообщениям, активности
+        ОБРАБОТКА: Агрегация статистики по сессиям, сообщениям, активности одним запросом
         ВЫХОДЯЩИЕ ДАННЫЕ: Подробная статистика использования
-        СВЯЗИ: apps.gemini.models (ChatSession, ChatMessage)
+        СВЯЗИ: apps.gemini.models (ChatSession, ChatMessage), apps.gemini.logic.session_queries
         ФОРМАТ: Словарь со статистическими данными
         """
         try:
             user = request.user
             
-            # Статистика сессий
-            total_sessions = ChatSession.objects.filter(user=user, is_active=True).count()
-            active_sessions = ChatSession.objects.filter(
-                user=user, 
-                is_active=True,
-                updated_at__gte=timezone.now() - timezone.timedelta(days=7)
-            ).count()
-            
-            # Статистика сообщений
-            total_messages = ChatMessage.objects.filter(session__user=user).count()
-            user_messages = ChatMessage.objects.filter(
-                session__user=user, 
-                role='user'
-            ).count()
-            assistant_messages = ChatMessage.objects.filter(
-                session__user=user, 
-                role='assistant'
-            ).count()
-            
-            # Статистика за последние 30 дней
-            from django.db.models import Count
-            from django.utils import timezone
-            from datetime import timedelta
-            
-            thirty_days_ago = timezone.now() - timedelta(days=30)
-            recent_messages = ChatMessage.objects.filter(
-                session__user=user,
-                timestamp__gte=thirty_days_ago
-            ).count()
+            # Статистика сессий и сообщений одним запросом
+            totals = get_chat_totals(ChatSession.objects.filter(user=user), active_days=7, recent_days=30)
             
             stats_data = {
-                'total_sessions': total_sessions,
-                'active_sessions': active_sessions,
-                'total_messages': total_messages,
-                'user_messages': user_messages,
-                'assistant_messages': assistant_messages,
-                'recent_messages_30d': recent_messages,
+                'total_sessions': totals['active_sessions'],
+                'active_sessions': totals['recently_active_sessions'],
+                'total_messages': totals['total_messages'],
+                'user_messages': totals['user_messages'],
+                'assistant_messages': totals['assistant_messages'],
+                'recent_messages_30d': totals['recent_messages'],
                 'has_api_key': bool(user.gemini_api_key),
-                'last_activity': None
+                # Последняя активность
+                'last_activity': totals['last_activity'].isoformat() if totals['last_activity'] else None
             }
             
-            # Последняя активность
-            last_message = ChatMessage.objects.filter(
-                session__user=user
-            ).order_by('-timestamp').first()
-            
-            if last_message:
-                stats_data['last_activity'] = last_message.timestamp.isoformat()
-            
             return stats_data
             
         except Exception as e:
@@ -2,10 +2,12 @@
 import requests
 import json
 import time
+from functools import partial
 from typing import Dict, List, Optional, Tuple
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from logic.base.api_client import BaseAPIClient
+from apps.gemini.logic.response_cache import cached_generate, gemini_cache_site
 
 
 class GeminiService(BaseAPIClient):
@@ -57,6 +59,22 @@ class GeminiService(BaseAPIClient):
         pass
     
     def _make_request(self, endpoint: str, data: Dict, max_retries: int = 2) -> Tuple[bool, Dict, Optional[str]]:
+        """
+        Запрос к Gemini API через кэш ответов одинаковых запросов
+        
+        ВХОДЯЩИЕ ДАННЫЕ: endpoint (строка), data (словарь), max_retries (число)
+        ИСТОЧНИКИ ДАННЫХ: Кэш ответов Gemini, Google Gemini API
+        ОБРАБОТКА: Для generateContent - поиск ответа в кэше по хэшу модели и тела запроса
+        ВЫХОДЯЩИЕ ДАННЫЕ: Кортеж (успех, ответ, ошибка)
+        СВЯЗИ: apps.gemini.logic.response_cache.cached_generate, self._send_request()
+        ФОРМАТ: Tuple[bool, Dict, Optional[str]]
+        """
+        send = partial(self._send_request, endpoint, data, max_retries)
+        if not endpoint.endswith(':generateContent'):
+            return send()
+        return cached_generate(endpoint.rsplit(':', 1)[0], data, send)
+    
+    def _send_request(self, endpoint: str, data: Dict, max_retries: int = 2) -> Tuple[bool, Dict, Optional[str]]:
         """
         Выполняет запрос к Gemini API с повторными попытками
         
@@ -112,6 +130,7 @@ class GeminiService(BaseAPIClient):
         
         return False, {}, "Не удалось выполнить запрос после всех попыток"
     
+    @gemini_cache_site('test_connection')
     def test_connection(self):
         """
         Тестирование подключения к Gemini API
@@ -266,6 +285,7 @@ class GeminiService(BaseAPIClient):
                 'error': f'Ошибка анализа: {str(e)}'
             }
     
+    @gemini_cache_site('chat')
     def chat_completion(self, messages: List[Dict], max_tokens: int = 1000) -> Dict:
         """
         Завершение чата на основе истории сообщений
@@ -94,7 +94,8 @@ class UnifiedCurrencyService(BaseAPIClient):
         ВХОДЯЩИЕ ДАННЫЕ: Нет
         ИСТОЧНИКИ ДАННЫЕ: НБРБ API, Django модель CurrencyRate
         ОБРАБОТКА: Получение курсов валют и сохранение в базу данных
-        ВЫХОДЯЩИЕ ДАННЫЕ: Словарь с результатами обновления
+        ВЫХОДЯЩИЕ ДАННЫЕ: Словарь с результатами обновления (changed_count - сколько курсов
+        действительно изменилось)
         СВЯЗИ: self.get_all_rates(), CurrencyRate модель
         ФОРМАТ: Dict[str, Any] с результатами обновления
         """
@@ -104,6 +105,7 @@ class UnifiedCurrencyService(BaseAPIClient):
         
         rates_data = self.get_all_rates()
         updated_count = 0
+        changed_count = 0
         results = {}
         
         for currency, data in rates_data.items():
@@ -118,17 +120,23 @@ class UnifiedCurrencyService(BaseAPIClient):
                     }
                 )
                 
+                changed = created
                 if not created:
-                    currency_rate.rate = Decimal(str(data['Cur_OfficialRate']))
-                    currency_rate.scale = data.get('Cur_Scale', 1)
+                    new_rate = Decimal(str(data['Cur_OfficialRate']))
+                    new_scale = data.get('Cur_Scale', 1)
+                    changed = currency_rate.rate != new_rate or currency_rate.scale != new_scale
+                    currency_rate.rate = new_rate
+                    currency_rate.scale = new_scale
                     currency_rate.fetched_at = timezone.now()
                     currency_rate.save()
                 
                 updated_count += 1
+                changed_count += int(changed)
                 results[currency] = {
                     'success': True,
                     'rate': currency_rate.rate,
-                    'created': created
+                    'created': created,
+                    'changed': changed
                 }
                 
             except Exception as e:
@@ -139,6 +147,7 @@ class UnifiedCurrencyService(BaseAPIClient):
         
         return {
             'updated_count': updated_count,
+            'changed_count': changed_count,
             'results': results
         }
 
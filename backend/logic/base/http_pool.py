@@ -0,0 +1,249 @@
+"""Общий пул HTTP-соединений с keep-alive для внешних API"""
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+
+DEFAULT_POOL_SETTINGS = {
+    'pool_connections': 10,
+    'pool_maxsize': 20,
+    'pool_block': False,
+    'max_retries': 3,
+    'backoff_factor': 0.5,
+    'status_forcelist': (502, 503, 504),
+    'retry_methods': ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'),
+    'respect_retry_after_header': True,  # Повторять 429/503 с Retry-After внутри адаптера
+    'hosts': {},  # Переопределения настроек повторов по имени хоста
+}
+
+
+def _get_pool_settings() -> Dict[str, Any]:
+    """
+    Получение настроек пула
+
+    ВХОДЯЩИЕ ДАННЫЕ: Нет
+    ИСТОЧНИКИ ДАННЫХ: settings.HTTP_POOL_SETTINGS (если Django настроен)
+    ОБРАБОТКА: Объединение настроек по умолчанию с настройками проекта
+    ВЫХОДЯЩИЕ ДАННЫЕ: Словарь настроек пула
+    СВЯЗИ: django.conf.settings
+    ФОРМАТ: dict
+    """
+    pool_settings = dict(DEFAULT_POOL_SETTINGS)
+    try:
+        from django.conf import settings
+        pool_settings.update(getattr(settings, 'HTTP_POOL_SETTINGS', {}) or {})
+    except Exception:
+        pass
+    return pool_settings
+
+
+class _PoolCounters:
+    """Потокобезопасные счетчики использования пула по хостам"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests: Dict[str, int] = {}
+        self._new_connections: Dict[str, int] = {}
+
+    def add_request(self, host: str):
+        with self._lock:
+            self._requests[host] = self._requests.get(host, 0) + 1
+
+    def add_new_connection(self, host: str):
+        with self._lock:
+            self._new_connections[host] = self._new_connections.get(host, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            hosts = set(self._requests) | set(self._new_connections)
+            stats = {}
+            for host in sorted(hosts):
+                total = self._requests.get(host, 0)
+                misses = self._new_connections.get(host, 0)
+                hits = max(total - misses, 0)
+                stats[host] = {
+                    'requests': total,
+                    'hits': hits,
+                    'misses': misses,
+                    'hit_ratio': round(hits / total, 4) if total else 0.0,
+                }
+            return stats
+
+    def reset(self):
+        with self._lock:
+            self._requests.clear()
+            self._new_connections.clear()
+
+
+_counters = _PoolCounters()
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    """HTTP-пул, учитывающий создание новых соединений (промахи пула)"""
+
+    def _new_conn(self):
+        _counters.add_new_connection(f"http://{self.host}:{self.port}")
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    """HTTPS-пул, учитывающий создание новых соединений (промахи пула)"""
+
+    def _new_conn(self):
+        _counters.add_new_connection(f"https://{self.host}:{self.port}")
+        return super()._new_conn()
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    HTTP адаптер с общим пулом keep-alive соединений
+
+    ВХОДЯЩИЕ ДАННЫЕ: Параметры пула (pool_connections, pool_maxsize, max_retries)
+    ИСТОЧНИКИ ДАННЫХ: urllib3 PoolManager
+    ОБРАБОТКА: Переиспользование TCP+TLS соединений, учет попаданий и промахов пула
+    ВЫХОДЯЩИЕ ДАННЫЕ: HTTP ответы requests
+    СВЯЗИ: requests.adapters.HTTPAdapter
+    ФОРМАТ: Экземпляр адаптера, общий для всех сессий одного хоста
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, *args, **kwargs):
+        _counters.add_request(_host_key(request.url))
+        return super().send(request, *args, **kwargs)
+
+
+def _host_key(url: str) -> str:
+    """Ключ хоста в формате scheme://host:port"""
+    parts = urlsplit(url)
+    scheme = parts.scheme or 'https'
+    port = parts.port or (443 if scheme == 'https' else 80)
+    return f"{scheme}://{parts.hostname}:{port}"
+
+
+def _host_prefix(url: str) -> str:
+    """Префикс для монтирования адаптера в сессию (scheme://netloc/)"""
+    parts = urlsplit(url)
+    return f"{parts.scheme or 'https'}://{parts.netloc}/"
+
+
+class HTTPPoolRegistry:
+    """
+    Процессный реестр пулов соединений по базовым URL
+
+    ВХОДЯЩИЕ ДАННЫЕ: URL запросов
+    ИСТОЧНИКИ ДАННЫХ: settings.HTTP_POOL_SETTINGS
+    ОБРАБОТКА: Один адаптер (пул) на хост, отдельная легкая сессия на поток;
+        настройки повторов хоста можно переопределить в HTTP_POOL_SETTINGS['hosts']
+    ВЫХОДЯЩИЕ ДАННЫЕ: requests.Session с общим пулом соединений
+    СВЯЗИ: PooledHTTPAdapter
+    ФОРМАТ: Singleton на уровне модуля
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._adapters: Dict[str, PooledHTTPAdapter] = {}
+        self._local = threading.local()
+
+    def _build_adapter(self, hostname: Optional[str] = None) -> PooledHTTPAdapter:
+        pool_settings = _get_pool_settings()
+        pool_settings.update((pool_settings.get('hosts') or {}).get(hostname, {}))
+        retry = Retry(
+            total=pool_settings['max_retries'],
+            connect=pool_settings['max_retries'],
+            read=pool_settings['max_retries'],
+            status=pool_settings['max_retries'],
+            backoff_factor=pool_settings['backoff_factor'],
+            status_forcelist=tuple(pool_settings['status_forcelist']),
+            allowed_methods=frozenset(m.upper() for m in pool_settings['retry_methods']),
+            raise_on_status=False,
+            respect_retry_after_header=pool_settings['respect_retry_after_header'],
+        )
+        return PooledHTTPAdapter(
+            pool_connections=pool_settings['pool_connections'],
+            pool_maxsize=pool_settings['pool_maxsize'],
+            pool_block=pool_settings['pool_block'],
+            max_retries=retry,
+        )
+
+    def get_adapter(self, url: str) -> PooledHTTPAdapter:
+        """Возвращает общий адаптер для хоста, создавая его при первом обращении"""
+        prefix = _host_prefix(url)
+        adapter = self._adapters.get(prefix)
+        if adapter is None:
+            with self._lock:
+                adapter = self._adapters.get(prefix)
+                if adapter is None:
+                    adapter = self._build_adapter(urlsplit(url).hostname)
+                    self._adapters[prefix] = adapter
+        return adapter
+
+    def mount(self, session: requests.Session, url: str) -> requests.Session:
+        """
+        Подключает общий пул хоста к существующей сессии
+
+        Заголовки и cookies сессии остаются своими, общими становятся только соединения.
+        """
+        session.mount(_host_prefix(url), self.get_adapter(url))
+        return session
+
+    def get_session(self, url: str) -> requests.Session:
+        """Возвращает сессию текущего потока с подключенным пулом хоста"""
+        sessions = getattr(self._local, 'sessions', None)
+        if sessions is None:
+            sessions = self._local.sessions = {}
+        prefix = _host_prefix(url)
+        session = sessions.get(prefix)
+        if session is None:
+            session = requests.Session()
+            # Сессия разделяется между пользователями - cookies не сохраняем
+            session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            self.mount(session, url)
+            sessions[prefix] = session
+        return session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Выполняет запрос через общий пул соединений"""
+        return self.get_session(url).request(method=method, url=url, **kwargs)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Статистика попаданий/промахов пула по хостам"""
+        return _counters.snapshot()
+
+    def reset_stats(self):
+        _counters.reset()
+
+    def close(self):
+        """Закрывает все соединения (например, после fork воркера)"""
+        with self._lock:
+            for adapter in self._adapters.values():
+                adapter.close()
+            self._adapters.clear()
+        self._local = threading.local()
+
+
+http_pool = HTTPPoolRegistry()
+
+
+def pooled_request(method: str, url: str, **kwargs) -> requests.Response:
+    """Выполняет HTTP запрос через общий keep-alive пул"""
+    return http_pool.request(method, url, **kwargs)
+
+
+def get_pool_stats(host: Optional[str] = None) -> Dict[str, Any]:
+    """Статистика пула: по всем хостам или по конкретному URL/хосту"""
+    stats = http_pool.get_stats()
+    if host is None:
+        return stats
+    return stats.get(_host_key(host), {'requests': 0, 'hits': 0, 'misses': 0, 'hit_ratio': 0.0})
@@ -0,0 +1,118 @@
+"""
+Снимок курсов валют НБРБ и налогов PLN
+Переиспользуемый компонент для пересчета зарплат без запросов к БД на каждую сумму
+
+get_rate_snapshot() держит снимок в VersionedLocalCache; он перечитывается после
+изменения CurrencyRate и PLNTax (в том числе из update_currency_rates_in_db).
+"""
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from logic.utilities.versioned_cache import VersionedLocalCache
+
+CENTS = Decimal('0.01')
+
+VERSION_KEY = 'finance_rate_snapshot_version'
+
+# Валюты, для которых суммы считаются gross (с учетом налогов PLNTax)
+GROSS_CURRENCIES = ('PLN', 'EUR')
+
+# Поля зарплатной вилки, которые рассчитываются из USD
+SALARY_CURRENCY_FIELDS = (
+    'salary_min_byn', 'salary_max_byn',
+    'salary_min_pln', 'salary_max_pln',
+    'salary_min_eur', 'salary_max_eur',
+)
+
+
+class RateSnapshot:
+    """Курсы валют и суммарная ставка активных налогов, загруженные одним чтением
+
+    Все конвертации идут через BYN с учетом scale; для PLN и EUR по запросу
+    net пересчитывается в gross = net / (1 - суммарная ставка налогов).
+    """
+
+    def __init__(self, rates: Dict[str, Tuple[Decimal, int]], total_tax_rate: Decimal = Decimal('0')):
+        self.rates = rates
+        self.total_tax_rate = total_tax_rate
+
+    @classmethod
+    def load(cls) -> 'RateSnapshot':
+        """Два запроса: все курсы и ставки активных налогов"""
+        from apps.finance.models import CurrencyRate, PLNTax
+
+        rates = {
+            code: (rate, scale)
+            for code, rate, scale in CurrencyRate.objects.values_list('code', 'rate', 'scale')
+        }
+        tax_rates = list(PLNTax.objects.filter(is_active=True).order_by().values_list('rate', flat=True))
+        total_tax_rate = sum(rate / 100 for rate in tax_rates) if tax_rates else Decimal('0')
+        return cls(rates, total_tax_rate)
+
+    def has_rates(self, *codes: str) -> bool:
+        return all(code == 'BYN' or code in self.rates for code in codes)
+
+    def convert(self, amount: Optional[Decimal], from_currency: str, to_currency: str,
+                gross: bool = False) -> Optional[Decimal]:
+        """
+        Конвертация через BYN по курсам НБРБ (без округления)
+
+        Args:
+            gross: пересчитать net -> gross для PLN/EUR по активным налогам
+
+        Returns:
+            Сумма в to_currency или None, если amount пустой или курса нет
+        """
+        if amount is None or not self.has_rates(from_currency, to_currency):
+            return None
+        if not isinstance(amount, Decimal):
+            amount = Decimal(str(amount))
+
+        if from_currency == to_currency:
+            result = amount
+        else:
+            byn_amount = amount
+            if from_currency != 'BYN':
+                rate, scale = self.rates[from_currency]
+                byn_amount = amount * rate if scale == 1 else amount * rate / scale
+            result = byn_amount
+            if to_currency != 'BYN':
+                rate, scale = self.rates[to_currency]
+                result = byn_amount / (rate / scale)
+
+        if gross and to_currency in GROSS_CURRENCIES and self.total_tax_rate < 1:
+            result = result / (1 - self.total_tax_rate)
+        return result
+
+    def convert_many(self, amounts: Iterable[Optional[Decimal]], from_currency: str, to_currency: str,
+                     gross: bool = False) -> List[Optional[Decimal]]:
+        """convert() для списка сумм с одним снимком курсов"""
+        return [self.convert(amount, from_currency, to_currency, gross=gross) for amount in amounts]
+
+    @staticmethod
+    def _round(amount: Optional[Decimal]) -> Optional[Decimal]:
+        return amount.quantize(CENTS) if amount else None
+
+    def salary_amounts(self, salary_min_usd: Optional[Decimal], salary_max_usd: Optional[Decimal]) -> Dict[str, Optional[Decimal]]:
+        """Суммы зарплатной вилки в BYN, PLN (gross) и EUR (gross), округленные до копеек"""
+        amounts = {}
+        for code in ('BYN',) + GROSS_CURRENCIES:
+            suffix = code.lower()
+            amounts[f'salary_min_{suffix}'] = self._round(self.convert(salary_min_usd, 'USD', code, gross=True))
+            amounts[f'salary_max_{suffix}'] = self._round(self.convert(salary_max_usd, 'USD', code, gross=True))
+        return amounts
+
+
+rate_snapshot_cache: VersionedLocalCache[RateSnapshot] = VersionedLocalCache(
+    VERSION_KEY, RateSnapshot.load, description='снимка курсов валют'
+)
+
+
+def get_rate_snapshot() -> RateSnapshot:
+    """Снимок текущего процесса; перечитывается после изменения курсов или налогов"""
+    return rate_snapshot_cache.get()
+
+
+def invalidate_rate_snapshot():
+    """Сбрасывает снимок в этом процессе и увеличивает версию для остальных"""
+    rate_snapshot_cache.invalidate()
@@ -15,144 +15,101 @@ class SalaryService:
     """
     
     @staticmethod
-    def calculate_byn_amounts(salary_min_usd: Decimal, salary_max_usd: Decimal) -> tuple[Optional[Decimal], Optional[Decimal]]:
-        """Рассчитывает суммы в BYN на основе USD и курса валют"""
+    def _calculate_amounts(salary_min_usd: Decimal, salary_max_usd: Decimal, code: str) -> tuple[Optional[Decimal], Optional[Decimal]]:
+        """Суммы в валюте code по общему снимку курсов и налогов (gross для PLN и EUR)"""
         try:
-            # Импортируем модель только при необходимости
-            from apps.finance.models import CurrencyRate
-            
-            usd_rate_obj = CurrencyRate.objects.get(code='USD')
-            usd_rate = usd_rate_obj.rate
+            # Импортируем сервис только при необходимости
+            from logic.finance.rate_snapshot import get_rate_snapshot
             
-            min_byn = salary_min_usd * usd_rate if salary_min_usd is not None else None
-            max_byn = salary_max_usd * usd_rate if salary_max_usd is not None else None
+            snapshot = get_rate_snapshot()
+            if not snapshot.has_rates('USD', code):
+                return None, None
             
-            return min_byn.quantize(Decimal('0.01')) if min_byn else None, \
-                   max_byn.quantize(Decimal('0.01')) if max_byn else None
+            amounts = snapshot.convert_many([salary_min_usd, salary_max_usd], 'USD', code, gross=True)
+            return tuple(amount.quantize(Decimal('0.01')) if amount else None for amount in amounts)
             
         except Exception:
             return None, None
     
+    @staticmethod
+    def calculate_byn_amounts(salary_min_usd: Decimal, salary_max_usd: Decimal) -> tuple[Optional[Decimal], Optional[Decimal]]:
+        """Рассчитывает суммы в BYN на основе USD и курса валют"""
+        return SalaryService._calculate_amounts(salary_min_usd, salary_max_usd, 'BYN')
+    
     @staticmethod
     def calculate_pln_amounts(salary_min_usd: Decimal, salary_max_usd: Decimal) -> tuple[Optional[Decimal], Optional[Decimal]]:
         """Рассчитывает суммы в PLN на основе USD и курса валют с учетом налогов (gross)"""
-        try:
-            # Импортируем модели только при необходимости
-            from apps.finance.models import CurrencyRate, PLNTax
-            
-            usd_rate_obj = CurrencyRate.objects.get(code='USD')
-            pln_rate_obj = CurrencyRate.objects.get(code='PLN')
-            
-            usd_rate = usd_rate_obj.rate
-            pln_to_byn_rate = pln_rate_obj.rate # Сколько BYN за 1 PLN
-            
-            # Получаем налоговые ставки для PLN
-            active_taxes = PLNTax.objects.filter(is_active=True)
-            total_tax_rate = sum(tax.rate_decimal for tax in active_taxes) if active_taxes.exists() else Decimal('0')
-            
-            min_pln = None
-            max_pln = None
-            
-            if salary_min_usd is not None:
-                # USD -> BYN -> PLN (net) с учетом scale
-                byn_amount = salary_min_usd * usd_rate
-                pln_net = byn_amount / (pln_to_byn_rate / pln_rate_obj.scale)
-                # PLN net -> PLN gross = net / (1 - налоги)
-                min_pln = pln_net / (1 - total_tax_rate) if total_tax_rate < 1 else pln_net
-                
-            if salary_max_usd is not None:
-                # USD -> BYN -> PLN (net) с учетом scale
-                byn_amount = salary_max_usd * usd_rate
-                pln_net = byn_amount / (pln_to_byn_rate / pln_rate_obj.scale)
-                # PLN net -> PLN gross = net / (1 - налоги)
-                max_pln = pln_net / (1 - total_tax_rate) if total_tax_rate < 1 else pln_net
-            
-            return min_pln.quantize(Decimal('0.01')) if min_pln else None, \
-                   max_pln.quantize(Decimal('0.01')) if max_pln else None
-            
-        except Exception:
-            return None, None
+        return SalaryService._calculate_amounts(salary_min_usd, salary_max_usd, 'PLN')
     
     @staticmethod
     def calculate_eur_amounts(salary_min_usd: Decimal, salary_max_usd: Decimal) -> tuple[Optional[Decimal], Optional[Decimal]]:
         """Рассчитывает суммы в EUR на основе USD и курса валют с учетом налогов (gross)"""
-        try:
-            # Импортируем модели только при необходимости
-            from apps.finance.models import CurrencyRate, PLNTax
-            
-            usd_rate_obj = CurrencyRate.objects.get(code='USD')
-            eur_rate_obj = CurrencyRate.objects.get(code='EUR')
-            
-            usd_rate = usd_rate_obj.rate
-            eur_to_byn_rate = eur_rate_obj.rate # Сколько BYN за 1 EUR
-            
-            # Получаем налоговые ставки для EUR (используем те же, что и для PLN)
-            active_taxes = PLNTax.objects.filter(is_active=True)
-            total_tax_rate = sum(tax.rate_decimal for tax in active_taxes) if active_taxes.exists() else Decimal('0')
-            
-            min_eur = None
-            max_eur = None
-            
-            if salary_min_usd is not None:
-                # USD -> BYN -> EUR (net) с учетом scale
-                byn_amount = salary_min_usd * usd_rate
-                eur_net = byn_amount / (eur_to_byn_rate / eur_rate_obj.scale)
-                # EUR net -> EUR gross = net / (1 - налоги)
-                min_eur = eur_net / (1 - total_tax_rate) if total_tax_rate < 1 else eur_net
-                
-            if salary_max_usd is not None:
-                # USD -> BYN -> EUR (net) с учетом scale
-                byn_amount = salary_max_usd * usd_rate
-                eur_net = byn_amount / (eur_to_byn_rate / eur_rate_obj.scale)
-                # EUR net -> EUR gross = net / (1 - налоги)
-                max_eur = eur_net / (1 - total_tax_rate) if total_tax_rate < 1 else eur_net
-            
-            return min_eur.quantize(Decimal('0.01')) if min_eur else None, \
-                   max_eur.quantize(Decimal('0.01')) if max_eur else None
-            
-        except Exception:
-            return None, None
+        return SalaryService._calculate_amounts(salary_min_usd, salary_max_usd, 'EUR')
     
     @staticmethod
     def update_salary_range_currency_amounts(salary_range):
         """Обновляет суммы в других валютах для одной зарплатной вилки"""
-        min_byn, max_byn = SalaryService.calculate_byn_amounts(
-            salary_range.salary_min_usd, salary_range.salary_max_usd
-        )
-        min_pln, max_pln = SalaryService.calculate_pln_amounts(
-            salary_range.salary_min_usd, salary_range.salary_max_usd
-        )
-        min_eur, max_eur = SalaryService.calculate_eur_amounts(
-            salary_range.salary_min_usd, salary_range.salary_max_usd
+        from logic.finance.rate_snapshot import get_rate_snapshot, SALARY_CURRENCY_FIELDS
+        
+        amounts = get_rate_snapshot().salary_amounts(salary_range.salary_min_usd, salary_range.salary_max_usd)
+        for field, value in amounts.items():
+            setattr(salary_range, field, value)
+        
+        salary_range.save(update_fields=list(SALARY_CURRENCY_FIELDS))
+    
+    @staticmethod
+    def recalculate_all_currency_amounts(snapshot=None, batch_size: int = 500) -> Dict[str, Any]:
+        """
+        Пересчитывает суммы в других валютах для всех зарплатных вилок пакетно
+        
+        Курсы и налоги читаются один раз (RateSnapshot), вилки - одним запросом
+        только нужных полей, изменившиеся строки записываются через bulk_update.
+        
+        Returns:
+            total, changed_count, load_ms, compute_ms, write_ms, elapsed_ms
+        """
+        import time
+        from apps.finance.models import SalaryRange
+        from logic.finance.rate_snapshot import RateSnapshot, SALARY_CURRENCY_FIELDS
+        
+        started = time.monotonic()
+        snapshot = snapshot or RateSnapshot.load()
+        salary_ranges = list(
+            SalaryRange.objects.order_by().only('id', 'salary_min_usd', 'salary_max_usd', *SALARY_CURRENCY_FIELDS)
         )
+        loaded = time.monotonic()
         
-        salary_range.salary_min_byn = min_byn
-        salary_range.salary_max_byn = max_byn
-        salary_range.salary_min_pln = min_pln
-        salary_range.salary_max_pln = max_pln
-        salary_range.salary_min_eur = min_eur
-        salary_range.salary_max_eur = max_eur
+        changed = []
+        for salary_range in salary_ranges:
+            amounts = snapshot.salary_amounts(salary_range.salary_min_usd, salary_range.salary_max_usd)
+            if any(getattr(salary_range, field) != value for field, value in amounts.items()):
+                for field, value in amounts.items():
+                    setattr(salary_range, field, value)
+                changed.append(salary_range)
+        computed = time.monotonic()
         
-        salary_range.save(update_fields=['salary_min_byn', 'salary_max_byn', 'salary_min_pln', 'salary_max_pln', 'salary_min_eur', 'salary_max_eur'])
+        if changed:
+            with transaction.atomic():
+                SalaryRange.objects.bulk_update(changed, SALARY_CURRENCY_FIELDS, batch_size=batch_size)
+        finished = time.monotonic()
+        
+        return {
+            "total": len(salary_ranges),
+            "changed_count": len(changed),
+            "load_ms": round((loaded - started) * 1000, 1),
+            "compute_ms": round((computed - loaded) * 1000, 1),
+            "write_ms": round((finished - computed) * 1000, 1),
+            "elapsed_ms": round((finished - started) * 1000, 1),
+        }
     
     @staticmethod
     def update_all_salary_currency_amounts():
         """Обновляет суммы в других валютах для всех зарплатных вилок"""
         try:
-            # Импортируем модель только при необходимости
-            from apps.finance.models import SalaryRange
-            
-            updated_count = 0
-            for salary_range in SalaryRange.objects.all():
-                try:
-                    SalaryService.update_salary_range_currency_amounts(salary_range)
-                    updated_count += 1
-                except Exception as e:
-                    print(f"Ошибка при обновлении вилки {salary_range.id}: {e}")
-            
-            return {"updated_count": updated_count}
-            
-        except Exception:
+            result = SalaryService.recalculate_all_currency_amounts()
+            return {"updated_count": result["total"], **result}
+        except Exception as e:
+            print(f"Ошибка при пересчете зарплатных вилок: {e}")
             return {"updated_count": 0}
     
     @staticmethod
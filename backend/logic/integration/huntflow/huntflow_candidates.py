@@ -1,5 +1,6 @@
 """Сервис для работы с кандидатами Huntflow с использованием shared модулей"""
 from logic.base.api_client import BaseAPIClient
+from logic.base.http_pool import http_pool
 from logic.base.response_handler import UnifiedResponseHandler
 from logic.integration.shared.candidate_operations import BaseCandidateOperations
 from logic.integration.shared.comment_operations import BaseCommentOperations
@@ -28,10 +29,12 @@ class HuntflowCandidateService(BaseAPIClient, BaseCandidateOperations, BaseComme
         ИСТОЧНИКИ ДАННЫЕ: Пользовательские данные
         ОБРАБОТКА: Настройка подключения к Huntflow API
         ВЫХОДЯЩИЕ ДАННЫЕ: Инициализированный сервис
-        СВЯЗИ: BaseAPIClient, HuntflowService
+        СВЯЗИ: BaseAPIClient, HuntflowService, http_pool
         ФОРМАТ: Экземпляр HuntflowCandidateService
         """
         super().__init__("", "https://api.huntflow.ru/v2", timeout=30)
+        # Соединения берем из общего keep-alive пула, заголовки остаются у сессии
+        http_pool.mount(self.session, self.base_url)
         self.user = user
         self.huntflow_service = HuntflowService(user)
         self._setup_auth()
@@ -10,6 +10,7 @@ import json
 from logic.utilities.context_helpers import ContextHelper
 from logic.base.response_handler import UnifiedResponseHandler
 from apps.huntflow.services import HuntflowService
+from apps.huntflow.accounts_cache import HuntflowAccountsCache
 
 
 def get_correct_account_id(user, fallback_account_id=None):
@@ -17,19 +18,18 @@ def get_correct_account_id(user, fallback_account_id=None):
     Получает правильный account_id пользователя из Huntflow API
     
     ВХОДЯЩИЕ ДАННЫЕ: user (пользователь), fallback_account_id (строка)
-    ИСТОЧНИКИ ДАННЫЕ: HuntflowService, Huntflow API
-    ОБРАБОТКА: Получение account_id из API или использование fallback
+    ИСТОЧНИКИ ДАННЫЕ: HuntflowAccountsCache
+    ОБРАБОТКА: Получение account_id из кэша организаций или использование fallback
     ВЫХОДЯЩИЕ ДАННЫЕ: Правильный account_id
-    СВЯЗИ: HuntflowService
+    СВЯЗИ: HuntflowAccountsCache
     ФОРМАТ: Строка с account_id
     """
     try:
-        huntflow_service = HuntflowService(user)
-        accounts = huntflow_service.get_accounts()
+        accounts = HuntflowAccountsCache.get_accounts(user)
         
         if accounts and 'items' in accounts and accounts['items']:
             account_id = accounts['items'][0]['id']
-            print(f"🔍 Получен account_id из API: {account_id}")
+            print(f"🔍 Получен account_id: {account_id}")
             return account_id
         else:
             print(f"⚠️ Не удалось получить account_id из API, используем fallback: {fallback_account_id}")
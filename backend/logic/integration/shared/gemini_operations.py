@@ -1,6 +1,7 @@
 """Базовые операции с Gemini AI для всех интеграций"""
 from logic.base.response_handler import UnifiedResponseHandler
 from logic.base.api_client import BaseAPIClient
+from apps.gemini.logic.response_cache import cached_generate
 import json
 
 class BaseGeminiOperations(BaseAPIClient):
@@ -45,6 +46,25 @@ class BaseGeminiOperations(BaseAPIClient):
                 'Content-Type': 'application/json'
             })
     
+    def _generate_content(self, endpoint, request_data):
+        """
+        Запрос generateContent через кэш ответов одинаковых запросов
+        
+        ВХОДЯЩИЕ ДАННЫЕ: endpoint (строка вида v1beta/models/<модель>:generateContent), request_data (словарь)
+        ИСТОЧНИКИ ДАННЫЕ: Кэш ответов Gemini, Gemini API
+        ОБРАБОТКА: Ответ из кэша по хэшу модели и тела запроса, иначе POST запрос
+        ВЫХОДЯЩИЕ ДАННЫЕ: Ответ Gemini API
+        СВЯЗИ: apps.gemini.logic.response_cache.cached_generate, BaseAPIClient.post()
+        ФОРМАТ: Словарь с ключами success, data, error
+        """
+        def send():
+            response = self.post(endpoint, data=request_data)
+            data = response.data if isinstance(response.data, dict) else {}
+            return response.success, data, response.error
+        
+        success, data, error = cached_generate(endpoint.rsplit(':', 1)[0], request_data, send)
+        return {'success': success, 'data': data, 'error': error}
+    
     def test_connection(self):
         """
         Тест подключения к Gemini API
@@ -90,7 +110,7 @@ class BaseGeminiOperations(BaseAPIClient):
                 }
             }
             
-            response = self.post("v1beta/models/gemini-pro:generateContent", json=analysis_request)
+            response = self._generate_content("v1beta/models/gemini-pro:generateContent", analysis_request)
             
             if response.get('success'):
                 # Извлекаем результат анализа
@@ -143,7 +163,7 @@ class BaseGeminiOperations(BaseAPIClient):
                 }
             }
             
-            response = self.post("v1beta/models/gemini-pro:generateContent", json=prompt_request)
+            response = self._generate_content("v1beta/models/gemini-pro:generateContent", prompt_request)
             
             if response.get('success'):
                 # Извлекаем результат анализа
@@ -172,6 +172,9 @@ class MigrationMonitor:
             
             overall_healthy = cpu_ok and memory_ok and disk_ok
             
+            # Переиспользование соединений общего HTTP пула
+            from logic.base.http_pool import get_pool_stats
+            
             return {
                 'status': 'healthy' if overall_healthy else 'degraded',
                 'cpu_percent': cpu_percent,
@@ -180,6 +183,7 @@ class MigrationMonitor:
                 'cpu_ok': cpu_ok,
                 'memory_ok': memory_ok,
                 'disk_ok': disk_ok,
+                'http_pool': get_pool_stats(),
                 'message': f'Performance check: CPU {cpu_percent}%, Memory {memory.percent}%, Disk {disk.percent}%'
             }
         except Exception as e:
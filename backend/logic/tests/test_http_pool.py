@@ -0,0 +1,70 @@
+"""Тесты для общего пула HTTP соединений"""
+import threading
+import sys
+import os
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import requests
+from logic.tests.test_base import BaseTestCase
+from logic.base.http_pool import HTTPPoolRegistry, get_pool_stats, http_pool
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    """Локальный keep-alive сервер для проверки переиспользования соединений"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHTTPPool(BaseTestCase):
+    """Тесты для HTTPPoolRegistry"""
+
+    def setUp(self):
+        super().setUp()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _KeepAliveHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/ping"
+        self.registry = HTTPPoolRegistry()
+        http_pool.reset_stats()
+
+    def tearDown(self):
+        self.registry.close()
+        self.server.shutdown()
+        self.server.server_close()
+        super().tearDown()
+
+    def test_connection_reused_between_requests(self):
+        """Последовательные запросы к одному хосту используют одно соединение"""
+        for _ in range(5):
+            response = self.registry.request('GET', self.url, timeout=5)
+            self.assertEqual(response.json(), {'ok': True})
+
+        stats = get_pool_stats(self.url)
+        self.assertEqual(stats['requests'], 5)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 4)
+
+    def test_adapter_shared_per_host(self):
+        """Для одного хоста используется один адаптер"""
+        first = self.registry.get_adapter(self.url)
+        second = self.registry.get_adapter(self.url.replace('/ping', '/other'))
+        self.assertIs(first, second)
+
+    def test_mount_keeps_session_headers(self):
+        """Подключение пула к сессии не затирает ее заголовки"""
+        session = requests.Session()
+        session.headers['Authorization'] = 'Bearer test'
+        self.registry.mount(session, self.url)
+
+        self.assertIs(session.get_adapter(self.url), self.registry.get_adapter(self.url))
+        self.assertEqual(session.headers['Authorization'], 'Bearer test')
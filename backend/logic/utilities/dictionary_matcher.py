@@ -0,0 +1,123 @@
+"""
+Поиск вхождений ключей словаря в тексте (автомат Ахо-Корасик)
+
+Словари опечаток месяцев и дней недели содержат тысячи вариантов, списки
+стоп-слов фильтра вакансий - сотни, поэтому проверка "есть ли ключ в тексте"
+перебором словаря стоит O(размер словаря × длина текста). Автомат строится
+один раз на словарь и находит все вхождения за один проход по тексту.
+
+Используется: EnhancedDateTimeParser (google_oauth), VacancyFilter (finance)
+"""
+
+from collections import deque
+from typing import Any, Dict, List, NamedTuple, Optional
+
+
+class DictionaryMatch(NamedTuple):
+    start: int
+    end: int
+    key: str
+    value: Any
+
+    @property
+    def length(self) -> int:
+        return self.end - self.start
+
+
+class DictionaryMatcher:
+    """Автомат Ахо-Корасик по ключам словаря"""
+
+    _cache: Dict[int, Any] = {}
+
+    def __init__(self, dictionary: Dict[str, Any]):
+        self.dictionary = dictionary
+
+        # Узел автомата: переходы, суффиксная ссылка, ключ (если узел - конец слова)
+        # и ссылка на ближайший по суффиксным ссылкам узел с ключом
+        self._goto: List[Dict[str, int]] = [{}]
+        self._key: List[Optional[str]] = [None]
+
+        for key in dictionary:
+            if not key:
+                continue
+            node = 0
+            for char in key:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._key.append(None)
+                node = next_node
+            self._key[node] = key
+
+        self._fail = [0] * len(self._goto)
+        self._output = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail_child = self._goto[fail].get(char, 0)
+                self._fail[child] = fail_child if fail_child != child else 0
+                target = self._fail[child]
+                self._output[child] = target if self._key[target] is not None else self._output[target]
+                queue.append(child)
+
+    @classmethod
+    def for_dictionary(cls, dictionary: Dict[str, Any]) -> 'DictionaryMatcher':
+        """Автомат для словаря, построенный один раз на процесс"""
+        cached = cls._cache.get(id(dictionary))
+        if cached is None or cached.dictionary is not dictionary:
+            cached = cls(dictionary)
+            cls._cache[id(dictionary)] = cached
+        return cached
+
+    def __len__(self):
+        return len(self._goto)
+
+    def find_all(self, text: str) -> List[DictionaryMatch]:
+        """Все вхождения ключей словаря в текст (в порядке окончания)"""
+        matches = []
+        goto, fail, keys, output = self._goto, self._fail, self._key, self._output
+        dictionary = self.dictionary
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+
+            match_node = node if keys[node] is not None else output[node]
+            while match_node:
+                key = keys[match_node]
+                end = position + 1
+                matches.append(DictionaryMatch(end - len(key), end, key, dictionary[key]))
+                match_node = output[match_node]
+        return matches
+
+    def search(self, text: str) -> Optional[DictionaryMatch]:
+        """Первое вхождение (по позиции окончания), без поиска остальных"""
+        goto, fail, keys, output = self._goto, self._fail, self._key, self._output
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+
+            match_node = node if keys[node] is not None else output[node]
+            if match_node:
+                key = keys[match_node]
+                return DictionaryMatch(position + 1 - len(key), position + 1, key, self.dictionary[key])
+        return None
+
+    def longest(self, text: str) -> Optional[DictionaryMatch]:
+        """Самое длинное вхождение (при равной длине - самое левое)"""
+        best = None
+        for match in self.find_all(text):
+            if best is None or match.length > best.length or (
+                match.length == best.length and match.start < best.start
+            ):
+                best = match
+        return best
@@ -0,0 +1,87 @@
+"""
+Копия данных в памяти процесса с версией в общем кэше
+
+Для данных, которые дорого загружать и которые редко меняются (снимок курсов
+валют, порядок грейдов, индекс сопоставления вакансий). Каждый процесс держит
+свою копию и сверяет ее с версией в кэше; invalidate() сбрасывает копию в этом
+процессе и увеличивает версию для остальных. Если кэш недоступен, версия не
+читается, поэтому копия все равно перестраивается не реже, чем раз в max_age секунд.
+
+Сброс из сигналов - invalidate_on_commit(): версия увеличивается после коммита,
+иначе параллельный процесс успеет перечитать старые строки и сохранит их под
+новой версией.
+
+Используется: get_rate_snapshot (logic/finance), get_grade_order и
+get_matcher_index (finance)
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Generic, Optional, Tuple, TypeVar
+
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Страховка на случай недоступного кэша: копия не живет дольше (секунды)
+DEFAULT_MAX_AGE = 600
+
+
+class VersionedLocalCache(Generic[T]):
+    """
+    Результат builder() в памяти процесса
+
+    Пример:
+        _rates = VersionedLocalCache('rates_version', RateSnapshot.load, description='снимка курсов')
+        snapshot = _rates.get()
+    """
+
+    def __init__(self, version_key: str, builder: Callable[[], T], max_age: float = DEFAULT_MAX_AGE,
+                 description: str = 'локальной копии'):
+        self.version_key = version_key
+        self.builder = builder
+        self.max_age = max_age
+        self.description = description
+        # (значение, версия, время построения) - заменяется целиком, читается без блокировки
+        self._entry: Optional[Tuple[T, int, float]] = None
+        self._lock = threading.Lock()
+
+    def _get_version(self) -> int:
+        try:
+            return cache.get(self.version_key) or 1
+        except Exception:
+            return 1
+
+    def _is_fresh(self, entry: Optional[Tuple[T, int, float]], version: int) -> bool:
+        return entry is not None and entry[1] == version and time.monotonic() - entry[2] < self.max_age
+
+    def get(self) -> T:
+        """Копия текущего процесса; строится заново после смены версии или через max_age"""
+        version = self._get_version()
+        entry = self._entry
+        if self._is_fresh(entry, version):
+            return entry[0]
+
+        with self._lock:
+            entry = self._entry
+            if not self._is_fresh(entry, version):
+                entry = (self.builder(), version, time.monotonic())
+                self._entry = entry
+            return entry[0]
+
+    def invalidate(self):
+        """Сбрасывает копию в этом процессе и увеличивает версию для остальных"""
+        self._entry = None
+        try:
+            if not cache.add(self.version_key, 2, None):
+                cache.incr(self.version_key)
+        except Exception as e:
+            logger.warning(f"Не удалось обновить версию {self.description}: {e}")
+
+    def invalidate_on_commit(self):
+        """invalidate() после коммита текущей транзакции (сразу, если транзакции нет)"""
+        transaction.on_commit(self.invalidate)